@@ -0,0 +1,47 @@
+/*
+ * PARAMS.h
+ *
+ *  Indexed parameter table (modes, servo setpoints, controller gains)
+ *  with read-back, see PARAMS.c and params.py on the PC.
+ */
+
+#ifndef INC_PARAMS_H_
+#define INC_PARAMS_H_
+
+#include <stdint.h>
+
+// Table indices (the host addresses parameters by index).
+typedef enum {
+    PARAM_MOD,  // Control mode (ControlMode_t)
+    PARAM_SRU,  // Servo setpoints [deg]
+    PARAM_STR,
+    PARAM_STW,
+    PARAM_SEX,
+    PARAM_KPR,  // Roll PI gains
+    PARAM_KIR,
+    PARAM_KPY,  // Yaw PI gains
+    PARAM_KIY,
+    PARAM_COUNT
+} ParamIndex_t;
+
+typedef struct {
+    const char *key;    // Legacy "KEY:value" command name
+    float min;
+    float max;
+    float default_value;
+} ParamInfo_t;
+
+// Error codes of "PER:<code>" replies.
+#define PARAM_ERR_SYNTAX  1
+#define PARAM_ERR_INDEX   2
+#define PARAM_ERR_RANGE   3
+
+// Sends one reply line (without CRLF).
+typedef void (*ParamReply_t)(const char *line);
+
+void     params_init(void);
+float    params_get(ParamIndex_t index);
+uint16_t params_version(void);
+int      params_handle(const char *key, const char *arg, ParamReply_t reply);
+
+#endif /* INC_PARAMS_H_ */
@@ -0,0 +1,57 @@
+/*
+ * RUDDER_LUT.h
+ *
+ *  Generated by rudder_LUT.py (header subcommand), do not edit.
+ *  Servo angle for a rudder angle (degrees), with non-uniform breakpoints
+ *  placed so that linear interpolation stays within RUDDER_LUT_MAX_ERROR
+ *  of the exact rudder angle. Checked by STM32/Tests/test_rudder_lut.c.
+ *
+ *  Lookup: 3 binary search steps and one division, 72 bytes of tables.
+ */
+
+#ifndef INC_RUDDER_LUT_H_
+#define INC_RUDDER_LUT_H_
+
+#define RUDDER_LUT_POINTS      9
+#define RUDDER_LUT_MIN_ANGLE   -35.00F
+#define RUDDER_LUT_MAX_ANGLE   35.00F
+#define RUDDER_LUT_MAX_ERROR   0.0997F   // Degrees of rudder
+
+// Linkage the table was generated for (mm, degrees).
+#define RUDDER_LUT_SERVO_ARM   -21.00
+#define RUDDER_LUT_PUSHROD     200.00
+#define RUDDER_LUT_RUDDER_ARM  30.00
+#define RUDDER_LUT_OFFSET      -90.00
+#define RUDDER_LUT_SERVO_MIN   10.00
+#define RUDDER_LUT_SERVO_MAX   170.00
+
+static const float rudder_lut_mech[RUDDER_LUT_POINTS] = {
+    -35.0000F, -32.6500F, -27.5500F, -20.0500F, 0.0000F, 12.4500F, 21.7500F, 29.2000F, 35.0000F
+};
+
+static const float rudder_lut_servo[RUDDER_LUT_POINTS] = {
+    160.0615F, 155.4125F, 146.6680F, 135.3803F, 107.6144F, 89.8895F, 75.6056F, 63.0101F, 51.9791F
+};
+
+// Servo angle for a rudder angle, saturated to the table's range.
+static inline float rudder_lut_servo_angle(float mech_angle) {
+    if (mech_angle <= rudder_lut_mech[0]) {
+        return rudder_lut_servo[0];
+    }
+    if (mech_angle >= rudder_lut_mech[RUDDER_LUT_POINTS - 1]) {
+        return rudder_lut_servo[RUDDER_LUT_POINTS - 1];
+    }
+    int low = 0, high = RUDDER_LUT_POINTS - 1;
+    while (high - low > 1) {
+        int mid = (low + high) / 2;
+        if (mech_angle < rudder_lut_mech[mid]) {
+            high = mid;
+        } else {
+            low = mid;
+        }
+    }
+    float t = (mech_angle - rudder_lut_mech[low]) / (rudder_lut_mech[high] - rudder_lut_mech[low]);
+    return rudder_lut_servo[low] + t * (rudder_lut_servo[high] - rudder_lut_servo[low]);
+}
+
+#endif /* INC_RUDDER_LUT_H_ */
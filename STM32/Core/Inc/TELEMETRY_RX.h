@@ -0,0 +1,22 @@
+/*
+ * TELEMETRY_RX.h
+ *
+ *  Receive path of the telemetry task: circular UART DMA and line
+ *  assembly, see TELEMETRY_RX.c.
+ */
+
+#ifndef INC_TELEMETRY_RX_H_
+#define INC_TELEMETRY_RX_H_
+
+#include <stdint.h>
+#include "stm32f4xx_hal.h"
+
+// Holds a parameter batch arriving between two task runs.
+#define RX_BUFFER_SIZE  256
+#define RX_LINE_SIZE    128
+
+void     rx_init(UART_HandleTypeDef *huart);  // (Re)start the circular RX DMA
+char    *rx_line(void);                       // Next complete line without CRLF, or NULL
+uint32_t rx_restarts(void);
+
+#endif /* INC_TELEMETRY_RX_H_ */
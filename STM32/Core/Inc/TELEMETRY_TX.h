@@ -0,0 +1,28 @@
+/*
+ * TELEMETRY_TX.h
+ *
+ *  Double-buffered, DMA-driven transmit path of the telemetry task,
+ *  see TELEMETRY_TX.c.
+ */
+
+#ifndef INC_TELEMETRY_TX_H_
+#define INC_TELEMETRY_TX_H_
+
+#include <stdint.h>
+#include "stm32f4xx_hal.h"
+
+// Largest frame one task run can queue: heartbeat, keyframe, every group
+// with its sequence line and a full parameter read-back.
+#define TX_FRAME_SIZE  768
+
+void     tx_init(UART_HandleTypeDef *huart);
+void     tx_value(const char *key, float value);  // "KEY:%.2f\r\n"
+void     tx_line(const char *line);               // line + "\r\n"
+void     tx_flush(void);
+int      tx_idle(void);
+int      tx_pending(void);
+uint32_t tx_dropped(void);
+
+int      format_fixed2(char *out, float value);
+
+#endif /* INC_TELEMETRY_TX_H_ */
@@ -0,0 +1,180 @@
+/*
+ * PARAMS.c
+ *
+ *  Indexed parameter table with read-back. Values travel as the hex bits
+ *  of the IEEE-754 float, so what the host reads back is exactly what the
+ *  controller uses:
+ *
+ *    PGA:0                     -> PRM:<i>=<hex> for every parameter, PVR:<version>
+ *    PGT:<i>                   -> PRM:<i>=<hex>, PVR:<version>
+ *    PST:<i>=<hex>[,<i>=<hex>] -> PRM:<i>=<hex> per parameter set, PVR:<version>
+ *    <KEY>:<decimal>           -> same as PST for one parameter (older hosts)
+ *
+ *  A batch is checked as a whole and applied only if every entry is valid;
+ *  otherwise the answer is PER:<code> and nothing changes. The version
+ *  counts applied changes, so the host can tell when its copy is stale.
+ *
+ *  No HAL here: the parser is compiled and tested on the PC as well
+ *  (STM32/Tests/test_params.c).
+ */
+
+#include "PARAMS.h"
+#include <stdio.h>
+#include <string.h>
+#include <stdlib.h>
+
+#define PARAM_LINE_SIZE  32
+
+static const ParamInfo_t param_info[PARAM_COUNT] = {
+    [PARAM_MOD] = {"MOD", -79.0f, 4.0f, 0.0f},    // MODE_RESET .. MODE_AUTO_4
+    [PARAM_SRU] = {"SRU", -35.0f, 35.0f, 0.0f},   // RUDDER_MIN/MAX_ANGLE
+    [PARAM_STR] = {"STR", 0.0f, 90.0f, 0.0f},     // TRIM_MIN/MAX_ANGLE
+    [PARAM_STW] = {"STW", 0.0f, 30.0f, 0.0f},     // TWIST_MIN/MAX_ANGLE
+    [PARAM_SEX] = {"SEX", 0.0f, 180.0f, 0.0f},    // EXTRA_MIN/MAX_ANGLE
+    [PARAM_KPR] = {"KPR", 0.0f, 100.0f, 1.0f},
+    [PARAM_KIR] = {"KIR", 0.0f, 100.0f, 0.1f},
+    [PARAM_KPY] = {"KPY", 0.0f, 100.0f, 1.0f},
+    [PARAM_KIY] = {"KIY", 0.0f, 100.0f, 1.0f},
+};
+
+static float param_value[PARAM_COUNT];
+static uint16_t version = 0;
+
+void params_init(void) {
+    for (int i = 0; i < PARAM_COUNT; i++) {
+        param_value[i] = param_info[i].default_value;
+    }
+    version = 0;
+}
+
+float params_get(ParamIndex_t index) {
+    return param_value[index];
+}
+
+uint16_t params_version(void) {
+    return version;
+}
+
+static uint32_t float_bits(float value) {
+    uint32_t bits;
+    memcpy(&bits, &value, sizeof(bits));
+    return bits;
+}
+
+static float bits_float(uint32_t bits) {
+    float value;
+    memcpy(&value, &bits, sizeof(value));
+    return value;
+}
+
+static int in_range(int index, float value) {
+    // Also false for NaN.
+    return value >= param_info[index].min && value <= param_info[index].max;
+}
+
+static void reply_value(int index, ParamReply_t reply) {
+    char line[PARAM_LINE_SIZE];
+    snprintf(line, sizeof(line), "PRM:%d=%08lX", index, (unsigned long)float_bits(param_value[index]));
+    reply(line);
+}
+
+static void reply_version(ParamReply_t reply) {
+    char line[PARAM_LINE_SIZE];
+    snprintf(line, sizeof(line), "PVR:%u", (unsigned)version);
+    reply(line);
+}
+
+static void reply_error(int code, ParamReply_t reply) {
+    char line[PARAM_LINE_SIZE];
+    snprintf(line, sizeof(line), "PER:%d", code);
+    reply(line);
+}
+
+// Parses a decimal index; returns -1 unless `text` up to `*end` is one.
+static int parse_index(const char *text, char **end) {
+    if (*text < '0' || *text > '9') return -1;
+    unsigned long index = strtoul(text, end, 10);
+    return index < PARAM_COUNT ? (int)index : -2;
+}
+
+// "<i>=<hex>[,<i>=<hex>...]": all checked before anything is applied.
+static int params_set_batch(const char *arg, ParamReply_t reply) {
+    int indices[PARAM_COUNT];
+    float values[PARAM_COUNT];
+    int count = 0;
+    const char *p = arg;
+    while (1) {
+        char *end;
+        int index = parse_index(p, &end);
+        if (index == -1 || *end != '=') return PARAM_ERR_SYNTAX;
+        if (index == -2) return PARAM_ERR_INDEX;
+        p = end + 1;
+        if (!((*p >= '0' && *p <= '9') || (*p >= 'A' && *p <= 'F') || (*p >= 'a' && *p <= 'f'))) {
+            return PARAM_ERR_SYNTAX;
+        }
+        uint32_t bits = strtoul(p, &end, 16);
+        if (end - p > 8 || (*end != ',' && *end != '\0')) return PARAM_ERR_SYNTAX;
+        if (count == PARAM_COUNT) return PARAM_ERR_SYNTAX;  // More entries than parameters
+        values[count] = bits_float(bits);
+        if (!in_range(index, values[count])) return PARAM_ERR_RANGE;
+        indices[count++] = index;
+        if (*end == '\0') break;
+        p = end + 1;
+    }
+    for (int i = 0; i < count; i++) {
+        param_value[indices[i]] = values[i];
+    }
+    version++;
+    for (int i = 0; i < count; i++) {
+        reply_value(indices[i], reply);
+    }
+    reply_version(reply);
+    return 0;
+}
+
+// Returns 1 if `key` is a parameter command (answered through `reply`).
+int params_handle(const char *key, const char *arg, ParamReply_t reply) {
+    if (strcmp(key, "PGA") == 0) {
+        for (int i = 0; i < PARAM_COUNT; i++) {
+            reply_value(i, reply);
+        }
+        reply_version(reply);
+        return 1;
+    }
+    if (strcmp(key, "PGT") == 0) {
+        char *end;
+        int index = parse_index(arg, &end);
+        if (index == -1 || *end != '\0') {
+            reply_error(PARAM_ERR_SYNTAX, reply);
+        } else if (index == -2) {
+            reply_error(PARAM_ERR_INDEX, reply);
+        } else {
+            reply_value(index, reply);
+            reply_version(reply);
+        }
+        return 1;
+    }
+    if (strcmp(key, "PST") == 0) {
+        int error = params_set_batch(arg, reply);
+        if (error) reply_error(error, reply);
+        return 1;
+    }
+    for (int i = 0; i < PARAM_COUNT; i++) {
+        if (strcmp(key, param_info[i].key) == 0) {
+            char *end;
+            float value = strtof(arg, &end);
+            if (end == arg) {
+                reply_error(PARAM_ERR_SYNTAX, reply);
+            } else if (!in_range(i, value)) {
+                reply_error(PARAM_ERR_RANGE, reply);
+            } else {
+                param_value[i] = value;
+                version++;
+                reply_value(i, reply);
+                reply_version(reply);
+            }
+            return 1;
+        }
+    }
+    return 0;
+}
@@ -9,9 +9,13 @@
 #include "cmsis_os.h"
 #include "ANALOG.h"
 #include "IMU.h"
+#include "PARAMS.h"
+#include "TELEMETRY_TX.h"
+#include "TELEMETRY_RX.h"
 #include <stdio.h>
 #include <string.h>
 #include <stdlib.h>
+#include <math.h>
 #include "usart.h"
 
 // Queue externs
@@ -27,18 +31,6 @@ ImuData_t     imuDataReceived;
 RadioData_t   radioDataReceived;
 ControlData_t controlDataReceived;
 
-// DMA RX circular buffer
-#define RX_BUFFER_SIZE 32
-static char uartRxBuffer[RX_BUFFER_SIZE] = {0};
-
-#define TX_BUFFER_SIZE 32
-static char uartTxBuffer[TX_BUFFER_SIZE];  // TX buffer
-
-#define TEMP_BUFFER_SIZE 64
-static char tempBuffer[TEMP_BUFFER_SIZE];
-static uint16_t tempIndex = 0;
-static uint16_t last_read_index = 0;
-
 // Prescalers
 #define ADC_PRESCALER      5
 #define IMU_PRESCALER      1
@@ -46,170 +38,375 @@ static uint16_t last_read_index = 0;
 #define CONTROL_PRESCALER  2
 #define CPU_PRESCALER      5
 
-TelemetryData_t telemetryData = {
-    .mode = MODE_DIRECT_INPUT,
-    .rudder_servo_angle = 0.0f,
-    .trim_servo_angle   = 0.0f,
-    .twist_servo_angle  = 0.0f,
-    .extra_servo_angle  = 0.0f,
-
-    .Kp_roll = 1.0f,
-    .Ki_roll = 0.1f,
-    .Kp_yaw  = 1.0f,
-    .Ki_yaw  = 1.0f
+// Subscription: bit i enables the i-th key in transmit order
+// (DIR BAT EX1 EX2 | ROL PIT YAW ACX ACY ACZ GYX GYY GYZ SPE | RW1..RW4 |
+//  RUD TWI TRI | CPU, see protocol.py on the PC). "SUB:<mask>\r\n" replaces
+// it; the bandwidth freed by unsubscribed keys speeds up the groups.
+#define SUB_ALL                    0x003FFFFFUL
+#define TELEMETRY_BYTES_PER_VALUE  12   // Typical "KEY:-12.34\r\n" line
+#define TELEMETRY_LOAD_PERCENT     80   // Share of the link the stream may use
+#define HEARTBEAT_BYTES            4
+#define PRESCALER_LCM              60   // Multiple of every prescaler (1..5)
+
+typedef enum { GROUP_ADC, GROUP_IMU, GROUP_RADIO, GROUP_CONTROL, GROUP_CPU, GROUP_COUNT } TelemetryGroup_t;
+
+static const uint8_t base_prescaler[GROUP_COUNT] = {
+    ADC_PRESCALER, IMU_PRESCALER, RADIO_PRESCALER, CONTROL_PRESCALER, CPU_PRESCALER
+};
+static const uint32_t group_bits[GROUP_COUNT] = {
+    0x0000000FUL, 0x00003FF0UL, 0x0003C000UL, 0x001C0000UL, 0x00200000UL
+};
+static uint8_t prescaler[GROUP_COUNT] = {
+    ADC_PRESCALER, IMU_PRESCALER, RADIO_PRESCALER, CONTROL_PRESCALER, CPU_PRESCALER
+};
+static uint32_t subscription = SUB_ALL;
+
+// Each group transmission starts with its sequence number ("SQx:<n>",
+// counting modulo SEQUENCE_MOD) so the host can count lost frames. "PNG:<n>"
+// from the host is echoed for round-trip measurements.
+#define SEQUENCE_MOD  1000
+static const char *sequence_key[GROUP_COUNT] = {"SQA", "SQI", "SQR", "SQC", "SQP"};
+static uint16_t sequence[GROUP_COUNT];
+
+extern int TASK_DELAY;
+
+// Change-only encoding ("ENC:1", echoed): a subscribed value is only sent
+// when it moved at least its deadband since it was last sent; the host
+// holds the last value meanwhile. Every KEYFRAME_TICKS task runs a
+// "KF:<n>" line starts a keyframe: each value is sent once more in full.
+// Deadbands are in signal units, in mask order (see encoding.py).
+#define KEYFRAME_TICKS  50
+static const float deadband[22] = {
+    0.5f, 0.02f, 0.01f, 0.01f,                                      // DIR BAT EX1 EX2
+    0.01f, 0.01f, 0.01f, 0.01f, 0.01f, 0.01f, 0.01f, 0.01f, 0.01f,  // ROL PIT YAW ACX..GYZ
+    0.01f,                                                          // SPE
+    4.0f, 4.0f, 4.0f, 4.0f,                                         // RW1..RW4
+    0.1f, 0.1f, 0.1f,                                               // RUD TWI TRI
+    0.5f                                                            // CPU
 };
+static float last_sent[22];
+static uint8_t change_only = 0;
+static uint32_t keyframe_pending = 0;  // Keys still to be sent in full
+static uint16_t keyframe_ticks = 0;
+static uint32_t keyframe_number = 0;
+
+// Baud-rate negotiation: the host proposes "BDR:<baud>"; we answer
+// "BDA:<baud>" at the current rate (or BDA with the current rate to refuse)
+// and switch. The host checks our heartbeats at the new rate and confirms
+// with "BDC:<baud>", which we echo. Unconfirmed after BAUD_CONFIRM_TICKS
+// task runs, the previous rate is restored.
+#define BAUD_CONFIRM_TICKS  50
+static const uint32_t supported_bauds[] = {115200, 230400, 460800, 921600};
+static uint32_t baud_fallback = 0;      // Rate to restore; 0 once confirmed
+static uint16_t baud_confirm_ticks = 0;
+
+// Filled from the parameter table (PARAMS.c, defaults there) every run.
+TelemetryData_t telemetryData;
+
+// CPU load from the FreeRTOS run-time counters, read with
+// uxTaskGetSystemState() each CPU group run. Every PROFILE_EVERY of them a
+// task profile follows: one "TSK:<name>,<share %>,<stack words free>" line
+// per task, the share being its run time over the profile window.
+#define PROFILE_MAX_TASKS  10   // Task numbers (creation order) kept
+#define PROFILE_EVERY      5
+#define PROFILE_LOAD_LINES 3    // Profile bytes per CPU run, in TELEMETRY_BYTES_PER_VALUE lines
+static TaskStatus_t task_status[PROFILE_MAX_TASKS];
+static uint32_t last_task_runtime[PROFILE_MAX_TASKS];
+static uint32_t profile_task_time[PROFILE_MAX_TASKS];
+static uint32_t last_total_runtime = 0;
+static uint32_t profile_total_time = 0;
+static uint8_t profile_count = 0;
 
 static int telemetry_initialized = 0;
-static char statsBuffer[512];
 
+// Lines are queued for one DMA transfer per task run (TELEMETRY_TX.c).
 static void telemetry_transmit(const char *key, float value) {
-    snprintf(uartTxBuffer, sizeof(uartTxBuffer), "%s:%.2f\r\n", key, value);
-    HAL_UART_Transmit(&huart1, (uint8_t *)uartTxBuffer, strlen(uartTxBuffer), 10);
+    tx_value(key, value);
 }
 
-static void telemetry_start_rx_dma(void) {
-    HAL_UART_Receive_DMA(&huart1, (uint8_t *)uartRxBuffer, RX_BUFFER_SIZE);
+// Sends everything queued at the current rate and waits until it has left.
+static void telemetry_drain(void) {
+    do {
+        tx_flush();
+        while (!tx_idle()) {
+            osDelay(1);
+        }
+    } while (tx_pending());
+}
+
+static void telemetry_load_params(void) {
+    telemetryData.mode               = (ControlMode_t)(int)params_get(PARAM_MOD);
+    telemetryData.rudder_servo_angle = params_get(PARAM_SRU);
+    telemetryData.trim_servo_angle   = params_get(PARAM_STR);
+    telemetryData.twist_servo_angle  = params_get(PARAM_STW);
+    telemetryData.extra_servo_angle  = params_get(PARAM_SEX);
+    telemetryData.Kp_roll            = params_get(PARAM_KPR);
+    telemetryData.Ki_roll            = params_get(PARAM_KIR);
+    telemetryData.Kp_yaw             = params_get(PARAM_KPY);
+    telemetryData.Ki_yaw             = params_get(PARAM_KIY);
+}
+
+// Only sends subscribed keys; `bit` is the key's position in the mask.
+static void telemetry_send(uint8_t bit, const char *key, float value) {
+    uint32_t mask = 1UL << bit;
+    if (!(subscription & mask)) {
+        return;
+    }
+    if (change_only && !(keyframe_pending & mask) && fabsf(value - last_sent[bit]) < deadband[bit]) {
+        return;  // The host holds last_sent
+    }
+    telemetry_transmit(key, value);
+    last_sent[bit] = value;
+    keyframe_pending &= ~mask;
+}
+
+// Sequence number of a group transmission (skipped, like the values, when
+// nothing in the group is subscribed).
+static void telemetry_sequence(TelemetryGroup_t g) {
+    if (subscription & group_bits[g]) {
+        telemetry_transmit(sequence_key[g], (float)sequence[g]);
+        sequence[g] = (sequence[g] + 1) % SEQUENCE_MOD;
+    }
+}
+
+// Speed every group up by the largest common factor (bounded by its base
+// prescaler) that keeps the subscribed values, plus the sequence line of
+// each group and the task profile, within the link budget. Loads are scaled by PRESCALER_LCM to
+// stay in integers.
+static void telemetry_update_rates(void) {
+    uint32_t budget = huart1.Init.BaudRate / 10 * TASK_DELAY / 1000 * TELEMETRY_LOAD_PERCENT / 100;
+    budget = (budget - HEARTBEAT_BYTES) * PRESCALER_LCM;
+    for (uint8_t speedup = CPU_PRESCALER; speedup >= 1; speedup--) {
+        uint32_t load = 0;
+        uint8_t candidate[GROUP_COUNT];
+        for (int g = 0; g < GROUP_COUNT; g++) {
+            candidate[g] = base_prescaler[g] / speedup;
+            if (candidate[g] < 1) candidate[g] = 1;
+            uint32_t lines = __builtin_popcount(subscription & group_bits[g]);
+            if (lines) lines++;  // Sequence number
+            if (lines && g == GROUP_CPU) lines += PROFILE_LOAD_LINES;
+            load += lines * TELEMETRY_BYTES_PER_VALUE * (PRESCALER_LCM / candidate[g]);
+        }
+        if (load <= budget || speedup == 1) {
+            memcpy(prescaler, candidate, sizeof(prescaler));
+            return;
+        }
+    }
+}
+
+static void telemetry_profile_line(const TaskStatus_t *task, float share) {
+    char share_text[16];
+    char line[48];
+    format_fixed2(share_text, share);
+    snprintf(line, sizeof(line), "TSK:%s,%s,%u", task->pcTaskName, share_text,
+             (unsigned)task->usStackHighWaterMark);
+    tx_line(line);
+}
+
+// Run-time deltas since the last call: total load now, task shares every
+// PROFILE_EVERY calls.
+static void telemetry_cpu(void) {
+    uint32_t total_runtime;
+    UBaseType_t count = uxTaskGetSystemState(task_status, PROFILE_MAX_TASKS, &total_runtime);
+    if (count == 0) {
+        return;  // More tasks than PROFILE_MAX_TASKS
+    }
+    uint32_t total_delta = total_runtime - last_total_runtime;
+    int primed = last_total_runtime != 0;
+    last_total_runtime = total_runtime;
+    uint32_t idle_delta = 0;
+    for (UBaseType_t i = 0; i < count; i++) {
+        UBaseType_t number = task_status[i].xTaskNumber;
+        if (number >= PROFILE_MAX_TASKS) continue;
+        uint32_t delta = task_status[i].ulRunTimeCounter - last_task_runtime[number];
+        last_task_runtime[number] = task_status[i].ulRunTimeCounter;
+        profile_task_time[number] += delta;
+        if (strcmp(task_status[i].pcTaskName, "IDLE") == 0) {
+            idle_delta = delta;
+        }
+    }
+    if (!primed || total_delta == 0) {
+        memset(profile_task_time, 0, sizeof(profile_task_time));
+        return;  // First snapshot: deltas would span the whole uptime
+    }
+    profile_total_time += total_delta;
+    telemetry_sequence(GROUP_CPU);
+    telemetry_send(21, "CPU", 100.0f - (idle_delta * 100.0f) / total_delta);
+
+    if (++profile_count >= PROFILE_EVERY) {
+        for (UBaseType_t i = 0; i < count; i++) {
+            UBaseType_t number = task_status[i].xTaskNumber;
+            if (number >= PROFILE_MAX_TASKS) continue;
+            telemetry_profile_line(&task_status[i], profile_task_time[number] * 100.0f / profile_total_time);
+        }
+        memset(profile_task_time, 0, sizeof(profile_task_time));
+        profile_total_time = 0;
+        profile_count = 0;
+    }
+}
+
+static int telemetry_baud_supported(uint32_t baud) {
+    for (size_t i = 0; i < sizeof(supported_bauds) / sizeof(supported_bauds[0]); i++) {
+        if (supported_bauds[i] == baud) return 1;
+    }
+    return 0;
+}
+
+static void telemetry_set_baud(uint32_t baud) {
+    // Let everything queued at the old rate leave, down to the last bit.
+    telemetry_drain();
+    while (__HAL_UART_GET_FLAG(&huart1, UART_FLAG_TC) == RESET) {}
+    HAL_UART_DMAStop(&huart1);
+    huart1.Init.BaudRate = baud;
+    HAL_UART_Init(&huart1);
+    rx_init(&huart1);
+    telemetry_update_rates();
 }
 
 void telemetry(void) {
     if (!telemetry_initialized) {
-        telemetry_start_rx_dma();
+        params_init();
+        tx_init(&huart1);
+        rx_init(&huart1);
         telemetry_initialized = 1;
     }
 
+    // Unconfirmed baud-rate change: give up and go back.
+    if (baud_fallback && --baud_confirm_ticks == 0) {
+        telemetry_set_baud(baud_fallback);
+        baud_fallback = 0;
+    }
+
     // Heartbeat
-    HAL_UART_Transmit(&huart1, (uint8_t *)"OK\r\n", 4, HAL_MAX_DELAY);
+    tx_line("OK");
+
+    if (change_only && ++keyframe_ticks >= KEYFRAME_TICKS) {
+        keyframe_ticks = 0;
+        keyframe_pending = SUB_ALL;
+        telemetry_transmit("KF", (float)(++keyframe_number % 100000));
+    }
 
     // Prescaler counters
     static int adc_count = 0, imu_count = 0, radio_count = 0;
     static int control_count = 0, cpu_count = 0;
 
     // ADC group
-    if (++adc_count >= ADC_PRESCALER) {
+    if (++adc_count >= prescaler[GROUP_ADC]) {
         adc_count = 0;
         if (osMessageQueueGetCount(adcQueueHandle) > 0) {
             osMessageQueueGet(adcQueueHandle, &adcDataReceived, NULL, osWaitForever);
-            telemetry_transmit("DIR", adcDataReceived.windDirection);
-            telemetry_transmit("BAT", adcDataReceived.batteryVoltage);
-            telemetry_transmit("EX1", adcDataReceived.extra1);
-            telemetry_transmit("EX2", adcDataReceived.extra2);
+            telemetry_sequence(GROUP_ADC);
+            telemetry_send(0, "DIR", adcDataReceived.windDirection);
+            telemetry_send(1, "BAT", adcDataReceived.batteryVoltage);
+            telemetry_send(2, "EX1", adcDataReceived.extra1);
+            telemetry_send(3, "EX2", adcDataReceived.extra2);
         }
     }
 
     // IMU group
-    if (++imu_count >= IMU_PRESCALER) {
+    if (++imu_count >= prescaler[GROUP_IMU]) {
         imu_count = 0;
         if (osMessageQueueGetCount(imuQueueHandle) > 0) {
             osMessageQueueGet(imuQueueHandle, &imuDataReceived, NULL, osWaitForever);
-            telemetry_transmit("ROL", imuDataReceived.roll);
-            telemetry_transmit("PIT", imuDataReceived.pitch);
-            telemetry_transmit("YAW", imuDataReceived.yaw);
-            telemetry_transmit("ACX", imuDataReceived.accelX);
-            telemetry_transmit("ACY", imuDataReceived.accelY);
-            telemetry_transmit("ACZ", imuDataReceived.accelZ);
-			telemetry_transmit("GYX", imuDataReceived.gyroX);
-			telemetry_transmit("GYY", imuDataReceived.gyroY);
-			telemetry_transmit("GYZ", imuDataReceived.gyroZ);
+            telemetry_sequence(GROUP_IMU);
+            telemetry_send(4, "ROL", imuDataReceived.roll);
+            telemetry_send(5, "PIT", imuDataReceived.pitch);
+            telemetry_send(6, "YAW", imuDataReceived.yaw);
+            telemetry_send(7, "ACX", imuDataReceived.accelX);
+            telemetry_send(8, "ACY", imuDataReceived.accelY);
+            telemetry_send(9, "ACZ", imuDataReceived.accelZ);
+			telemetry_send(10, "GYX", imuDataReceived.gyroX);
+			telemetry_send(11, "GYY", imuDataReceived.gyroY);
+			telemetry_send(12, "GYZ", imuDataReceived.gyroZ);
 //            telemetry_transmit("MGX", imuDataReceived.magX);
 //            telemetry_transmit("MGY", imuDataReceived.magY);
 //            telemetry_transmit("MGZ", imuDataReceived.magZ);
-            telemetry_transmit("SPE", imuDataReceived.speed);
+            telemetry_send(13, "SPE", imuDataReceived.speed);
         }
     }
 
     // Radio group
-    if (++radio_count >= RADIO_PRESCALER) {
+    if (++radio_count >= prescaler[GROUP_RADIO]) {
         radio_count = 0;
         if (osMessageQueueGetCount(radioQueueHandle) > 0) {
             osMessageQueueGet(radioQueueHandle, &radioDataReceived, NULL, osWaitForever);
-            telemetry_transmit("RW1", (float)radioDataReceived.ch1);
-            telemetry_transmit("RW2", (float)radioDataReceived.ch2);
-            telemetry_transmit("RW3", (float)radioDataReceived.ch3);
-            telemetry_transmit("RW4", (float)radioDataReceived.ch4);
+            telemetry_sequence(GROUP_RADIO);
+            telemetry_send(14, "RW1", (float)radioDataReceived.ch1);
+            telemetry_send(15, "RW2", (float)radioDataReceived.ch2);
+            telemetry_send(16, "RW3", (float)radioDataReceived.ch3);
+            telemetry_send(17, "RW4", (float)radioDataReceived.ch4);
         }
     }
 
     // Control group
-    if (++control_count >= CONTROL_PRESCALER) {
+    if (++control_count >= prescaler[GROUP_CONTROL]) {
         control_count = 0;
         if (osMessageQueueGetCount(controlQueueHandle) > 0) {
             osMessageQueueGet(controlQueueHandle, &controlDataReceived, NULL, osWaitForever);
-            telemetry_transmit("RUD", controlDataReceived.rudder);
-            telemetry_transmit("TWI", controlDataReceived.twist);
-            telemetry_transmit("TRI", controlDataReceived.trim);
+            telemetry_sequence(GROUP_CONTROL);
+            telemetry_send(18, "RUD", controlDataReceived.rudder);
+            telemetry_send(19, "TWI", controlDataReceived.twist);
+            telemetry_send(20, "TRI", controlDataReceived.trim);
 //            telemetry_transmit("CEX", controlDataReceived.extra);
         }
     }
 
-    // CPU usage
-    if (++cpu_count >= CPU_PRESCALER) {
+    // CPU usage and task profile (only while CPU is subscribed)
+    if (++cpu_count >= prescaler[GROUP_CPU]) {
         cpu_count = 0;
-        vTaskGetRunTimeStats(statsBuffer);
-        char *idleEntry = strstr(statsBuffer, "IDLE");
-        if (idleEntry) {
-            unsigned long idleTime = 0, totalTime = 0;
-            sscanf(idleEntry, "IDLE %lu", &idleTime);
-            char *line = strtok(statsBuffer, "\n");
-            while (line) {
-                unsigned long t = 0;
-                sscanf(line, "%*s %lu", &t);
-                totalTime += t;
-                line = strtok(NULL, "\n");
-            }
-            if (totalTime > 0) {
-                float cpuUsage = 100.0f - ((idleTime * 100.0f) / totalTime);
-                telemetry_transmit("CPU", cpuUsage);
-            }
+        if (subscription & group_bits[GROUP_CPU]) {
+            telemetry_cpu();
         }
     }
 
-    // --- Single-pass parsing of incoming commands ---
+    // --- Parsing of incoming commands (TELEMETRY_RX.c) ---
     {
-        uint16_t dma_remaining = __HAL_DMA_GET_COUNTER(huart1.hdmarx);
-        uint16_t current_index = RX_BUFFER_SIZE - dma_remaining;
-        while (last_read_index != current_index) {
-            char ch = uartRxBuffer[last_read_index];
-            last_read_index = (last_read_index + 1) % RX_BUFFER_SIZE;
-            if (tempIndex < TEMP_BUFFER_SIZE - 1) {
-                tempBuffer[tempIndex++] = ch;
-            } else {
-                tempIndex = 0;  // overflow guard
-            }
-
-            if (tempIndex >= 2 &&
-                tempBuffer[tempIndex - 2] == '\r' &&
-                tempBuffer[tempIndex - 1] == '\n') {
-
-                tempBuffer[tempIndex - 2] = '\0';  // chop CRLF
-                char *sep = strchr(tempBuffer, ':');
-                if (sep) {
-                    *sep = '\0';
-                    float val = atof(sep + 1);
-                    if (strcmp(tempBuffer, "MOD") == 0) {
-                        telemetryData.mode = (ControlMode_t)(int)val;
-                    } else if (strcmp(tempBuffer, "SRU") == 0) {
-                        telemetryData.rudder_servo_angle = val;
-                    } else if (strcmp(tempBuffer, "STR") == 0) {
-                        telemetryData.trim_servo_angle = val;
-                    } else if (strcmp(tempBuffer, "STW") == 0) {
-                        telemetryData.twist_servo_angle = val;
-                    } else if (strcmp(tempBuffer, "SEX") == 0) {
-                        telemetryData.extra_servo_angle = val;
-                    } else if (strcmp(tempBuffer, "KPR") == 0) {
-                        telemetryData.Kp_roll = val;
-                    } else if (strcmp(tempBuffer, "KIR") == 0) {
-                        telemetryData.Ki_roll = val;
-                    } else if (strcmp(tempBuffer, "KPY") == 0) {
-                        telemetryData.Kp_yaw = val;
-                    } else if (strcmp(tempBuffer, "KIY") == 0) {
-                        telemetryData.Ki_yaw = val;
+        char *line;
+        while ((line = rx_line()) != NULL) {
+            char *sep = strchr(line, ':');
+            if (sep) {
+                *sep = '\0';
+                float val = atof(sep + 1);
+                if (params_handle(line, sep + 1, tx_line)) {
+                    // Modes, setpoints and gains (PARAMS.c)
+                } else if (strcmp(line, "SUB") == 0) {
+                    subscription = (uint32_t)strtoul(sep + 1, NULL, 10) & SUB_ALL;
+                    keyframe_pending = subscription;  // New keys start with a full value
+                    telemetry_update_rates();
+                    telemetry_transmit("SUB", (float)subscription);  // Acknowledge
+                } else if (strcmp(line, "PNG") == 0) {
+                    telemetry_transmit("PNG", val);
+                } else if (strcmp(line, "ENC") == 0) {
+                    change_only = (val != 0.0f);
+                    keyframe_ticks = KEYFRAME_TICKS - 1;  // Start with a keyframe
+                    telemetry_transmit("ENC", (float)change_only);
+                } else if (strcmp(line, "BDR") == 0) {
+                    uint32_t baud = strtoul(sep + 1, NULL, 10);
+                    if (!baud_fallback && telemetry_baud_supported(baud) &&
+                        baud != huart1.Init.BaudRate) {
+                        uint32_t previous = huart1.Init.BaudRate;
+                        telemetry_transmit("BDA", (float)baud);
+                        telemetry_set_baud(baud);
+                        baud_fallback = previous;
+                        baud_confirm_ticks = BAUD_CONFIRM_TICKS;
+                        break;  // The rest of the buffer came at the old rate
+                    }
+                    telemetry_transmit("BDA", (float)huart1.Init.BaudRate);  // Refused
+                } else if (strcmp(line, "BDC") == 0) {
+                    if (baud_fallback && strtoul(sep + 1, NULL, 10) == huart1.Init.BaudRate) {
+                        baud_fallback = 0;
+                        telemetry_transmit("BDC", (float)huart1.Init.BaudRate);
                     }
                 }
-                tempIndex = 0;
             }
         }
     }
 
+    // One DMA transfer for the whole run (queued behind the previous one if
+    // that is still going out).
+    tx_flush();
+
     // Push the updated telemetry struct once
+    telemetry_load_params();
     osMessageQueuePut(telemetryQueueHandle, &telemetryData, 0, 0);
 }
@@ -0,0 +1,73 @@
+/*
+ * TELEMETRY_RX.c
+ *
+ *  Receive path of the telemetry task. The UART DMA writes into a circular
+ *  buffer; rx_line() consumes it up to the DMA's position and returns the
+ *  commands line by line.
+ *
+ *  With the USART1 interrupt enabled (for the TX DMA), a framing, noise or
+ *  overrun error makes the HAL abort the RX DMA, e.g. on line noise or
+ *  while both ends briefly disagree on the baud rate. The error callback
+ *  restarts it, so the boat keeps accepting commands
+ *  (STM32/Tests/test_telemetry_rx.c).
+ */
+
+#include "TELEMETRY_RX.h"
+#include <string.h>
+
+static UART_HandleTypeDef *rx_uart;
+static char rx_buffer[RX_BUFFER_SIZE];
+static char line_buffer[RX_LINE_SIZE];
+static uint16_t line_length = 0;
+static uint16_t read_index = 0;
+static volatile uint8_t rx_restarted = 0;   // Set by the error callback (interrupt)
+static volatile uint32_t restart_count = 0;
+
+void rx_init(UART_HandleTypeDef *huart) {
+    rx_uart = huart;
+    read_index = 0;
+    line_length = 0;
+    rx_restarted = 0;
+    HAL_UART_Receive_DMA(rx_uart, (uint8_t *)rx_buffer, RX_BUFFER_SIZE);
+}
+
+// Called by HAL_UART_IRQHandler after it aborted a transfer on an error.
+void HAL_UART_ErrorCallback(UART_HandleTypeDef *huart) {
+    if (huart != rx_uart || huart->RxState != HAL_UART_STATE_READY) {
+        return;  // Reception still running (e.g. a TX DMA error)
+    }
+    HAL_UART_Receive_DMA(huart, (uint8_t *)rx_buffer, RX_BUFFER_SIZE);
+    restart_count++;
+    rx_restarted = 1;  // The task starts over at the beginning of the buffer
+}
+
+char *rx_line(void) {
+    if (rx_restarted) {
+        rx_restarted = 0;
+        read_index = 0;
+        line_length = 0;  // The partial line was cut by the error
+    }
+    uint16_t current_index = RX_BUFFER_SIZE - __HAL_DMA_GET_COUNTER(rx_uart->hdmarx);
+    while (read_index != current_index) {
+        char ch = rx_buffer[read_index];
+        read_index = (read_index + 1) % RX_BUFFER_SIZE;
+        if (line_length < RX_LINE_SIZE - 1) {
+            line_buffer[line_length++] = ch;
+        } else {
+            line_length = 0;  // overflow guard
+        }
+
+        if (line_length >= 2 &&
+            line_buffer[line_length - 2] == '\r' &&
+            line_buffer[line_length - 1] == '\n') {
+            line_buffer[line_length - 2] = '\0';  // chop CRLF
+            line_length = 0;
+            return line_buffer;
+        }
+    }
+    return NULL;
+}
+
+uint32_t rx_restarts(void) {
+    return restart_count;
+}
@@ -0,0 +1,147 @@
+/*
+ * TELEMETRY_TX.c
+ *
+ *  Transmit path of the telemetry task. Lines are packed into one of two
+ *  frame buffers; tx_flush() hands the filled buffer to the UART DMA and
+ *  switches to the other one, so the task never waits on the UART. While
+ *  a transfer is still running, the next run's lines are appended to the
+ *  same buffer and go out with the following flush; lines that do not
+ *  fit are dropped (and counted) rather than blocking.
+ *
+ *  Values are formatted by format_fixed2(), which gives the same bytes
+ *  as "%.2f" without the printf machinery (STM32/Tests/test_telemetry_tx.c).
+ */
+
+#include "TELEMETRY_TX.h"
+#include <stdio.h>
+#include <string.h>
+
+#define TX_LINE_SIZE  32
+#define FIXED2_FAST_EXPONENT  150   // Biased exponent of 2^23: |value| below it takes the integer path
+
+static UART_HandleTypeDef *tx_uart;
+static char tx_buffer[2][TX_FRAME_SIZE];
+static uint16_t tx_length[2];
+static uint8_t tx_fill = 0;         // Buffer being filled; the other one may be in flight
+static uint32_t dropped_lines = 0;
+
+void tx_init(UART_HandleTypeDef *huart) {
+    tx_uart = huart;
+    tx_length[0] = tx_length[1] = 0;
+    tx_fill = 0;
+}
+
+static void tx_append(const char *data, uint16_t length) {
+    if (tx_length[tx_fill] + length > TX_FRAME_SIZE) {
+        dropped_lines++;
+        return;
+    }
+    memcpy(&tx_buffer[tx_fill][tx_length[tx_fill]], data, length);
+    tx_length[tx_fill] += length;
+}
+
+// "%.2f" of `value` into `out` (at least TX_LINE_SIZE bytes); returns the
+// length. The float is exact in binary, so value * 100 is computed exactly
+// in integers and rounded half to even, as printf does.
+int format_fixed2(char *out, float value) {
+    uint32_t bits;
+    memcpy(&bits, &value, sizeof(bits));
+    uint32_t exponent = (bits >> 23) & 0xFF;
+    if (exponent >= FIXED2_FAST_EXPONENT) {
+        int length = snprintf(out, TX_LINE_SIZE, "%.2f", value);  // Huge, infinite or NaN
+        return length < TX_LINE_SIZE ? length : TX_LINE_SIZE - 1;
+    }
+    uint32_t mantissa = bits & 0x7FFFFF;
+    int shift;
+    if (exponent == 0) {
+        shift = 149;                // Subnormal
+    } else {
+        mantissa |= 0x800000;
+        shift = FIXED2_FAST_EXPONENT - exponent;
+    }
+    // |value| * 100 = mantissa * 100 / 2^shift, with mantissa * 100 < 2^31.
+    uint64_t scaled = (uint64_t)mantissa * 100;
+    uint32_t hundredths = 0;
+    if (shift < 40) {
+        uint64_t half = 1ULL << (shift - 1);
+        uint64_t rest = scaled & ((half << 1) - 1);
+        hundredths = (uint32_t)(scaled >> shift);
+        if (rest > half || (rest == half && (hundredths & 1))) {
+            hundredths++;
+        }
+    }
+
+    char digits[12];
+    int n = 0;
+    uint32_t whole = hundredths / 100;
+    do {
+        digits[n++] = (char)('0' + whole % 10);
+        whole /= 10;
+    } while (whole);
+
+    int length = 0;
+    if (bits >> 31) {
+        out[length++] = '-';        // Also "-0.00", like printf
+    }
+    while (n) {
+        out[length++] = digits[--n];
+    }
+    out[length++] = '.';
+    out[length++] = (char)('0' + hundredths / 10 % 10);
+    out[length++] = (char)('0' + hundredths % 10);
+    out[length] = '\0';
+    return length;
+}
+
+void tx_value(const char *key, float value) {
+    char line[TX_LINE_SIZE + 12];
+    size_t key_length = strlen(key);
+    if (key_length > 7) {
+        key_length = 7;
+    }
+    memcpy(line, key, key_length);
+    int length = (int)key_length;
+    line[length++] = ':';
+    length += format_fixed2(&line[length], value);
+    line[length++] = '\r';
+    line[length++] = '\n';
+    tx_append(line, (uint16_t)length);
+}
+
+void tx_line(const char *line) {
+    char buffer[TX_LINE_SIZE + 2];
+    size_t length = strlen(line);
+    if (length > TX_LINE_SIZE) {
+        length = TX_LINE_SIZE;
+    }
+    memcpy(buffer, line, length);
+    buffer[length++] = '\r';
+    buffer[length++] = '\n';
+    tx_append(buffer, (uint16_t)length);
+}
+
+// No transfer in flight (the UART is back to READY once the last byte left).
+int tx_idle(void) {
+    return tx_uart->gState == HAL_UART_STATE_READY;
+}
+
+// Lines queued and not handed to the DMA yet.
+int tx_pending(void) {
+    return tx_length[tx_fill] != 0;
+}
+
+// Starts sending the queued lines unless a transfer is still running.
+void tx_flush(void) {
+    if (!tx_pending() || !tx_idle()) {
+        return;
+    }
+    if (HAL_UART_Transmit_DMA(tx_uart, (uint8_t *)tx_buffer[tx_fill], tx_length[tx_fill]) != HAL_OK) {
+        return;  // Retried with the next flush
+    }
+    tx_fill ^= 1;
+    tx_length[tx_fill] = 0;
+}
+
+uint32_t tx_dropped(void) {
+    return dropped_lines;
+}
@@ -1,6 +1,23 @@
+"""
+Servo -> rudder linkage: lookup table generation and geometry sweep.
+
+    python rudder_LUT.py lut [--servo-arm=-21 --pushrod=200 --rudder-arm=30 --offset=-90] [--no-plot]
+    python rudder_LUT.py sweep --servo-arm=-30:-15:16 --rudder-arm=20:40:21 --offset=-100:-80:21 [--jobs 8]
+    python rudder_LUT.py header [--max-error 0.1 | --points 12] [-o ../Inc/RUDDER_LUT.h]
+
+Lengths in millimetres, angles in degrees. `lut` prints the C arrays for
+the firmware (and plots the mapping); `sweep` evaluates every combination
+of the given ranges ("start:stop:count" or a single value) in parallel
+and ranks them by usable symmetric travel, then linearity; `header`
+places non-uniform breakpoints for an error bound or a point budget and
+writes them as a C header (checked by STM32/Tests/test_rudder_lut.c).
+"""
+import argparse
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+
 import numpy as np
-import matplotlib.pyplot as plt
-from scipy.optimize import fsolve
 
 # ---------------------------------------------------------------------
 # PARAMETERS (all lengths in meters)
@@ -17,134 +34,457 @@ max_servo_angle = 170
 # Number of points in the LUT
 NUM_POINTS = 10
 
+# Servo angles the mapping is evaluated at
+GRID_POINTS = 300
+
 # ---------------------------------------------------------------------
 # FUNCTION: Compute Rudder Angle from Servo Angle via the Linkage
 # ---------------------------------------------------------------------
-def solve_theta_r(theta_s):
+def solve_theta_r(theta_s, servo_arm=servo_arm, pushrod=pushrod, rudder_arm=rudder_arm,
+                  delta_rudder=delta_rudder):
     """
-    Given a servo angle (theta_s, in radians), compute the resulting rudder angle (theta_r, in radians)
-    by solving the nonlinear equation:
-    
+    Rudder angle (radians) for servo angles `theta_s` (radians), solving
+
        (servo_arm*cos(theta_s) - (pushrod + rudder_arm*cos(theta_r)))^2 +
        (servo_arm*sin(theta_s) - rudder_arm*sin(theta_r))^2 = pushrod**2
-       
-    The computed theta_r is then offset by delta_rudder so that the rudder travels
-    with both positive and negative angles.
-    """
-    def f(theta_r):
-        return (servo_arm * np.cos(theta_s) - (pushrod + rudder_arm * np.cos(theta_r)))**2 + \
-               (servo_arm * np.sin(theta_s) - rudder_arm * np.sin(theta_r))**2 - pushrod**2
 
-    ts = np.linspace(0, np.pi, 300)
-    vals = np.abs(f(ts))
-    guess = ts[np.argmin(vals)]
-    sol = fsolve(f, guess)[0]
-    sol_clipped = np.clip(sol, 0, np.pi)
-    return sol_clipped + delta_rudder
+    in closed form: with d = servo tip - rudder pivot, the equation reduces
+    to |d| cos(theta_r - atan2(d)) = (|d|^2 + rudder_arm^2 - pushrod^2) / (2 rudder_arm),
+    a circle intersection. The branch is the one the linkage is assembled
+    in (theta_r in [0, pi] before the offset); positions the linkage cannot
+    reach are NaN. Every argument broadcasts, so whole grids of angles and
+    geometries are solved at once.
+    """
+    dx = servo_arm * np.cos(theta_s) - pushrod
+    dy = servo_arm * np.sin(theta_s)
+    distance = np.hypot(dx, dy)
+    reach = (distance**2 + rudder_arm**2 - pushrod**2) / (2 * rudder_arm * distance)
+    with np.errstate(invalid="ignore"):
+        theta_r = np.mod(np.arctan2(dy, dx) - np.arccos(reach), 2 * np.pi)
+    theta_r = np.where((np.abs(reach) <= 1) & (theta_r <= np.pi), theta_r, np.nan)
+    return theta_r + delta_rudder
 
 # ---------------------------------------------------------------------
-# Compute the Mapping over a Fine Grid of Servo Angles
+# Mapping Quality: Symmetric Travel and Linearity
 # ---------------------------------------------------------------------
-servo_angles_rad = np.linspace(np.radians(min_servo_angle), np.radians(max_servo_angle), 300)
-rudder_angles_rad = np.array([solve_theta_r(theta_s) for theta_s in servo_angles_rad])
+def servo_grid():
+    return np.linspace(np.radians(min_servo_angle), np.radians(max_servo_angle), GRID_POINTS)
+
 
-# Convert to degrees.
-servo_angles_deg = np.degrees(servo_angles_rad)
-rudder_angles_deg = np.degrees(rudder_angles_rad)
+def symmetric_travel(rudder_deg):
+    """
+    Usable symmetric travel (degrees) of mappings sampled along the last
+    axis: the smaller rudder excursion at the servo endpoints, or 0 when the
+    mapping is unreachable somewhere, not monotonic or does not cross 0°.
+    """
+    steps = np.diff(rudder_deg, axis=-1)
+    monotonic = np.all(steps > 0, axis=-1) | np.all(steps < 0, axis=-1)
+    first, last = rudder_deg[..., 0], rudder_deg[..., -1]
+    usable = monotonic & (first * last < 0)  # NaN compares False
+    return np.where(usable, np.minimum(np.abs(first), np.abs(last)), 0.0)
 
-# For the LUT mapping (assuming monotonicity), sort by rudder angle.
-sort_idx = np.argsort(rudder_angles_deg)
-rudder_mech = rudder_angles_deg[sort_idx]
-rudder_servo = servo_angles_deg[sort_idx]
 
-# ---------------------------------------------------------------------
-# Determine the Symmetric Rudder Limits Using Servo Endpoints
-# ---------------------------------------------------------------------
-r_at_min = solve_theta_r(np.radians(min_servo_angle))
-r_at_max = solve_theta_r(np.radians(max_servo_angle))
-orig_min = np.degrees(r_at_min)
-orig_max = np.degrees(r_at_max)
+def linearity_error(servo_deg, rudder_deg, travel):
+    """
+    Largest deviation (degrees) of the rudder angle from the least-squares
+    line over the part of the servo range within +-travel.
+    """
+    inside = np.abs(rudder_deg) <= travel[..., None]
+    weight = inside.astype(float)
+    rudder = np.where(inside, rudder_deg, 0.0)
+    n = weight.sum(axis=-1)
+    sx = (servo_deg * weight).sum(axis=-1)
+    sy = rudder.sum(axis=-1)
+    sxx = (servo_deg**2 * weight).sum(axis=-1)
+    sxy = (servo_deg * rudder).sum(axis=-1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        slope = (n * sxy - sx * sy) / (n * sxx - sx**2)
+        intercept = (sy - slope * sx) / n
+    deviation = np.abs(rudder_deg - (slope[..., None] * servo_deg + intercept[..., None]))
+    error = np.where(inside, deviation, 0.0).max(axis=-1)
+    return np.where(n >= 2, error, np.inf)
 
-# Determine the symmetric limit from the smaller absolute extreme, then floor to the nearest 5°.
-abs_limit = min(abs(orig_min), abs(orig_max))
-limit = 5 * np.floor(abs_limit / 5.0)
-angle_min = -limit
-angle_max = limit
+
+def evaluate(geometries):
+    """
+    Travel and linearity error (degrees) of each row of `geometries`:
+    (servo_arm, pushrod, rudder_arm in m, offset in rad). One vectorized
+    solve for all rows and servo angles.
+    """
+    geometries = np.atleast_2d(geometries)
+    servo_rad = servo_grid()
+    columns = [geometries[:, i:i + 1] for i in range(4)]
+    rudder_deg = np.degrees(solve_theta_r(servo_rad, *columns))
+    travel = symmetric_travel(rudder_deg)
+    return travel, linearity_error(np.degrees(servo_rad), rudder_deg, travel)
 
 # ---------------------------------------------------------------------
-# Build the LUT (ensuring 0° is included)
+# LUT Output (C arrays) and Plot
 # ---------------------------------------------------------------------
-# Create LUT points that span from angle_min to angle_max.
-sample_mech = np.linspace(angle_min, angle_max, NUM_POINTS)
+def build_lut(geometry):
+    """Symmetric limits and LUT breakpoints of one geometry (m, rad)."""
+    servo_angles_rad = servo_grid()
+    rudder_angles_deg = np.degrees(solve_theta_r(servo_angles_rad, *geometry))
+    if symmetric_travel(rudder_angles_deg) == 0:
+        raise SystemExit("This geometry does not give a monotonic mapping through 0° over the servo range.")
+    servo_angles_deg = np.degrees(servo_angles_rad)
+
+    # For the LUT mapping (monotonic, checked above), sort by rudder angle.
+    sort_idx = np.argsort(rudder_angles_deg)
+    rudder_mech = rudder_angles_deg[sort_idx]
+    rudder_servo = servo_angles_deg[sort_idx]
+
+    # Determine the symmetric limit from the smaller absolute extreme, then floor to the nearest 5°.
+    orig_min, orig_max = rudder_angles_deg[0], rudder_angles_deg[-1]
+    abs_limit = min(abs(orig_min), abs(orig_max))
+    limit = 5 * np.floor(abs_limit / 5.0)
+
+    # LUT points spanning the limits, with 0° included.
+    sample_mech = np.linspace(-limit, limit, NUM_POINTS)
+    if 0 not in sample_mech:
+        sample_mech = np.append(sample_mech, 0)
+    sample_mech = np.sort(sample_mech)
+    sample_servo = np.interp(sample_mech, rudder_mech, rudder_servo)
+    return {
+        "servo_deg": servo_angles_deg, "rudder_deg": rudder_angles_deg,
+        "rudder_mech": rudder_mech, "rudder_servo": rudder_servo,
+        "orig_min": orig_min, "orig_max": orig_max, "limit": limit,
+        "sample_mech": sample_mech, "sample_servo": sample_servo,
+    }
+
+
+def print_lut(lut):
+    sample_mech, sample_servo, limit = lut["sample_mech"], lut["sample_servo"], lut["limit"]
+    print("static const float rudder_mech_angles[{}] = {{".format(len(sample_mech)))
+    print(", ".join("{:.2f}".format(val) for val in sample_mech))
+    print("};\n")
+
+    print("static const float rudder_servo_angles[{}] = {{".format(len(sample_servo)))
+    print(", ".join("{:.2f}".format(val) for val in sample_servo))
+    print("};\n")
+
+    print("// Additional marker for zero rudder angle:")
+    print("static const float rudder_zero_servo_angle = {:.2f};\n".format(
+        np.interp(0, lut["rudder_mech"], lut["rudder_servo"])))
+
+    print("// Symmetric rudder limits (floored to nearest 5°)")
+    print("static const float angle_min = {:.2f};".format(-limit))
+    print("static const float angle_max = {:.2f};".format(limit))
+    print("static const float limit = {:.2f};".format(limit))
+
+
+def plot_lut(lut):
+    """Plot the mapping (only for rudder angles between the symmetric limits)."""
+    import matplotlib.pyplot as plt
+
+    servo_angles_deg, rudder_angles_deg = lut["servo_deg"], lut["rudder_deg"]
+    angle_min, angle_max = -lut["limit"], lut["limit"]
+    zero_servo = np.interp(0, lut["rudder_mech"], lut["rudder_servo"])
+    fig, ax = plt.subplots(figsize=(8, 5))
+
+    # Clip the full mapping to the symmetric limits.
+    mask = (rudder_angles_deg >= angle_min) & (rudder_angles_deg <= angle_max)
+    ax.plot(servo_angles_deg[mask], rudder_angles_deg[mask], label="Servo vs Rudder Angle", color='purple')
+
+    # Mark the computed rudder endpoints based on the servo endpoints.
+    ax.scatter(min_servo_angle, lut["orig_min"], color='green', zorder=5,
+               label="Rudder at {}° Servo".format(min_servo_angle))
+    ax.scatter(max_servo_angle, lut["orig_max"], color='blue', zorder=5,
+               label="Rudder at {}° Servo".format(max_servo_angle))
+
+    # Mark zero rudder angle.
+    ax.scatter(zero_servo, 0, color='orange', zorder=5, label="Zero Rudder")
+    ax.text(zero_servo + 2, 0, "0°", fontsize=10, color='orange')
 
-# Ensure 0° is in the LUT
-if 0 not in sample_mech:
-    sample_mech = np.append(sample_mech, 0)
+    # Draw horizontal lines for the symmetric limits.
+    ax.axhline(angle_min, color='gray', linestyle='--', label="Symmetric Limits")
+    ax.axhline(angle_max, color='gray', linestyle='--')
+    ax.text(servo_angles_deg[-1] - 20, angle_max + 1, f"{angle_max:.0f}°", fontsize=10, color='gray')
+    ax.text(servo_angles_deg[-1] - 20, angle_min - 3, f"{angle_min:.0f}°", fontsize=10, color='gray')
 
-# Sort to maintain order
-sample_mech = np.sort(sample_mech)
+    # Plot the sampled LUT points.
+    ax.scatter(lut["sample_servo"], lut["sample_mech"], color='red', zorder=5, label="LUT Points")
 
-# Compute corresponding servo angles
-sample_servo = np.interp(sample_mech, rudder_mech, rudder_servo)
+    ax.set_xlabel("Servo Angle (°)")
+    ax.set_ylabel("Rudder Angle (°)")
+    ax.set_title("Servo vs Rudder Angle (clipped to symmetric limits, 0° included)")
+    ax.grid()
+    ax.legend()
+    plt.show()
 
 # ---------------------------------------------------------------------
-# Output the LUT as C arrays and print the symmetric limits.
+# Non-uniform LUT: Breakpoints for an Error Bound or a Point Budget
 # ---------------------------------------------------------------------
-print("static const float rudder_mech_angles[{}] = {{".format(len(sample_mech)))
-print(", ".join("{:.2f}".format(val) for val in sample_mech))
-print("};\n")
+BREAKPOINT_STEP = 0.05    # Degrees of rudder between candidate breakpoints
+SEGMENT_SAMPLES = 33      # Samples per segment when measuring its error
+CHECK_SAMPLES = 20001     # Samples over the whole table when measuring a LUT
 
-print("static const float rudder_servo_angles[{}] = {{".format(len(sample_servo)))
-print(", ".join("{:.2f}".format(val) for val in sample_servo))
-print("};\n")
 
-print("// Additional marker for zero rudder angle:")
-print("static const float rudder_zero_servo_angle = {:.2f};\n".format(np.interp(0, rudder_mech, rudder_servo)))
+def rudder_deg_at(servo_deg, geometry):
+    return np.degrees(solve_theta_r(np.radians(servo_deg), *geometry))
 
-print("// Symmetric rudder limits (floored to nearest 5°)")
-print("static const float angle_min = {:.2f};".format(angle_min))
-print("static const float angle_max = {:.2f};".format(angle_max))
-print("static const float limit = {:.2f};".format(limit))
+
+def servo_for_rudder(mech_deg, geometry, iterations=60):
+    """Exact servo angles (degrees) giving rudder angles `mech_deg`: bisection of the monotonic mapping."""
+    mech_deg = np.asarray(mech_deg, dtype=float)
+    low = np.full(mech_deg.shape, float(min_servo_angle))
+    high = np.full(mech_deg.shape, float(max_servo_angle))
+    increasing = rudder_deg_at(max_servo_angle, geometry) > rudder_deg_at(min_servo_angle, geometry)
+    for _ in range(iterations):
+        mid = (low + high) / 2
+        past = (rudder_deg_at(mid, geometry) > mech_deg) == increasing
+        high = np.where(past, mid, high)
+        low = np.where(past, low, mid)
+    return (low + high) / 2
+
+
+def lut_error(mech, servo, geometry, samples=CHECK_SAMPLES):
+    """Largest rudder angle error (degrees) of interpolating the table (as stored, in float)."""
+    mech = np.asarray(mech, dtype=np.float32).astype(float)
+    servo = np.asarray(servo, dtype=np.float32).astype(float)
+    commanded = np.linspace(mech[0], mech[-1], samples)
+    return np.max(np.abs(rudder_deg_at(np.interp(commanded, mech, servo), geometry) - commanded))
+
+
+def greedy_breakpoints(mech, servo, geometry, max_error):
+    """
+    Indices into the candidate breakpoints (`mech` from 0 outward, exact
+    `servo`) of the fewest breakpoints keeping every segment within
+    `max_error`: each segment is extended as far as it stays within it.
+    """
+    t = np.linspace(0.0, 1.0, SEGMENT_SAMPLES)
+    chosen = [0]
+    while chosen[-1] < len(mech) - 1:
+        i = chosen[-1]
+        ends = np.arange(i + 1, len(mech))
+        commanded = mech[i] + (mech[ends, None] - mech[i]) * t
+        interpolated = servo[i] + (servo[ends, None] - servo[i]) * t
+        errors = np.abs(rudder_deg_at(interpolated, geometry) - commanded).max(axis=1)
+        too_far = np.flatnonzero(errors > max_error)
+        reach = too_far[0] if too_far.size else len(ends)
+        chosen.append(ends[max(reach - 1, 0)])
+    return chosen
+
+
+def nonuniform_lut(geometry, limit, max_error=None, points=None):
+    """
+    (mech, servo) breakpoints over +-limit, 0° included: the fewest for
+    `max_error`, or the smallest error reachable with `points`.
+    """
+    halves = []
+    for sign in (-1, 1):
+        mech = sign * np.append(np.arange(0.0, limit, BREAKPOINT_STEP), limit)
+        halves.append((mech, servo_for_rudder(mech, geometry)))
+
+    def place(bound):
+        negative, positive = (greedy_breakpoints(mech, servo, geometry, bound) for mech, servo in halves)
+        mech = np.concatenate([halves[0][0][negative[:0:-1]], halves[1][0][positive]])
+        servo = np.concatenate([halves[0][1][negative[:0:-1]], halves[1][1][positive]])
+        return mech, servo
+
+    if points is None:
+        return place(max_error)
+    # Smallest bound whose table fits the budget.
+    low, high = 0.0, 1.0
+    while len(place(high)[0]) > points:
+        low, high = high, high * 2
+    for _ in range(30):
+        middle = (low + high) / 2
+        if len(place(middle)[0]) > points:
+            low = middle
+        else:
+            high = middle
+    return place(high)
+
+
+def lookup_cost(points):
+    """Binary search steps of the firmware lookup and flash bytes of the two tables."""
+    return int(np.ceil(np.log2(points - 1))), 2 * 4 * points
+
+
+def write_header(path, geometry, mech, servo, max_error):
+    """C header with the breakpoints and the firmware lookup."""
+    arm, rod, rudder, offset = geometry
+    steps, flash = lookup_cost(len(mech))
+    values = lambda array: ", ".join("{:.4f}F".format(value) for value in array)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(f"""/*
+ * RUDDER_LUT.h
+ *
+ *  Generated by rudder_LUT.py (header subcommand), do not edit.
+ *  Servo angle for a rudder angle (degrees), with non-uniform breakpoints
+ *  placed so that linear interpolation stays within RUDDER_LUT_MAX_ERROR
+ *  of the exact rudder angle. Checked by STM32/Tests/test_rudder_lut.c.
+ *
+ *  Lookup: {steps} binary search steps and one division, {flash} bytes of tables.
+ */
+
+#ifndef INC_RUDDER_LUT_H_
+#define INC_RUDDER_LUT_H_
+
+#define RUDDER_LUT_POINTS      {len(mech)}
+#define RUDDER_LUT_MIN_ANGLE   {mech[0]:.2f}F
+#define RUDDER_LUT_MAX_ANGLE   {mech[-1]:.2f}F
+#define RUDDER_LUT_MAX_ERROR   {max_error:.4f}F   // Degrees of rudder
+
+// Linkage the table was generated for (mm, degrees).
+#define RUDDER_LUT_SERVO_ARM   {arm * 1000:.2f}
+#define RUDDER_LUT_PUSHROD     {rod * 1000:.2f}
+#define RUDDER_LUT_RUDDER_ARM  {rudder * 1000:.2f}
+#define RUDDER_LUT_OFFSET      {np.degrees(offset):.2f}
+#define RUDDER_LUT_SERVO_MIN   {min_servo_angle:.2f}
+#define RUDDER_LUT_SERVO_MAX   {max_servo_angle:.2f}
+
+static const float rudder_lut_mech[RUDDER_LUT_POINTS] = {{
+    {values(mech)}
+}};
+
+static const float rudder_lut_servo[RUDDER_LUT_POINTS] = {{
+    {values(servo)}
+}};
+
+// Servo angle for a rudder angle, saturated to the table's range.
+static inline float rudder_lut_servo_angle(float mech_angle) {{
+    if (mech_angle <= rudder_lut_mech[0]) {{
+        return rudder_lut_servo[0];
+    }}
+    if (mech_angle >= rudder_lut_mech[RUDDER_LUT_POINTS - 1]) {{
+        return rudder_lut_servo[RUDDER_LUT_POINTS - 1];
+    }}
+    int low = 0, high = RUDDER_LUT_POINTS - 1;
+    while (high - low > 1) {{
+        int mid = (low + high) / 2;
+        if (mech_angle < rudder_lut_mech[mid]) {{
+            high = mid;
+        }} else {{
+            low = mid;
+        }}
+    }}
+    float t = (mech_angle - rudder_lut_mech[low]) / (rudder_lut_mech[high] - rudder_lut_mech[low]);
+    return rudder_lut_servo[low] + t * (rudder_lut_servo[high] - rudder_lut_servo[low]);
+}}
+
+#endif /* INC_RUDDER_LUT_H_ */
+""")
 
 # ---------------------------------------------------------------------
-# Plot the Mapping (only for rudder angles between angle_min and angle_max)
+# Geometry Sweep
 # ---------------------------------------------------------------------
-fig, ax = plt.subplots(figsize=(8, 5))
+def parse_range(text):
+    """"start:stop:count" (inclusive) or a single value, as an array."""
+    parts = text.split(":")
+    try:
+        if len(parts) == 1:
+            return np.array([float(parts[0])])
+        if len(parts) == 3:
+            return np.linspace(float(parts[0]), float(parts[1]), int(parts[2]))
+    except ValueError:
+        pass
+    raise argparse.ArgumentTypeError(f"expected a value or start:stop:count, got '{text}'")
 
-# Clip the full mapping to the symmetric limits.
-mask = (rudder_angles_deg >= angle_min) & (rudder_angles_deg <= angle_max)
-clipped_servo_angles = servo_angles_deg[mask]
-clipped_rudder_angles = rudder_angles_deg[mask]
 
-# Plot the clipped mapping.
-ax.plot(clipped_servo_angles, clipped_rudder_angles, label="Servo vs Rudder Angle", color='purple')
+def sweep(servo_arms, pushrods, rudder_arms, offsets, jobs=None, chunk=2000):
+    """
+    Travel and linearity error of every combination (lengths in m, offsets
+    in rad), evaluated in chunks across `jobs` processes. Returns
+    (geometries, travel, error), one row per combination.
+    """
+    geometries = np.array(list(itertools.product(servo_arms, pushrods, rudder_arms, offsets)))
+    chunks = [geometries[i:i + chunk] for i in range(0, len(geometries), chunk)]
+    if jobs == 1 or len(chunks) == 1:
+        results = list(map(evaluate, chunks))
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            results = list(pool.map(evaluate, chunks))
+    travel = np.concatenate([travel for travel, _ in results])
+    error = np.concatenate([error for _, error in results])
+    return geometries, travel, error
+
+
+def rank(travel, error):
+    """Indices best first: usable travel (floored to 5° like the LUT), then linearity."""
+    usable = 5 * np.floor(travel / 5.0)
+    return np.lexsort((error, -usable))
+
+# ---------------------------------------------------------------------
+# Command Line
+# ---------------------------------------------------------------------
+def geometry_arguments(parser, ranges=False):
+    kind = parse_range if ranges else float
+    parser.add_argument("--servo-arm", type=kind, default=kind(str(servo_arm * 1000)),
+                        help="Servo arm length in mm (negative for crossed bar)")
+    parser.add_argument("--pushrod", type=kind, default=kind(str(pushrod * 1000)),
+                        help="Pushrod length / rudder pivot distance in mm")
+    parser.add_argument("--rudder-arm", type=kind, default=kind(str(rudder_arm * 1000)),
+                        help="Rudder arm length in mm")
+    parser.add_argument("--offset", type=kind, default=kind(str(np.degrees(delta_rudder))),
+                        help="Rudder offset angle in degrees")
 
-# Mark the computed rudder endpoints based on the servo endpoints.
-ax.scatter(min_servo_angle, orig_min, color='green', zorder=5,
-           label="Rudder at {}° Servo".format(min_servo_angle))
-ax.scatter(max_servo_angle, orig_max, color='blue', zorder=5,
-           label="Rudder at {}° Servo".format(max_servo_angle))
 
-# Mark zero rudder angle.
-ax.scatter(np.interp(0, rudder_mech, rudder_servo), 0, color='orange', zorder=5, label="Zero Rudder")
-ax.text(np.interp(0, rudder_mech, rudder_servo) + 2, 0, "0°", fontsize=10, color='orange')
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Servo to rudder linkage tools.")
+    commands = parser.add_subparsers(dest="command")
+    lut_parser = commands.add_parser("lut", help="Print the firmware LUT of one geometry")
+    geometry_arguments(lut_parser)
+    lut_parser.add_argument("--no-plot", action="store_true", help="Only print the C arrays")
+    sweep_parser = commands.add_parser("sweep", help="Rank linkage geometries")
+    geometry_arguments(sweep_parser, ranges=True)
+    sweep_parser.add_argument("--jobs", type=int, default=os.cpu_count(), help="Worker processes")
+    sweep_parser.add_argument("--top", type=int, default=20, help="Geometries listed")
+    header_parser = commands.add_parser("header", help="Write a non-uniform LUT as a C header")
+    geometry_arguments(header_parser)
+    budget = header_parser.add_mutually_exclusive_group()
+    budget.add_argument("--max-error", type=float, default=0.1, help="Rudder error bound in degrees")
+    budget.add_argument("--points", type=int, help="Number of breakpoints (minimizes the error)")
+    header_parser.add_argument("-o", "--output", default=os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                                      "..", "Inc", "RUDDER_LUT.h"))
+    args = parser.parse_args(argv)
 
-# Draw horizontal lines for the symmetric limits.
-ax.axhline(angle_min, color='gray', linestyle='--', label="Symmetric Limits")
-ax.axhline(angle_max, color='gray', linestyle='--')
+    if args.command == "sweep":
+        geometries, travel, error = sweep(args.servo_arm / 1000.0, args.pushrod / 1000.0,
+                                          args.rudder_arm / 1000.0, np.radians(args.offset), args.jobs)
+        print(f"{len(geometries)} geometries, {np.count_nonzero(travel)} usable\n")
+        print(f"{'servo arm':>10} {'pushrod':>8} {'rudder arm':>11} {'offset':>7} {'travel':>8} {'lin. err':>9}")
+        for i in rank(travel, error)[:args.top]:
+            if travel[i] == 0:
+                break
+            arm, rod, rudder, offset = geometries[i]
+            print(f"{arm * 1000:10.1f} {rod * 1000:8.1f} {rudder * 1000:11.1f} {np.degrees(offset):7.1f}"
+                  f" {travel[i]:7.1f}° {error[i]:8.2f}°")
+        return
 
-# Add text labels for symmetric limits.
-ax.text(servo_angles_deg[-1] - 20, angle_max + 1, f"{angle_max:.0f}°", fontsize=10, color='gray')
-ax.text(servo_angles_deg[-1] - 20, angle_min - 3, f"{angle_min:.0f}°", fontsize=10, color='gray')
+    if args.command == "header":
+        geometry = (args.servo_arm / 1000.0, args.pushrod / 1000.0, args.rudder_arm / 1000.0,
+                    np.radians(args.offset))
+        limit = build_lut(geometry)["limit"]
+        points = args.points
+        if points is not None and points < 3:
+            raise SystemExit("At least 3 points are needed (both limits and 0°).")
+        # Rounded as written to the header, so the error reported is the table's.
+        mech, servo = np.round(nonuniform_lut(geometry, limit, args.max_error, points), 4)
+        error = np.ceil(lut_error(mech, servo, geometry) * 1e4) / 1e4
+        uniform_mech = np.linspace(-limit, limit, len(mech))
+        uniform_error = lut_error(uniform_mech, np.round(servo_for_rudder(uniform_mech, geometry), 4), geometry)
+        steps, flash = lookup_cost(len(mech))
+        print(f"Non-uniform: {len(mech)} points, max error {error:.4f}°, "
+              f"{steps} search steps, {flash} bytes")
+        print(f"Uniform:     {len(mech)} points, max error {uniform_error:.4f}°, direct index")
+        write_header(args.output, geometry, mech, servo, error)
+        print(f"Written to {os.path.normpath(args.output)}")
+        return
 
-# Plot the sampled LUT points.
-ax.scatter(sample_servo, sample_mech, color='red', zorder=5, label="LUT Points")
+    if args.command == "lut":
+        geometry = (args.servo_arm / 1000.0, args.pushrod / 1000.0, args.rudder_arm / 1000.0,
+                    np.radians(args.offset))
+        show_plot = not args.no_plot
+    else:
+        geometry = (servo_arm, pushrod, rudder_arm, delta_rudder)
+        show_plot = True
+    lut = build_lut(geometry)
+    print_lut(lut)
+    if show_plot:
+        plot_lut(lut)
 
-# Labels, title, and grid.
-ax.set_xlabel("Servo Angle (°)")
-ax.set_ylabel("Rudder Angle (°)")
-ax.set_title("Servo vs Rudder Angle (clipped to symmetric limits, 0° included)")
-ax.grid()
-ax.legend()
 
-plt.show()
+if __name__ == "__main__":
+    main()
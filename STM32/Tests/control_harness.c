@@ -0,0 +1,70 @@
+/*
+ * control_harness.c
+ *
+ *  Host build of the firmware control law for test_control_sim.py.
+ *  CONTROL.c is compiled in whole (its controllers are static), with
+ *  RADIO.c and stubbed RTOS, IMU and servo calls:
+ *
+ *    cc -std=c99 -Wall -I../Core/Src -Istubs -I../Core/Inc control_harness.c ../Core/Src/RADIO.c -o control_harness -lm
+ *    ./control_harness roll|yaw <Kp> <Ki> < inputs
+ *
+ *  Each input line "<tick ms> <measurement> <CH1 us>" is one run of the
+ *  mode 1 (roll) or mode 2 (yaw rate) control; each output line is the
+ *  controller output and integrator, "%.9g %.9g".
+ */
+
+#include "CONTROL.c"
+#include "stm32f4xx_hal.h"
+#include <stdlib.h>
+#include <string.h>
+
+extern RadioData_t radioDataSent;
+
+// --- Stubs: RTOS, IMU, servos and timer capture ---
+osMessageQueueId_t radioQueueHandle, telemetryQueueHandle, imuQueueHandle, controlQueueHandle;
+static uint32_t kernel_tick;
+
+uint32_t osKernelGetTickCount(void) { return kernel_tick; }
+osStatus_t osMessageQueueGet(osMessageQueueId_t q, void *m, uint8_t *p, uint32_t t) { return osError; }
+osStatus_t osMessageQueuePut(osMessageQueueId_t q, const void *m, uint8_t p, uint32_t t) { return osOK; }
+uint32_t osMessageQueueGetCount(osMessageQueueId_t q) { return 0; }
+void NVIC_SystemReset(void) { exit(2); }
+int is_imu_initialized(void) { return 1; }
+void set_rudder(float angle) {}
+void set_trim(float angle) {}
+void set_twist(float angle) {}
+void set_extra(float angle) {}
+void set_servo_rudder(float angle) {}
+void set_servo_trim(float angle) {}
+void set_servo_twist(float angle) {}
+void set_servo_extra(float angle) {}
+void disable_all_servos(void) {}
+uint32_t HAL_TIM_ReadCapturedValue(TIM_HandleTypeDef *htim, uint32_t Channel) { return 0; }
+
+int main(int argc, char **argv) {
+    if (argc != 4 || (strcmp(argv[1], "roll") != 0 && strcmp(argv[1], "yaw") != 0)) {
+        fprintf(stderr, "usage: %s roll|yaw <Kp> <Ki>\n", argv[0]);
+        return 1;
+    }
+    int yaw = strcmp(argv[1], "yaw") == 0;
+    Kp_roll = Kp_yaw = strtof(argv[2], NULL);
+    Ki_roll = Ki_yaw = strtof(argv[3], NULL);
+
+    unsigned long tick;
+    float measurement;
+    int ch1;
+    while (scanf("%lu %f %d", &tick, &measurement, &ch1) == 3) {
+        kernel_tick = (uint32_t)tick;
+        radioDataSent.ch1 = (int16_t)ch1;
+        float output;
+        if (yaw) {
+            imu.gyroZ = measurement;
+            output = auto_control_mode2().rudder;
+        } else {
+            imu.roll = measurement;
+            output = auto_control_mode1().twist;
+        }
+        printf("%.9g %.9g\n", output, yaw ? integrator_yaw : integrator_roll);
+    }
+    return 0;
+}
@@ -0,0 +1,22 @@
+/*
+ * cmsis_os.h (host stub)
+ *
+ *  The CMSIS-RTOS2 calls CONTROL.c makes. The kernel tick is set by the
+ *  harness (control_harness.c) before each control run.
+ */
+
+#ifndef TESTS_STUBS_CMSIS_OS_H_
+#define TESTS_STUBS_CMSIS_OS_H_
+
+#include <stdint.h>
+
+typedef long BaseType_t;
+typedef void *osMessageQueueId_t;
+typedef enum { osOK = 0, osError = -1 } osStatus_t;
+
+uint32_t   osKernelGetTickCount(void);
+osStatus_t osMessageQueueGet(osMessageQueueId_t mq_id, void *msg_ptr, uint8_t *msg_prio, uint32_t timeout);
+osStatus_t osMessageQueuePut(osMessageQueueId_t mq_id, const void *msg_ptr, uint8_t msg_prio, uint32_t timeout);
+uint32_t   osMessageQueueGetCount(osMessageQueueId_t mq_id);
+
+#endif /* TESTS_STUBS_CMSIS_OS_H_ */
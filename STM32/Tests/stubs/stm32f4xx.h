@@ -0,0 +1,19 @@
+/*
+ * stm32f4xx.h (host stub)
+ *
+ *  Device header as far as bno055.h and CONTROL.c need it, for the host
+ *  build of the control law (see test_control_sim.py).
+ */
+
+#ifndef TESTS_STUBS_STM32F4XX_H_
+#define TESTS_STUBS_STM32F4XX_H_
+
+#include <stdint.h>
+
+typedef struct {
+    void *Instance;
+} I2C_HandleTypeDef;
+
+void NVIC_SystemReset(void);
+
+#endif /* TESTS_STUBS_STM32F4XX_H_ */
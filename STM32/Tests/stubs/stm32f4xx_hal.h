@@ -0,0 +1,67 @@
+/*
+ * stm32f4xx_hal.h (host stub)
+ *
+ *  The parts of the HAL the telemetry and radio modules use, so they build
+ *  on the PC. Transfers are recorded by the tests (see test_telemetry_tx.c
+ *  and test_telemetry_rx.c).
+ */
+
+#ifndef TESTS_STUBS_STM32F4XX_HAL_H_
+#define TESTS_STUBS_STM32F4XX_HAL_H_
+
+#include <stdint.h>
+
+typedef enum { HAL_OK = 0, HAL_ERROR, HAL_BUSY, HAL_TIMEOUT } HAL_StatusTypeDef;
+
+typedef enum {
+    HAL_UART_STATE_READY   = 0x20,
+    HAL_UART_STATE_BUSY_TX = 0x21,
+    HAL_UART_STATE_BUSY_RX = 0x22
+} HAL_UART_StateTypeDef;
+
+typedef struct {
+    volatile uint32_t Counter;  // NDTR: bytes left before the circular buffer wraps
+} DMA_HandleTypeDef;
+
+typedef struct {
+    volatile HAL_UART_StateTypeDef gState;
+    volatile HAL_UART_StateTypeDef RxState;
+    DMA_HandleTypeDef *hdmarx;
+} UART_HandleTypeDef;
+
+#define __HAL_DMA_GET_COUNTER(handle)     ((handle)->Counter)
+
+// Timer input capture (RADIO.c): enough to compile, never triggered.
+typedef enum {
+    HAL_TIM_ACTIVE_CHANNEL_1 = 0x01,
+    HAL_TIM_ACTIVE_CHANNEL_2 = 0x02,
+    HAL_TIM_ACTIVE_CHANNEL_3 = 0x04,
+    HAL_TIM_ACTIVE_CHANNEL_4 = 0x08
+} HAL_TIM_ActiveChannel;
+
+typedef struct {
+    uint32_t Period;
+} TIM_Base_InitTypeDef;
+
+typedef struct {
+    void *Instance;
+    TIM_Base_InitTypeDef Init;
+    HAL_TIM_ActiveChannel Channel;
+} TIM_HandleTypeDef;
+
+#define TIM3                              ((void *)0x40000400UL)
+#define TIM_CHANNEL_1                     0x00000000U
+#define TIM_CHANNEL_2                     0x00000004U
+#define TIM_CHANNEL_3                     0x00000008U
+#define TIM_CHANNEL_4                     0x0000000CU
+#define TIM_INPUTCHANNELPOLARITY_RISING   0x00000000U
+#define TIM_INPUTCHANNELPOLARITY_FALLING  0x00000002U
+#define __HAL_TIM_SET_CAPTUREPOLARITY(handle, channel, polarity)  ((void)(handle))
+
+uint32_t HAL_TIM_ReadCapturedValue(TIM_HandleTypeDef *htim, uint32_t Channel);
+
+HAL_StatusTypeDef HAL_UART_Transmit_DMA(UART_HandleTypeDef *huart, const uint8_t *pData, uint16_t Size);
+HAL_StatusTypeDef HAL_UART_Receive_DMA(UART_HandleTypeDef *huart, uint8_t *pData, uint16_t Size);
+void HAL_UART_ErrorCallback(UART_HandleTypeDef *huart);
+
+#endif /* TESTS_STUBS_STM32F4XX_HAL_H_ */
@@ -0,0 +1,12 @@
+/*
+ * stm32f4xx_hal_i2c.h (host stub)
+ *
+ *  Included by bno055.h; the I2C handle comes from stm32f4xx.h.
+ */
+
+#ifndef TESTS_STUBS_STM32F4XX_HAL_I2C_H_
+#define TESTS_STUBS_STM32F4XX_HAL_I2C_H_
+
+#include "stm32f4xx.h"
+
+#endif /* TESTS_STUBS_STM32F4XX_HAL_I2C_H_ */
@@ -0,0 +1,81 @@
+"""
+Test of the baud-rate negotiation (Telemetry/PC_GUI/baud.py) against the
+firmware simulator on a pty, whose output only comes through when the
+host's rate matches its own: the link must move to the fastest rate,
+fall back from one the "cable" cannot carry (--broken-baud), and a
+reconnect must find the rate the firmware is already at.
+
+    python test_baud.py      (Linux/macOS: needs pyserial and ptys)
+"""
+import os
+import sys
+
+import serial
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+PC_GUI = os.path.join(HERE, "..", "..", "Telemetry", "PC_GUI")
+sys.path.insert(0, PC_GUI)
+_cwd = os.getcwd()
+os.chdir(PC_GUI)  # database.json is read from the working directory, as when the GUI runs
+try:
+    from config import BAUD_RATE
+    from baud import negotiate
+    from headless import start_simulator
+finally:
+    os.chdir(_cwd)
+
+
+class Simulator:
+    """The simulator run with `options`, and a port opened on it at BAUD_RATE."""
+
+    def __init__(self, *options):
+        self.process, self.port = start_simulator(*options)
+        self.ser = self.open()
+
+    def open(self):
+        return serial.Serial(self.port, BAUD_RATE, timeout=0.1)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.ser.close()
+        self.process.terminate()
+        self.process.wait()
+
+
+def test_fastest_rate():
+    with Simulator() as sim:
+        result = negotiate(sim.ser)
+        assert result.baud == 921600, result.summary()
+        assert sim.ser.baudrate == 921600
+        assert result.attempts == [(921600, "ok")]
+
+
+def test_broken_rate_falls_back():
+    with Simulator("--broken-baud", "921600") as sim:
+        result = negotiate(sim.ser)
+        assert result.baud == 460800, result.summary()
+        assert sim.ser.baudrate == 460800
+        assert [baud for baud, _ in result.attempts] == [921600, 460800]
+        assert result.attempts[0][1] != "ok"
+
+
+def test_reconnect_finds_previous_rate():
+    with Simulator() as sim:
+        assert negotiate(sim.ser).baud == 921600
+        # As comm.SerialComm.reopen: the port comes back at BAUD_RATE,
+        # the firmware is still at the agreed rate.
+        sim.ser.close()
+        sim.ser = sim.open()
+        result = negotiate(sim.ser, candidates=(921600,))
+        assert result.baud == 921600, result.summary()
+        assert sim.ser.baudrate == 921600
+        assert result.attempts == []  # Found, not negotiated again
+
+
+if __name__ == "__main__":
+    test_fastest_rate()
+    test_broken_rate_falls_back()
+    test_reconnect_finds_previous_rate()
+    print("baud.py: negotiation, fallback and reconnect work against the simulator")
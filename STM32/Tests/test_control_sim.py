@@ -0,0 +1,95 @@
+"""
+Regression test of the offline control simulator (Telemetry/PC_GUI/control_sim.py)
+against the firmware: CONTROL.c is built for the host (control_harness.c)
+and both run the same inputs, including saturation, integrator resets,
+radio values outside the calibration and a kernel tick wrap. Outputs and
+integrators must match to the bit, for gains run one by one and as one array.
+
+    python test_control_sim.py      (needs numpy and a C compiler as `cc`)
+"""
+import os
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", "..", "Telemetry", "PC_GUI"))
+import control_sim  # noqa: E402
+
+GAINS = [(0.0, 0.0), (0.0, 1.5), (1.0, 0.1), (2.5, 0.0), (4.0, 2.0), (25.0, 10.0)]
+
+
+def build(directory):
+    executable = os.path.join(directory, "control_harness")
+    subprocess.run(["cc", "-std=c99", "-Wall", "-I../Core/Src", "-Istubs", "-I../Core/Inc",
+                    "control_harness.c", "../Core/Src/RADIO.c", "-o", executable, "-lm"],
+                   cwd=HERE, check=True)
+    return executable
+
+
+def inputs(loop, runs=2000, seed=1):
+    """(tick, measurement, ch1) rows: jittered 20 ms runs, wrapping the tick counter."""
+    rng = np.random.default_rng(seed)
+    ticks = (0xFFFFFFFF - 10 * 20 + np.cumsum(rng.integers(18, 23, runs))) & 0xFFFFFFFF
+    ticks[ticks == 0] = 1  # 0 reads as "never ran" in get_delta_time()
+    scale = 30.0 if loop == "roll" else 4.0
+    measurement = np.cumsum(rng.normal(0, scale / 20, runs)).clip(-2 * scale, 2 * scale)
+    measurement[rng.random(runs) < 0.1] = rng.uniform(-1.2, 1.2)  # Around the roll reset
+    measurement = measurement.astype(np.float32)
+    ch1 = rng.integers(1100, 1850, runs)  # Beyond the 1234..1732 calibration too
+    return list(zip(ticks.tolist(), measurement.tolist(), ch1.tolist()))
+
+
+def run_firmware(executable, loop, kp, ki, rows):
+    text = "".join(f"{tick} {m!r} {ch1}\n" for tick, m, ch1 in rows)
+    result = subprocess.run([executable, loop, repr(kp), repr(ki)], input=text,
+                            capture_output=True, text=True, check=True)
+    values = np.array([line.split() for line in result.stdout.splitlines()], dtype=np.float32)
+    return values[:, 0], values[:, 1]
+
+
+def run_simulator(loop, kp, ki, rows):
+    controller = control_sim.Controller(loop, kp, ki)
+    outputs, integrators = [], []
+    for tick, measurement, ch1 in rows:
+        setpoint = control_sim.yaw_setpoint(ch1) if loop == "yaw" else 0.0
+        out, _ = controller.step(measurement, setpoint, tick)
+        outputs.append(out)
+        integrators.append(controller.integrator)
+    return np.array(outputs, dtype=np.float32), np.array(integrators, dtype=np.float32)
+
+
+def check_loop(executable, loop):
+    rows = inputs(loop)
+    expected = [run_firmware(executable, loop, kp, ki, rows) for kp, ki in GAINS]
+    for (kp, ki), (out, integrator) in zip(GAINS, expected):
+        sim_out, sim_integrator = run_simulator(loop, kp, ki, rows)
+        assert np.array_equal(sim_out, out), f"{loop} Kp={kp} Ki={ki}: outputs differ"
+        assert np.array_equal(sim_integrator, integrator), f"{loop} Kp={kp} Ki={ki}: integrators differ"
+    low, high = control_sim.OUTPUT_LIMITS[loop]
+    outputs = np.concatenate([out for out, _ in expected])
+    assert (outputs == low).any() and (outputs == high).any(), f"{loop}: inputs never saturate"
+    # All gains at once, as the sweeps run them.
+    kp, ki = np.array(GAINS, dtype=np.float32).T
+    sim_out, sim_integrator = run_simulator(loop, kp, ki, rows)
+    for column, (out, integrator) in enumerate(expected):
+        assert np.array_equal(sim_out[:, column], out), f"{loop}: vectorized outputs differ"
+        assert np.array_equal(sim_integrator[:, column], integrator), f"{loop}: vectorized integrators differ"
+
+
+def test_roll_matches_firmware():
+    with tempfile.TemporaryDirectory() as directory:
+        check_loop(build(directory), "roll")
+
+
+def test_yaw_rate_matches_firmware():
+    with tempfile.TemporaryDirectory() as directory:
+        check_loop(build(directory), "yaw")
+
+
+if __name__ == "__main__":
+    test_roll_matches_firmware()
+    test_yaw_rate_matches_firmware()
+    print("control_sim.py: matches CONTROL.c")
@@ -0,0 +1,118 @@
+"""
+Test of the TCP fan-out (Telemetry/PC_GUI/fanout.py) with local clients:
+every client gets only the keys it subscribed to, a client sending a
+malformed message is dropped without affecting the others, and a key
+subscribed to again later starts with new samples only.
+
+    python test_fanout.py
+"""
+import os
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+PC_GUI = os.path.join(HERE, "..", "..", "Telemetry", "PC_GUI")
+sys.path.insert(0, PC_GUI)
+from fanout import FanoutServer, FanoutClient
+
+BATCH_S = 0.02
+TIMEOUT_S = 2.0
+
+
+class Received:
+    """Samples per key a FanoutClient received, and its batches."""
+
+    def __init__(self):
+        self.samples = {}
+        self.batches = []
+
+    def __call__(self, batch):
+        self.batches.append(batch["samples"])
+        for key, samples in batch["samples"].items():
+            self.samples.setdefault(key, []).extend(samples)
+
+
+def wait_for(condition):
+    end = time.monotonic() + TIMEOUT_S
+    while not condition():
+        assert time.monotonic() < end, "timed out"
+        time.sleep(0.01)
+
+
+def start(history):
+    t0 = time.monotonic()
+    clock = lambda: time.monotonic() - t0
+    server = FanoutServer(history, clock, host="127.0.0.1", port=0, batch_s=BATCH_S).start()
+    return server, clock
+
+
+def connect(server, keys):
+    received = Received()
+    client = FanoutClient("127.0.0.1", server.address[1], keys, on_batch=received)
+    wait_for(lambda: any(c.keys == set(keys) for c in server.clients.values()))
+    return client, received
+
+
+def test_clients_get_their_keys():
+    history = {"ROL": [], "PIT": [], "YAW": []}
+    server, clock = start(history)
+    try:
+        roll, roll_received = connect(server, ["ROL"])
+        both, both_received = connect(server, ["PIT", "YAW"])
+        for i in range(20):
+            for key in history:
+                history[key].append((float(i), clock()))
+            time.sleep(BATCH_S / 4)
+        wait_for(lambda: len(both_received.samples.get("YAW", [])) == 20)
+        wait_for(lambda: len(roll_received.samples.get("ROL", [])) == 20)
+        assert set(roll_received.samples) == {"ROL"}
+        assert set(both_received.samples) == {"PIT", "YAW"}
+        assert [v for _, v in both_received.samples["PIT"]] == [float(i) for i in range(20)]
+        roll.close()
+        both.close()
+    finally:
+        server.stop()
+
+
+def test_malformed_message_drops_only_its_client():
+    history = {"ROL": [], "PIT": []}
+    server, clock = start(history)
+    try:
+        good, good_received = connect(server, ["ROL"])
+        bad, _ = connect(server, ["PIT"])
+        bad._send({"subscribe": 5})
+        wait_for(lambda: not bad.is_connected())
+        assert len(server.clients) == 1
+        history["ROL"].append((1.0, clock()))
+        wait_for(lambda: "ROL" in good_received.samples)
+        assert good.is_connected()
+        good.close()
+    finally:
+        server.stop()
+
+
+def test_resubscribed_key_starts_from_now():
+    history = {"ROL": [], "PIT": []}
+    server, clock = start(history)
+    try:
+        client, received = connect(server, ["ROL"])
+        client.subscribe(["PIT"])
+        wait_for(lambda: all(c.keys == {"PIT"} for c in server.clients.values()))
+        for i in range(500):
+            history["ROL"].append((float(i), clock()))  # Nobody is subscribed to ROL
+        time.sleep(3 * BATCH_S)
+        late, late_received = connect(server, ["ROL"])
+        history["ROL"].append((500.0, clock()))
+        wait_for(lambda: "ROL" in late_received.samples)
+        assert [v for _, v in late_received.samples["ROL"]] == [500.0]
+        client.close()
+        late.close()
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    test_clients_get_their_keys()
+    test_malformed_message_drops_only_its_client()
+    test_resubscribed_key_starts_from_now()
+    print("fanout.py: clients get their keys only")
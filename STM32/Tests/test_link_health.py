@@ -0,0 +1,87 @@
+"""
+Regression test of the link-health monitoring (Telemetry/PC_GUI/linkquality.py)
+against the firmware simulator on a pty: the serial reader feeds a
+LinkMonitor while PNG probes go out every PING_INTERVAL_S, first on a
+clean link, then with lines lost (--loss) and output delayed
+(--latency-ms). Frame loss from the sequence numbers and the round-trip
+percentiles must match what the simulator was told to do.
+
+    python test_link_health.py      (Linux/macOS: needs pyserial and ptys)
+"""
+import os
+import sys
+import threading
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+PC_GUI = os.path.join(HERE, "..", "..", "Telemetry", "PC_GUI")
+sys.path.insert(0, PC_GUI)
+_cwd = os.getcwd()
+os.chdir(PC_GUI)  # database.json is read from the working directory, as when the GUI runs
+try:
+    from config import BAUD_RATE
+    from data import start_time
+    from devices import DeviceStore
+    from headless import HeadlessLink, start_simulator
+    from uart import SerialReader
+finally:
+    os.chdir(_cwd)
+
+SECONDS = 8.0
+TICK_S = 0.020  # TASK_PERIOD_S: an echo waits for the next task run
+
+
+def measure(*options):
+    """LinkMonitor after SECONDS of probing the simulator run with `options`."""
+    process, port = start_simulator(*options)
+    link = HeadlessLink(port, BAUD_RATE, negotiate=False, change_only=False)
+    link.device = DeviceStore("linktest")  # Keys outside data_history: nothing is stored
+    reader = SerialReader(link)
+    try:
+        assert link.connect(), f"could not open {port}"
+        threading.Thread(target=reader.read_serial, daemon=True).start()
+        monitor = link.device.link_monitor
+        end = time.monotonic() + SECONDS
+        while time.monotonic() < end:
+            now = time.time() - start_time
+            if monitor.ping.due(now):
+                link.ser.write(monitor.ping.message(now))
+            time.sleep(0.01)
+        return monitor
+    finally:
+        reader.stop()
+        link.close()
+        process.terminate()
+        process.wait()
+
+
+def test_clean_link():
+    monitor = measure()
+    frames, lost = monitor.lost_frames()
+    assert frames > 100 * SECONDS, f"only {frames} frames"
+    assert lost == 0, f"{lost} frames lost on a clean link"
+    p50, p95 = monitor.ping.percentiles(50, 95)
+    assert len(monitor.ping.rtts) >= SECONDS / 0.5 - 2
+    assert p50 < 2 * TICK_S + 0.020 and p95 < 0.100, f"RTT p50 {p50 * 1000:.0f} ms, p95 {p95 * 1000:.0f} ms"
+
+
+def test_lossy_delayed_link():
+    loss, latency = 0.05, 0.080
+    monitor = measure("--loss", str(loss), "--latency-ms", str(latency * 1000))
+    frames, lost = monitor.lost_frames()
+    # A frame counts as lost with its sequence line: binomial, about +-1% here.
+    measured = lost / (frames + lost)
+    assert abs(measured - loss) < 0.025, f"frame loss {measured:.3f}, expected {loss}"
+    for group, sequence in monitor.sequences.items():
+        assert sequence.frames > 0, f"no {group} frames"
+    # Echoes are lost like any line; the others come back after the latency.
+    p50, p95 = monitor.ping.percentiles(50, 95)
+    assert len(monitor.ping.rtts) >= (SECONDS / 0.5) * (1 - loss) - 4
+    assert latency <= p50 < latency + 2 * TICK_S + 0.020, f"RTT p50 {p50 * 1000:.0f} ms"
+    assert p95 < latency + 0.100, f"RTT p95 {p95 * 1000:.0f} ms"
+
+
+if __name__ == "__main__":
+    test_clean_link()
+    test_lossy_delayed_link()
+    print("linkquality.py: loss and round trips match the simulated link")
@@ -0,0 +1,38 @@
+"""
+Test that the host's parameter batches (Telemetry/PC_GUI/params.py) fit
+the firmware's command line buffer (RX_LINE_SIZE in TELEMETRY_RX.h): a
+longer PST line would be dropped by rx_line() as an overflow.
+
+    python test_param_batches.py
+"""
+import os
+import re
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", "..", "Telemetry", "PC_GUI"))
+import params  # noqa: E402
+
+TELEMETRY_RX_H = os.path.join(HERE, "..", "Core", "Inc", "TELEMETRY_RX.h")
+
+
+def test_line_size_matches_firmware():
+    with open(TELEMETRY_RX_H) as f:
+        size = int(re.search(r"^#define\s+RX_LINE_SIZE\s+(\d+)", f.read(), re.MULTILINE).group(1))
+    assert params.RX_LINE_SIZE == size
+
+
+def test_batches_fit_line_buffer():
+    # Every parameter in one batch.
+    values = {key: -1.0e-38 for key, *_ in params.PARAMETERS}
+    lines = params.set_lines(values)
+    # rx_line() keeps RX_LINE_SIZE - 1 bytes, the CRLF included.
+    assert all(len(line) <= params.RX_LINE_SIZE - 1 for line in lines)
+    sent = [entry for line in lines for entry in line[len(params.SET) + 1:-2].split(",")]
+    assert [int(entry.split("=")[0]) for entry in sent] == list(range(len(params.PARAMETERS)))
+
+
+if __name__ == "__main__":
+    test_line_size_matches_firmware()
+    test_batches_fit_line_buffer()
+    print("params.py: batches fit the firmware's line buffer")
@@ -0,0 +1,127 @@
+/*
+ * test_params.c
+ *
+ *  Host test of the parameter protocol parser (PARAMS.c). Outside the
+ *  CubeIDE source folders, so it is not part of the firmware build:
+ *
+ *    cc -std=c99 -Wall -I../Core/Inc test_params.c ../Core/Src/PARAMS.c -o test_params && ./test_params
+ */
+
+#include "PARAMS.h"
+#include <stdio.h>
+#include <string.h>
+
+static char replies[32][32];
+static int reply_count;
+static int failures;
+
+static void capture(const char *line) {
+    if (reply_count < 32) {
+        strncpy(replies[reply_count], line, sizeof(replies[0]) - 1);
+    }
+    reply_count++;
+}
+
+static int handle(const char *key, const char *arg) {
+    reply_count = 0;
+    memset(replies, 0, sizeof(replies));
+    return params_handle(key, arg, capture);
+}
+
+#define CHECK(cond) do { \
+    if (!(cond)) { printf("%s:%d: CHECK(%s) failed\n", __FILE__, __LINE__, #cond); failures++; } \
+} while (0)
+
+static void test_get_all(void) {
+    params_init();
+    CHECK(handle("PGA", "0") == 1);
+    CHECK(reply_count == PARAM_COUNT + 1);
+    CHECK(strcmp(replies[0], "PRM:0=00000000") == 0);            // MOD 0
+    CHECK(strcmp(replies[PARAM_KPR], "PRM:5=3F800000") == 0);    // KPR 1.0
+    CHECK(strcmp(replies[PARAM_KIR], "PRM:6=3DCCCCCD") == 0);    // KIR 0.1
+    CHECK(strcmp(replies[PARAM_COUNT], "PVR:0") == 0);
+}
+
+static void test_get_one(void) {
+    params_init();
+    CHECK(handle("PGT", "7") == 1);
+    CHECK(reply_count == 2);
+    CHECK(strcmp(replies[0], "PRM:7=3F800000") == 0);
+    CHECK(strcmp(replies[1], "PVR:0") == 0);
+    handle("PGT", "9");
+    CHECK(reply_count == 1 && strcmp(replies[0], "PER:2") == 0);
+    handle("PGT", "x");
+    CHECK(reply_count == 1 && strcmp(replies[0], "PER:1") == 0);
+    handle("PGT", "1x");
+    CHECK(reply_count == 1 && strcmp(replies[0], "PER:1") == 0);
+}
+
+static void test_batch_set(void) {
+    params_init();
+    // KPR = 2.5, KIY = 0.5
+    CHECK(handle("PST", "5=40200000,8=3F000000") == 1);
+    CHECK(reply_count == 3);
+    CHECK(strcmp(replies[0], "PRM:5=40200000") == 0);
+    CHECK(strcmp(replies[1], "PRM:8=3F000000") == 0);
+    CHECK(strcmp(replies[2], "PVR:1") == 0);
+    CHECK(params_get(PARAM_KPR) == 2.5f);
+    CHECK(params_get(PARAM_KIY) == 0.5f);
+    CHECK(params_version() == 1);
+}
+
+static void test_batch_is_atomic(void) {
+    params_init();
+    // SRU = 50 is beyond the rudder limit: KPR must not change either.
+    handle("PST", "5=40200000,1=42480000");
+    CHECK(reply_count == 1 && strcmp(replies[0], "PER:3") == 0);
+    CHECK(params_get(PARAM_KPR) == 1.0f);
+    CHECK(params_version() == 0);
+    handle("PST", "5=40200000,12=3F000000");
+    CHECK(strcmp(replies[0], "PER:2") == 0);
+    handle("PST", "5=40200000,");
+    CHECK(strcmp(replies[0], "PER:1") == 0);
+    handle("PST", "5=402000001");      // Nine hex digits
+    CHECK(strcmp(replies[0], "PER:1") == 0);
+    handle("PST", "5=7FC00000");       // NaN
+    CHECK(strcmp(replies[0], "PER:3") == 0);
+    handle("PST", "");
+    CHECK(strcmp(replies[0], "PER:1") == 0);
+    CHECK(params_get(PARAM_KPR) == 1.0f);
+    CHECK(params_version() == 0);
+}
+
+static void test_legacy_commands(void) {
+    params_init();
+    CHECK(handle("MOD", "3.000000") == 1);
+    CHECK(params_get(PARAM_MOD) == 3.0f);
+    CHECK(reply_count == 2 && strcmp(replies[0], "PRM:0=40400000") == 0);
+    CHECK(strcmp(replies[1], "PVR:1") == 0);
+    handle("STW", "45.0");             // Twist limit is 30
+    CHECK(reply_count == 1 && strcmp(replies[0], "PER:3") == 0);
+    CHECK(params_get(PARAM_STW) == 0.0f);
+    handle("KIR", "abc");
+    CHECK(strcmp(replies[0], "PER:1") == 0);
+    CHECK(params_version() == 1);
+}
+
+static void test_other_commands_pass_through(void) {
+    params_init();
+    CHECK(handle("SUB", "15") == 0);
+    CHECK(handle("PNG", "12") == 0);
+    CHECK(reply_count == 0);
+}
+
+int main(void) {
+    test_get_all();
+    test_get_one();
+    test_batch_set();
+    test_batch_is_atomic();
+    test_legacy_commands();
+    test_other_commands_pass_through();
+    if (failures) {
+        printf("%d check(s) failed\n", failures);
+        return 1;
+    }
+    printf("PARAMS.c: all checks passed\n");
+    return 0;
+}
@@ -0,0 +1,83 @@
+/*
+ * test_rudder_lut.c
+ *
+ *  Host test of the generated rudder table (RUDDER_LUT.h): the firmware
+ *  lookup, in float, must stay within RUDDER_LUT_MAX_ERROR of the exact
+ *  linkage solution over the whole table, and saturate outside it.
+ *
+ *    cc -std=c99 -Wall -I../Core/Inc test_rudder_lut.c -o test_rudder_lut -lm && ./test_rudder_lut
+ */
+
+#include "RUDDER_LUT.h"
+#include <math.h>
+#include <stdio.h>
+
+#define PI          3.14159265358979323846
+#define TOLERANCE   1e-3    // Float rounding of the lookup, degrees
+
+static int failures;
+
+#define CHECK(cond) do { \
+    if (!(cond)) { printf("%s:%d: CHECK(%s) failed\n", __FILE__, __LINE__, #cond); failures++; } \
+} while (0)
+
+// Rudder angle (degrees) for a servo angle, closed-form circle intersection
+// on the assembled branch, as solve_theta_r() in rudder_LUT.py.
+static double exact_rudder(double servo_deg) {
+    double servo = servo_deg * PI / 180.0;
+    double dx = RUDDER_LUT_SERVO_ARM * cos(servo) - RUDDER_LUT_PUSHROD;
+    double dy = RUDDER_LUT_SERVO_ARM * sin(servo);
+    double distance = hypot(dx, dy);
+    double reach = (distance * distance + RUDDER_LUT_RUDDER_ARM * RUDDER_LUT_RUDDER_ARM
+                    - RUDDER_LUT_PUSHROD * RUDDER_LUT_PUSHROD) / (2.0 * RUDDER_LUT_RUDDER_ARM * distance);
+    double rudder = fmod(atan2(dy, dx) - acos(reach) + 4.0 * PI, 2.0 * PI);
+    return rudder * 180.0 / PI + RUDDER_LUT_OFFSET;
+}
+
+static void test_breakpoints(void) {
+    int has_zero = 0;
+    for (int i = 0; i < RUDDER_LUT_POINTS; i++) {
+        if (i > 0) {
+            CHECK(rudder_lut_mech[i] > rudder_lut_mech[i - 1]);
+        }
+        CHECK(rudder_lut_servo[i] >= RUDDER_LUT_SERVO_MIN && rudder_lut_servo[i] <= RUDDER_LUT_SERVO_MAX);
+        has_zero |= rudder_lut_mech[i] == 0.0f;
+    }
+    CHECK(has_zero);
+    CHECK(rudder_lut_mech[0] == RUDDER_LUT_MIN_ANGLE);
+    CHECK(rudder_lut_mech[RUDDER_LUT_POINTS - 1] == RUDDER_LUT_MAX_ANGLE);
+}
+
+static void test_max_error(void) {
+    double worst = 0.0, worst_at = 0.0;
+    for (int i = 0; i <= 70000; i++) {
+        float mech = RUDDER_LUT_MIN_ANGLE + (RUDDER_LUT_MAX_ANGLE - RUDDER_LUT_MIN_ANGLE) * i / 70000.0f;
+        double error = fabs(exact_rudder(rudder_lut_servo_angle(mech)) - mech);
+        if (error > worst) {
+            worst = error;
+            worst_at = mech;
+        }
+    }
+    printf("max error %.4f deg at %.3f deg (bound %.4f)\n", worst, worst_at, RUDDER_LUT_MAX_ERROR);
+    CHECK(worst <= RUDDER_LUT_MAX_ERROR + TOLERANCE);
+}
+
+static void test_saturation(void) {
+    CHECK(rudder_lut_servo_angle(RUDDER_LUT_MIN_ANGLE - 10.0f) == rudder_lut_servo[0]);
+    CHECK(rudder_lut_servo_angle(RUDDER_LUT_MAX_ANGLE + 10.0f) == rudder_lut_servo[RUDDER_LUT_POINTS - 1]);
+    for (int i = 0; i < RUDDER_LUT_POINTS; i++) {
+        CHECK(rudder_lut_servo_angle(rudder_lut_mech[i]) == rudder_lut_servo[i]);
+    }
+}
+
+int main(void) {
+    test_breakpoints();
+    test_max_error();
+    test_saturation();
+    if (failures) {
+        printf("%d check(s) failed\n", failures);
+        return 1;
+    }
+    printf("RUDDER_LUT.h: all checks passed\n");
+    return 0;
+}
@@ -0,0 +1,181 @@
+"""
+Test that the three copies of the subscription and rate logic agree: the
+firmware's (TELEMETRY.c), the host's (protocol.py, used by
+uart.SubscriptionRequest and the link monitor) and the simulator's.
+
+telemetry_update_rates() and its tables are cut out of TELEMETRY.c and
+built for the host, and must give effective_prescalers() for every
+group subscription at every supported rate. Against the simulator on a
+pty, after SUB:<mask> only the subscribed keys must arrive, the SUB echo
+must confirm the mask and every group must come at its effective rate.
+
+    python test_subscription.py      (needs a C compiler as `cc`, pyserial and ptys)
+"""
+import itertools
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+
+import serial
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+PC_GUI = os.path.join(HERE, "..", "..", "Telemetry", "PC_GUI")
+TELEMETRY_C = os.path.join(HERE, "..", "Core", "Src", "TELEMETRY.c")
+sys.path.insert(0, PC_GUI)
+_cwd = os.getcwd()
+os.chdir(PC_GUI)  # database.json is read from the working directory, as when the GUI runs
+try:
+    from config import BAUD_RATE
+    from protocol import (GROUPS, HEARTBEAT, KEY_GROUP, SUBSCRIBE, SEQUENCE_GROUP, SIGNAL_BIT,
+                          effective_prescalers, parse_line, subscription_mask)
+    from headless import start_simulator
+    from uart import SubscriptionRequest
+finally:
+    os.chdir(_cwd)
+
+BAUDS = (115200, 230400, 460800, 921600)  # supported_bauds in TELEMETRY.c
+
+HARNESS = """
+#include <stdint.h>
+#include <stdio.h>
+#include <string.h>
+
+static struct { struct { uint32_t BaudRate; } Init; } huart1;
+int TASK_DELAY = 20;
+
+%s
+
+int main(void) {
+    unsigned long mask, baud;
+    while (scanf("%%lu %%lu", &mask, &baud) == 2) {
+        subscription = (uint32_t)mask;
+        huart1.Init.BaudRate = (uint32_t)baud;
+        telemetry_update_rates();
+        for (int g = 0; g < GROUP_COUNT; g++) {
+            printf("%%u ", prescaler[g]);
+        }
+        printf("\\n");
+    }
+    return 0;
+}
+"""
+
+
+def firmware_rates_source():
+    """The numeric defines, group tables and telemetry_update_rates() of TELEMETRY.c."""
+    with open(TELEMETRY_C) as f:
+        source = f.read()
+    defines = re.findall(r"^#define\s+\w+\s+(?:0x[0-9A-F]+UL|\d+)\b.*$", source, re.MULTILINE)
+    tables = [re.search(pattern, source, re.MULTILINE | re.DOTALL).group(0) for pattern in (
+        r"^typedef enum \{ GROUP_ADC.*?;$",
+        r"^static const uint8_t base_prescaler\[GROUP_COUNT\] = \{.*?\};$",
+        r"^static const uint32_t group_bits\[GROUP_COUNT\] = \{.*?\};$",
+        r"^static uint8_t prescaler\[GROUP_COUNT\] = \{.*?\};$",
+        r"^static uint32_t subscription = .*?;$",
+        r"^static void telemetry_update_rates\(void\) \{.*?^\}$",
+    )]
+    return "\n".join(defines + tables)
+
+
+def firmware_prescalers(cases):
+    """[{group: prescaler}] of the firmware for each (mask, baud) in `cases`."""
+    with tempfile.TemporaryDirectory() as directory:
+        harness = os.path.join(directory, "rates.c")
+        executable = os.path.join(directory, "rates")
+        with open(harness, "w") as f:
+            f.write(HARNESS % firmware_rates_source())
+        subprocess.run(["cc", "-std=c99", "-Wall", harness, "-o", executable], check=True)
+        output = subprocess.run([executable], input="".join(f"{mask} {baud}\n" for mask, baud in cases),
+                                capture_output=True, text=True, check=True).stdout
+    return [dict(zip(GROUPS, map(int, line.split()))) for line in output.splitlines()]
+
+
+def group_masks():
+    """A mask for every combination of whole groups, and a few single keys."""
+    masks = []
+    for count in range(1, len(GROUPS) + 1):
+        for groups in itertools.combinations(GROUPS, count):
+            masks.append(subscription_mask([key for group in groups for key in GROUPS[group][1]]))
+    masks += [subscription_mask([key]) for key in ("ROL", "BAT", "RW1", "CPU")]
+    return masks
+
+
+def test_firmware_rates_match_protocol():
+    cases = [(mask, baud) for mask in group_masks() for baud in BAUDS]
+    for (mask, baud), firmware in zip(cases, firmware_prescalers(cases), strict=True):
+        assert firmware == effective_prescalers(mask, baud), f"mask {mask:#x} at {baud} baud"
+
+
+def test_firmware_key_bits_match_protocol():
+    with open(TELEMETRY_C) as f:
+        sent = re.findall(r'telemetry_send\((\d+), "(\w+)"', f.read())
+    assert {key: int(bit) for bit, key in sent} == SIGNAL_BIT
+
+
+def subscribe(ser, keys, seconds=3.0):
+    """Subscribe to `keys`; (acknowledged mask, {key: count}, heartbeats) over `seconds`."""
+    mask = subscription_mask(keys)
+    request = SubscriptionRequest()
+    acked = None
+    pending = b""
+    counts, heartbeats = {}, 0
+    deadline = time.monotonic() + 2.0
+    end = None
+    while end is None or time.monotonic() < end:
+        if end is None:
+            assert time.monotonic() < deadline, f"SUB:{mask} not acknowledged"
+            request.update(ser, mask, acked)
+        lines = (pending + ser.read(ser.in_waiting or 1)).split(b"\n")
+        pending = lines.pop()
+        for line in lines:
+            frame = parse_line(line.decode("ascii", errors="replace"))
+            if frame is None:
+                continue
+            key, value = frame
+            if end is None:
+                if key == SUBSCRIBE:
+                    acked = int(value)
+                elif key == HEARTBEAT and acked == mask:
+                    end = time.monotonic() + seconds  # Count from the next task run on
+                    heartbeats = 1
+                continue
+            if key == HEARTBEAT:
+                heartbeats += 1
+            else:
+                counts[key] = counts.get(key, 0) + 1
+    return acked, counts, heartbeats
+
+
+def test_simulator_follows_subscription():
+    process, port = start_simulator()
+    ser = serial.Serial(port, BAUD_RATE, timeout=0.1)
+    try:
+        # ADC and IMU: ADC and CPU speed up to a prescaler of 2 at 115200 baud.
+        for keys in (["ROL", "BAT", "RW1"], GROUPS["ADC"][1] + GROUPS["IMU"][1], ["PIT"]):
+            mask = subscription_mask(keys)
+            acked, counts, heartbeats = subscribe(ser, keys)
+            assert acked == mask
+            prescalers = effective_prescalers(mask, BAUD_RATE)
+            signals = {key for key in counts if key not in SEQUENCE_GROUP}
+            assert signals == set(keys), f"SUB:{mask}: got {sorted(signals)}"
+            groups = {group for group, (_, group_keys) in GROUPS.items() if set(group_keys) & set(keys)}
+            assert {SEQUENCE_GROUP[key] for key in counts if key in SEQUENCE_GROUP} == groups
+            for key in counts:
+                group = SEQUENCE_GROUP.get(key) or KEY_GROUP[key]
+                expected = heartbeats / prescalers[group]
+                assert abs(counts[key] - expected) <= 2, \
+                    f"{key}: {counts[key]} in {heartbeats} runs, expected prescaler {prescalers[group]}"
+    finally:
+        ser.close()
+        process.terminate()
+        process.wait()
+
+
+if __name__ == "__main__":
+    test_firmware_rates_match_protocol()
+    test_firmware_key_bits_match_protocol()
+    test_simulator_follows_subscription()
+    print("TELEMETRY.c, protocol.py and simulator.py agree on subscriptions and rates")
@@ -0,0 +1,157 @@
+/*
+ * test_telemetry_rx.c
+ *
+ *  Host test of the telemetry receive path (TELEMETRY_RX.c) against a
+ *  stubbed HAL UART (stubs/stm32f4xx_hal.h): commands must be read line by
+ *  line across the wrap of the circular buffer, and a UART error, which
+ *  makes the HAL abort the RX DMA, must not stop reception.
+ *
+ *    cc -std=c99 -Wall -Istubs -I../Core/Inc test_telemetry_rx.c ../Core/Src/TELEMETRY_RX.c -o test_telemetry_rx && ./test_telemetry_rx
+ */
+
+#include "TELEMETRY_RX.h"
+#include <stdio.h>
+#include <string.h>
+
+static DMA_HandleTypeDef hdma_usart1_rx;
+UART_HandleTypeDef huart1 = {HAL_UART_STATE_READY, HAL_UART_STATE_READY, &hdma_usart1_rx};
+
+// --- HAL stub: a circular RX DMA fed by receive() ---
+static uint8_t *dma_buffer;
+static uint16_t dma_size;
+static int dma_starts;
+
+HAL_StatusTypeDef HAL_UART_Receive_DMA(UART_HandleTypeDef *huart, uint8_t *pData, uint16_t Size) {
+    if (huart->RxState != HAL_UART_STATE_READY) {
+        return HAL_BUSY;
+    }
+    huart->RxState = HAL_UART_STATE_BUSY_RX;
+    huart->hdmarx->Counter = Size;
+    dma_buffer = pData;
+    dma_size = Size;
+    dma_starts++;
+    return HAL_OK;
+}
+
+// Bytes arriving on the line; dropped while no reception is running.
+static void receive(const char *text) {
+    for (; *text; text++) {
+        if (huart1.RxState != HAL_UART_STATE_BUSY_RX) {
+            continue;
+        }
+        dma_buffer[dma_size - hdma_usart1_rx.Counter] = (uint8_t)*text;
+        if (--hdma_usart1_rx.Counter == 0) {
+            hdma_usart1_rx.Counter = dma_size;  // Circular mode
+        }
+    }
+}
+
+// What HAL_UART_IRQHandler does on a framing/noise/overrun error with RX
+// DMA running: end the reception, abort the DMA, then report the error.
+static void uart_error(void) {
+    huart1.RxState = HAL_UART_STATE_READY;
+    HAL_UART_ErrorCallback(&huart1);
+}
+
+static int failures;
+
+#define CHECK(cond) do { \
+    if (!(cond)) { printf("%s:%d: CHECK(%s) failed\n", __FILE__, __LINE__, #cond); failures++; } \
+} while (0)
+
+static int next_line_is(const char *expected) {
+    char *line = rx_line();
+    if (line == NULL || strcmp(line, expected) != 0) {
+        printf("rx_line(): \"%s\", expected \"%s\"\n", line ? line : "(none)", expected);
+        return 0;
+    }
+    return 1;
+}
+
+static void start(void) {
+    huart1.RxState = HAL_UART_STATE_READY;
+    dma_starts = 0;
+    rx_init(&huart1);
+}
+
+static void test_lines(void) {
+    start();
+    CHECK(dma_starts == 1);
+    CHECK(rx_line() == NULL);
+    receive("PNG:1\r\nSUB:4095\r\nKPR:0.5");
+    CHECK(next_line_is("PNG:1"));
+    CHECK(next_line_is("SUB:4095"));
+    CHECK(rx_line() == NULL);  // Incomplete, kept for the next run
+    receive("\r\n");
+    CHECK(next_line_is("KPR:0.5"));
+    CHECK(rx_line() == NULL);
+}
+
+static void test_wrap_around(void) {
+    start();
+    char text[16], expected[16];
+    for (int i = 0; i < 3 * RX_BUFFER_SIZE / 9; i++) {
+        snprintf(text, sizeof(text), "PNG:%03d\r\n", i);  // 9 bytes: lines straddle the wrap
+        snprintf(expected, sizeof(expected), "PNG:%03d", i);
+        receive(text);
+        CHECK(next_line_is(expected));
+    }
+}
+
+static void test_overlong_line_dropped(void) {
+    start();
+    for (int i = 0; i < RX_LINE_SIZE; i++) {
+        receive("x");
+    }
+    receive("\r\nPNG:7\r\n");
+    CHECK(next_line_is(""));  // What was left of the overlong line
+    CHECK(next_line_is("PNG:7"));
+}
+
+static void test_error_restarts_reception(void) {
+    start();
+    uint32_t restarts = rx_restarts();
+    receive("PNG:1\r\nBDC:9216");  // Cut by a framing error
+    CHECK(next_line_is("PNG:1"));
+    uart_error();
+    CHECK(dma_starts == 2);
+    CHECK(huart1.RxState == HAL_UART_STATE_BUSY_RX);
+    CHECK(rx_restarts() == restarts + 1);
+    receive("SUB:3\r\n");
+    CHECK(next_line_is("SUB:3"));  // Not "BDC:9216SUB:3"
+    CHECK(rx_line() == NULL);
+
+    // An error before the task read what came in: that line is lost, later ones are not.
+    receive("PNG:2\r\n");
+    uart_error();
+    receive("PNG:3\r\n");
+    CHECK(next_line_is("PNG:3"));
+    CHECK(rx_line() == NULL);
+}
+
+static void test_tx_error_leaves_reception_alone(void) {
+    start();
+    receive("PNG:4");
+    HAL_UART_ErrorCallback(&huart1);  // RX still running (e.g. a TX DMA error)
+    CHECK(dma_starts == 1);
+    receive("\r\n");
+    CHECK(next_line_is("PNG:4"));
+
+    UART_HandleTypeDef other = {HAL_UART_STATE_READY, HAL_UART_STATE_READY, &hdma_usart1_rx};
+    HAL_UART_ErrorCallback(&other);  // Another UART
+    CHECK(dma_starts == 1);
+}
+
+int main(void) {
+    test_lines();
+    test_wrap_around();
+    test_overlong_line_dropped();
+    test_error_restarts_reception();
+    test_tx_error_leaves_reception_alone();
+    if (failures) {
+        printf("%d check(s) failed\n", failures);
+        return 1;
+    }
+    printf("TELEMETRY_RX.c: all checks passed\n");
+    return 0;
+}
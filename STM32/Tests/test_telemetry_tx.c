@@ -0,0 +1,179 @@
+/*
+ * test_telemetry_tx.c
+ *
+ *  Host test of the telemetry transmit path (TELEMETRY_TX.c) against a
+ *  stubbed HAL UART (stubs/stm32f4xx_hal.h): the bytes must match the previous
+ *  snprintf("%s:%.2f\r\n") output, and the double buffering must never
+ *  touch a buffer the DMA is sending.
+ *
+ *    cc -std=c99 -Wall -Istubs -I../Core/Inc test_telemetry_tx.c ../Core/Src/TELEMETRY_TX.c -o test_telemetry_tx -lm && ./test_telemetry_tx
+ */
+
+#include "TELEMETRY_TX.h"
+#include <math.h>
+#include <stdio.h>
+#include <string.h>
+
+UART_HandleTypeDef huart1 = {HAL_UART_STATE_READY};
+
+// --- HAL stub: records every DMA transfer ---
+static const uint8_t *dma_data;
+static uint16_t dma_size;
+static int dma_starts;
+
+HAL_StatusTypeDef HAL_UART_Transmit_DMA(UART_HandleTypeDef *huart, const uint8_t *pData, uint16_t Size) {
+    if (huart->gState != HAL_UART_STATE_READY) {
+        return HAL_BUSY;
+    }
+    huart->gState = HAL_UART_STATE_BUSY_TX;
+    dma_data = pData;
+    dma_size = Size;
+    dma_starts++;
+    return HAL_OK;
+}
+
+static void dma_complete(void) {
+    huart1.gState = HAL_UART_STATE_READY;
+}
+
+static int failures;
+
+#define CHECK(cond) do { \
+    if (!(cond)) { printf("%s:%d: CHECK(%s) failed\n", __FILE__, __LINE__, #cond); failures++; } \
+} while (0)
+
+static int check_format(float value) {
+    char expected[64], actual[64];
+    snprintf(expected, sizeof(expected), "%.2f", value);
+    expected[31] = '\0';  // Beyond ~1e29 the text is cut to the line buffer, as before
+    int length = format_fixed2(actual, value);
+    if (strcmp(expected, actual) != 0 || length != (int)strlen(expected)) {
+        printf("format_fixed2(%.9g): \"%s\", expected \"%s\"\n", value, actual, expected);
+        failures++;
+        return 0;
+    }
+    return 1;
+}
+
+static void test_format_special_values(void) {
+    const float values[] = {
+        0.0f, -0.0f, 0.001f, -0.001f, 0.004999f, 0.005f, -0.005f, 0.015f, 0.025f,
+        0.125f, 0.375f, -0.125f, 1.005f, 2.675f, 99.995f, 100.0f, 359.99f, -179.995f,
+        1500.0f, 1e-30f, 1e-45f, 8388607.5f, 8388608.0f, -8388609.0f, 1e9f, 3.4e38f,
+        INFINITY, -INFINITY, NAN,
+    };
+    for (size_t i = 0; i < sizeof(values) / sizeof(values[0]); i++) {
+        check_format(values[i]);
+    }
+}
+
+static void test_format_sweep(void) {
+    // Every hundredth and its neighbouring floats over the telemetry range.
+    int bad = 0;
+    for (int hundredths = -400000; hundredths <= 400000 && bad < 10; hundredths++) {
+        float value = hundredths / 100.0f;
+        bad += !check_format(value);
+        bad += !check_format(nextafterf(value, INFINITY));
+        bad += !check_format(nextafterf(value, -INFINITY));
+        bad += !check_format(value + 0.005f);  // Ties and near-ties
+    }
+    // Pseudo-random bit patterns across all magnitudes.
+    uint32_t state = 12345;
+    for (int i = 0; i < 2000000 && bad < 20; i++) {
+        state = state * 1664525u + 1013904223u;
+        float value;
+        memcpy(&value, &state, sizeof(value));
+        bad += !check_format(value);
+    }
+}
+
+static void test_value_lines(void) {
+    tx_init(&huart1);
+    dma_starts = 0;
+    const char *keys[] = {"OK", "ROL", "PIT", "RW1", "CPU"};
+    const float values[] = {0.0f, -12.345f, 3.14159f, 1523.0f, 37.5f};
+    char expected[256] = "";
+    for (int i = 0; i < 5; i++) {
+        char line[32];
+        snprintf(line, sizeof(line), "%s:%.2f\r\n", keys[i], values[i]);
+        strcat(expected, line);
+        tx_value(keys[i], values[i]);
+    }
+    tx_line("PVR:3");
+    strcat(expected, "PVR:3\r\n");
+    CHECK(tx_pending());
+    tx_flush();
+    CHECK(dma_starts == 1);
+    CHECK(dma_size == strlen(expected));
+    CHECK(memcmp(dma_data, expected, dma_size) == 0);
+    CHECK(!tx_pending());
+    dma_complete();
+}
+
+static void test_double_buffering(void) {
+    tx_init(&huart1);
+    dma_starts = 0;
+    tx_line("OK");
+    tx_value("ROL", 1.0f);
+    tx_flush();
+    const uint8_t *first = dma_data;
+    char in_flight[64];
+    memcpy(in_flight, first, dma_size);
+    uint16_t first_size = dma_size;
+
+    // The transfer is still running: the next runs queue behind it.
+    tx_line("OK");
+    tx_value("ROL", 2.0f);
+    tx_flush();
+    CHECK(dma_starts == 1);
+    tx_line("OK");
+    tx_value("ROL", 3.0f);
+    tx_flush();
+    CHECK(dma_starts == 1);
+    CHECK(memcmp(first, in_flight, first_size) == 0);  // Untouched while sent
+
+    dma_complete();
+    tx_flush();
+    CHECK(dma_starts == 2);
+    CHECK(dma_data != first);
+    const char *expected = "OK\r\nROL:2.00\r\nOK\r\nROL:3.00\r\n";
+    CHECK(dma_size == strlen(expected));
+    CHECK(memcmp(dma_data, expected, dma_size) == 0);
+
+    // Nothing queued: no transfer.
+    dma_complete();
+    tx_flush();
+    CHECK(dma_starts == 2);
+}
+
+static void test_overflow_drops_whole_lines(void) {
+    tx_init(&huart1);
+    dma_starts = 0;
+    uint32_t dropped = tx_dropped();
+    huart1.gState = HAL_UART_STATE_BUSY_TX;  // Link stuck: nothing leaves
+    int lines = 0;
+    while (tx_dropped() == dropped) {
+        tx_value("RW1", 1500.0f);  // "RW1:1500.00\r\n", 13 bytes
+        lines++;
+    }
+    CHECK(lines - 1 == TX_FRAME_SIZE / 13);
+    huart1.gState = HAL_UART_STATE_READY;
+    tx_flush();
+    CHECK(dma_size == (TX_FRAME_SIZE / 13) * 13);
+    CHECK(memcmp(dma_data + dma_size - 13, "RW1:1500.00\r\n", 13) == 0);
+    dma_complete();
+}
+
+int main(void) {
+    test_format_special_values();
+    test_format_sweep();
+    test_value_lines();
+    test_double_buffering();
+    test_overflow_drops_whole_lines();
+    if (failures) {
+        printf("%d check(s) failed\n", failures);
+        return 1;
+    }
+    printf("TELEMETRY_TX.c: all checks passed\n");
+    return 0;
+}
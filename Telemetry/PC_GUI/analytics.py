@@ -0,0 +1,384 @@
+#!/usr/bin/env python3
+"""
+Multi-session analytics store.
+
+Logs (CSV, .rcs or segmented) are ingested into a local SQLite database:
+every signal is cut into chunks of ANALYTICS_CHUNK_ROWS samples, stored
+as raw float arrays together with the chunk's time range, min/max and
+first/last value. The (key, vmin) and (key, vmax) indexes let event
+queries skip every chunk that cannot contain a match, so only a small
+part of the data is ever decoded.
+
+Queries return events as dicts:
+    {"session": path, "t_start": s, "t_end": s, "value": ...}
+
+Example: every tack (roll changes side) where ROL exceeded 30 deg and
+SPE dropped by more than 20% within 5 s:
+
+    python analytics.py ingest log_*.csv
+    python analytics.py query --cross ROL 0 --above ROL 30 --drop SPE 0.2 5 --within 5
+"""
+import os
+import sys
+import time
+import sqlite3
+import argparse
+import numpy as np
+import pandas as pd
+
+from config import ANALYTICS_DB, ANALYTICS_CHUNK_ROWS
+from session import SESSION_EXT, read_session, read_csv_columns
+from segments import find_manifest, load_segments
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    mtime REAL NOT NULL,
+    t_min REAL,
+    t_max REAL,
+    ingested REAL
+);
+CREATE TABLE IF NOT EXISTS chunks (
+    session_id INTEGER NOT NULL REFERENCES sessions(id) ON DELETE CASCADE,
+    key TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    t0 REAL NOT NULL,
+    t1 REAL NOT NULL,
+    vmin REAL NOT NULL,
+    vmax REAL NOT NULL,
+    v_first REAL NOT NULL,
+    v_last REAL NOT NULL,
+    t_data BLOB NOT NULL,
+    v_data BLOB NOT NULL,
+    PRIMARY KEY (session_id, key, idx)
+);
+CREATE INDEX IF NOT EXISTS chunks_time ON chunks (key, session_id, t0);
+CREATE INDEX IF NOT EXISTS chunks_vmin ON chunks (key, vmin);
+CREATE INDEX IF NOT EXISTS chunks_vmax ON chunks (key, vmax);
+"""
+
+# Threshold operators: numpy comparison and the chunk condition that can contain a match.
+THRESHOLD_OPS = {
+    ">": (np.greater, "vmax > ?"),
+    ">=": (np.greater_equal, "vmax >= ?"),
+    "<": (np.less, "vmin < ?"),
+    "<=": (np.less_equal, "vmin <= ?"),
+}
+
+
+def read_log_arrays(path):
+    """{key: (t, v)} for a CSV, session or segmented log, without gaps."""
+    manifest = find_manifest(path)
+    if manifest:
+        return load_segments(manifest)
+    if path.endswith(SESSION_EXT):
+        return read_session(path)[1]
+    return read_csv_columns(path)
+
+
+def runs(mask):
+    """(start, stop) index pairs of the runs of True in a boolean array."""
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    return zip(np.flatnonzero(edges == 1), np.flatnonzero(edges == -1))
+
+
+def merge_events(events, gap, peak=max):
+    """Merge events of the same session less than `gap` seconds apart, keeping the peak value."""
+    merged = []
+    for event in events:
+        last = merged[-1] if merged else None
+        if last and last["session"] == event["session"] and event["t_start"] - last["t_end"] <= gap:
+            last["t_end"] = max(last["t_end"], event["t_end"])
+            last["value"] = peak(last["value"], event["value"])
+        else:
+            merged.append(dict(event))
+    return merged
+
+
+class AnalyticsStore:
+    """SQLite-backed store of ingested sessions with chunk-skipping event queries."""
+
+    def __init__(self, path=ANALYTICS_DB, chunk_rows=ANALYTICS_CHUNK_ROWS):
+        self.path = path
+        self.chunk_rows = chunk_rows
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA foreign_keys = ON")
+        self.db.executescript(SCHEMA)
+        # Chunks decoded / chunks stored for the signal of the last query.
+        self.last_scan = (0, 0)
+
+    def close(self):
+        self.db.close()
+
+    # --- Ingest ---
+    def ingest(self, path):
+        """
+        Import one log. Returns False when the same file (by path and
+        modification time) is already in the store.
+        """
+        path = os.path.abspath(path)
+        mtime = os.path.getmtime(path)
+        row = self.db.execute("SELECT id, mtime FROM sessions WHERE path = ?", (path,)).fetchone()
+        if row and row[1] == mtime:
+            return False
+        arrays = read_log_arrays(path)
+        with self.db:
+            if row:
+                self.db.execute("DELETE FROM sessions WHERE id = ?", (row[0],))
+            times = [t for t, _ in arrays.values() if len(t)]
+            t_min = min(float(t[0]) for t in times) if times else None
+            t_max = max(float(t[-1]) for t in times) if times else None
+            session_id = self.db.execute(
+                "INSERT INTO sessions (path, mtime, t_min, t_max, ingested) VALUES (?, ?, ?, ?, ?)",
+                (path, mtime, t_min, t_max, time.time()),
+            ).lastrowid
+            self.db.executemany(
+                "INSERT INTO chunks VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                self._chunk_rows(session_id, arrays),
+            )
+        return True
+
+    def _chunk_rows(self, session_id, arrays):
+        for key, (t, v) in arrays.items():
+            keep = ~np.isnan(v)
+            order = np.argsort(t[keep], kind="stable")
+            t = np.ascontiguousarray(t[keep][order], dtype="<f8")
+            v = np.ascontiguousarray(v[keep][order], dtype="<f4")
+            for idx, start in enumerate(range(0, len(t), self.chunk_rows)):
+                ct = t[start:start + self.chunk_rows]
+                cv = v[start:start + self.chunk_rows]
+                yield (session_id, key, idx, len(ct), float(ct[0]), float(ct[-1]),
+                       float(cv.min()), float(cv.max()), float(cv[0]), float(cv[-1]),
+                       ct.tobytes(), cv.tobytes())
+
+    def sessions(self):
+        """[(path, t_min, t_max, signal count, sample count)] for every ingested log."""
+        return self.db.execute(
+            "SELECT s.path, s.t_min, s.t_max, COUNT(DISTINCT c.key), COALESCE(SUM(c.count), 0) "
+            "FROM sessions s LEFT JOIN chunks c ON c.session_id = s.id "
+            "GROUP BY s.id ORDER BY s.path"
+        ).fetchall()
+
+    # --- Chunk access ---
+    def _total_chunks(self, key):
+        return self.db.execute("SELECT COUNT(*) FROM chunks WHERE key = ?", (key,)).fetchone()[0]
+
+    def _blocks(self, key, condition, params):
+        """
+        Decode the chunks of `key` matching an SQL condition, joined into
+        blocks of consecutive chunks: yields (session path, t, v).
+        """
+        rows = self.db.execute(
+            "SELECT s.path, c.idx, c.t_data, c.v_data FROM chunks c "
+            "JOIN sessions s ON s.id = c.session_id "
+            f"WHERE c.key = ? AND ({condition}) ORDER BY c.session_id, c.idx",
+            (key, *params),
+        )
+        decoded = 0
+        block, block_path, last_idx = [], None, None
+        for path, idx, t_data, v_data in rows:
+            decoded += 1
+            if block and (path != block_path or idx != last_idx + 1):
+                yield block_path, *self._join(block)
+                block = []
+            block.append((t_data, v_data))
+            block_path, last_idx = path, idx
+        if block:
+            yield block_path, *self._join(block)
+        self.last_scan = (decoded, self._total_chunks(key))
+
+    @staticmethod
+    def _join(block):
+        t = np.concatenate([np.frombuffer(t_data, dtype="<f8") for t_data, _ in block])
+        v = np.concatenate([np.frombuffer(v_data, dtype="<f4") for _, v_data in block])
+        return t, v.astype(np.float64)
+
+    # --- Queries ---
+    def threshold(self, key, op, level, min_duration=0.0, gap=0.0):
+        """
+        Runs of samples where `key <op> level`. Runs less than `gap`
+        seconds apart are merged; shorter than min_duration are dropped.
+        """
+        compare, condition = THRESHOLD_OPS[op]
+        peak = max if op.startswith(">") else min
+        events = []
+        for path, t, v in self._blocks(key, condition, (level,)):
+            for start, stop in runs(compare(v, level)):
+                segment = v[start:stop]
+                events.append({"session": path, "t_start": float(t[start]), "t_end": float(t[stop - 1]),
+                               "value": float(segment.max() if peak is max else segment.min())})
+        events = merge_events(events, gap, peak)
+        return [e for e in events if e["t_end"] - e["t_start"] >= min_duration]
+
+    def crossings(self, key, level, direction="both", min_interval=0.0):
+        """
+        Times where `key` crosses `level` ("up", "down" or "both").
+        Crossings closer than min_interval seconds to the previous one in
+        the same session are dropped, which debounces noisy signals.
+        """
+        found = []
+        # Chunks that contain the level can hold a crossing...
+        for path, t, v in self._blocks(key, "vmin < ? AND vmax >= ?", (level, level)):
+            above = v >= level
+            change = np.flatnonzero(above[1:] != above[:-1]) + 1
+            for i in change:
+                found.append((path, float(t[i]), float(v[i]), bool(above[i])))
+        decoded = self.last_scan[0]
+        # ...and so can the boundary between two chunks that do not.
+        boundaries = self.db.execute(
+            "SELECT s.path, b.t0, b.v_first, b.v_first >= ? FROM chunks a "
+            "JOIN chunks b ON b.session_id = a.session_id AND b.key = a.key AND b.idx = a.idx + 1 "
+            "JOIN sessions s ON s.id = a.session_id "
+            "WHERE a.key = ? AND ((a.v_last < ?) != (b.v_first < ?)) "
+            "AND NOT (a.vmin < ? AND a.vmax >= ? AND b.vmin < ? AND b.vmax >= ?)",
+            (level, key, level, level, level, level, level, level),
+        )
+        for path, t0, v_first, is_above in boundaries:
+            found.append((path, t0, v_first, bool(is_above)))
+        self.last_scan = (decoded, self.last_scan[1])
+
+        events = []
+        last = {}
+        for path, t, value, is_above in sorted(found):
+            if direction == "up" and not is_above or direction == "down" and is_above:
+                continue
+            if path in last and t - last[path] < min_interval:
+                continue
+            last[path] = t
+            events.append({"session": path, "t_start": t, "t_end": t, "value": value,
+                           "direction": "up" if is_above else "down"})
+        return events
+
+    def drop(self, key, fraction, window):
+        """
+        Places where `key` falls by more than `fraction` of its value
+        within `window` seconds (e.g. speed lost in a manoeuvre). Only
+        positive values are considered.
+        """
+        stats = self.db.execute(
+            "SELECT session_id, idx, t0, t1, vmin, vmax FROM chunks WHERE key = ? "
+            "ORDER BY session_id, idx", (key,)
+        ).fetchall()
+        # A chunk can start a drop only if its max, reduced by `fraction`,
+        # is above the lowest value reachable within `window` after it.
+        wanted = set()
+        by_session = {}
+        for row in stats:
+            by_session.setdefault(row[0], []).append(row)
+        for session_id, chunks in by_session.items():
+            t0 = np.array([c[2] for c in chunks])
+            t1 = np.array([c[3] for c in chunks])
+            vmin = np.array([c[4] for c in chunks])
+            vmax = np.array([c[5] for c in chunks])
+            reach = np.searchsorted(t0, t1 + window, side="right")
+            for i in range(len(chunks)):
+                if vmax[i] > 0 and vmin[i:reach[i]].min() <= vmax[i] * (1 - fraction):
+                    # Decode the chunks the drop can extend into as well.
+                    wanted.update((session_id, chunks[j][1]) for j in range(i, reach[i]))
+        if not wanted:
+            self.last_scan = (0, len(stats))
+            return []
+        self.db.execute("CREATE TEMP TABLE IF NOT EXISTS wanted (session_id INTEGER, idx INTEGER)")
+        self.db.execute("DELETE FROM wanted")
+        self.db.executemany("INSERT INTO wanted VALUES (?, ?)", sorted(wanted))
+        condition = "(c.session_id, c.idx) IN (SELECT session_id, idx FROM wanted)"
+
+        events = []
+        for path, t, v in self._blocks(key, condition, ()):
+            # Lowest value in [t, t + window]: a trailing rolling min over reversed time.
+            series = pd.Series(v[::-1], index=pd.to_timedelta(-t[::-1], unit="s"))
+            future_min = series.rolling(pd.Timedelta(seconds=window), closed="both").min().to_numpy()[::-1]
+            mask = (v > 0) & (future_min <= v * (1 - fraction))
+            for start, stop in runs(mask):
+                loss = 1 - future_min[start:stop] / v[start:stop]
+                events.append({"session": path, "t_start": float(t[start]),
+                               "t_end": float(t[stop - 1]) + window, "value": float(loss.max())})
+        # Overlapping windows describe the same drop.
+        return merge_events(events, 0.0)
+
+
+def coincident(events, others, tolerance=0.0):
+    """Events of `events` overlapping (within tolerance seconds) an event of `others` in the same session."""
+    by_session = {}
+    for other in others:
+        by_session.setdefault(other["session"], []).append((other["t_start"], other["t_end"]))
+    for intervals in by_session.values():
+        intervals.sort()
+    result = []
+    for event in events:
+        intervals = by_session.get(event["session"], [])
+        start, end = event["t_start"] - tolerance, event["t_end"] + tolerance
+        if any(s <= end and e >= start for s, e in intervals):
+            result.append(event)
+    return result
+
+
+# --- Command line ---
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Telemetry analytics store")
+    parser.add_argument("--db", default=ANALYTICS_DB, help="Store location")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    ing = sub.add_parser("ingest", help="Import logs (CSV, .rcs or segmented)")
+    ing.add_argument("logs", nargs="+")
+
+    sub.add_parser("sessions", help="List ingested sessions")
+
+    query = sub.add_parser("query", help="Find events; several conditions must coincide")
+    query.add_argument("--above", nargs=2, action="append", default=[], metavar=("KEY", "LEVEL"))
+    query.add_argument("--below", nargs=2, action="append", default=[], metavar=("KEY", "LEVEL"))
+    query.add_argument("--cross", nargs=2, action="append", default=[], metavar=("KEY", "LEVEL"),
+                       help="Level crossings, e.g. --cross ROL 0 for tacks")
+    query.add_argument("--drop", nargs=3, action="append", default=[], metavar=("KEY", "FRACTION", "SECONDS"))
+    query.add_argument("--within", type=float, default=0.0,
+                       help="Seconds by which coinciding events may be apart")
+    query.add_argument("--min-duration", type=float, default=0.0)
+    query.add_argument("--debounce", type=float, default=2.0,
+                       help="Merge threshold events and crossings closer than this (seconds)")
+
+    args = parser.parse_args(argv)
+    store = AnalyticsStore(args.db)
+    try:
+        if args.command == "ingest":
+            for path in args.logs:
+                start = time.perf_counter()
+                added = store.ingest(path)
+                status = f"{time.perf_counter() - start:.2f} s" if added else "up to date"
+                print(f"{path}: {status}")
+        elif args.command == "sessions":
+            for path, t_min, t_max, n_signals, n_samples in store.sessions():
+                span = f"{t_max - t_min:.0f} s" if t_min is not None else "empty"
+                print(f"{path}: {span}, {n_signals} signals, {n_samples} samples")
+        else:
+            # The first condition (crossings, if any) anchors the reported events.
+            conditions = (
+                [(f"{k} crosses {lvl}", lambda k=k, lvl=lvl: store.crossings(k, float(lvl), min_interval=args.debounce))
+                 for k, lvl in args.cross]
+                + [(f"{k} > {lvl}", lambda k=k, lvl=lvl: store.threshold(k, ">", float(lvl), args.min_duration, args.debounce))
+                   for k, lvl in args.above]
+                + [(f"{k} < {lvl}", lambda k=k, lvl=lvl: store.threshold(k, "<", float(lvl), args.min_duration, args.debounce))
+                   for k, lvl in args.below]
+                + [(f"{k} drops {float(f):.0%} in {s} s", lambda k=k, f=f, s=s: store.drop(k, float(f), float(s)))
+                   for k, f, s in args.drop]
+            )
+            if not conditions:
+                parser.error("query needs at least one condition")
+            start = time.perf_counter()
+            events = None
+            for label, run in conditions:
+                found = run()
+                decoded, total = store.last_scan
+                print(f"{label}: {len(found)} events ({decoded}/{total} chunks decoded)")
+                events = found if events is None else coincident(events, found, args.within)
+            print(f"{len(events)} matching events in {time.perf_counter() - start:.3f} s")
+            for event in events:
+                print(f"  {event['session']}  {event['t_start']:.2f}-{event['t_end']:.2f} s  {event['value']:.2f}")
+    finally:
+        store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
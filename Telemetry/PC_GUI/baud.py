@@ -0,0 +1,158 @@
+"""
+Baud-rate negotiation with the firmware (see TELEMETRY.c).
+
+The link always comes up at BAUD_RATE. negotiate() then:
+
+  1. finds the rate the firmware is at (it may still be at a higher
+     rate from a previous session) by looking for heartbeats;
+  2. proposes each of BAUD_CANDIDATES, fastest first: BDR:<baud>;
+  3. on BDA:<baud>, switches the port and counts heartbeats and bad
+     lines for BAUD_VERIFY_S;
+  4. if the line is clean, confirms with BDC:<baud> and waits for the
+     echo; otherwise it goes back to the previous rate, where the
+     firmware also returns on its own once the confirmation is missing.
+
+No Qt here, so the GUI, headless.py and the benchmarks share it.
+"""
+import time
+
+from config import BAUD_RATE, BAUD_CANDIDATES, BAUD_VERIFY_S, BAUD_MIN_HEARTBEATS, BAUD_REPLY_TIMEOUT_S
+from protocol import HEARTBEAT, parse_line
+from taskprofile import PROFILE
+from params import VALUE, VERSION, ERROR
+
+FIRMWARE_CONFIRM_S = 1.0  # BAUD_CONFIRM_TICKS * TASK_DELAY in TELEMETRY.c
+# Valid lines that are not KEY:float frames: neither frames nor bad lines.
+OTHER_REPLIES = (PROFILE, VALUE, VERSION, ERROR)
+
+
+class Negotiation:
+    """Outcome of negotiate(): the rate in use and what happened on the way."""
+
+    def __init__(self, baud):
+        self.baud = baud
+        self.attempts = []      # (baud, outcome)
+        self.bad_lines = 0      # Rejected lines over the whole negotiation
+        self.elapsed = 0.0
+
+    def summary(self):
+        tried = ", ".join(f"{baud}: {outcome}" for baud, outcome in self.attempts) or "none"
+        return (f"Link at {self.baud} baud ({tried}; {self.bad_lines} bad lines, "
+                f"{self.elapsed:.2f} s)")
+
+
+class _LineReader:
+    """Reads complete lines from a port until a deadline, counting bad ones."""
+
+    def __init__(self, ser):
+        self.ser = ser
+        self.pending = b""
+        self.bad = 0
+
+    def flush(self):
+        self.ser.reset_input_buffer()
+        self.pending = b""
+
+    def frames(self, duration):
+        """Yield (key, value) of every valid line for `duration` seconds."""
+        deadline = time.monotonic() + duration
+        while time.monotonic() < deadline:
+            data = self.ser.read(self.ser.in_waiting or 1)
+            if not data:
+                continue
+            lines = (self.pending + data).split(b"\n")
+            self.pending = lines.pop()
+            if len(self.pending) > 64:
+                self.pending = b""
+                self.bad += 1
+            for line in lines:
+                text = line.decode("ascii", errors="replace")
+                frame = parse_line(text)
+                if frame is None:
+                    if text.strip() and text.partition(":")[0] not in OTHER_REPLIES:
+                        self.bad += 1
+                    continue
+                yield frame
+
+    def heartbeats(self, duration):
+        """(heartbeats, bad lines) seen in `duration` seconds."""
+        bad_before = self.bad
+        count = sum(1 for key, _ in self.frames(duration) if key == HEARTBEAT)
+        return count, self.bad - bad_before
+
+    def reply(self, key, duration):
+        """Value of the first `key` frame within `duration` seconds, or None."""
+        for frame_key, value in self.frames(duration):
+            if frame_key == key:
+                return int(value)
+        return None
+
+
+def _clean(heartbeats, bad):
+    return heartbeats >= BAUD_MIN_HEARTBEATS and bad <= heartbeats // 10
+
+
+def find_rate(ser, reader, rates):
+    """The rate in `rates` at which the firmware's heartbeats come through, or None."""
+    for baud in rates:
+        ser.baudrate = baud
+        reader.flush()
+        heartbeats, bad = reader.heartbeats(BAUD_VERIFY_S)
+        if _clean(heartbeats, bad):
+            return baud
+    return None
+
+
+def negotiate(ser, candidates=BAUD_CANDIDATES, default=BAUD_RATE):
+    """
+    Move an open link to the fastest rate both ends manage. Leaves `ser`
+    at the rate in use and returns a Negotiation. Firmware that does not
+    answer BDR (older builds) is left at `default`.
+    """
+    started = time.monotonic()
+    reader = _LineReader(ser)
+    result = Negotiation(default)
+    current = find_rate(ser, reader, [default] + [b for b in candidates if b != default])
+    if current is None:
+        ser.baudrate = default
+        result.attempts.append((default, "no heartbeat"))
+    else:
+        result.baud = current
+        for baud in candidates:
+            if baud <= current:
+                break
+            outcome = _try_rate(ser, reader, current, baud)
+            result.attempts.append((baud, outcome))
+            if outcome == "ok":
+                result.baud = baud
+                break
+            if outcome == "no answer":
+                break  # The firmware does not negotiate
+    result.bad_lines = reader.bad
+    result.elapsed = time.monotonic() - started
+    return result
+
+
+def _try_rate(ser, reader, current, baud):
+    reader.flush()
+    ser.write(f"BDR:{baud}\r\n".encode("ascii"))
+    accepted = reader.reply("BDA", BAUD_REPLY_TIMEOUT_S)
+    if accepted is None:
+        return "no answer"
+    if accepted != baud:
+        return "refused"
+    ser.baudrate = baud
+    reader.flush()
+    heartbeats, bad = reader.heartbeats(BAUD_VERIFY_S)
+    if _clean(heartbeats, bad):
+        ser.write(f"BDC:{baud}\r\n".encode("ascii"))
+        if reader.reply("BDC", BAUD_REPLY_TIMEOUT_S) == baud:
+            return "ok"
+        outcome = "unconfirmed"
+    else:
+        outcome = f"{heartbeats} heartbeats, {bad} bad lines"
+    # The firmware falls back by itself once the confirmation is overdue.
+    ser.baudrate = current
+    reader.flush()
+    reader.heartbeats(FIRMWARE_CONFIRM_S)
+    return outcome
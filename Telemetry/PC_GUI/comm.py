@@ -1,14 +1,35 @@
+import sys
 import time
 import serial
 import threading
-from PyQt6 import QtWidgets
+from PyQt6 import QtWidgets, QtCore
 from serial.tools import list_ports
-from config import BAUD_RATE, MAX_POINTS
-from uart import SerialReader  # SerialReader will be updated to accept a comm parameter
+from config import BAUD_RATE, BAUD_NEGOTIATE, CHANGE_ONLY_ENCODING, MAX_POINTS, FANOUT_PORT, AUTO_RECONNECT
+from uart import SerialReader, SubscriptionRequest
+from fanout import FanoutClient
+from protocol import subscription_mask
+from signal_db import split_device_key
+from baud import negotiate
+from hotplug import Reconnect, PortWatcher, port_identity
+import encoding
+import data
 
 class CommProtocol:
     def change_connection(self):
         raise NotImplementedError
+
+    def ping(self):
+        """Send a round-trip probe when one is due (called often)."""
+        pass
+
+    def sync_parameters(self):
+        """Keep data.param_table in step with the boat (called often)."""
+        pass
+
+    def set_parameters(self, values):
+        """Send {key: value} parameters to the boat as one batch."""
+        for key, value in values.items():
+            self.send_signal(key, value)
     
     def is_connected(self):
         raise NotImplementedError
@@ -19,11 +40,28 @@ class CommProtocol:
     def start_reader(self):
         raise NotImplementedError
 
-class SerialComm(CommProtocol):
+class _ErrorRelay(QtCore.QObject):
+    """Shows errors reported by the reader thread, and finishes connections, on the GUI thread."""
+    error = QtCore.pyqtSignal(str)
+    call = QtCore.pyqtSignal(object)  # Function to run on the GUI thread
+
     def __init__(self):
+        super().__init__()
+        self.error.connect(lambda message: QtWidgets.QMessageBox.critical(None, "Serial Port Error", message))
+        self.call.connect(lambda function: function())
+
+
+class SerialComm(CommProtocol):
+    def __init__(self, device=None):
+        # Store namespace and link state this port feeds (see devices.py).
+        self.device = device or data.primary
         self.ser = None
+        self.connecting = None  # Port being brought up by connect(), until it is in use
         self.last_ok_time = time.time()
         self.reader_thread = None
+        self.error_relay = _ErrorRelay()
+        self.subscription = SubscriptionRequest()
+        self.reconnect = Reconnect()  # Brings the port back after a failure (see hotplug.py)
 
     def select_serial_port(self):
         ports = [port.device for port in list_ports.comports()]
@@ -42,28 +80,165 @@ class SerialComm(CommProtocol):
         try:
             new_ser = serial.Serial(port, BAUD_RATE, timeout=0.1)
             print(f"Serial port {port} opened.")
-            return new_ser
         except serial.SerialException as e:
             QtWidgets.QMessageBox.critical(None, "Serial Port Error",
                                            f"Error opening serial port {port}:\n{e}")
             return None
+        return new_ser
+
+    def prepare_link(self, new_ser):
+        """Baud-rate negotiation and encoding request (background thread, no dialogs)."""
+        if BAUD_NEGOTIATE:
+            try:
+                print(negotiate(new_ser).summary())
+            except (serial.SerialException, OSError) as e:
+                print(f"Baud-rate negotiation failed, staying at {new_ser.baudrate}: {e}", file=sys.stderr)
+        try:
+            encoding.request(new_ser, CHANGE_ONLY_ENCODING)
+        except (serial.SerialException, OSError) as e:
+            print(f"Error requesting the telemetry encoding: {e}", file=sys.stderr)
 
     def change_connection(self):
+        # A click while the port is being brought up cancels it.
+        if self.connecting is not None:
+            self.connecting = None  # finish_connect() closes the port
+            print("Connection cancelled.")
+            return
+        # A manual disconnect (or a click while reconnecting) stops reconnecting.
+        if self.reconnect.active:
+            self.reconnect.cancel()
+            print("Stopped reconnecting.")
+            return
+        self.reconnect.cancel()
         # Disconnect if already connected.
         if self.ser is not None:
+            # Detach first so the reader does not report the close as an error.
+            ser, self.ser = self.ser, None
             try:
-                self.ser.close()
+                ser.close()
             except Exception as e:
                 QtWidgets.QMessageBox.critical(None, "Serial Port Error",
                                                f"Error disconnecting serial port:\n{e}")
-            self.ser = None
             return
         port = self.select_serial_port()
         if port:
-            new_ser = self.open_serial_port(port)
-            if new_ser:
-                self.ser = new_ser
-                self.last_ok_time = time.time()
+            self.connect(port)
+
+    def connect(self, port):
+        """
+        Open `port` and bring the link up on a background thread, as the
+        negotiation takes up to a few seconds; the port is taken into use
+        on the GUI thread afterwards. Returns False if it cannot be opened.
+        """
+        new_ser = self.open_serial_port(port)
+        if new_ser is None:
+            return False
+        self.connecting = new_ser
+
+        def bring_up():
+            self.prepare_link(new_ser)
+            identity = port_identity(port)
+            self.error_relay.call.emit(lambda: self.finish_connect(new_ser, identity))
+        threading.Thread(target=bring_up, daemon=True).start()
+        return True
+
+    def finish_connect(self, new_ser, identity):
+        """GUI thread: use the port brought up by connect(), unless that was cancelled."""
+        if self.connecting is not new_ser:
+            new_ser.close()
+            return
+        self.connecting = None
+        # Live data replaces any log being browsed.
+        data.close_session_view()
+        self.device.reset(new_ser.baudrate)
+        self.subscription.reset()
+        self.ser = new_ser
+        self.last_ok_time = time.time()
+        self.reconnect.on_connected(identity)
+
+    def on_lost(self, message):
+        """The reader lost the port (reader thread): reconnect in the background, or report it."""
+        if AUTO_RECONNECT and self.reconnect.on_lost():
+            print("Reconnecting to the same device in the background...")
+        else:
+            self.error_relay.error.emit(message)
+
+    def reopen(self, port):
+        """
+        Reconnect to the lost device (PortWatcher thread, no dialogs). The
+        store and any log carry on; returns True once the link is up.
+        """
+        try:
+            new_ser = serial.Serial(port, BAUD_RATE, timeout=0.1)
+        except (serial.SerialException, OSError) as e:
+            print(f"Reconnecting to {port} failed: {e}", file=sys.stderr)
+            return False
+        try:
+            if BAUD_NEGOTIATE:
+                # Only the rate the link had: the firmware is either still at it
+                # or agreed to it before, so no slower probing of the others.
+                previous = self.device.link_monitor.baud
+                candidates = (previous,) if previous != BAUD_RATE else ()
+                print(negotiate(new_ser, candidates).summary())
+            encoding.request(new_ser, CHANGE_ONLY_ENCODING)
+        except (serial.SerialException, OSError) as e:
+            print(f"Reconnecting to {port} failed: {e}", file=sys.stderr)
+            new_ser.close()
+            return False
+        identity = port_identity(port)
+        with self.reconnect.lock:  # The user may cancel meanwhile
+            if not self.reconnect.active:
+                new_ser.close()
+                return True
+            self.device.reset(new_ser.baudrate)
+            self.subscription.reset()
+            self.last_ok_time = time.time()
+            self.ser = new_ser
+            outage = self.reconnect.on_connected(identity)
+        if outage is not None:
+            print(f"Reconnected to {port} after {outage:.2f} s.")
+        return True
+
+    def ping(self):
+        ser = self.ser
+        now = time.time() - data.start_time
+        monitor = self.device.link_monitor
+        if ser is None or not monitor.ping.due(now):
+            return
+        try:
+            ser.write(monitor.ping.message(now))
+        except (serial.SerialException, OSError) as e:
+            print(f"Error sending ping: {e}", file=sys.stderr)  # The reader reports a lost port
+
+    def sync_parameters(self):
+        """Reads the whole table after connecting, again if the boat restarts."""
+        ser = self.ser
+        if ser is None:
+            return
+        try:
+            self.device.param_table.poll(ser)
+        except (serial.SerialException, OSError) as e:
+            print(f"Error requesting parameters: {e}", file=sys.stderr)  # The reader reports a lost port
+
+    def set_parameters(self, values):
+        ser = self.ser
+        if ser is None:
+            QtWidgets.QMessageBox.warning(None, "Serial Port Warning", "Serial port is not open.")
+            return
+        try:
+            self.device.param_table.set(ser, values)
+        except (serial.SerialException, OSError) as e:
+            QtWidgets.QMessageBox.critical(None, "Serial Port Error", f"Error sending parameters:\n{e}")
+
+    def set_subscription(self, keys):
+        """Have the firmware stream only `keys` (see protocol.py)."""
+        ser = self.ser
+        if ser is None:
+            return
+        try:
+            self.subscription.update(ser, subscription_mask(keys), self.device.link_monitor.subscription)
+        except (serial.SerialException, OSError) as e:
+            print(f"Error sending subscription: {e}", file=sys.stderr)  # The reader reports a lost port
 
     def is_connected(self):
         return self.ser is not None and self.ser.is_open
@@ -72,12 +247,12 @@ class SerialComm(CommProtocol):
         if not isinstance(value, (int, float)):
             raise ValueError("Value must be a number.")
         if self.ser and self.ser.is_open:
-            message = f"{signal}:{value:.2f}\r\n"
+            message = f"{signal}:{value:.6f}\r\n"
             try:
                 self.ser.write(message.encode("utf-8"))
                 self.ser.flush()
             except (serial.SerialException, OSError) as e:
-                print(f"Error sending data on serial port: {e}")
+                print(f"Error sending data on serial port: {e}", file=sys.stderr)
                 QtWidgets.QMessageBox.critical(None, "Serial Port Error", f"Error sending data:\n{e}")
                 try:
                     self.ser.close()
@@ -89,9 +264,207 @@ class SerialComm(CommProtocol):
 
     def start_reader(self):
         if self.reader_thread is None or not self.reader_thread.is_alive():
-            reader = SerialReader(self)  # pass self to let the reader update comm attributes
+            # Pass self to let the reader update comm attributes.
+            reader = SerialReader(self, on_error=self.error_relay.error.emit)
             thread = threading.Thread(target=reader.read_serial, daemon=True)
             thread.start()
             self.reader_thread = thread
 
-comm = SerialComm()
+class FanoutComm(CommProtocol):
+    """
+    Viewer of a fan-out server (fanout.py, e.g. headless.py --serve):
+    receives only the signals this GUI plots, stored like serial data.
+    """
+    def __init__(self):
+        self.client = None
+        self.last_ok_time = 0.0
+        self.offset = None      # Local store time minus server time
+        self.keys = set()
+
+    def connect(self, host, port=FANOUT_PORT):
+        try:
+            self.client = FanoutClient(host, port, self.keys, on_batch=self.on_batch)
+        except OSError as e:
+            QtWidgets.QMessageBox.critical(None, "Telemetry Server", f"Could not connect to {host}:{port}:\n{e}")
+            return False
+        print(f"Connected to telemetry server {host}:{port}.")
+        data.close_session_view()
+        data.link_monitor.reset()
+        self.offset = None
+        return True
+
+    def change_connection(self):
+        if self.client is not None:
+            self.client.close()
+            self.client = None
+
+    def is_connected(self):
+        return self.client is not None and self.client.is_connected()
+
+    def set_subscription(self, keys):
+        keys = set(keys)
+        if keys != self.keys:
+            self.keys = keys
+            if self.is_connected():
+                self.client.subscribe(keys)
+
+    def send_signal(self, signal, value):
+        if not isinstance(value, (int, float)):
+            raise ValueError("Value must be a number.")
+        if self.is_connected():
+            self.client.send_command(signal, value)
+        else:
+            QtWidgets.QMessageBox.warning(None, "Telemetry Server", "Not connected to a telemetry server.")
+
+    def start_reader(self):
+        pass  # The client reads on its own thread once connected.
+
+    def on_batch(self, batch):
+        """Called from the client thread for every batch."""
+        now = time.time() - data.start_time
+        if self.offset is None:
+            self.offset = now - batch["now"]
+        if batch.get("ok") is not None:
+            self.last_ok_time = time.time() - batch["ok"]
+        for key, samples in batch["samples"].items():
+            if key not in data.data_history:
+                continue
+            for t, value in samples:
+                data.append_sample(key, value, t + self.offset)
+                data.link_monitor.on_sample(key, t + self.offset)
+
+
+class ConnectionManager(CommProtocol):
+    """
+    The application's connections: the first device's serial port, or a
+    fan-out server chosen from the same port list, plus any additional
+    devices (see devices.py). All serial ports share one reader thread.
+    """
+    SERVER_ITEM = "Telemetry server (TCP)..."
+
+    def __init__(self):
+        self.serial = SerialComm()
+        self.server = FanoutComm()
+        self.active = self.serial
+        self.devices = {}   # name -> SerialComm of the additional devices
+        self.reader = SerialReader(self.serial, on_error=self.serial.error_relay.error.emit)
+        self.reader_thread = None
+        self.watcher = PortWatcher(lambda: [self.serial] + list(self.devices.values()))
+        self.on_devices_changed = None  # Called with the device names after a change
+
+    @property
+    def ser(self):
+        return self.serial.ser if self.active is self.serial else None
+
+    @property
+    def last_ok_time(self):
+        return self.active.last_ok_time
+
+    def change_connection(self):
+        if (self.active.is_connected() or self.active is self.serial
+                and (self.serial.reconnect.active or self.serial.connecting is not None)):
+            self.active.change_connection()  # Disconnect (or stop connecting or reconnecting)
+            return
+        ports = [port.device for port in list_ports.comports()] + [self.SERVER_ITEM]
+        choice, ok = QtWidgets.QInputDialog.getItem(
+            None, "Connect", "Serial port or telemetry server:", ports, 0, False
+        )
+        if not ok:
+            return
+        if choice == self.SERVER_ITEM:
+            address, ok = QtWidgets.QInputDialog.getText(
+                None, "Telemetry Server", "Host[:port]:", text=f"localhost:{FANOUT_PORT}"
+            )
+            if not ok or not address.strip():
+                return
+            host, _, port = address.strip().partition(":")
+            if self.server.connect(host, int(port) if port else FANOUT_PORT):
+                self.active = self.server
+        elif self.serial.connect(choice):
+            self.active = self.serial
+
+    def add_device(self):
+        """Ask for a port and a name, and connect an additional device."""
+        ports = [port.device for port in list_ports.comports()]
+        if not ports:
+            QtWidgets.QMessageBox.critical(None, "Serial Port Error", "No serial ports found.")
+            return
+        port, ok = QtWidgets.QInputDialog.getItem(None, "Add Device", "Serial Port:", ports, 0, False)
+        if not ok:
+            return
+        name, ok = QtWidgets.QInputDialog.getText(None, "Add Device", "Device name:",
+                                                  text=f"boat{len(self.devices) + 2}")
+        name = name.strip()
+        if not ok or not name:
+            return
+        if name in self.devices or "/" in name:
+            QtWidgets.QMessageBox.warning(None, "Add Device", f"Invalid or duplicate device name: {name}")
+            return
+        link = SerialComm(data.add_device(name))
+        if not link.connect(port):
+            data.remove_device(name)
+            return
+        self.devices[name] = link
+        self.reader.add(link)
+        self.devices_changed()
+
+    def remove_device(self, name):
+        link = self.devices.pop(name, None)
+        if link is None:
+            return
+        self.reader.remove(link)
+        link.reconnect.cancel()
+        if link.ser is not None or link.connecting is not None:
+            link.change_connection()  # Disconnect, or cancel the connection
+        data.remove_device(name)
+        self.devices_changed()
+
+    def devices_changed(self):
+        if self.on_devices_changed:
+            self.on_devices_changed(list(self.devices))
+
+    def is_connected(self):
+        return self.active.is_connected()
+
+    def send_signal(self, signal, value):
+        device, key = split_device_key(signal)
+        if device is None:
+            self.active.send_signal(signal, value)
+        elif device in self.devices:
+            self.devices[device].send_signal(key, value)
+        else:
+            QtWidgets.QMessageBox.warning(None, "Serial Port Warning", f"Device {device} is not connected.")
+
+    def set_subscription(self, keys):
+        """Signals the GUI currently plots or logs; each source only sends its own."""
+        by_device = {}
+        for signal in keys:
+            device, key = split_device_key(signal)
+            by_device.setdefault(device, set()).add(key)
+        self.active.set_subscription(by_device.get(None, set()))
+        for name, link in self.devices.items():
+            link.set_subscription(by_device.get(name, set()))
+
+    def ping(self):
+        self.active.ping()
+        for link in self.devices.values():
+            link.ping()
+
+    def sync_parameters(self):
+        self.active.sync_parameters()
+        for link in self.devices.values():
+            link.sync_parameters()
+
+    def set_parameters(self, values):
+        self.active.set_parameters(values)
+
+    def start_reader(self):
+        """One thread reads every serial port (see uart.SerialReader)."""
+        if self.reader_thread is None or not self.reader_thread.is_alive():
+            self.reader_thread = threading.Thread(target=self.reader.read_serial, daemon=True)
+            self.reader_thread.start()
+            if not self.watcher.thread.is_alive():
+                self.watcher.start()
+
+
+comm = ConnectionManager()
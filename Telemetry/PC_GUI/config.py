@@ -10,7 +10,67 @@ if sys.platform.startswith('linux'):
         os.environ["QT_QPA_PLATFORM"] = "xcb"
 
 # --- Configuration ---
-BAUD_RATE = 115200
+BAUD_RATE = 115200          # Rate the link comes up at (and falls back to)
+BAUD_NEGOTIATE = True       # Try to move to a faster rate after connecting (see baud.py)
+BAUD_CANDIDATES = (921600, 460800, 230400)  # Proposed fastest first
+BAUD_VERIFY_S = 0.3         # Heartbeats are counted this long at a new rate
+BAUD_MIN_HEARTBEATS = 5     # A rate is kept with at least this many clean heartbeats
+BAUD_REPLY_TIMEOUT_S = 0.5  # Wait for the firmware's BDA/BDC answers
+CHANGE_ONLY_ENCODING = True # Ask the firmware to only send values that moved (see encoding.py)
 UPDATE_INTERVAL_MS = 5      # Update interval in milliseconds
 PLOT_UPDATE_INTERVAL_MS = 30 # Plot update interval
-MAX_POINTS = 5000             # Maximum data points to store per channel
\ No newline at end of file
+MAX_POINTS = 5000             # Maximum data points to store per channel
+HISTORY_LEVELS = (10, 100, 1000)  # Samples per min/max/mean bucket in the history pyramid
+LEVEL_MAX_BUCKETS = 5000          # Buckets kept per pyramid level
+
+# --- Logging ---
+SEGMENT_MAX_BYTES = 20 * 1024 * 1024  # Start a new log segment past this size
+SEGMENT_MAX_SECONDS = 15 * 60         # ... or after this long
+
+# --- Console ---
+CONSOLE_FLUSH_MS = 100        # Queued console lines are shown this often,
+CONSOLE_BATCH_LINES = 200     # at most this many per flush
+CONSOLE_MAX_PENDING = 5000    # Lines queued past this are dropped (and counted)
+CONSOLE_MAX_BLOCKS = 2000     # Lines kept in the console view
+
+# --- Log Viewer ---
+LAZY_LOAD_BYTES = 50 * 1024 * 1024  # Logs above this size open in windowed viewer mode
+SESSION_CACHE_CHUNKS = 64           # Decoded chunks kept in the viewer's LRU cache
+
+# --- Analytics ---
+ANALYTICS_DB = "analytics.db"  # SQLite store used by analytics.py
+ANALYTICS_CHUNK_ROWS = 1024    # Samples per stored chunk (the unit of skipping)
+
+# --- Reconnection ---
+AUTO_RECONNECT = True       # Reopen a lost port in the background (see hotplug.py)
+HOTPLUG_POLL_S = 0.5        # Ports are listed this often
+RECONNECT_MIN_S = 0.25      # Backoff between failed attempts starts here,
+RECONNECT_MAX_S = 5.0       # doubling up to this
+
+# --- Link Quality ---
+LINK_GAP_FACTOR = 3.0            # An arrival later than this many expected periods is a gap
+LINK_RATE_TAU_S = 2.0            # Time constant of the smoothed arrival rate
+JITTER_HIST_MIN_S = 0.001        # Jitter histogram: first bin edge,
+JITTER_HIST_BINS_PER_DECADE = 8  # log-spaced bins,
+JITTER_HIST_DECADES = 4          # covering 1 ms to 10 s
+LINK_REFRESH_MS = 500            # Link quality panel refresh interval
+SUBSCRIBE_RETRY_S = 1.0          # Resend an unacknowledged signal subscription after this
+PARAM_REPLY_TIMEOUT_S = 1.0      # Re-request the parameter table / drop unanswered writes after this
+PING_INTERVAL_S = 0.5            # Round-trip probes sent this often
+PING_TIMEOUT_S = 2.0             # A probe not echoed within this is lost
+PING_WINDOW = 120                # Round trips kept for the percentiles (last minute)
+HEALTH_WINDOW_S = 10.0           # Frame loss shown by the health indicator is over this window
+HEALTH_RTT_WARN_MS = 150.0       # Health indicator turns orange above this 95th percentile RTT,
+HEALTH_LOSS_WARN = 0.02          # or above this fraction of lost frames
+
+# --- Statistics panel ---
+STATS_WINDOWS_S = (1.0, 10.0, 60.0)  # Rolling windows offered (see stats.py)
+STATS_PANES = 10                     # Panes per window: its time resolution
+STATS_SKETCH_ACCURACY = 0.02         # Relative accuracy of the percentiles
+STATS_SKETCH_RANGE = (1e-3, 1e5)     # Magnitudes the percentile sketch resolves
+STATS_REFRESH_MS = 500               # Panel refresh interval
+
+# --- Fan-out ---
+FANOUT_PORT = 8765                 # TCP port of the live telemetry feed
+FANOUT_BATCH_MS = 50               # Samples are sent to viewers in batches this often
+FANOUT_MAX_BUFFER = 1024 * 1024    # Bytes queued for a viewer before it is dropped
@@ -0,0 +1,163 @@
+"""
+Console panel that sys.stdout / sys.stderr are redirected to.
+
+write() may be called from any thread (the serial reader prints its
+errors): complete lines are only queued under a lock, and a GUI-thread
+timer moves them to the text view in batches of at most
+CONSOLE_BATCH_LINES every CONSOLE_FLUSH_MS. Past CONSOLE_MAX_PENDING
+queued lines new ones are dropped and counted, the view keeps
+CONSOLE_MAX_BLOCKS lines, and a line identical to the previous one only
+bumps its "(xN)" counter (already in the queue), so an error storm
+cannot stall the GUI.
+"""
+import html
+import threading
+from collections import deque
+from PyQt6 import QtWidgets, QtCore, QtGui
+
+from config import CONSOLE_FLUSH_MS, CONSOLE_BATCH_LINES, CONSOLE_MAX_PENDING, CONSOLE_MAX_BLOCKS
+
+DEBUG, INFO, WARNING, ERROR = range(4)
+LEVEL_NAMES = ["Debug", "Info", "Warning", "Error"]
+LEVEL_COLORS = [QtGui.QColor("gray"), None, QtGui.QColor("orange"), QtGui.QColor("red")]
+
+
+class ConsoleStream:
+    """File-like object writing into a Console at a fixed level."""
+    encoding = "utf-8"
+
+    def __init__(self, console, level):
+        self.console = console
+        self.level = level
+        self.partial = {}  # thread id -> text written since its last newline
+        self.lock = threading.Lock()
+
+    def write(self, msg):
+        thread = threading.get_ident()
+        with self.lock:
+            *lines, rest = (self.partial.pop(thread, "") + msg).split("\n")
+            if rest:
+                self.partial[thread] = rest
+        for line in lines:
+            self.console.log(line, self.level)
+        return len(msg)
+
+    def flush(self):
+        pass
+
+    def isatty(self):
+        return False
+
+
+class Console(QtWidgets.QWidget):
+    """Bounded, batched log view with repeat collapsing and a level filter."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.lock = threading.Lock()
+        self.pending = []   # [level, text, repeats] queued by any thread
+        self.dropped = 0    # Lines refused while the queue was full
+        # Lines shown, newest last, as [level, text, repeats]; kept to re-filter.
+        self.entries = deque(maxlen=CONSOLE_MAX_BLOCKS)
+        self.min_level = INFO
+
+        layout = QtWidgets.QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        bar = QtWidgets.QHBoxLayout()
+        bar.addWidget(QtWidgets.QLabel("Show:"))
+        self.level_combo = QtWidgets.QComboBox()
+        self.level_combo.addItems(LEVEL_NAMES)
+        self.level_combo.setCurrentIndex(self.min_level)
+        self.level_combo.currentIndexChanged.connect(self.set_min_level)
+        bar.addWidget(self.level_combo)
+        bar.addStretch(1)
+        clear_button = QtWidgets.QPushButton("Clear")
+        clear_button.clicked.connect(self.clear)
+        bar.addWidget(clear_button)
+        layout.addLayout(bar)
+
+        self.text_edit = QtWidgets.QPlainTextEdit()
+        self.text_edit.setReadOnly(True)
+        self.text_edit.setMaximumBlockCount(CONSOLE_MAX_BLOCKS)
+        layout.addWidget(self.text_edit)
+
+        self.timer = QtCore.QTimer(self)
+        self.timer.timeout.connect(self.flush_pending)
+        self.timer.start(CONSOLE_FLUSH_MS)
+
+    def stream(self, level):
+        """File-like object for sys.stdout / sys.stderr."""
+        return ConsoleStream(self, level)
+
+    def log(self, text, level=INFO):
+        """Queue one line; safe from any thread."""
+        text = text.rstrip()
+        with self.lock:
+            last = self.pending[-1] if self.pending else None
+            if last is not None and last[0] == level and last[1] == text:
+                last[2] += 1
+            elif len(self.pending) >= CONSOLE_MAX_PENDING:
+                self.dropped += 1
+            else:
+                self.pending.append([level, text, 1])
+
+    # --- GUI thread ---
+    def flush_pending(self):
+        with self.lock:
+            batch = self.pending[:CONSOLE_BATCH_LINES]
+            del self.pending[:CONSOLE_BATCH_LINES]
+            dropped = 0
+            if not self.pending:  # Reported after the lines queued before the drop
+                dropped, self.dropped = self.dropped, 0
+        if dropped:
+            batch.append([WARNING, f"Console: {dropped} lines dropped", 1])
+        if not batch:
+            return
+        scrollbar = self.text_edit.verticalScrollBar()
+        at_bottom = scrollbar.value() == scrollbar.maximum()
+        for level, text, repeats in batch:
+            self.add_entry(level, text, repeats)
+        if at_bottom:
+            scrollbar.setValue(scrollbar.maximum())
+
+    def add_entry(self, level, text, repeats):
+        last = self.entries[-1] if self.entries else None
+        if last is not None and last[0] == level and last[1] == text:
+            last[2] += repeats
+            if level >= self.min_level:
+                self.replace_last_block(last)
+            return
+        entry = [level, text, repeats]
+        self.entries.append(entry)
+        if level >= self.min_level:
+            self.append_block(entry)
+
+    def format_entry(self, entry):
+        level, text, repeats = entry
+        if repeats > 1:
+            text = f"{text}  (x{repeats})"
+        text = html.escape(text).replace(" ", "&nbsp;")
+        color = LEVEL_COLORS[level]
+        return f'<span style="color:{color.name()}">{text}</span>' if color else text
+
+    def append_block(self, entry):
+        self.text_edit.appendHtml(self.format_entry(entry))
+
+    def replace_last_block(self, entry):
+        cursor = QtGui.QTextCursor(self.text_edit.document())
+        cursor.movePosition(QtGui.QTextCursor.MoveOperation.End)
+        cursor.movePosition(QtGui.QTextCursor.MoveOperation.StartOfBlock,
+                            QtGui.QTextCursor.MoveMode.KeepAnchor)
+        cursor.removeSelectedText()
+        cursor.insertHtml(self.format_entry(entry))
+
+    def set_min_level(self, level):
+        self.min_level = level
+        self.text_edit.clear()
+        for entry in self.entries:
+            if entry[0] >= level:
+                self.append_block(entry)
+
+    def clear(self):
+        self.entries.clear()
+        self.text_edit.clear()
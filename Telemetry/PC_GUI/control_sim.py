@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Offline simulator of the firmware's roll and yaw-rate PI controllers
+(roll_controller() and yaw_rate_controller() in CONTROL.c), for tuning
+the gains off the water.
+
+The control law is computed exactly as the firmware does: float32, the
+same order of operations, output saturation with tracking anti-windup
+(clamp_with_integrator()), the roll integrator reset near level and the
+first-run dt of 0. Every array of (Kp, Ki) pairs runs at once:
+
+    python control_sim.py step --loop yaw --kp 0:10:41 --ki 0:10:41
+    python control_sim.py replay log_regatta_2.csv --loop roll --kp 0:5:21 --ki 0:2:21
+
+`step` closes the loop around a first-order plant (PLANTS) and ranks the
+gains by settling time and overshoot; `replay` feeds the logged ROL or
+GYZ and radio CH1 through the controller (open loop: the log cannot say
+how the boat would have answered other gains) and reports saturation and
+servo activity. STM32/Tests/test_control_sim.py pins this module to a
+host build of CONTROL.c.
+"""
+import argparse
+import numpy as np
+
+F32 = np.float32
+
+# --- Firmware constants (CONTROL.c, SERVO.h, RADIO.c, freertos.c) ---
+CONTROL_PERIOD_MS = 20             # TASK_DELAY of the control task
+OUTPUT_LIMITS = {
+    "roll": (0.0, 30.0),           # TWIST_MIN_ANGLE, TWIST_MAX_ANGLE
+    "yaw": (-35.0, 35.0),          # RUDDER_MIN_ANGLE, RUDDER_MAX_ANGLE
+}
+YAW_RATE_LIMITS = (-5.0, 5.0)      # MIN_YAW_RATE, MAX_YAW_RATE
+ROLL_RESET_DEG = 1.0               # Roll integrator reset below this |roll|
+RADIO_CH1_RANGE = (1234, 1732)     # radioCalibration.ch1_min/ch1_max defaults
+MEASUREMENTS = {"roll": "ROL", "yaw": "GYZ"}
+
+# --- Plant models for closed-loop steps ---
+# roll: the wind heels the boat by `step` degrees, twist spills it:
+#       tau * roll' = -step + gain * twist - roll
+# yaw:  the yaw-rate setpoint steps by `step` rad/s:
+#       tau * rate' = gain * rudder - rate
+PLANTS = {
+    "roll": {"gain": 1.0, "tau": 1.0, "step": 20.0},
+    "yaw": {"gain": 0.1, "tau": 0.5, "step": 2.0},
+}
+SETTLE_BAND = 0.05   # Fraction of the step the error must stay within
+
+
+class Controller:
+    """
+    One of the firmware's PI loops ("roll" or "yaw") for arrays of gains
+    (broadcast together); the integrators are one per gain pair.
+    """
+
+    def __init__(self, loop, kp, ki):
+        self.loop = loop
+        self.kp = np.asarray(kp, dtype=F32)
+        self.ki = np.asarray(ki, dtype=F32)
+        self.integrator = np.zeros(np.broadcast(self.kp, self.ki).shape, dtype=F32)
+        self.last_tick = 0
+        self.low, self.high = (F32(limit) for limit in OUTPUT_LIMITS[loop])
+
+    def delta_time(self, tick):
+        """get_delta_time(): seconds since the last run, 0 on the first one."""
+        dt = F32(0.0)
+        if self.last_tick != 0:
+            dt = F32((tick - self.last_tick) & 0xFFFFFFFF) * F32(1e-3)
+        self.last_tick = tick
+        return max(dt, F32(0.0))
+
+    def step(self, measurement, setpoint, tick):
+        """
+        One control run at kernel tick `tick` (ms). Returns the outputs and
+        a mask of the saturated ones.
+        """
+        measurement = np.asarray(measurement, dtype=F32)
+        error = F32(setpoint) - measurement
+        dt = self.delta_time(tick)
+        unsat = self.kp * error + self.integrator
+        # clamp_with_integrator(): tracking anti-windup
+        out = np.minimum(np.maximum(unsat, self.low), self.high)
+        dw = (out - unsat) / np.where(self.kp > 0, self.kp, F32(1.0))
+        self.integrator = self.integrator + self.ki * dt * (error + dw)
+        if self.loop == "roll":
+            self.integrator = np.where(np.abs(measurement) < F32(ROLL_RESET_DEG), F32(0.0), self.integrator)
+        return out, out != unsat
+
+
+def yaw_setpoint(ch1):
+    """Yaw-rate setpoint for a raw CH1 pulse (us): normalize() and map_radio() in RADIO.c."""
+    low, high = RADIO_CH1_RANGE
+    if ch1 <= low:
+        radio = F32(0.0)
+    elif ch1 >= high:
+        radio = F32(1.0)
+    else:
+        radio = F32(int(ch1) - low) / F32(high - low)
+    return radio * (F32(YAW_RATE_LIMITS[1]) - F32(YAW_RATE_LIMITS[0])) + F32(YAW_RATE_LIMITS[0])
+
+
+# --- Closed loop: step response on a plant model ---
+def simulate_step(loop, kp, ki, duration=10.0, step_time=1.0, plant=None):
+    """
+    Closed-loop run of the controller on PLANTS[loop] for every gain pair.
+    Returns (t, error, saturated), with one column per gain pair.
+    """
+    plant = dict(PLANTS[loop], **(plant or {}))
+    controller = Controller(loop, kp, ki)
+    dt = CONTROL_PERIOD_MS / 1000.0
+    ticks = int(round(duration / dt))
+    y = np.zeros(controller.integrator.shape)
+    t = np.arange(ticks) * dt
+    errors = np.empty((ticks,) + y.shape)
+    saturated = np.empty((ticks,) + y.shape, dtype=bool)
+    for i in range(ticks):
+        stepped = t[i] >= step_time
+        setpoint = plant["step"] if loop == "yaw" and stepped else 0.0
+        out, saturated[i] = controller.step(y, setpoint, CONTROL_PERIOD_MS * (i + 1))
+        errors[i] = setpoint - y
+        if loop == "roll":
+            target = -(plant["step"] if stepped else 0.0) + plant["gain"] * out
+        else:
+            target = plant["gain"] * out
+        y = y + dt / plant["tau"] * (target - y)
+    return t, errors, saturated
+
+
+def step_metrics(t, errors, saturated, step, step_time=1.0):
+    """
+    {metric: array per gain pair}: overshoot (% of the step), settling
+    time (s after the step until the error stays within SETTLE_BAND; inf
+    if it does not for the last tenth of the run, e.g. a limit cycle),
+    saturation (fraction of runs) and final error (mean over that tenth).
+    """
+    after = t >= step_time
+    errors, saturated, t = errors[after], saturated[after], t[after] - step_time
+    overshoot = np.maximum(0.0, (-errors).max(axis=0)) / step * 100.0 + 0.0
+    outside = np.abs(errors) > SETTLE_BAND * step
+    tail_length = max(1, len(t) // 10)
+    last_outside = len(t) - 1 - np.argmax(outside[::-1], axis=0)
+    settling = np.where(outside.any(axis=0), t[np.minimum(last_outside + 1, len(t) - 1)], 0.0)
+    settling = np.where(outside[-tail_length:].any(axis=0), np.inf, settling)
+    tail = errors[-tail_length:]
+    return {
+        "overshoot": overshoot,
+        "settling": settling,
+        "saturation": saturated.mean(axis=0),
+        "final_error": np.abs(tail).mean(axis=0),
+    }
+
+
+# --- Open loop: replay of a log ---
+def replay(arrays, loop, kp, ki):
+    """
+    Controller outputs for the logged measurement (and CH1 setpoint for
+    yaw), held between samples, at the control rate. Returns
+    (t, outputs, saturated), one column per gain pair.
+    """
+    key = MEASUREMENTS[loop]
+    if key not in arrays or not len(arrays[key][0]):
+        raise ValueError(f"The log has no {key} samples")
+    t_meas, measured = arrays[key]
+    dt = CONTROL_PERIOD_MS / 1000.0
+    t = np.arange(t_meas[0], t_meas[-1], dt)
+    measurement = measured[np.searchsorted(t_meas, t, side="right") - 1]
+    if loop == "yaw":
+        if "RW1" not in arrays or not len(arrays["RW1"][0]):
+            raise ValueError("The log has no RW1 samples for the yaw-rate setpoint")
+        t_radio, radio = arrays["RW1"]
+        index = np.clip(np.searchsorted(t_radio, t, side="right") - 1, 0, None)
+        setpoints = [yaw_setpoint(ch1) for ch1 in radio[index]]
+    else:
+        setpoints = np.zeros(len(t))
+    controller = Controller(loop, kp, ki)
+    outputs = np.empty((len(t),) + controller.integrator.shape, dtype=F32)
+    saturated = np.empty(outputs.shape, dtype=bool)
+    for i in range(len(t)):
+        outputs[i], saturated[i] = controller.step(measurement[i], setpoints[i], CONTROL_PERIOD_MS * (i + 1))
+    return t, outputs, saturated
+
+
+def replay_metrics(t, outputs, saturated):
+    """{metric: array per gain pair}: saturation fraction, RMS output and servo travel (deg/s)."""
+    duration = max(t[-1] - t[0], CONTROL_PERIOD_MS / 1000.0) if len(t) else 1.0
+    outputs = outputs.astype(float)
+    return {
+        "saturation": saturated.mean(axis=0),
+        "rms": np.sqrt((outputs ** 2).mean(axis=0)),
+        "travel": np.abs(np.diff(outputs, axis=0)).sum(axis=0) / duration,
+    }
+
+
+# --- Command line ---
+def parse_range(text):
+    """"start:stop:count" (inclusive) or a single value, as an array."""
+    parts = text.split(":")
+    try:
+        if len(parts) == 1:
+            return np.array([float(parts[0])])
+        if len(parts) == 3:
+            return np.linspace(float(parts[0]), float(parts[1]), int(parts[2]))
+    except ValueError:
+        pass
+    raise argparse.ArgumentTypeError(f"expected a value or start:stop:count, got '{text}'")
+
+
+def print_table(kp, ki, metrics, order, columns, top):
+    print(f"{'Kp':>8} {'Ki':>8} " + " ".join(f"{name:>12}" for name, _ in columns))
+    for i in order[:top]:
+        cells = " ".join(f"{fmt.format(metrics[name][i]):>12}" for name, fmt in columns)
+        print(f"{kp[i]:8.3f} {ki[i]:8.3f} {cells}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline simulator of the firmware PI controllers")
+    sub = parser.add_subparsers(dest="command", required=True)
+    step = sub.add_parser("step", help="Closed-loop step on a plant model, gains ranked")
+    play = sub.add_parser("replay", help="Open-loop replay of a log (CSV, .rcs or segmented)")
+    play.add_argument("log")
+    for command in (step, play):
+        command.add_argument("--loop", choices=sorted(OUTPUT_LIMITS), default="roll")
+        command.add_argument("--kp", type=parse_range, default=parse_range("0:5:21"))
+        command.add_argument("--ki", type=parse_range, default=parse_range("0:2:21"))
+        command.add_argument("--top", type=int, default=15, help="Gain pairs listed")
+    step.add_argument("--duration", type=float, default=10.0, help="Seconds simulated")
+    step.add_argument("--gain", type=float, help="Plant gain (see PLANTS)")
+    step.add_argument("--tau", type=float, help="Plant time constant in s")
+    args = parser.parse_args(argv)
+
+    kp, ki = (grid.ravel() for grid in np.meshgrid(args.kp, args.ki, indexing="ij"))
+    if args.command == "step":
+        plant = {name: getattr(args, name) for name in ("gain", "tau") if getattr(args, name) is not None}
+        t, errors, saturated = simulate_step(args.loop, kp, ki, args.duration, plant=plant)
+        metrics = step_metrics(t, errors, saturated, PLANTS[args.loop]["step"])
+        order = np.lexsort((metrics["overshoot"], metrics["settling"]))
+        print(f"{len(kp)} gain pairs, {len(t)} control runs each, "
+              f"{np.isfinite(metrics['settling']).sum()} settle\n")
+        print_table(kp, ki, metrics, order, [("settling", "{:.2f} s"), ("overshoot", "{:.1f} %"),
+                                             ("saturation", "{:.1%}"), ("final_error", "{:.3f}")], args.top)
+    else:
+        from analytics import read_log_arrays
+        try:
+            t, outputs, saturated = replay(read_log_arrays(args.log), args.loop, kp, ki)
+        except ValueError as e:
+            raise SystemExit(str(e))
+        metrics = replay_metrics(t, outputs, saturated)
+        order = np.lexsort((metrics["travel"], metrics["saturation"]))
+        print(f"{len(kp)} gain pairs over {len(t)} control runs ({len(t) * CONTROL_PERIOD_MS / 1000:.0f} s)\n")
+        print_table(kp, ki, metrics, order, [("saturation", "{:.1%}"), ("rms", "{:.2f}"),
+                                             ("travel", "{:.1f}/s")], args.top)
+
+
+if __name__ == "__main__":
+    main()
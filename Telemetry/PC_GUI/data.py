@@ -1,13 +1,91 @@
-from signals import SIGNAL_KEYS
+from signal_db import SIGNAL_KEYS
+from config import MAX_POINTS
+from pyramid import HistoryPyramid
+from linkquality import LinkMonitor
+from encoding import HoldDecoder
+from params import ParamTable
+from taskprofile import TaskProfile
+from snapshot import Snapshot
+from devices import DeviceStore
 import time
 
 # --- Data Storage ---
 data_history = {key: [] for key in SIGNAL_KEYS}
 start_time = time.time()
+# Min/max/mean summaries of everything received, beyond the last MAX_POINTS.
+history_pyramid = HistoryPyramid()
+# Arrival statistics of the live link, fed by the serial reader.
+link_monitor = LinkMonitor()
+# Fills in the samples a change-only stream leaves out (see encoding.py).
+hold_decoder = HoldDecoder(link_monitor)
+# The boat's parameter table as last read back (see params.py).
+param_table = ParamTable()
+# Per-task CPU shares streamed while CPU is subscribed (see taskprofile.py).
+task_profile = TaskProfile()
+# Rolling per-signal statistics (see stats.py); set by the GUI's statistics panel.
+rolling_stats = None
+
+# --- Devices ---
+# The first device feeds the globals above under the plain signal keys;
+# additional ones get their own DeviceStore and "<name>/<key>" entries.
+primary = DeviceStore(None, link_monitor, hold_decoder, param_table, task_profile)
+devices = {}  # name -> DeviceStore of the additional devices
+
+def add_device(name):
+    """Create the store namespace of an additional device."""
+    store = DeviceStore(name)
+    for key in SIGNAL_KEYS:
+        data_history.setdefault(store.key(key), [])
+    devices[name] = store
+    return store
+
+def remove_device(name):
+    """Forget a device; its samples stay in data_history until cleared."""
+    devices.pop(name, None)
+
+def append_sample(key, value, t):
+    """Store one received sample in the raw history and the summary pyramid."""
+    signal_data = data_history.setdefault(key, [])  # A loaded log may have replaced the keys
+    signal_data.append((value, t))
+    if len(signal_data) > MAX_POINTS:
+        data_history[key] = signal_data[-MAX_POINTS:]
+    history_pyramid.add(key, value, t)
+    if rolling_stats is not None:
+        rolling_stats.add(key, value, t)
+
+# --- Freeze ---
+# Snapshot of data_history the tiles render and measure against while frozen.
+frozen = None
+
+def freeze():
+    global frozen
+    frozen = Snapshot(data_history, time.time() - start_time)
+
+def unfreeze():
+    global frozen
+    frozen = None
+
+def plot_history():
+    """The samples tiles should show: the frozen snapshot, or the live history."""
+    return frozen if frozen is not None else data_history
+
+def plot_time():
+    """'Now' for the tiles: the freeze time while frozen."""
+    return frozen.t if frozen is not None else time.time() - start_time
+
+# --- Log viewer ---
+# SessionReader used instead of data_history while browsing a large log.
+session_view = None
+
+def close_session_view():
+    """Leave log-viewer mode and release the session file."""
+    global session_view
+    if session_view is not None:
+        session_view.close()
+        session_view = None
  
 # --- Global variables for CSV Logging ---
 logging_active = False
 logging_start_time = None
 logging_vars = []  # List of signal keys to log
-csv_file = None
-csv_writer = None
+active_log = None      # TickLogger writing the current log
@@ -1,73 +1,235 @@
-import pandas as pd
-import ast
+#!/usr/bin/env python3
+"""
+Offline data-rate and signal-quality report for telemetry logs.
+
+Takes log files (CSV, .rcs or segmented) and/or directories, analyses
+them in parallel with a process pool and writes one combined report.
+Per session and per signal it reports the sample rate, inter-arrival
+jitter, gaps, stuck values and a min/max/mean/std summary.
+
+CSV logs hold one row per logging tick with the latest value of every
+signal, so arrivals are estimated from the rows where a value changes;
+a signal repeating exactly the same value therefore looks slower (or
+stuck) rather than faster. Session logs store the real sample times.
+
+    python datarate.py logs/ --json report.json --csv report.csv -j 8
+"""
+import os
+import sys
+import glob
+import json
+import time
+import argparse
 import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+
+from session import SESSION_EXT, read_session, iter_csv_chunks
+from segments import MANIFEST_SUFFIX, SEGMENT_PATTERN, find_manifest, read_manifest, load_segments, segment_paths
+
+GAP_FACTOR = 5.0      # An interval longer than this many median intervals is a gap
+MIN_GAP_S = 0.2       # ... and at least this long
+STUCK_MIN_S = 5.0     # Constant values held longer than this are reported as stuck
+
+SIGNAL_FIELDS = [
+    "file", "signal", "samples", "coverage", "rate_hz", "interval_mean_s", "jitter_s",
+    "interval_p99_s", "interval_max_s", "gaps", "gap_time_s", "longest_constant_s",
+    "stuck_runs", "min", "max", "mean", "std",
+]
+
+
+def find_logs(paths):
+    """Expand files and directories into log paths, one entry per segmented log."""
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            for pattern in ("*.csv", "*" + SESSION_EXT, "*" + MANIFEST_SUFFIX):
+                found.extend(glob.glob(os.path.join(path, "**", pattern), recursive=True))
+        else:
+            found.append(path)
+    logs = []
+    for path in sorted(set(found)):
+        if path.endswith(".csv") and os.path.exists(os.path.splitext(path)[0] + SESSION_EXT):
+            continue  # Session file converted from this CSV (see session.convert_csv)
+        if SEGMENT_PATTERN.match(path) and find_manifest(path):
+            continue  # Part of a segmented log, analysed through its manifest
+        logs.append(path)
+    return logs
+
+
+def read_csv_log(paths):
+    """
+    ({key: (t, v)} with NaN gaps, row times) of CSV files read one after
+    the other. The row times come from the t column, so a log of ticks
+    without any signal still has them.
+    """
+    rows, parts = [], {}
+    for path in paths:
+        try:
+            chunks = list(iter_csv_chunks(path))
+        except Exception as e:
+            if len(paths) == 1:
+                raise
+            print(f"Skipping unreadable segment {path}: {e}")  # As load_segments() does
+            continue
+        for t, columns in chunks:
+            rows.append(t)
+            for key, v in columns.items():
+                parts.setdefault(key, []).append((t, v))
+    arrays = {key: (np.concatenate([t for t, _ in p]), np.concatenate([v for _, v in p]))
+              for key, p in parts.items()}
+    return arrays, np.concatenate(rows) if rows else np.empty(0)
+
+
+def read_log(path):
+    """
+    ({key: (t, v)} with NaN gaps, row times or None, snapshot flag) for
+    any supported log.
+    """
+    manifest = find_manifest(path)
+    if manifest and read_manifest(manifest).get("format") == "csv":
+        return (*read_csv_log(segment_paths(manifest)), True)
+    if manifest:
+        return load_segments(manifest, keep_gaps=True), None, False
+    if path.endswith(SESSION_EXT):
+        return read_session(path)[1], None, False
+    return (*read_csv_log([path]), True)
+
+
+def arrivals(t, v, snapshot):
+    """Sample times and values: all samples, or value changes for CSV snapshots."""
+    present = ~np.isnan(v)
+    if not snapshot:
+        return t[present], v[present]
+    t, v = t[present], v[present]
+    if len(v) == 0:
+        return t, v
+    changed = np.concatenate(([True], v[1:] != v[:-1]))
+    return t[changed], v[changed]
+
+
+def constant_runs(t, v):
+    """Durations over which the value did not change (from first to last repeat)."""
+    if len(v) < 2:
+        return np.empty(0)
+    boundaries = np.flatnonzero(np.concatenate(([True], v[1:] != v[:-1], [True])))
+    starts, stops = boundaries[:-1], boundaries[1:] - 1
+    # A run lasts until the next different value arrives.
+    ends = np.minimum(stops + 1, len(t) - 1)
+    return t[ends] - t[starts]
+
+
+def signal_stats(t, v, snapshot):
+    """Metrics for one signal."""
+    present = ~np.isnan(v)
+    stats = {"samples": 0, "coverage": float(present.mean()) if len(v) else 0.0}
+    values = v[present]
+    if len(values):
+        stats.update({"min": float(values.min()), "max": float(values.max()),
+                      "mean": float(values.mean()), "std": float(values.std())})
+    # Stuck values are judged on every row the signal was present.
+    held = constant_runs(t[present], values)
+    stats["longest_constant_s"] = float(held.max()) if len(held) else 0.0
+    stats["stuck_runs"] = int((held >= STUCK_MIN_S).sum())
+
+    ts, _ = arrivals(t, v, snapshot)
+    stats["samples"] = int(len(ts))
+    if len(ts) < 2:
+        return stats
+    intervals = np.diff(ts)
+    median = float(np.median(intervals))
+    gaps = intervals[intervals > max(GAP_FACTOR * median, MIN_GAP_S)]
+    stats.update({
+        "rate_hz": (len(ts) - 1) / (ts[-1] - ts[0]) if ts[-1] > ts[0] else None,
+        "interval_mean_s": float(intervals.mean()),
+        "jitter_s": float(intervals.std()),
+        "interval_p99_s": float(np.percentile(intervals, 99)),
+        "interval_max_s": float(intervals.max()),
+        "gaps": int(len(gaps)),
+        "gap_time_s": float(gaps.sum()),
+    })
+    return stats
+
+
+def analyse_log(path):
+    """Report for one log; runs in a worker process."""
+    start = time.perf_counter()
+    try:
+        arrays, rows, snapshot = read_log(path)
+    except Exception as e:
+        return {"file": path, "error": str(e)}
+    session = {"file": path, "format": "csv" if snapshot else "session", "signals": {}}
+    if rows is not None:
+        times = [rows[0], rows[-1]] if len(rows) else []
+    else:
+        times = [t[0] for t, _ in arrays.values() if len(t)] + [t[-1] for t, _ in arrays.values() if len(t)]
+    session["duration_s"] = float(max(times) - min(times)) if times else 0.0
+    if rows is not None and len(rows) > 1:
+        ticks = np.diff(rows)
+        session.update({"rows": int(len(rows)), "tick_rate_hz": float(1 / ticks.mean()),
+                        "tick_jitter_s": float(ticks.std()), "tick_max_s": float(ticks.max())})
+    for key, (t, v) in arrays.items():
+        session["signals"][key] = signal_stats(t, v, snapshot)
+    session["analysis_s"] = time.perf_counter() - start
+    return session
+
+
+def write_csv(report, path):
+    rows = []
+    for session in report["sessions"]:
+        for key, stats in session.get("signals", {}).items():
+            rows.append({"file": session["file"], "signal": key, **stats})
+    pd.DataFrame(rows, columns=SIGNAL_FIELDS).to_csv(path, index=False)
+
+
+def print_summary(report):
+    for session in report["sessions"]:
+        if "error" in session:
+            print(f"{session['file']}: ERROR {session['error']}")
+            continue
+        tick = f", log tick {session['tick_rate_hz']:.1f} Hz" if "tick_rate_hz" in session else ""
+        print(f"{session['file']}: {session['duration_s']:.1f} s{tick}")
+        for key, s in session["signals"].items():
+            if not s["samples"]:
+                print(f"  {key:4s} no data")
+                continue
+            rate = f"{s['rate_hz']:.1f} Hz" if s.get("rate_hz") else "-"
+            jitter = f"{s['jitter_s'] * 1000:.1f} ms" if "jitter_s" in s else "-"
+            print(f"  {key:4s} {rate:>9s}  jitter {jitter:>9s}  gaps {s.get('gaps', 0):3d}"
+                  f"  stuck {s['stuck_runs']:2d}  [{s['min']:.2f}, {s['max']:.2f}]"
+                  f"  mean {s['mean']:.2f} std {s['std']:.2f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Data-rate and signal-quality report for telemetry logs")
+    parser.add_argument("paths", nargs="+", help="Log files or directories")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(), help="Worker processes")
+    parser.add_argument("--json", help="Write the combined report as JSON")
+    parser.add_argument("--csv", help="Write one row per file and signal as CSV")
+    parser.add_argument("-q", "--quiet", action="store_true", help="Do not print the summary")
+    args = parser.parse_args(argv)
+
+    logs = find_logs(args.paths)
+    if not logs:
+        parser.error("no logs found")
+    start = time.perf_counter()
+    if args.jobs > 1 and len(logs) > 1:
+        with ProcessPoolExecutor(max_workers=min(args.jobs, len(logs))) as pool:
+            sessions = list(pool.map(analyse_log, logs))
+    else:
+        sessions = [analyse_log(path) for path in logs]
+    report = {"generated": time.time(), "elapsed_s": time.perf_counter() - start, "sessions": sessions}
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.csv:
+        write_csv(report, args.csv)
+    if not args.quiet:
+        print_summary(report)
+        print(f"{len(logs)} logs in {report['elapsed_s']:.2f} s")
+    return 0
+
 
-# File path to your CSV file
-csv_file = 'data.csv'
-
-# Read CSV file
-df = pd.read_csv(csv_file)
-
-# List of channels that have tuple values
-channels = ['DIR', 'BAT', 'EX1', 'EX2']
-
-# Parse tuple values in each channel into two separate columns:
-# one for a sample value and one for the local timestamp.
-for ch in channels:
-    df[[f'{ch}_value', f'{ch}_local_time']] = df[ch].apply(lambda s: pd.Series(ast.literal_eval(s)))
-
-# ---- Global Metrics ----
-global_times = df['t'].values
-global_intervals = np.diff(global_times)
-global_avg_interval = np.mean(global_intervals) if len(global_intervals) > 0 else np.nan
-global_data_rate = 1 / global_avg_interval if global_avg_interval > 0 else np.nan
-global_jitter = np.std(global_intervals) if len(global_intervals) > 0 else np.nan
-
-print("Global Time Metrics:")
-print(f"  Average Global Sampling Interval: {global_avg_interval:.6f} sec")
-print(f"  Global Data Rate: {global_data_rate:.2f} Hz")
-print(f"  Global Jitter (std of intervals): {global_jitter:.6f} sec\n")
-
-# ---- Channel Metrics ----
-results = {}
-for ch in channels:
-    # Extract local times for this channel
-    local_times = df[f'{ch}_local_time'].values
-    local_intervals = np.diff(local_times)
-    
-    # Compute local metrics
-    local_avg_interval = np.mean(local_intervals) if len(local_intervals) > 0 else np.nan
-    local_data_rate = 1 / local_avg_interval if local_avg_interval > 0 else np.nan
-    local_jitter = np.std(local_intervals) if len(local_intervals) > 0 else np.nan
-    
-    # Compute offsets between global time and local time
-    offsets = df['t'] - df[f'{ch}_local_time']
-    avg_offset = np.mean(offsets)
-    offset_jitter = np.std(offsets)
-    
-    # Compare sample intervals: difference between global interval and local interval
-    # Note: This is computed for the interval between consecutive samples.
-    interval_diffs = global_intervals - local_intervals
-    avg_interval_diff = np.mean(interval_diffs) if len(interval_diffs) > 0 else np.nan
-    interval_diff_jitter = np.std(interval_diffs) if len(interval_diffs) > 0 else np.nan
-
-    results[ch] = {
-        'local_avg_interval': local_avg_interval,
-        'local_data_rate_Hz': local_data_rate,
-        'local_jitter': local_jitter,
-        'avg_offset': avg_offset,
-        'offset_jitter': offset_jitter,
-        'avg_interval_diff': avg_interval_diff,
-        'interval_diff_jitter': interval_diff_jitter,
-    }
-
-# Print channel metrics
-for ch, metrics in results.items():
-    print(f"Channel: {ch}")
-    print(f"  Local Average Sampling Interval: {metrics['local_avg_interval']:.6f} sec")
-    print(f"  Local Data Rate: {metrics['local_data_rate_Hz']:.2f} Hz")
-    print(f"  Local Jitter (std of local intervals): {metrics['local_jitter']:.6f} sec")
-    print(f"  Average Global-to-Local Offset: {metrics['avg_offset']:.6f} sec")
-    print(f"  Offset Jitter (std of offsets): {metrics['offset_jitter']:.6f} sec")
-    print(f"  Average Difference (global interval - local interval): {metrics['avg_interval_diff']:.6f} sec")
-    print(f"  Interval Difference Jitter: {metrics['interval_diff_jitter']:.6f} sec\n")
+if __name__ == "__main__":
+    sys.exit(main())
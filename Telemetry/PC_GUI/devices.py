@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Several boats (or devices) at once.
+
+The first device stores its signals under the plain keys and feeds the
+link monitor, decoders and tables in data.py, as before. Each additional
+device gets a DeviceStore: its own LinkMonitor, HoldDecoder, ParamTable
+and TaskProfile, and its samples stored as "<name>/<key>" (see
+signal_db.device_key()), so tiles can overlay e.g. ROL and boat2/ROL.
+All ports are serviced by the one SerialReader thread (uart.py).
+
+    python devices.py --bench 1 2 4 8     # N simulated devices on ptys
+No Qt here.
+"""
+import sys
+import time
+import argparse
+import threading
+
+from config import BAUD_RATE
+from signal_db import device_key
+from linkquality import LinkMonitor
+from encoding import HoldDecoder
+from params import ParamTable
+from taskprofile import TaskProfile
+
+
+class DeviceStore:
+    """One device's store namespace and the link state its frames feed."""
+
+    def __init__(self, name=None, link_monitor=None, hold_decoder=None, param_table=None, task_profile=None):
+        self.name = name  # None: the first device, stored under the plain keys
+        self.link_monitor = link_monitor or LinkMonitor()
+        self.hold_decoder = hold_decoder or HoldDecoder(self.link_monitor)
+        self.param_table = param_table or ParamTable()
+        self.task_profile = task_profile or TaskProfile()
+
+    def key(self, signal_key):
+        """Store key of one of this device's signals."""
+        return device_key(self.name, signal_key)
+
+    def reset(self, baud=BAUD_RATE):
+        """New connection: the firmware starts from its defaults."""
+        self.link_monitor.reset(baud)
+        self.hold_decoder.reset()
+        self.param_table.reset()
+        self.task_profile.reset()
+
+
+# --- Benchmark ---
+def _cpu_seconds():
+    import resource  # Unix only, like the benchmark's ptys
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def bench_devices(count, seconds, threads=False):
+    """
+    Serve `count` simulators on ptys with one reader (or, with `threads`,
+    one reader thread per device as before); returns (samples/s, CPU % of
+    one core, worst per-device share of the expected samples).
+    """
+    import data
+    from uart import SerialReader
+    from headless import HeadlessLink, start_simulator
+    processes, links = [], []
+    try:
+        for i in range(count):
+            process, port = start_simulator()
+            processes.append(process)
+            link = HeadlessLink(port, BAUD_RATE, negotiate=False, change_only=False)
+            link.device = data.add_device(f"bench{count}{'t' if threads else ''}_{i}")
+            link.connect()
+            links.append(link)
+        readers = [SerialReader(link) for link in links] if threads else [SerialReader(links[0])]
+        if not threads:
+            for link in links[1:]:
+                readers[0].add(link)
+        workers = [threading.Thread(target=reader.read_serial, daemon=True) for reader in readers]
+        for worker in workers:
+            worker.start()
+        time.sleep(1.0)  # Let the links settle
+
+        def samples():
+            return [sum(s.samples for s in link.device.link_monitor.signals.values()) for link in links]
+        samples0, cpu0, wall0 = samples(), _cpu_seconds(), time.monotonic()
+        time.sleep(seconds)
+        samples1, cpu1, wall = samples(), _cpu_seconds(), time.monotonic() - wall0
+        for reader in readers:
+            reader.stop()
+        for link in links:
+            link.close()
+        for worker in workers:
+            worker.join(timeout=1.0)
+    finally:
+        for process in processes:
+            process.terminate()
+            process.wait()
+        for link in links:
+            data.remove_device(link.device.name)
+    per_device = [b - a for a, b in zip(samples0, samples1)]
+    return sum(per_device) / wall, 100 * (cpu1 - cpu0) / wall, min(per_device) / max(max(per_device), 1)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark one reader serving N simulated devices")
+    parser.add_argument("--bench", type=int, nargs="+", default=[1, 2, 4, 8], metavar="N",
+                        help="Device counts to measure")
+    parser.add_argument("--seconds", type=float, default=5.0, help="Measurement time per count")
+    parser.add_argument("--threads", action="store_true",
+                        help="Also measure one reader thread per device, for comparison")
+    args = parser.parse_args(argv)
+    print(f"{'devices':>7} {'reader':>8} {'samples/s':>10} {'CPU %':>7} {'min/max':>8}")
+    for count in args.bench:
+        for threads in ([False, True] if args.threads else [False]):
+            rate, cpu, balance = bench_devices(count, args.seconds, threads)
+            print(f"{count:>7} {'threads' if threads else 'select':>8} {rate:>10.0f} {cpu:>7.1f} {balance:>8.2f}",
+                  flush=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
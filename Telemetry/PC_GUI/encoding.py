@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Change-only telemetry encoding (see TELEMETRY.c).
+
+With "ENC:1" the firmware sends a subscribed value only when it moved
+at least its deadband since it was last sent, and every KEYFRAME_TICKS
+task runs starts a keyframe ("KF:<n>" followed by every value once).
+HoldDecoder rebuilds the full series on the host: at each heartbeat,
+every key that was due in the task run that just ended but did not
+arrive is stored again with its last value (zero-order hold). Runs are
+counted by heartbeats rather than timed, since lines read together
+share one receive time.
+
+A line lost to noise leaves the held value stale until the key moves
+again or the next keyframe; the bad-frame count shows when that can
+have happened.
+
+    python encoding.py log_regatta_2.csv logs/    # bandwidth saved on logs
+"""
+import sys
+import argparse
+from collections import deque
+
+import numpy as np
+
+from protocol import GROUPS, KEY_GROUP, SIGNAL_BIT, TASK_PERIOD_S, HEARTBEAT_BYTES
+
+KEYFRAME = "KF"
+ENCODING = "ENC"
+KEYFRAME_TICKS = 50      # KEYFRAME_TICKS in TELEMETRY.c
+KEYFRAME_HISTORY = 1000  # Keyframe boundaries kept by the decoder
+
+# Deadbands in signal units (deadband[] in TELEMETRY.c).
+DEADBANDS = {
+    "DIR": 0.5, "BAT": 0.02, "EX1": 0.01, "EX2": 0.01,
+    "ROL": 0.01, "PIT": 0.01, "YAW": 0.01, "ACX": 0.01, "ACY": 0.01, "ACZ": 0.01,
+    "GYX": 0.01, "GYY": 0.01, "GYZ": 0.01, "SPE": 0.01,
+    "RW1": 4.0, "RW2": 4.0, "RW3": 4.0, "RW4": 4.0,
+    "RUD": 0.1, "TWI": 0.1, "TRI": 0.1,
+    "CPU": 0.5,
+}
+
+
+class HoldDecoder:
+    """
+    Fills in the samples a change-only stream left out. `monitor` is the
+    LinkMonitor, whose periods and subscription say which keys were due.
+    """
+
+    def __init__(self, monitor):
+        self.monitor = monitor
+        self.reset()
+
+    def reset(self):
+        self.enabled = False    # Set when the firmware echoes ENC:1
+        self.last = {}          # key -> (value, run) of the last stored sample
+        self.received = set()   # Keys received since the last heartbeat
+        self.run = 0            # Task runs started (heartbeats seen)
+        self.tick_t = None      # Time of the last heartbeat
+        self.keyframes = deque(maxlen=KEYFRAME_HISTORY)  # (t, keyframe number)
+
+    def on_sample(self, key, value, t):
+        self.last[key] = (value, self.run)
+        self.received.add(key)
+
+    def on_keyframe(self, number, t):
+        self.keyframes.append((t, number))
+
+    def on_heartbeat(self, t):
+        """Held samples [(key, value, t)] for the task run the heartbeat ends."""
+        held = []
+        if self.enabled and self.tick_t is not None:
+            subscription = self.monitor.subscription
+            for key, (value, last_run) in self.last.items():
+                if key in self.received or not subscription >> SIGNAL_BIT[key] & 1:
+                    continue
+                prescaler = round(self.monitor.signals[key].period / TASK_PERIOD_S)
+                if self.run - last_run >= prescaler:
+                    held.append((key, value, self.tick_t))
+            for key, value, _ in held:
+                self.last[key] = (value, self.run)
+        self.received.clear()
+        self.run += 1
+        self.tick_t = t
+        return held
+
+
+def request(ser, enabled=True):
+    """Ask the firmware to switch change-only encoding on or off."""
+    ser.write(f"{ENCODING}:{int(enabled)}\r\n".encode("ascii"))
+
+
+# --- Bandwidth measurement ---
+def line_bytes(key, values):
+    """Bytes of the "KEY:%.2f\\r\\n" lines for `values`."""
+    return sum(len(f"{key}:{value:.2f}\r\n") for value in values)
+
+
+def change_only(key, values, ticks):
+    """Mask of the values the firmware sends; `ticks` are their task-run numbers."""
+    deadband = DEADBANDS[key]
+    sent = np.zeros(len(values), dtype=bool)
+    last = None
+    keyframe = -1
+    for i, (value, tick) in enumerate(zip(values, ticks)):
+        # The first transmission after a keyframe line is sent in full.
+        if tick // KEYFRAME_TICKS != keyframe or last is None or abs(value - last) >= deadband:
+            sent[i] = True
+            last = value
+            keyframe = tick // KEYFRAME_TICKS
+    return sent
+
+
+def firmware_stream(key, t, v, snapshot):
+    """
+    (ticks, values) the firmware transmitted for one signal. Session logs
+    hold the real samples; CSV logs only a snapshot per logging row, so
+    the stream is estimated by interpolating the rows at the group rate
+    (rounded to the transmitted resolution) within stretches without gaps.
+    """
+    present = ~np.isnan(v)
+    if not snapshot:
+        return np.round(t[present] / TASK_PERIOD_S).astype(np.int64), v[present]
+    period = GROUPS[KEY_GROUP[key]][0] * TASK_PERIOD_S
+    ticks, values = [], []
+    # Stretches of consecutive non-NaN rows.
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], present.astype(np.int8), [0]))))
+    for start, stop in zip(edges[::2], edges[1::2]):
+        if stop - start < 2:
+            continue
+        grid = np.arange(t[start], t[stop - 1], period)
+        ticks.append(np.round(grid / TASK_PERIOD_S).astype(np.int64))
+        values.append(np.round(np.interp(grid, t[start:stop], v[start:stop]), 2))
+    if not ticks:
+        return np.empty(0, dtype=np.int64), np.empty(0)
+    return np.concatenate(ticks), np.concatenate(values)
+
+
+def measure(path):
+    """Per-signal {key: (full bytes, change-only bytes, values, sent)} and the log duration."""
+    from datarate import read_log
+    arrays, _, snapshot = read_log(path)
+    result = {}
+    duration = 0.0
+    for key, (t, v) in arrays.items():
+        if key not in DEADBANDS or len(t) == 0:
+            continue
+        ticks, values = firmware_stream(key, t, v, snapshot)
+        if len(values) == 0:
+            continue
+        sent = change_only(key, values, ticks)
+        result[key] = (line_bytes(key, values), line_bytes(key, values[sent]), len(values), int(sent.sum()))
+        duration = max(duration, (ticks[-1] - ticks[0]) * TASK_PERIOD_S)
+    return result, duration
+
+
+def print_report(path, result, duration):
+    ticks = duration / TASK_PERIOD_S
+    # Heartbeats are sent either way; keyframe lines only in change-only mode.
+    heartbeat = ticks * HEARTBEAT_BYTES
+    keyframes = ticks / KEYFRAME_TICKS * len("KF:00000.00\r\n")
+    full = sum(r[0] for r in result.values()) + heartbeat
+    encoded = sum(r[1] for r in result.values()) + heartbeat + keyframes
+    print(f"{path}  ({duration:.0f} s of signal)")
+    print(f"  {'signal':6s} {'deadband':>8s} {'values':>8s} {'sent':>8s} {'saved':>7s}")
+    for key in sorted(result, key=SIGNAL_BIT.get):
+        full_bytes, encoded_bytes, values, sent = result[key]
+        print(f"  {key:6s} {DEADBANDS[key]:8g} {values:8d} {sent:8d} "
+              f"{100 * (1 - encoded_bytes / full_bytes):6.1f}%")
+    if duration > 0:
+        print(f"  total  {full / duration / 1024:.2f} kB/s -> {encoded / duration / 1024:.2f} kB/s "
+              f"({100 * (1 - encoded / full):.1f}% saved, heartbeats and keyframes included)")
+    return full, encoded
+
+
+def main(argv=None):
+    from datarate import find_logs
+    parser = argparse.ArgumentParser(description="Bandwidth saved by change-only encoding on logs")
+    parser.add_argument("paths", nargs="+", help="Log files or directories")
+    args = parser.parse_args(argv)
+    total_full = total_encoded = 0.0
+    for path in find_logs(args.paths):
+        result, duration = measure(path)
+        if not result:
+            print(f"{path}: no telemetry signals")
+            continue
+        full, encoded = print_report(path, result, duration)
+        total_full += full
+        total_encoded += encoded
+    if total_full:
+        print(f"All logs: {100 * (1 - total_encoded / total_full):.1f}% of the telemetry bytes saved")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,391 @@
+#!/usr/bin/env python3
+"""
+Live fan-out of the ingested telemetry to several viewers over TCP.
+
+One process owns the serial port (normally headless.py --serve) and
+publishes what it parses; any number of GUIs connect as clients. The
+protocol is newline-delimited JSON:
+
+    client -> server   {"subscribe": ["ROL", "PIT"]}     ("*" for all)
+                       {"send": ["SRU", 10.0]}           (if the server allows commands)
+    server -> client   {"now": 12.34, "ok": 0.01, "samples": {"ROL": [[t, v], ...]}}
+
+Every FANOUT_BATCH_MS the server collects the new samples of each
+subscribed key once, encodes each key once, and sends every client only
+the keys it asked for. Clients that stop reading are dropped once
+FANOUT_MAX_BUFFER bytes are queued for them, and clients sending a
+malformed message right away. Times are seconds on the server's clock
+(data.start_time).
+"""
+import sys
+import json
+import math
+import time
+import socket
+import argparse
+import selectors
+import threading
+
+from config import FANOUT_PORT, FANOUT_BATCH_MS, FANOUT_MAX_BUFFER
+
+
+class _Client:
+    __slots__ = ("sock", "address", "keys", "inbox", "outbox", "sent")
+
+    def __init__(self, sock, address):
+        self.sock = sock
+        self.address = address
+        self.keys = set()       # Subscribed keys; "*" for all
+        self.inbox = b""
+        self.outbox = bytearray()
+        self.sent = 0
+
+    def wants(self, key):
+        return "*" in self.keys or key in self.keys
+
+
+class FanoutServer:
+    """
+    Publishes a live store ({key: [(value, t), ...]}, see data.py) to TCP
+    clients. `clock()` returns "now" on the store's clock; `last_ok()`
+    (optional) the time since the last heartbeat; `on_command(key, value)`
+    (optional) forwards commands from clients to the boat.
+    """
+
+    def __init__(self, history, clock, host="0.0.0.0", port=FANOUT_PORT,
+                 last_ok=None, on_command=None, batch_s=FANOUT_BATCH_MS / 1000,
+                 max_buffer=FANOUT_MAX_BUFFER):
+        self.history = history
+        self.clock = clock
+        self.last_ok = last_ok
+        self.on_command = on_command
+        self.batch_s = batch_s
+        self.max_buffer = max_buffer
+        self.selector = selectors.DefaultSelector()
+        self.listener = socket.create_server((host, port), reuse_port=False)
+        self.listener.setblocking(False)
+        self.address = self.listener.getsockname()
+        self.selector.register(self.listener, selectors.EVENT_READ)
+        self.clients = {}
+        self.last_t = {}        # Last published sample time per key
+        self.published = 0      # Samples collected from the store
+        self._running = False
+        self.thread = None
+
+    def start(self):
+        self._running = True
+        self.thread = threading.Thread(target=self.serve, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self._running = False
+        if self.thread:
+            self.thread.join(timeout=1.0)
+        for client in list(self.clients.values()):
+            self._drop(client)
+        self.selector.close()
+        self.listener.close()
+
+    def serve(self):
+        next_batch = time.monotonic()
+        while self._running:
+            timeout = max(0.0, next_batch - time.monotonic())
+            for key, events in self.selector.select(timeout):
+                if key.fileobj is self.listener:
+                    self._accept()
+                    continue
+                client = key.data
+                if events & selectors.EVENT_READ:
+                    self._read(client)
+                if events & selectors.EVENT_WRITE and client.sock.fileno() != -1:
+                    self._write(client)
+            if time.monotonic() >= next_batch:
+                next_batch += self.batch_s
+                if time.monotonic() > next_batch:
+                    next_batch = time.monotonic() + self.batch_s  # Fell behind: skip, don't burst
+                self.publish()
+
+    # --- Connections ---
+    def _accept(self):
+        try:
+            sock, address = self.listener.accept()
+        except BlockingIOError:
+            return
+        sock.setblocking(False)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        client = _Client(sock, address)
+        self.clients[sock.fileno()] = client
+        self.selector.register(sock, selectors.EVENT_READ, client)
+
+    def _drop(self, client):
+        self.clients.pop(client.sock.fileno(), None)
+        try:
+            self.selector.unregister(client.sock)
+        except (KeyError, ValueError):
+            pass
+        client.sock.close()
+
+    def _read(self, client):
+        try:
+            data = client.sock.recv(65536)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError:
+            data = b""
+        if not data:
+            self._drop(client)
+            return
+        client.inbox += data
+        while b"\n" in client.inbox:
+            line, client.inbox = client.inbox.split(b"\n", 1)
+            try:
+                message = json.loads(line)
+            except ValueError:
+                continue
+            try:
+                self._handle(client, message)
+            except (ValueError, TypeError, KeyError) as e:
+                print(f"Dropping fan-out client {client.address}: {e}", file=sys.stderr, flush=True)
+                self._drop(client)
+                return
+        if len(client.inbox) > 65536:
+            self._drop(client)
+
+    def _handle(self, client, message):
+        """Apply one client message; raises ValueError if it is malformed."""
+        if not isinstance(message, dict):
+            raise ValueError("message is not an object")
+        if "subscribe" in message:
+            keys = message["subscribe"]
+            if not isinstance(keys, list) or not all(isinstance(key, str) for key in keys):
+                raise ValueError("subscribe expects a list of keys")
+            keys = set(keys)
+            now = self.clock()
+            # Keys nobody was subscribed to start with the samples that
+            # arrive from now on; their cursor stood still meanwhile.
+            published = self.subscribed_keys()
+            wanted = keys - {"*"} | (set(self.history) if "*" in keys else set())
+            for key in wanted - published:
+                self.last_t[key] = now
+            client.keys = keys
+        if "send" in message:
+            command = message["send"]
+            if (not isinstance(command, list) or len(command) != 2 or not isinstance(command[0], str)
+                    or isinstance(command[1], bool) or not isinstance(command[1], (int, float))
+                    or not math.isfinite(command[1])):
+                raise ValueError("send expects [key, number]")
+            if self.on_command:
+                self.on_command(command[0], float(command[1]))
+
+    def _write(self, client):
+        try:
+            sent = client.sock.send(client.outbox)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError:
+            self._drop(client)
+            return
+        del client.outbox[:sent]
+        client.sent += sent
+        if not client.outbox:
+            self.selector.modify(client.sock, selectors.EVENT_READ, client)
+
+    # --- Publishing ---
+    def collect(self, keys):
+        """Encoded '"KEY": [[t, v], ...]' fragment per key with new samples."""
+        fragments = {}
+        for key in keys:
+            samples = self.history.get(key)
+            if not samples:
+                continue
+            last_t = self.last_t.get(key, float("-inf"))
+            new_samples = []
+            for value, t in reversed(samples):
+                if t <= last_t:
+                    break
+                new_samples.append((t, value))
+            if new_samples:
+                self.last_t[key] = new_samples[0][0]
+                self.published += len(new_samples)
+                encoded = json.dumps([(round(t, 4), value) for t, value in reversed(new_samples)])
+                fragments[key] = json.dumps(key) + ":" + encoded
+        return fragments
+
+    def subscribed_keys(self):
+        """Union of the keys the connected clients subscribed to."""
+        wanted = set()
+        for client in list(self.clients.values()):
+            wanted |= set(self.history) if "*" in client.keys else client.keys
+        return wanted
+
+    def publish(self):
+        if not self.clients:
+            return
+        fragments = self.collect(self.subscribed_keys())
+        ok = self.last_ok() if self.last_ok else None
+        head = '{"now":%.4f,"ok":%s,"samples":{' % (self.clock(), json.dumps(ok))
+        for client in list(self.clients.values()):
+            parts = [fragment for key, fragment in fragments.items() if client.wants(key)]
+            message = (head + ",".join(parts) + "}}\n").encode("utf-8")
+            if len(client.outbox) + len(message) > self.max_buffer:
+                print(f"Dropping slow fan-out client {client.address}", file=sys.stderr, flush=True)
+                self._drop(client)
+                continue
+            was_empty = not client.outbox
+            client.outbox += message
+            if was_empty:
+                self._write(client)
+                if client.outbox and client.sock.fileno() != -1:
+                    self.selector.modify(client.sock, selectors.EVENT_READ | selectors.EVENT_WRITE, client)
+
+    def stats(self):
+        """[(address, subscribed keys, bytes sent)] per connected client."""
+        return [(c.address, sorted(c.keys), c.sent) for c in self.clients.values()]
+
+
+class FanoutClient:
+    """
+    Connects to a FanoutServer and calls `on_batch(batch)` from its own
+    thread for every received batch (the decoded JSON object).
+    """
+
+    def __init__(self, host, port=FANOUT_PORT, keys=("*",), on_batch=None, on_close=None):
+        self.sock = socket.create_connection((host, port), timeout=5.0)
+        self.sock.settimeout(None)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.on_batch = on_batch
+        self.on_close = on_close
+        self.keys = set(keys)
+        self.received = 0       # Bytes received
+        self._lock = threading.Lock()
+        self._running = True
+        self.subscribe(self.keys)
+        self.thread = threading.Thread(target=self._read, daemon=True)
+        self.thread.start()
+
+    def _send(self, message):
+        with self._lock:
+            self.sock.sendall((json.dumps(message) + "\n").encode("utf-8"))
+
+    def subscribe(self, keys):
+        self.keys = set(keys)
+        self._send({"subscribe": sorted(self.keys)})
+
+    def send_command(self, key, value):
+        self._send({"send": [key, value]})
+
+    def _read(self):
+        buffer = b""
+        try:
+            while self._running:
+                data = self.sock.recv(65536)
+                if not data:
+                    break
+                self.received += len(data)
+                buffer += data
+                *lines, buffer = buffer.split(b"\n")
+                for line in lines:
+                    if line and self.on_batch:
+                        self.on_batch(json.loads(line))
+        except OSError:
+            pass
+        finally:
+            self._running = False
+            if self.on_close:
+                self.on_close()
+
+    def is_connected(self):
+        return self._running
+
+    def close(self):
+        self._running = False
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.sock.close()
+
+
+# --- Benchmark ---
+def benchmark(n_clients, seconds):
+    """
+    Feed the store at firmware rates from the simulator, serve it to
+    `n_clients` local clients with different subscriptions and check
+    each gets exactly its keys.
+    """
+    import resource
+    from types import SimpleNamespace
+    from data import data_history, start_time, primary
+    from simulator import FirmwareSimulator
+    from protocol import GROUPS, TASK_PERIOD_S
+    from uart import dispatch_lines
+
+    clock = lambda: time.time() - start_time
+    server = FanoutServer(data_history, clock, host="127.0.0.1", port=0).start()
+    all_keys = [key for _, keys in GROUPS.values() for key in keys]
+    subscriptions = [["*"]] + [all_keys[i % len(all_keys):][:3] for i in range(1, n_clients)]
+    received = [dict() for _ in range(n_clients)]
+
+    def counter(counts):
+        def on_batch(batch):
+            for key, samples in batch["samples"].items():
+                counts[key] = counts.get(key, 0) + len(samples)
+        return on_batch
+
+    clients = [FanoutClient("127.0.0.1", server.address[1], keys, counter(received[i]))
+               for i, keys in enumerate(subscriptions)]
+    simulator = FirmwareSimulator()
+    link = SimpleNamespace(last_ok_time=0.0)
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    cpu0 = usage.ru_utime + usage.ru_stime
+    end = time.monotonic() + seconds
+    next_tick = time.monotonic()
+    while time.monotonic() < end:
+        # As the serial reader ingests it: profile and link lines are not samples.
+        dispatch_lines(link, primary, simulator.frame().decode().splitlines(), clock())
+        next_tick += TASK_PERIOD_S
+        time.sleep(max(0.0, next_tick - time.monotonic()))
+    time.sleep(3 * server.batch_s)
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    cpu = usage.ru_utime + usage.ru_stime - cpu0
+    stats = server.stats()
+    for client in clients:
+        client.close()
+    server.stop()
+
+    print(f"{n_clients} clients, {seconds:.0f} s, {server.published} samples published, "
+          f"{100 * cpu / seconds:.1f} % CPU (feeder + server + clients)")
+    for keys, counts, (_, _, sent) in zip(subscriptions, received, stats):
+        extra = set(counts) - (set(all_keys) if keys == ["*"] else set(keys))
+        print(f"  {','.join(keys):14s} {sum(counts.values()):6d} samples "
+              f"{sent / seconds / 1024:7.1f} kB/s  unexpected keys: {sorted(extra) or 'none'}")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Telemetry fan-out tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+    bench = sub.add_parser("bench", help="Serve simulated data to local clients")
+    bench.add_argument("--clients", type=int, default=4)
+    bench.add_argument("--seconds", type=float, default=5.0)
+    watch = sub.add_parser("watch", help="Print the batches received from a server")
+    watch.add_argument("host")
+    watch.add_argument("--port", type=int, default=FANOUT_PORT)
+    watch.add_argument("keys", nargs="*", default=["*"])
+    args = parser.parse_args(argv)
+
+    if args.command == "bench":
+        return benchmark(args.clients, args.seconds)
+    client = FanoutClient(args.host, args.port, args.keys,
+                          on_batch=lambda batch: print(json.dumps(batch), flush=True))
+    try:
+        while client.is_connected():
+            time.sleep(0.5)
+    except KeyboardInterrupt:
+        client.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+Headless ingest and logging daemon: connects to the boat, parses the
+telemetry, logs it (rotating segments, see segments.py) and prints
+link statistics, without importing Qt. Meant for the chase-boat laptop
+or a Raspberry Pi on the dock.
+
+Memory is bounded by MAX_POINTS and the history pyramid, as in the GUI;
+the reader blocks on the port instead of polling, so an idle link costs
+no CPU. SIGINT/SIGTERM close the log cleanly.
+
+    python headless.py --port /dev/ttyUSB0 --log run.rcs
+    python headless.py --serve         # publish to GUIs (see fanout.py)
+    python headless.py --bench 20      # against the firmware simulator
+"""
+import os
+import sys
+import time
+
+_import_started = time.perf_counter()
+
+import signal
+import argparse
+import threading
+import subprocess
+import serial
+from serial.tools import list_ports
+
+from config import BAUD_RATE, BAUD_NEGOTIATE, CHANGE_ONLY_ENCODING, FANOUT_PORT
+from signal_db import SIGNAL_KEYS
+from data import data_history, start_time, link_monitor, hold_decoder, task_profile
+from uart import SerialReader, SubscriptionRequest
+from segments import RotatingLog, TickLogger
+from protocol import GROUPS, subscription_mask
+from fanout import FanoutServer
+from baud import negotiate
+from hotplug import port_identity, find_port
+import encoding
+
+LOG_TICK_S = 0.02           # Logging tick (CSV rows are one per tick)
+RECONNECT_INTERVAL_S = 1.0
+
+
+class HeadlessLink:
+    """The part of comm.SerialComm the reader needs, without any dialogs."""
+
+    def __init__(self, port, baud, negotiate=BAUD_NEGOTIATE, change_only=CHANGE_ONLY_ENCODING):
+        self.port = port
+        self.baud = baud
+        self.negotiate = negotiate
+        self.change_only = change_only
+        self.on_open = None     # Called with the new port before the reader sees it
+        self.ser = None
+        self.last_ok_time = 0.0
+        self.last_attempt = 0.0
+        self.identity = None    # USB ids of the port once opened (see hotplug.py)
+
+    def connect(self):
+        """Try to open the port (at most every RECONNECT_INTERVAL_S)."""
+        if self.ser is not None or time.time() - self.last_attempt < RECONNECT_INTERVAL_S:
+            return self.ser is not None
+        self.last_attempt = time.time()
+        if self.identity is not None:
+            # The same device, even if it came back under another name.
+            self.port = find_port(self.identity) or self.port
+        try:
+            ser = serial.Serial(self.port, self.baud, timeout=0.1)
+            print(f"Serial port {self.port} opened.", flush=True)
+        except (serial.SerialException, OSError) as e:
+            print(f"Could not open {self.port}: {e}", flush=True)
+            return False
+        if self.negotiate:
+            try:
+                print(negotiate(ser, default=self.baud).summary(), flush=True)
+            except (serial.SerialException, OSError) as e:
+                print(f"Baud-rate negotiation failed, staying at {ser.baudrate}: {e}", flush=True)
+        try:
+            encoding.request(ser, self.change_only)
+        except (serial.SerialException, OSError) as e:
+            print(f"Error requesting the telemetry encoding: {e}", flush=True)
+        if self.on_open:
+            self.on_open(ser)
+        self.identity = port_identity(self.port)
+        self.ser = ser
+        return True
+
+    def close(self):
+        ser, self.ser = self.ser, None
+        if ser is not None:
+            ser.close()
+
+
+def resource_usage():
+    """(CPU seconds, peak RSS in MB) of this process."""
+    import resource  # Unix only, like the benchmark's ptys
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    # ru_maxrss is in kB on Linux and bytes on macOS.
+    scale = 1 / 1024 if sys.platform != "darwin" else 1 / (1024 * 1024)
+    return usage.ru_utime + usage.ru_stime, usage.ru_maxrss * scale
+
+
+def format_stats(now):
+    """One status line: actual/expected rate per group, gaps and bad frames."""
+    parts = []
+    for group, (_, keys) in GROUPS.items():
+        streams = [s for s in link_monitor.group(group) if s.samples]
+        if not streams:
+            parts.append(f"{group} off")
+            continue
+        rate = sum(s.rate(now) for s in streams) / len(streams)
+        gaps = sum(s.gaps for s in streams)
+        parts.append(f"{group} {rate:.1f}/{1 / streams[0].period:.0f}Hz gaps {gaps}")
+    heartbeat = link_monitor.heartbeat.rate(now)
+    frames, lost = link_monitor.lost_frames()
+    rtt = link_monitor.ping.percentiles(50, 95)
+    rtt_text = f"RTT {rtt[0] * 1000:.0f}/{rtt[1] * 1000:.0f} ms" if rtt else "RTT -"
+    return (f"OK {heartbeat:.1f}Hz | " + " | ".join(parts) +
+            f" | lost {lost}/{frames + lost} | {rtt_text} | bad {link_monitor.bad_frames}")
+
+
+class Daemon:
+    def __init__(self, link, log_path=None, keys=None, stats_interval=5.0, serve_port=None,
+                 allow_commands=False):
+        self.link = link
+        self.stats_interval = stats_interval
+        self.server = None
+        if serve_port is not None:
+            self.server = FanoutServer(
+                data_history, lambda: time.time() - start_time, port=serve_port,
+                last_ok=lambda: time.time() - link.last_ok_time if link.last_ok_time else None,
+                on_command=self.send_command if allow_commands else None,
+            )
+            print(f"Serving telemetry on port {self.server.address[1]}", flush=True)
+        self.subscription = SubscriptionRequest()
+        link.on_open = self.on_open
+        self.stop_event = threading.Event()
+        self.reader = SerialReader(link, on_error=lambda message: print(message, flush=True))
+        self.thread = threading.Thread(target=self.reader.read_serial, daemon=True)
+        self.logger = None
+        if log_path:
+            keys = keys or [key for key, info in SIGNAL_KEYS.items() if info["dir"] == "RX"]
+            log = RotatingLog(log_path, keys)
+            self.logger = TickLogger(log, keys, data_history, time.time() - start_time)
+            print(f"Logging to {log.manifest_path}", flush=True)
+
+    def stop(self, *_):
+        self.stop_event.set()
+
+    def send_command(self, key, value):
+        """Forward a viewer's command to the boat (fan-out server thread)."""
+        ser = self.link.ser
+        if ser is not None:
+            try:
+                ser.write(f"{key}:{value:.6f}\r\n".encode("utf-8"))
+            except (serial.SerialException, OSError) as e:
+                print(f"Error sending {key}: {e}", flush=True)
+
+    def on_open(self, ser):
+        """New connection: the firmware starts from its defaults."""
+        link_monitor.reset(ser.baudrate)
+        hold_decoder.reset()
+        task_profile.reset()
+        self.subscription.reset()
+
+    def ping(self):
+        now = time.time() - start_time
+        ser = self.link.ser
+        if ser is None or not link_monitor.ping.due(now):
+            return
+        try:
+            ser.write(link_monitor.ping.message(now))
+        except (serial.SerialException, OSError) as e:
+            print(f"Error sending ping: {e}", flush=True)
+
+    def update_subscription(self):
+        """
+        Only stream what is logged or served. Without either, the firmware
+        keeps its default of sending everything.
+        """
+        if not self.logger and not self.server:
+            return
+        keys = set(self.logger.keys) if self.logger else set()
+        if self.server:
+            keys |= self.server.subscribed_keys()
+        try:
+            self.subscription.update(self.link.ser, subscription_mask(keys), link_monitor.subscription)
+        except (serial.SerialException, OSError) as e:
+            print(f"Error sending subscription: {e}", flush=True)
+
+    def run(self, duration=None):
+        """Main loop: reconnect, log once per tick, report stats. Returns on stop."""
+        self.thread.start()
+        if self.server:
+            self.server.start()
+        started = time.monotonic()
+        next_stats = started + self.stats_interval
+        while not self.stop_event.is_set():
+            if duration is not None and time.monotonic() - started >= duration:
+                break
+            self.link.connect()
+            self.update_subscription()
+            self.ping()
+            if self.logger:
+                try:
+                    self.logger.tick(time.time() - start_time)
+                except OSError as e:
+                    print(f"Error writing log, logging stopped: {e}", flush=True)
+                    self.close_log()
+            if self.stats_interval and time.monotonic() >= next_stats:
+                next_stats += self.stats_interval
+                print(format_stats(time.time() - start_time), flush=True)
+            self.stop_event.wait(LOG_TICK_S)
+        self.shutdown()
+
+    def close_log(self):
+        logger, self.logger = self.logger, None
+        if logger:
+            try:
+                logger.close()
+            except OSError as e:
+                print(f"Error closing log: {e}", flush=True)
+
+    def shutdown(self):
+        if self.server:
+            self.server.stop()
+        self.reader.stop()
+        self.link.close()
+        self.thread.join(timeout=1.0)
+        self.close_log()
+
+
+def start_simulator(*options):
+    """Run simulator.py (with command-line `options`) in a child process; returns (process, pty path)."""
+    here = os.path.dirname(os.path.abspath(__file__))
+    process = subprocess.Popen([sys.executable, os.path.join(here, "simulator.py"), *options],
+                               stdout=subprocess.PIPE, text=True, cwd=here)
+    return process, process.stdout.readline().strip()
+
+
+def benchmark(seconds, log_path=None):
+    """Startup time, then steady-state CPU and memory against the simulator."""
+    startup = time.perf_counter() - _import_started
+    process, port = start_simulator()
+    try:
+        link = HeadlessLink(port, BAUD_RATE)
+        daemon = Daemon(link, log_path, stats_interval=0)
+        link.connect()
+        # Let the link settle, then measure.
+        threading.Thread(target=daemon.run, daemon=True).start()
+        time.sleep(1.0)
+        cpu0, _ = resource_usage()
+        wall0 = time.monotonic()
+        samples0 = sum(s.samples for s in link_monitor.signals.values())
+        time.sleep(seconds)
+        cpu1, peak_rss = resource_usage()
+        wall = time.monotonic() - wall0
+        samples = sum(s.samples for s in link_monitor.signals.values()) - samples0
+        stats = format_stats(time.time() - start_time)
+        daemon.stop()
+        time.sleep(0.2)
+    finally:
+        process.terminate()
+        process.wait()
+    print(f"Qt loaded:          {'PyQt6' in sys.modules}")
+    print(f"Startup (imports):  {startup * 1000:.0f} ms")
+    print(f"Steady-state CPU:   {100 * (cpu1 - cpu0) / wall:.1f} % of one core")
+    print(f"Samples/s:          {samples / wall:.0f}")
+    print(f"Peak RSS:           {peak_rss:.1f} MB")
+    print(stats)
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless telemetry ingest and logging")
+    parser.add_argument("--port", help="Serial port (default: first one found)")
+    parser.add_argument("--baud", type=int, default=BAUD_RATE, help="Rate the link comes up at")
+    parser.add_argument("--no-negotiate", action="store_true", help="Stay at --baud")
+    parser.add_argument("--full", action="store_true", help="Send every value, not only changes")
+    parser.add_argument("--log", help="Log path (.csv or .rcs), written as rotating segments")
+    parser.add_argument("--signals", nargs="+", help="Signals to log (default: all RX signals)")
+    parser.add_argument("--stats", type=float, default=5.0, help="Seconds between status lines (0: off)")
+    parser.add_argument("--duration", type=float, help="Stop after this many seconds")
+    parser.add_argument("--simulate", action="store_true", help="Connect to the firmware simulator")
+    parser.add_argument("--serve", type=int, nargs="?", const=FANOUT_PORT, metavar="PORT",
+                        help=f"Publish the telemetry to viewers over TCP (default port {FANOUT_PORT})")
+    parser.add_argument("--allow-commands", action="store_true",
+                        help="Forward commands sent by viewers to the boat")
+    parser.add_argument("--bench", type=float, metavar="SECONDS",
+                        help="Measure startup, CPU and memory against the simulator")
+    args = parser.parse_args(argv)
+
+    if args.bench:
+        return benchmark(args.bench, args.log)
+
+    simulator = None
+    port = args.port
+    if args.simulate:
+        simulator, port = start_simulator()
+    elif port is None:
+        ports = [p.device for p in list_ports.comports()]
+        if not ports:
+            print("No serial ports found.", file=sys.stderr)
+            return 1
+        port = ports[0]
+
+    try:
+        daemon = Daemon(HeadlessLink(port, args.baud, not args.no_negotiate, not args.full), args.log, args.signals, args.stats,
+                        args.serve, args.allow_commands)
+    except OSError as e:
+        print(f"Could not open log: {e}", file=sys.stderr)
+        if simulator:
+            simulator.terminate()
+        return 1
+    signal.signal(signal.SIGINT, daemon.stop)
+    signal.signal(signal.SIGTERM, daemon.stop)
+    try:
+        daemon.run(args.duration)
+    finally:
+        if simulator:
+            simulator.terminate()
+    print("Stopped.", flush=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,144 @@
+"""
+Automatic reconnection of lost serial links.
+
+When a port fails (e.g. the USB cable is pulled), the link remembers the
+device by its USB VID/PID/serial number (the path, for ports without
+USB ids such as ptys). A PortWatcher thread lists the ports every
+HOTPLUG_POLL_S and reopens the link as soon as the device is back,
+retrying with an exponential backoff between RECONNECT_MIN_S and
+RECONNECT_MAX_S meanwhile. Reopening happens on the watcher thread, so
+nothing blocks the GUI, and the store and logs simply carry on. Outage
+durations are kept for display. No Qt here.
+"""
+import os
+import sys
+import time
+import threading
+from collections import deque
+from serial.tools import list_ports
+
+from config import RECONNECT_MIN_S, RECONNECT_MAX_S, HOTPLUG_POLL_S
+
+OUTAGE_HISTORY = 20  # Reconnection times kept per link
+
+
+def port_identity(device, ports=None):
+    """(vid, pid, serial number) of a port, or ("path", device) without USB ids."""
+    for info in ports if ports is not None else list_ports.comports():
+        if info.device == device and info.vid is not None:
+            return (info.vid, info.pid, info.serial_number)
+    return ("path", device)
+
+
+def find_port(identity, ports=None):
+    """Current path of the device with `identity`, or None if it is not plugged in."""
+    if identity[0] == "path":
+        return identity[1] if os.path.exists(identity[1]) else None
+    for info in ports if ports is not None else list_ports.comports():
+        if (info.vid, info.pid, info.serial_number) == identity:
+            return info.device
+    return None
+
+
+class Reconnect:
+    """Backoff and outage timing of one link."""
+
+    def __init__(self):
+        self.identity = None    # Device to reconnect to; None: do not reconnect
+        self.lost_at = None     # time.time() the link was lost, while reconnecting
+        self.attempts = 0
+        self.delay = RECONNECT_MIN_S
+        self.next_try = 0.0
+        self.outages = deque(maxlen=OUTAGE_HISTORY)  # Seconds from loss to reconnection
+        self.lock = threading.Lock()  # Held by reopen() while it takes the new port into use
+
+    @property
+    def active(self):
+        """True while trying to get a lost link back."""
+        return self.lost_at is not None
+
+    def on_connected(self, identity):
+        """The link is up (again); returns the outage in seconds after a reconnection."""
+        self.identity = identity
+        outage = None
+        if self.lost_at is not None:
+            outage = time.time() - self.lost_at
+            self.outages.append(outage)
+        self.lost_at = None
+        return outage
+
+    def on_lost(self):
+        if self.identity is None:
+            return False
+        self.lost_at = time.time()
+        self.attempts = 0
+        self.delay = RECONNECT_MIN_S
+        self.next_try = 0.0  # First attempt right away
+        return True
+
+    def on_failed(self):
+        self.attempts += 1
+        self.next_try = time.time() + self.delay
+        self.delay = min(2 * self.delay, RECONNECT_MAX_S)
+
+    def due(self, plugged_in):
+        """Try now: the backoff has elapsed, or the device was just plugged back in."""
+        return self.active and (plugged_in or time.time() >= self.next_try)
+
+    def cancel(self):
+        """The user disconnected: forget the device."""
+        with self.lock:
+            self.identity = None
+            self.lost_at = None
+
+
+class PortWatcher:
+    """
+    Background hot-plug monitor. `links()` returns the links to watch;
+    each has a `reconnect` (Reconnect) and `reopen(port)`, called on this
+    thread, which returns True once the link is up again.
+    """
+
+    def __init__(self, links, interval=HOTPLUG_POLL_S):
+        self.links = links
+        self.interval = interval
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.known = None  # Port paths seen by the previous scan
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stop_event.set()
+
+    def run(self):
+        while not self.stop_event.is_set():
+            self.scan()
+            self.stop_event.wait(self.interval)
+
+    def scan(self):
+        ports = list_ports.comports()
+        paths = {info.device for info in ports}
+        if self.known is not None:
+            for path in sorted(paths - self.known):
+                print(f"Serial port {path} plugged in.")
+            for path in sorted(self.known - paths):
+                print(f"Serial port {path} unplugged.")
+        appeared = paths - (self.known or set())
+        self.known = paths
+        for link in self.links():
+            reconnect = link.reconnect
+            identity = reconnect.identity  # The GUI may cancel meanwhile
+            if not reconnect.active or identity is None:
+                continue
+            port = find_port(identity, ports)
+            if port is None:
+                continue
+            try:
+                if reconnect.due(port in appeared) and not link.reopen(port):
+                    reconnect.on_failed()
+            except Exception as e:  # Keep watching the other links, and this one
+                print(f"Error reconnecting to {port}: {e}", file=sys.stderr)
+                reconnect.on_failed()
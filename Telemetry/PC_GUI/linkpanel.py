@@ -0,0 +1,196 @@
+"""Panel and health indicator showing the live LinkMonitor statistics (see linkquality.py)."""
+import math
+from collections import deque
+import numpy as np
+import pyqtgraph as pg
+from PyQt6 import QtWidgets, QtCore, QtGui
+
+from config import (JITTER_HIST_DECADES, LINK_REFRESH_MS, HEALTH_WINDOW_S,
+                    HEALTH_RTT_WARN_MS, HEALTH_LOSS_WARN)
+from linkquality import HIST_BINS, HIST_LOG_MIN
+from protocol import GROUPS
+
+# Histogram bin edges in seconds.
+HIST_EDGES = np.logspace(HIST_LOG_MIN, HIST_LOG_MIN + JITTER_HIST_DECADES, HIST_BINS + 1)
+
+
+class LinkQualityPanel(QtWidgets.QWidget):
+    """
+    Tree of firmware groups (expandable to their signals) with expected
+    and actual rates, jitter, gaps and loss, plus the jitter histogram of
+    the selected row. Refreshed every LINK_REFRESH_MS.
+    """
+    COLUMNS = ["Stream", "Expected Hz", "Actual Hz", "Jitter ms", "Max ms", "Gaps", "Loss %",
+               "Lost frames"]
+
+    def __init__(self, monitor, time_source, parent=None):
+        super().__init__(parent)
+        self.monitor = monitor
+        self.time_source = time_source  # Returns "now" on the monitor's clock
+        layout = QtWidgets.QVBoxLayout(self)
+        layout.setContentsMargins(5, 5, 5, 5)
+
+        self.summary = QtWidgets.QLabel()
+        layout.addWidget(self.summary)
+
+        self.tree = QtWidgets.QTreeWidget()
+        self.tree.setColumnCount(len(self.COLUMNS))
+        self.tree.setHeaderLabels(self.COLUMNS)
+        self.tree.setRootIsDecorated(True)
+        self.items = {}  # item -> list of IntervalStats
+        self.heartbeat_item = QtWidgets.QTreeWidgetItem(["OK heartbeat"])
+        self.tree.addTopLevelItem(self.heartbeat_item)
+        self.items[id(self.heartbeat_item)] = [monitor.heartbeat]
+        self.group_names = {}  # id(item) -> group, for the sequence counters
+        for group, (_, keys) in GROUPS.items():
+            group_item = QtWidgets.QTreeWidgetItem([group])
+            self.tree.addTopLevelItem(group_item)
+            self.items[id(group_item)] = monitor.group(group)
+            self.group_names[id(group_item)] = group
+            for key in keys:
+                key_item = QtWidgets.QTreeWidgetItem([key])
+                group_item.addChild(key_item)
+                self.items[id(key_item)] = [monitor.signals[key]]
+        for column in range(1, len(self.COLUMNS)):
+            self.tree.headerItem().setTextAlignment(column, QtCore.Qt.AlignmentFlag.AlignRight)
+        self.tree.header().setSectionResizeMode(QtWidgets.QHeaderView.ResizeMode.ResizeToContents)
+        layout.addWidget(self.tree, 2)
+
+        self.hist_plot = pg.PlotWidget()
+        self.hist_plot.setLabel("bottom", "Inter-arrival time [log10 s]")
+        self.hist_plot.setLabel("left", "Count")
+        self.hist_plot.setMouseEnabled(x=False, y=False)
+        self.hist_bars = pg.BarGraphItem(x0=np.log10(HIST_EDGES[:-1]), x1=np.log10(HIST_EDGES[1:]),
+                                         height=np.zeros(HIST_BINS), brush="c")
+        self.hist_plot.addItem(self.hist_bars)
+        self.expected_line = pg.InfiniteLine(angle=90, pen=pg.mkPen("y", style=QtCore.Qt.PenStyle.DashLine))
+        self.hist_plot.addItem(self.expected_line)
+        layout.addWidget(self.hist_plot, 1)
+
+        self.tree.setCurrentItem(self.heartbeat_item)
+        self.tree.currentItemChanged.connect(lambda *_: self.refresh())
+        self.timer = QtCore.QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start(LINK_REFRESH_MS)
+
+    def refresh(self):
+        if not self.isVisible():
+            return
+        now = self.time_source()
+        self.update_item(self.heartbeat_item, now)
+        for i in range(1, self.tree.topLevelItemCount()):
+            group_item = self.tree.topLevelItem(i)
+            self.update_item(group_item, now)
+            if group_item.isExpanded():
+                for j in range(group_item.childCount()):
+                    self.update_item(group_item.child(j), now)
+        rtt = self.monitor.ping.percentiles(50, 95, 99)
+        rtt_text = "RTT p50/p95/p99 " + "/".join(f"{r * 1000:.0f}" for r in rtt) + " ms" if rtt else "RTT -"
+        self.summary.setText(f"{self.monitor.baud} baud | {rtt_text} | "
+                             f"Pings lost: {self.monitor.ping.lost} | Bad frames: {self.monitor.bad_frames}")
+        current = self.tree.currentItem()
+        if current is not None:
+            streams = self.items[id(current)]
+            counts = np.sum([s.hist for s in streams], axis=0)
+            self.hist_bars.setOpts(height=counts)
+            self.expected_line.setValue(math.log10(streams[0].period))
+
+    def update_item(self, item, now):
+        # Unsubscribed members of a group have no samples and are left out.
+        streams = [s for s in self.items[id(item)] if s.samples]
+        if not streams:
+            for column in range(1, len(self.COLUMNS)):
+                item.setText(column, "-")
+            item.setForeground(0, QtGui.QBrush(QtGui.QColor("gray")))
+            return
+        expected = 1.0 / streams[0].period
+        # Group rows average their members: the group rate is the rate of each of them.
+        actual = sum(s.rate(now) for s in streams) / len(streams)
+        jitter = max(s.jitter() for s in streams)
+        longest = max(s.max for s in streams)
+        gaps = sum(s.gaps for s in streams)
+        loss = sum(s.loss() for s in streams) / len(streams)
+        group = self.group_names.get(id(item))
+        lost = str(self.monitor.sequences[group].lost) if group else ""
+        values = [f"{expected:.1f}", f"{actual:.1f}", f"{jitter * 1000:.1f}",
+                  f"{longest * 1000:.0f}", str(gaps), f"{loss * 100:.1f}", lost]
+        for column, text in enumerate(values, start=1):
+            item.setText(column, text)
+            item.setTextAlignment(column, QtCore.Qt.AlignmentFlag.AlignRight)
+        ratio = actual / expected
+        color = "green" if ratio >= 0.9 else "orange" if ratio >= 0.5 else "red"
+        item.setForeground(0, QtGui.QBrush(QtGui.QColor(color)))
+
+
+class LinkHealthWidget(QtWidgets.QPushButton):
+    """
+    Compact link status for the menu bar corner: a dot (red when down,
+    orange when the RTT or the recent frame loss is too high, green
+    otherwise), the median RTT and the frame loss over HEALTH_WINDOW_S.
+    Details in the tooltip. `last_ok_age()` returns the seconds since the
+    last heartbeat, or None while disconnected. With the link's `reconnect`
+    (hotplug.Reconnect), reconnection attempts and times are shown too.
+    """
+    def __init__(self, monitor, last_ok_age, reconnect=None, parent=None):
+        super().__init__(parent)
+        self.monitor = monitor
+        self.last_ok_age = last_ok_age
+        self.reconnect = reconnect
+        self.setFlat(True)
+        self.history = deque()  # (time, frames, lost) snapshots over the window
+        self.timer = QtCore.QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start(LINK_REFRESH_MS)
+        self.refresh()
+
+    def recent_loss(self, now):
+        frames, lost = self.monitor.lost_frames()
+        if self.history and frames < self.history[-1][1]:
+            self.history.clear()  # The monitor was reset (new connection)
+        self.history.append((now, frames, lost))
+        while self.history and now - self.history[0][0] > HEALTH_WINDOW_S:
+            self.history.popleft()
+        _, frames0, lost0 = self.history[0]
+        total = (frames - frames0) + (lost - lost0)
+        return (lost - lost0) / total if total > 0 else 0.0
+
+    def refresh(self):
+        now = QtCore.QDateTime.currentMSecsSinceEpoch() / 1000
+        age = self.last_ok_age()
+        loss = self.recent_loss(now)
+        rtt = self.monitor.ping.percentiles(50, 95, 99)
+        reconnecting = age is None and self.reconnect is not None and self.reconnect.active
+        if reconnecting:
+            color, text = "orange", f"reconnecting {now - self.reconnect.lost_at:.0f} s"
+            self.history.clear()
+        elif age is None or age > 1:
+            color, text = "red", "no link" if age is None else "no data"
+            self.history.clear()
+        elif loss > HEALTH_LOSS_WARN or (rtt and rtt[1] * 1000 > HEALTH_RTT_WARN_MS):
+            color, text = "orange", None
+        else:
+            color, text = "green", None
+        if text is None:
+            text = f"{rtt[0] * 1000:.0f} ms" if rtt else "- ms"
+            text += f"  {loss * 100:.1f}%"
+        self.setText(f"\u25cf {text}")
+        self.setStyleSheet(f"QPushButton {{ color: {color}; border: none; padding: 0 4px; }}")
+        lines = [f"Link: {self.monitor.baud} baud"]
+        if rtt:
+            lines.append("RTT p50/p95/p99: " + " / ".join(f"{r * 1000:.1f}" for r in rtt) + " ms")
+        lines.append(f"Pings: {self.monitor.ping.sent} sent, {self.monitor.ping.lost} lost")
+        lines.append(f"Lost frames (last {HEALTH_WINDOW_S:.0f} s): {loss * 100:.2f}%")
+        for group, sequence in self.monitor.sequences.items():
+            if sequence.frames:
+                lines.append(f"  {group}: {sequence.lost} lost of {sequence.frames + sequence.lost}")
+        lines.append(f"Bad frames: {self.monitor.bad_frames}")
+        if self.reconnect is not None and self.reconnect.outages:
+            outages = self.reconnect.outages
+            lines.append(f"Reconnections: {len(outages)}, last {outages[-1]:.2f} s, "
+                         f"longest {max(outages):.2f} s")
+        if reconnecting:
+            lines.append(f"Reconnecting: {self.reconnect.attempts} failed attempts")
+            lines.append("Click to stop reconnecting")
+        else:
+            lines.append("Click to connect or disconnect")
+        self.setToolTip("\n".join(lines))
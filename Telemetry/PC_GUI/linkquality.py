@@ -0,0 +1,228 @@
+"""
+Live link-quality analysis.
+
+The serial reader feeds every received sample, heartbeat and rejected
+line into a LinkMonitor. For each signal it keeps, in O(1) per sample:
+the smoothed arrival rate, Welford mean/std of the inter-arrival time,
+a log-binned jitter histogram and the gaps longer than LINK_GAP_FACTOR
+expected periods. Expected rates come from the firmware prescalers (see
+protocol.py), so a slowly degrading radio link shows up as a falling
+actual/expected ratio and a growing gap count before it drops.
+
+Frame loss is counted exactly from the per-group sequence numbers, and
+round-trip times from echoed PNG probes (PingProbe).
+
+No Qt here: the panel and the health indicator live in linkpanel.py.
+"""
+import math
+import time
+from collections import deque
+
+from config import (BAUD_RATE, LINK_GAP_FACTOR, LINK_RATE_TAU_S, JITTER_HIST_MIN_S,
+                    JITTER_HIST_BINS_PER_DECADE, JITTER_HIST_DECADES,
+                    PING_INTERVAL_S, PING_TIMEOUT_S, PING_WINDOW)
+from protocol import (GROUPS, KEY_GROUP, TASK_PERIOD_S, SIGNAL_BIT, ALL_SIGNALS_MASK,
+                      PING, SEQUENCE_MOD, group_period, effective_prescalers)
+
+HIST_BINS = JITTER_HIST_BINS_PER_DECADE * JITTER_HIST_DECADES
+HIST_LOG_MIN = math.log10(JITTER_HIST_MIN_S)
+
+
+class IntervalStats:
+    """Incremental statistics of the arrival times of one stream."""
+    __slots__ = ("period", "samples", "first", "last", "intervals", "mean", "m2",
+                 "max", "smoothed", "gaps", "gap_time", "last_gap", "hist")
+
+    def __init__(self, period):
+        self.period = period  # Expected seconds between arrivals
+        self.reset()
+
+    def reset(self):
+        self.samples = 0
+        self.first = self.last = None
+        self.intervals = 0
+        self.mean = self.m2 = 0.0
+        self.max = 0.0
+        self.smoothed = self.period  # Exponentially weighted interval
+        self.gaps = 0
+        self.gap_time = 0.0
+        self.last_gap = None
+        self.hist = [0] * HIST_BINS
+
+    def add(self, t):
+        if self.last is not None:
+            dt = t - self.last
+            self.intervals += 1
+            delta = dt - self.mean
+            self.mean += delta / self.intervals
+            self.m2 += delta * (dt - self.mean)
+            if dt > self.max:
+                self.max = dt
+            # Time-based smoothing, so the rate responds equally fast at any rate.
+            weight = 1.0 - math.exp(-dt / LINK_RATE_TAU_S)
+            self.smoothed += weight * (dt - self.smoothed)
+            if dt > 0:
+                index = int((math.log10(dt) - HIST_LOG_MIN) * JITTER_HIST_BINS_PER_DECADE)
+                self.hist[min(max(index, 0), HIST_BINS - 1)] += 1
+            if dt > LINK_GAP_FACTOR * self.period:
+                self.gaps += 1
+                self.gap_time += dt
+                self.last_gap = t
+        else:
+            self.first = t
+        self.last = t
+        self.samples += 1
+
+    def rate(self, now):
+        """Smoothed arrivals per second; falls off while nothing arrives."""
+        if self.last is None:
+            return 0.0
+        return 1.0 / max(self.smoothed, now - self.last, 1e-6)
+
+    def jitter(self):
+        """Standard deviation of the inter-arrival time."""
+        return math.sqrt(self.m2 / self.intervals) if self.intervals > 1 else 0.0
+
+    def loss(self):
+        """Fraction of the expected arrivals that never came."""
+        if self.intervals == 0:
+            return 0.0
+        expected = (self.last - self.first) / self.period
+        return max(0.0, 1.0 - self.intervals / expected) if expected > 0 else 0.0
+
+
+class SequenceStats:
+    """Frames received and lost, from the sequence numbers of one group."""
+    __slots__ = ("last", "frames", "lost")
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.last = None
+        self.frames = 0
+        self.lost = 0
+
+    def add(self, number):
+        if self.last is not None:
+            # A counter line lost on its own also counts as a lost frame.
+            self.lost += (number - self.last - 1) % SEQUENCE_MOD
+        self.last = number
+        self.frames += 1
+
+    def loss(self):
+        total = self.frames + self.lost
+        return self.lost / total if total else 0.0
+
+
+class PingProbe:
+    """
+    Round-trip times of PNG probes. The sender calls message(now) when
+    due(now) and writes the result; the reader calls on_echo().
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.number = 0
+        self.pending = {}       # number -> send time
+        self.rtts = deque(maxlen=PING_WINDOW)
+        self.sent = 0
+        self.lost = 0
+        self.last_sent = None
+
+    def due(self, now):
+        return self.last_sent is None or now - self.last_sent >= PING_INTERVAL_S
+
+    def message(self, now):
+        """Bytes of the next probe, sent at `now`."""
+        for number, sent_t in list(self.pending.items()):
+            if now - sent_t > PING_TIMEOUT_S:
+                self.pending.pop(number, None)
+                self.lost += 1
+        self.number = self.number % 99999 + 1
+        self.pending[self.number] = now
+        self.sent += 1
+        self.last_sent = now
+        return f"{PING}:{self.number}\r\n".encode("ascii")
+
+    def on_echo(self, number, now):
+        sent_t = self.pending.pop(number, None)
+        if sent_t is not None:
+            self.rtts.append(now - sent_t)
+
+    def percentiles(self, *ps):
+        """RTT percentiles in seconds over the window, or None without data."""
+        if not self.rtts:
+            return None
+        rtts = sorted(self.rtts)
+        return [rtts[min(len(rtts) - 1, int(p / 100 * len(rtts)))] for p in ps]
+
+
+class LinkMonitor:
+    """Per-signal and heartbeat statistics for the live link."""
+
+    def __init__(self):
+        self.signals = {key: IntervalStats(group_period(group)) for key, group in KEY_GROUP.items()}
+        self.heartbeat = IntervalStats(TASK_PERIOD_S)
+        self.sequences = {group: SequenceStats() for group in GROUPS}
+        self.ping = PingProbe()
+        self.bad_frames = 0
+        self.subscription = ALL_SIGNALS_MASK  # Last mask acknowledged by the firmware
+        self.baud = BAUD_RATE
+        self.started = time.time()
+
+    def reset(self, baud=BAUD_RATE):
+        """New connection at `baud`: the firmware sends everything at its rates for that baud."""
+        self.baud = baud
+        prescalers = effective_prescalers(ALL_SIGNALS_MASK, baud)
+        for key, stats in self.signals.items():
+            stats.period = prescalers[KEY_GROUP[key]] * TASK_PERIOD_S
+            stats.reset()
+        self.heartbeat.reset()
+        for sequence in self.sequences.values():
+            sequence.reset()
+        self.ping.reset()
+        self.bad_frames = 0
+        self.subscription = ALL_SIGNALS_MASK
+        self.started = time.time()
+
+    def set_subscription(self, mask):
+        """
+        The firmware acknowledged a new subscription: expect its group
+        rates, and restart the statistics of every stream that changed.
+        """
+        prescalers = effective_prescalers(mask, self.baud)
+        for key, stats in self.signals.items():
+            group = KEY_GROUP[key]
+            period = prescalers[group] * TASK_PERIOD_S
+            subscribed = bool(mask >> SIGNAL_BIT[key] & 1)
+            was_subscribed = bool(self.subscription >> SIGNAL_BIT[key] & 1)
+            if period != stats.period or subscribed != was_subscribed:
+                stats.period = period
+                stats.reset()
+        self.subscription = mask
+
+    def on_sample(self, key, t):
+        stats = self.signals.get(key)
+        if stats is not None:
+            stats.add(t)
+
+    def on_heartbeat(self, t):
+        self.heartbeat.add(t)
+
+    def on_sequence(self, group, number):
+        self.sequences[group].add(number)
+
+    def lost_frames(self):
+        """(frames received, frames lost) over all groups."""
+        return (sum(s.frames for s in self.sequences.values()),
+                sum(s.lost for s in self.sequences.values()))
+
+    def on_bad_frame(self):
+        self.bad_frames += 1
+
+    def group(self, name):
+        """IntervalStats of the members of a firmware group."""
+        return [self.signals[key] for key in GROUPS[name][1]]
@@ -1,9 +1,20 @@
+import os
+import sys
 import csv
 import time
+import tempfile
+import threading
 from PyQt6 import QtWidgets, QtCore
 from signals import SignalsList
 from focus import FocusManager
 from data import *
+import data
+from config import LAZY_LOAD_BYTES, SESSION_CACHE_CHUNKS
+from segments import RotatingLog, TickLogger, SegmentedReader, find_manifest, load_segments, segment_paths, MANIFEST_SUFFIX
+from session import SessionReader, SESSION_EXT, read_session, read_csv_columns, to_history, convert_csv
+
+LOG_FILE_FILTER = "CSV Files (*.csv);;Session Files (*.rcs)"
+logging_widget = None  # CSVLoggerWidget whose button started the current log
 
 # --- CSV Logger Widget ---
 class CSVLoggerWidget(QtWidgets.QGroupBox):
@@ -87,101 +98,220 @@ class CSVLoggerWidget(QtWidgets.QGroupBox):
 
 def toggle_logging(logger_widget):
     """
-    Toggle CSV logging on/off.
-    
+    Toggle logging on/off.
+
     Uses the logger_widget (an instance of CSVLoggerWidget) to get:
       - The log_button for updating text and style.
       - The list of signal names via logger_widget.get_signals().
+
+    The log is written as rotating segments (see segments.RotatingLog).
     """
-    global logging_active, logging_start_time, logging_vars, csv_file, csv_writer
+    global logging_active, logging_start_time, logging_vars, active_log, logging_widget
     if not logging_active:
-        fname, _ = QtWidgets.QFileDialog.getSaveFileName(
-            None, "Save CSV Log", "", "CSV Files (*.csv)"
+        fname, selected_filter = QtWidgets.QFileDialog.getSaveFileName(
+            None, "Save Log", "", LOG_FILE_FILTER
         )
         if not fname:
             return  # User cancelled.
-        try:
-            csv_file = open(fname, 'w', newline='')
-        except Exception as e:
-            QtWidgets.QMessageBox.critical(None, "Error", f"Could not open file:\n{e}")
-            return
-        csv_writer = csv.writer(csv_file)
         # Retrieve signal keys from the logger widget's signal list.
         logging_vars = logger_widget.get_signals()
-        
+
         # If no signals are selected, log only time.
         if not logging_vars:
             logging_vars = []  # Empty list to indicate only time will be logged
-        
-        # Write header with time and the selected signal keys (if any).
-        header = ["t"] + logging_vars
-        csv_writer.writerow(header)
-        csv_file.flush()
+
+        if selected_filter.startswith("Session") and not fname.endswith((".csv", SESSION_EXT)):
+            fname += SESSION_EXT
+        try:
+            log = RotatingLog(fname, logging_vars)
+        except Exception as e:
+            QtWidgets.QMessageBox.critical(None, "Error", f"Could not open file:\n{e}")
+            return
         logging_start_time = time.time()
+        active_log = TickLogger(log, logging_vars, data_history, logging_start_time - start_time)
         logging_active = True
+        logging_widget = logger_widget
+        print(f"Logging to {active_log.manifest_path}")
+        show_logging(logger_widget, True)
+    else:
+        logging_active = False
+        if active_log:
+            try:
+                active_log.close()
+            except OSError as e:
+                print(f"Error closing log: {e}", file=sys.stderr)
+            active_log = None
+        logging_widget = None
+        show_logging(logger_widget, False)
+
+
+def show_logging(logger_widget, active):
+    """Show on the logger's button whether a log is being written."""
+    if active:
         logger_widget.log_button.setText("Stop Logging")
         logger_widget.log_button.setStyleSheet("background-color: red; color: white;")  # Red button
     else:
-        logging_active = False
-        if csv_file:
-            csv_file.close()
         logger_widget.log_button.setText("Start Logging")
         logger_widget.log_button.setStyleSheet("background-color: none; QGroupBox { border: 2px solid gray; }")  # Reset button style
 
 
 def log_data(data_history):
     """
-    Called on each update cycle. Writes a new row to the CSV file
-    if logging is active.
+    Called on each update cycle. Writes a new row to the CSV log (or the
+    new samples to a session log) if logging is active.
     """
-    global logging_active, logging_start_time, logging_vars, csv_file, csv_writer
-    if logging_active and csv_writer:
-        t_ms = time.time() - logging_start_time
-        row = [t_ms]
-        
-        if logging_vars:
-            for signal in logging_vars:
-                # Write the latest value for each signal (or an empty string if no data).
+    global logging_active, active_log, logging_widget
+    if not (logging_active and active_log):
+        return
+    try:
+        active_log.tick(time.time() - start_time)
+    except OSError as e:
+        # Disk full or gone: earlier segments are already closed and indexed.
+        print(f"Error writing log, logging stopped: {e}", file=sys.stderr)
+        logging_active = False
+        try:
+            active_log.close()
+        except OSError:
+            pass
+        active_log = None
+        # The next click starts a new log, so the button must say so.
+        if logging_widget is not None:
+            show_logging(logging_widget, False)
+            logging_widget = None
+
+
+class LogLoader(QtCore.QObject):
+    """
+    Parses a CSV or session log on a worker thread. Missing cells are kept
+    as NaN gaps. The parsed history is handed back to the GUI thread in
+    one piece through the `finished` signal.
+
+    With `lazy` set, nothing is loaded into memory: CSV logs are converted
+    to a session file next to them (the on-disk time index) and a
+    SessionReader is emitted instead.
+
+    Segmented logs (a manifest or any of its segments) are stitched back
+    into one session.
+    """
+    progress = QtCore.pyqtSignal(int)       # Percent of the file parsed
+    finished = QtCore.pyqtSignal(object)    # {key: [(value, t), ...]}, SessionReader or SegmentedReader
+    failed = QtCore.pyqtSignal(str)
+
+    def __init__(self, fname, lazy=False, parent=None):
+        super().__init__(parent)
+        self.fname = fname
+        self.lazy = lazy
+
+    def start(self):
+        thread = threading.Thread(target=self.run, daemon=True)
+        thread.start()
+
+    def run(self):
+        report = lambda f: self.progress.emit(int(f * 99))
+        try:
+            manifest = find_manifest(self.fname)
+            if manifest and self.lazy:
+                paths = segment_paths(manifest)
+                sessions = [session_file(p) for p in paths]
+                result = SegmentedReader(sessions, cache_chunks=SESSION_CACHE_CHUNKS)
+            elif manifest:
+                result = to_history(load_segments(manifest, keep_gaps=True, progress=report))
+            elif self.lazy:
+                result = SessionReader(session_file(self.fname, report), cache_chunks=SESSION_CACHE_CHUNKS)
+            elif self.fname.endswith(SESSION_EXT):
+                _, arrays = read_session(self.fname)
+                result = to_history(arrays)
+            else:
+                arrays = read_csv_columns(self.fname, keep_gaps=True, progress=report)
+                result = to_history(arrays)
+        except Exception as e:
+            self.failed.emit(str(e))
+            return
+        self.progress.emit(100)
+        self.finished.emit(result)
 
-                #each data_history element contains the value and timestamp, so we only need the value to be logged
-                row.append(data_history[signal][-1][0] if data_history[signal] else "")
-                
-        else:
-            # If no signals are selected, log only time.
-            row.append("")
-        # Write the row to the CSV file.
-        csv_writer.writerow(row)
-        csv_file.flush()
+
+def session_file(fname, report=None):
+    """Session file for a log, converting (and caching) CSV logs."""
+    if fname.endswith(SESSION_EXT):
+        return fname
+    sidecar = os.path.splitext(fname)[0] + SESSION_EXT
+    if os.path.exists(sidecar) and os.path.getmtime(sidecar) >= os.path.getmtime(fname):
+        return sidecar
+    try:
+        return convert_csv(fname, sidecar, progress=report)
+    except OSError:
+        # Read-only log folder: keep the index in the temp directory instead.
+        fallback = os.path.join(tempfile.gettempdir(), os.path.basename(sidecar))
+        return convert_csv(fname, fallback, progress=report)
+
+
+def log_size(fname):
+    """Size on disk of a log, summed over all segments for segmented logs."""
+    manifest = find_manifest(fname)
+    if manifest:
+        return sum(os.path.getsize(p) for p in segment_paths(manifest))
+    return os.path.getsize(fname)
+
+
+_active_loader = None  # Keeps the running LogLoader alive
 
 
 def load_log(data_history):
     """
-    Load a CSV log, only allowed when no active communication.
+    Load a CSV or session log in the background, only allowed when no
+    active communication. The store is replaced in bulk and the plots
+    refreshed once when parsing finishes. Logs larger than LAZY_LOAD_BYTES
+    open in log-viewer mode instead, where tiles read only their visible
+    range from disk.
     """
+    global _active_loader
     from comm import comm  # local import to avoid circular dependency
     if comm.is_connected():
         QtWidgets.QMessageBox.warning(None, "Load Log", "Cannot load log while communication is active.")
         return
+    if _active_loader is not None:
+        return  # A log is already loading
     fname, _ = QtWidgets.QFileDialog.getOpenFileName(
-        None, "Open CSV Log", "", "CSV Files (*.csv)"
+        None, "Open Log", "", f"Logs (*.csv *.rcs *{MANIFEST_SUFFIX});;" + LOG_FILE_FILTER
+        + f";;Segmented Logs (*{MANIFEST_SUFFIX})"
     )
     if not fname:
         return
-    data_history.clear()
-    with open(fname, 'r') as f:
-        reader = csv.reader(f)
-        header = next(reader, None)
-        if not header:
-            return
-        signals = header[1:]
-        for signal in signals:
-            data_history[signal] = []
-        for row in reader:
-            t_val = float(row[0]) if row[0] else 0
-            for i, signal in enumerate(signals, start=1):
-                val = float(row[i]) if row[i] else 0
-                data_history[signal].append((val, t_val))
-    # Immediately update plots if an update callback is set as a property on the application
-    update_plots_cb = QtWidgets.QApplication.instance().property("update_plots")
-    if callable(update_plots_cb):
-        update_plots_cb()
+
+    progress_dialog = QtWidgets.QProgressDialog(f"Loading {fname}...", None, 0, 100)
+    progress_dialog.setWindowTitle("Load Log")
+    progress_dialog.setMinimumDuration(200)
+    progress_dialog.setAutoClose(True)
+
+    loader = LogLoader(fname, lazy=log_size(fname) > LAZY_LOAD_BYTES)
+    loader.progress.connect(progress_dialog.setValue)
+
+    def on_finished(result):
+        global _active_loader
+        _active_loader = None
+        data.close_session_view()
+        data_history.clear()
+        data.history_pyramid.clear()
+        if isinstance(result, (SessionReader, SegmentedReader)):
+            data_history.update({key: [] for key in SIGNAL_KEYS})
+            data.session_view = result
+            print(f"Opened {fname} in viewer mode ({result.t_max - result.t_min:.0f} s)")
+        else:
+            data_history.update(result)
+        progress_dialog.setValue(100)
+        # Immediately update plots if an update callback is set as a property on the application
+        update_plots_cb = QtWidgets.QApplication.instance().property("update_plots")
+        if callable(update_plots_cb):
+            update_plots_cb()
+
+    def on_failed(message):
+        global _active_loader
+        _active_loader = None
+        progress_dialog.close()
+        QtWidgets.QMessageBox.critical(None, "Load Log", f"Could not load log:\n{message}")
+
+    loader.finished.connect(on_finished)
+    loader.failed.connect(on_failed)
+    _active_loader = loader
+    loader.start()
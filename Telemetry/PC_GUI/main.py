@@ -15,6 +15,12 @@ from tiles import TilingArea
 from logger import *
 from focus import FocusManager
 from menu import setup_menu_bar
+from linkpanel import LinkQualityPanel, LinkHealthWidget
+from parampanel import ParameterPanel
+from statspanel import StatisticsPanel
+from stats import RollingStats
+from console import Console, INFO, ERROR
+import data
 
 # Import the new communication module
 from comm import SerialComm, comm
@@ -26,9 +32,6 @@ logging_vars = []  # Captured signal keys for logging when logging starts.
 csv_file = None
 csv_writer = None
 
-# Global flag to freeze/unfreeze data updates.
-freeze_plots = False
-
 # --- Application Setup ---
 app = QtWidgets.QApplication([])
 
@@ -51,25 +54,10 @@ left_layout.setSpacing(5)
 
 
 
-class TerminalLogWidget(QtWidgets.QWidget):
-    def __init__(self, parent=None):
-        super().__init__(parent)
-        self.text_edit = QtWidgets.QPlainTextEdit()
-        self.text_edit.setReadOnly(True)
-        layout = QtWidgets.QVBoxLayout(self)
-        layout.setContentsMargins(0, 0, 0, 0)
-        layout.addWidget(self.text_edit)
-
-    def write(self, msg):
-        # redirect both prints and errors
-        self.text_edit.appendPlainText(msg.rstrip())
-
-    def flush(self):
-        pass
-
-
-log_widget          = TerminalLogWidget()
+log_widget          = Console()
 signals_list = SignalsList()
+# Additional devices (Devices menu) list their signals as "<name>/<signal>".
+comm.on_devices_changed = signals_list.set_devices
 left_layout.addWidget(signals_list)
 
 csv_logger_widget = CSVLoggerWidget()
@@ -80,8 +68,8 @@ left_layout.addWidget(signals_list,      1)
 left_layout.addWidget(csv_logger_widget, 1)
 
 # And then right after you show the window, redirect stdout/stderr
-sys.stdout = log_widget
-sys.stderr = log_widget
+sys.stdout = log_widget.stream(INFO)
+sys.stderr = log_widget.stream(ERROR)
 
 # --- Middle Column: Plot Area (Tiling Area) ---
 tiling_area = TilingArea()
@@ -96,11 +84,37 @@ main_splitter.setStretchFactor(1, 3)
 main_splitter.setStretchFactor(2, 1)
 
 
+# --- Link Quality Panel (dockable, toggled from the View menu) ---
+link_panel = LinkQualityPanel(data.link_monitor, lambda: time.time() - start_time)
+link_dock = QtWidgets.QDockWidget("Link Quality", main_window)
+link_dock.setWidget(link_panel)
+main_window.addDockWidget(QtCore.Qt.DockWidgetArea.RightDockWidgetArea, link_dock)
+link_dock.hide()
+
+# --- Parameter editor (dockable, toggled from the View menu) ---
+param_panel = ParameterPanel(data.param_table, comm)
+param_dock = QtWidgets.QDockWidget("Parameters", main_window)
+param_dock.setWidget(param_panel)
+main_window.addDockWidget(QtCore.Qt.DockWidgetArea.RightDockWidgetArea, param_dock)
+param_dock.hide()
+
+# --- Statistics panel (dockable, toggled from the View menu) ---
+data.rolling_stats = RollingStats()
+stats_panel = StatisticsPanel(data.rolling_stats, lambda: time.time() - start_time)
+stats_dock = QtWidgets.QDockWidget("Statistics", main_window)
+stats_dock.setWidget(stats_panel)
+main_window.addDockWidget(QtCore.Qt.DockWidgetArea.RightDockWidgetArea, stats_dock)
+stats_dock.hide()
+
 # --- Connect CSV Logger Button ---
 csv_logger_widget.log_button.clicked.connect(lambda: toggle_logging(csv_logger_widget))
 
 # --- Setup Menu Bar (called only once) ---
 setup_menu_bar(main_window, tiling_area)
+view_menu = main_window.menuBar().addMenu("View")
+view_menu.addAction(link_dock.toggleViewAction())
+view_menu.addAction(param_dock.toggleViewAction())
+view_menu.addAction(stats_dock.toggleViewAction())
 
 # --- Create Indicators in Menu Bar Corner ---
 # Freeze indicator (shows pause status)
@@ -108,14 +122,12 @@ freeze_indicator = QtWidgets.QLabel()
 freeze_indicator.setFixedSize(20, 20)  # enforce circular dimensions
 freeze_indicator.setStyleSheet("background-color: lightgray; border-radius: 10px;")
 
-# OK indicator (now a button to open the serial port selection popup)
-ok_indicator = QtWidgets.QPushButton("")
-ok_indicator.setFixedSize(20, 20)  # enforce circular dimensions
-ok_indicator.setStyleSheet("background-color: red; border-radius: 10px;")
-ok_indicator.setFlat(True)
+# Link health indicator (RTT, frame loss; click to open the connection popup)
+def last_ok_age():
+    return time.time() - comm.last_ok_time if comm.is_connected() else None
 
-# Create the communication instance and wire up the connection button.
-ok_indicator.clicked.connect(comm.change_connection)
+health_indicator = LinkHealthWidget(data.link_monitor, last_ok_age, comm.serial.reconnect)
+health_indicator.clicked.connect(comm.change_connection)
 
 # Container for both indicators with some margins.
 corner_container = QtWidgets.QWidget()
@@ -123,20 +135,22 @@ corner_layout = QtWidgets.QHBoxLayout(corner_container)
 corner_layout.setContentsMargins(5, 0, 5, 0)
 corner_layout.setSpacing(10)
 corner_layout.addWidget(freeze_indicator)
-corner_layout.addWidget(ok_indicator)
+corner_layout.addWidget(health_indicator)
 main_window.menuBar().setCornerWidget(corner_container, QtCore.Qt.Corner.TopRightCorner)
 
 def update():
     # Log data (every new data point has been appended by the serial thread).
     log_data(data_history)
 
-    # Update indicators based on the communication connection and last OK time.
-    if not comm.is_connected() or time.time() - comm.last_ok_time > 1:
-        ok_indicator.setStyleSheet("background-color: red; border-radius: 10px;")
-    else:
-        ok_indicator.setStyleSheet("background-color: green; border-radius: 10px;")
+    # The boat (or a telemetry server) only sends what is plotted or logged here.
+    needed = set(csv_logger_widget.get_signals())
+    for plot in tiling_area.plots:
+        needed.update(plot.signal_keys_assigned)
+    comm.set_subscription(needed)
+    comm.ping()
+    comm.sync_parameters()
 
-    if freeze_plots:
+    if data.frozen is not None:
         freeze_indicator.setStyleSheet("background-color: blue; border-radius: 10px;")
     else:
         freeze_indicator.setStyleSheet("background-color: lightgray; border-radius: 10px;")
@@ -144,9 +158,9 @@ def update():
 # --- Plot Update Function ---
 
 def update_plots():
-    if not freeze_plots:
-        for plot in tiling_area.plots.keys():
-            plot.update_plot(data_history)
+    # While frozen the tiles draw the snapshot taken by data.freeze().
+    for plot in tiling_area.plots.keys():
+        plot.update_plot(data.plot_history())
 
 # --- Timers ---
 
@@ -154,6 +168,9 @@ main_timer = QtCore.QTimer()
 main_timer.timeout.connect(update)
 main_timer.start(UPDATE_INTERVAL_MS)
 
+# Lets load_log refresh the plots once a log has been loaded.
+app.setProperty("update_plots", update_plots)
+
 plot_timer = QtCore.QTimer()
 plot_timer.timeout.connect(update_plots)
 plot_timer.start(PLOT_UPDATE_INTERVAL_MS)
@@ -177,9 +194,11 @@ tiling_area.add_initial_row()
 
 original_keyPressEvent = main_window.keyPressEvent
 def custom_keyPressEvent(event):
-    global freeze_plots
     if event.key() == QtCore.Qt.Key.Key_Space:
-        freeze_plots = not freeze_plots
+        if data.frozen is None:
+            data.freeze()
+        else:
+            data.unfreeze()
     else:
         original_keyPressEvent(event)
 main_window.keyPressEvent = custom_keyPressEvent
@@ -1,6 +1,11 @@
 from PyQt6 import QtWidgets, QtCore, QtGui
 import json
 
+import data
+from focus import FocusManager
+from session import SESSION_EXT
+from comm import comm
+
 def export_layout(main_window, tiling_area):
     """Exports the current layout state to a JSON file."""
     state = tiling_area.get_layout_state()
@@ -37,11 +42,54 @@ def import_layout(main_window, tiling_area):
         except Exception as e:
             QtWidgets.QMessageBox.critical(main_window, "Error", f"Failed to import layout: {e}")
 
+def export_frozen(main_window):
+    """
+    Exports the frozen snapshot (Space) to a session file: the time range
+    shown by the selected plot tile, or all frozen samples without one.
+    """
+    snapshot = data.frozen
+    if snapshot is None:
+        QtWidgets.QMessageBox.information(main_window, "Export Frozen Data",
+                                          "Freeze the plots (Space) first.")
+        return
+    t0 = t1 = None
+    active = FocusManager.get_active()
+    if getattr(active, "mode", None) == "plot":
+        t0, t1 = active.plot.getViewBox().viewRange()[0]
+    filename, _ = QtWidgets.QFileDialog.getSaveFileName(
+        main_window,
+        "Export Frozen Data",
+        "",
+        f"Session Files (*{SESSION_EXT})",
+        options=QtWidgets.QFileDialog.Option.DontUseNativeDialog
+    )
+    if filename:
+        if not filename.endswith(SESSION_EXT):
+            filename += SESSION_EXT
+        try:
+            count = snapshot.export(filename, t0=t0, t1=t1)
+            QtWidgets.QMessageBox.information(main_window, "Export Frozen Data",
+                                              f"{count} samples exported.")
+        except Exception as e:
+            QtWidgets.QMessageBox.critical(main_window, "Error", f"Failed to export frozen data: {e}")
+
+def remove_device(main_window):
+    """Disconnects one of the additional devices and drops it from the signal list."""
+    names = list(comm.devices)
+    if not names:
+        QtWidgets.QMessageBox.information(main_window, "Remove Device", "No additional devices connected.")
+        return
+    name, ok = QtWidgets.QInputDialog.getItem(main_window, "Remove Device", "Device:", names, 0, False)
+    if ok:
+        comm.remove_device(name)
+
 def setup_menu_bar(main_window, tiling_area):
     """
     Set up the menu bar for main_window with actions:
       - Import Layout
       - Export Layout
+      - Export Frozen Data
+      - Add Device / Remove Device
     """
     menu_bar = main_window.menuBar()
     
@@ -55,3 +103,21 @@ def setup_menu_bar(main_window, tiling_area):
     export_layout_action = QtGui.QAction("Export Layout", main_window)
     export_layout_action.triggered.connect(lambda: export_layout(main_window, tiling_area))
     layout_menu.addAction(export_layout_action)
+
+    # --- Data Menu ---
+    data_menu = menu_bar.addMenu("Data")
+
+    export_frozen_action = QtGui.QAction("Export Frozen Data", main_window)
+    export_frozen_action.triggered.connect(lambda: export_frozen(main_window))
+    data_menu.addAction(export_frozen_action)
+
+    # --- Devices Menu ---
+    devices_menu = menu_bar.addMenu("Devices")
+
+    add_device_action = QtGui.QAction("Add Device", main_window)
+    add_device_action.triggered.connect(lambda: comm.add_device())
+    devices_menu.addAction(add_device_action)
+
+    remove_device_action = QtGui.QAction("Remove Device", main_window)
+    remove_device_action.triggered.connect(lambda: remove_device(main_window))
+    devices_menu.addAction(remove_device_action)
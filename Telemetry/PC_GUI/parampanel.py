@@ -0,0 +1,114 @@
+"""Editor of the boat's parameter table (see params.py)."""
+from PyQt6 import QtWidgets, QtCore, QtGui
+
+from config import LINK_REFRESH_MS
+from params import PARAMETERS, check_value
+from signals import get_signal_name
+
+
+class ParameterPanel(QtWidgets.QWidget):
+    """
+    The boat's parameters as read back, with a column to type new values
+    in; Apply sends every edited value in one batch, which the boat
+    applies entirely or not at all.
+    """
+    COLUMNS = ["Parameter", "Boat", "New", "Range"]
+
+    def __init__(self, table, comm, parent=None):
+        super().__init__(parent)
+        self.table = table
+        self.comm = comm
+        self.shown_change = None
+        layout = QtWidgets.QVBoxLayout(self)
+        layout.setContentsMargins(5, 5, 5, 5)
+
+        self.status = QtWidgets.QLabel()
+        layout.addWidget(self.status)
+
+        self.grid = QtWidgets.QTableWidget(len(PARAMETERS), len(self.COLUMNS))
+        self.grid.setHorizontalHeaderLabels(self.COLUMNS)
+        self.grid.verticalHeader().hide()
+        self.grid.horizontalHeader().setSectionResizeMode(QtWidgets.QHeaderView.ResizeMode.ResizeToContents)
+        self.grid.horizontalHeader().setStretchLastSection(True)
+        for row, (key, low, high, _) in enumerate(PARAMETERS):
+            for column, text in enumerate([get_signal_name(key), "", "", f"{low:g} .. {high:g}"]):
+                item = QtWidgets.QTableWidgetItem(text)
+                if column != 2:
+                    item.setFlags(item.flags() & ~QtCore.Qt.ItemFlag.ItemIsEditable)
+                self.grid.setItem(row, column, item)
+        layout.addWidget(self.grid)
+
+        buttons = QtWidgets.QHBoxLayout()
+        self.apply_button = QtWidgets.QPushButton("Apply")
+        self.apply_button.clicked.connect(self.apply)
+        self.read_button = QtWidgets.QPushButton("Read back")
+        self.read_button.clicked.connect(self.read_back)
+        buttons.addWidget(self.apply_button)
+        buttons.addWidget(self.read_button)
+        layout.addLayout(buttons)
+
+        self.timer = QtCore.QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start(LINK_REFRESH_MS)
+
+    def edited_values(self):
+        """{key: value} typed in the New column; raises ValueError naming a bad entry."""
+        values = {}
+        for row, (key, *_) in enumerate(PARAMETERS):
+            text = self.grid.item(row, 2).text().strip()
+            if not text:
+                continue
+            try:
+                value = float(text)
+            except ValueError:
+                raise ValueError(f"{key}: '{text}' is not a number")
+            error = check_value(key, value)
+            if error:
+                raise ValueError(error)
+            values[key] = value
+        return values
+
+    def apply(self):
+        try:
+            values = self.edited_values()
+        except ValueError as e:
+            QtWidgets.QMessageBox.warning(self, "Parameters", str(e))
+            return
+        if not values:
+            return
+        self.comm.set_parameters(values)
+        for row in range(len(PARAMETERS)):
+            self.grid.item(row, 2).setText("")
+        self.refresh()
+
+    def read_back(self):
+        self.table.values.clear()  # sync_parameters() then requests the whole table
+        self.table.requested = 0.0
+        self.shown_change = None
+        self.refresh()
+
+    def refresh(self):
+        if not self.isVisible() or self.shown_change == self.table.changed:
+            return
+        self.shown_change = self.table.changed
+        for row, (key, *_) in enumerate(PARAMETERS):
+            item = self.grid.item(row, 1)
+            if key in self.table.pending:
+                item.setText(f"{self.table.pending[key]:.6g} (sending)")
+                item.setForeground(QtGui.QColor("gray"))
+            elif key in self.table.values:
+                item.setText(f"{self.table.values[key]:.6g}")
+                item.setForeground(self.palette().color(QtGui.QPalette.ColorRole.Text))
+            else:
+                item.setText("-")
+        if self.table.last_error:
+            self.status.setText(f"<span style='color: red'>Not applied: {self.table.last_error}</span>")
+        elif self.table.synced:
+            self.status.setText(f"In sync with the boat (version {self.table.version})")
+        else:
+            self.status.setText("Waiting for the boat...")
+
+    def showEvent(self, event):
+        self.shown_change = None
+        self.refresh()
+        super().showEvent(event)
@@ -0,0 +1,169 @@
+"""
+Host side of the firmware parameter table (PARAMS.c).
+
+Parameters (modes, servo setpoints, controller gains) are addressed by
+index and travel as the hex bits of their float, so the values read
+back are exactly the boat's:
+
+    PGA:0                      -> PRM:<i>=<hex> for every parameter, PVR:<version>
+    PGT:<i>                    -> PRM:<i>=<hex>, PVR:<version>
+    PST:<i>=<hex>[,<i>=<hex>]  -> PRM:<i>=<hex> per parameter set, PVR:<version>
+                                  or PER:<code>, with nothing applied
+
+Plain "KEY:value" commands are still accepted and answered the same way.
+ParamTable mirrors the boat's table from these replies; the whole table
+is requested in one round trip on connect. No Qt here.
+"""
+import re
+import time
+import struct
+
+from config import PARAM_REPLY_TIMEOUT_S
+
+GET_ALL = "PGA"
+GET = "PGT"
+SET = "PST"
+VALUE = "PRM"
+VERSION = "PVR"
+ERROR = "PER"
+
+VERSION_MOD = 1 << 16   # uint16_t version in PARAMS.c
+RX_LINE_SIZE = 128      # RX_LINE_SIZE in TELEMETRY_RX.h: a command line with CRLF and NUL
+MAX_BATCH_LINE = RX_LINE_SIZE - 8  # Without CRLF and NUL, and a margin
+
+# (key, min, max, default) in table order (param_info[] in PARAMS.c).
+PARAMETERS = [
+    ("MOD", -79.0, 4.0, 0.0),
+    ("SRU", -35.0, 35.0, 0.0),
+    ("STR", 0.0, 90.0, 0.0),
+    ("STW", 0.0, 30.0, 0.0),
+    ("SEX", 0.0, 180.0, 0.0),
+    ("KPR", 0.0, 100.0, 1.0),
+    ("KIR", 0.0, 100.0, 0.1),
+    ("KPY", 0.0, 100.0, 1.0),
+    ("KIY", 0.0, 100.0, 1.0),
+]
+PARAM_INDEX = {key: index for index, (key, *_) in enumerate(PARAMETERS)}
+
+ERRORS = {1: "syntax error", 2: "unknown parameter", 3: "value out of range"}
+HEX_BITS = re.compile(r"^[0-9A-Fa-f]{8}$")  # PRM values: "%08lX" in PARAMS.c
+
+
+def float_to_hex(value):
+    """Hex bits of `value` as a 32-bit float (what the firmware stores)."""
+    return struct.pack(">f", value).hex().upper()
+
+
+def hex_to_float(text):
+    if len(text) > 8:
+        raise ValueError(f"more than 32 bits: {text}")
+    return struct.unpack(">f", bytes.fromhex(text.rjust(8, "0")))[0]
+
+
+def as_float32(value):
+    """`value` rounded to the firmware's float."""
+    return hex_to_float(float_to_hex(value))
+
+
+def check_value(key, value):
+    """Error message if the firmware would refuse `value` for `key`, else None."""
+    _, low, high, _ = PARAMETERS[PARAM_INDEX[key]]
+    if not low <= value <= high:
+        return f"{key} must be between {low:g} and {high:g}"
+    return None
+
+
+def set_lines(values):
+    """PST command lines setting {key: value}, split to fit the firmware's line buffer."""
+    lines, entries = [], []
+    for key, value in values.items():
+        entry = f"{PARAM_INDEX[key]}={float_to_hex(value)}"
+        if entries and len(SET) + 1 + len(",".join(entries + [entry])) > MAX_BATCH_LINE:
+            lines.append(f"{SET}:{','.join(entries)}\r\n")
+            entries = []
+        entries.append(entry)
+    if entries:
+        lines.append(f"{SET}:{','.join(entries)}\r\n")
+    return lines
+
+
+class ParamTable:
+    """
+    The host's copy of the boat's parameters, fed by the serial reader.
+    `values` only holds what the firmware reported; `pending` what was
+    sent and not acknowledged yet.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.values = {}        # key -> value read back from the boat
+        self.version = None     # Firmware's change counter
+        self.pending = {}       # key -> value sent, awaiting its PRM
+        self.requested = 0.0    # time.time() of the last request
+        self.last_error = None
+        self.changed = 0        # Bumped on every reply, for polling views
+
+    @property
+    def synced(self):
+        return len(self.values) == len(PARAMETERS) and not self.pending
+
+    def request_all(self, ser):
+        """Ask for the whole table (one round trip)."""
+        ser.write(f"{GET_ALL}:0\r\n".encode("ascii"))
+        self.requested = time.time()
+
+    def set(self, ser, values):
+        """Send {key: value} as one batch (split only if the line gets too long)."""
+        for line in set_lines(values):
+            ser.write(line.encode("ascii"))
+        self.last_error = None
+        self.pending.update({key: as_float32(value) for key, value in values.items()})
+        self.requested = time.time()
+        self.changed += 1
+
+    def poll(self, ser):
+        """
+        Called periodically: (re)requests the table while it is incomplete
+        and gives up on writes unanswered for PARAM_REPLY_TIMEOUT_S.
+        """
+        if time.time() - self.requested < PARAM_REPLY_TIMEOUT_S:
+            return
+        if self.pending:
+            self.pending.clear()
+            self.last_error = "no answer from the boat"
+            self.changed += 1
+        if len(self.values) < len(PARAMETERS):
+            self.request_all(ser)
+
+    def on_line(self, line):
+        """Handle a parameter reply; returns False for any other line."""
+        key, sep, arg = line.strip().partition(":")
+        if not sep or key not in (VALUE, VERSION, ERROR):
+            return False
+        try:
+            if key == VALUE:
+                index, value = arg.split("=")
+                index = int(index)
+                if not 0 <= index < len(PARAMETERS) or not HEX_BITS.match(value):
+                    return False
+                name = PARAMETERS[index][0]
+                self.values[name] = hex_to_float(value)
+                self.pending.pop(name, None)
+            elif key == VERSION:
+                version = int(arg)
+                # Lower than ours: the boat restarted with its defaults.
+                stale = (self.version is not None and version != self.version
+                         and (self.version - version) % VERSION_MOD < VERSION_MOD // 2)
+                self.version = version
+                if stale:
+                    self.values.clear()
+            else:
+                code = int(arg)
+                self.last_error = ERRORS.get(code, f"error {code}")
+                self.pending.clear()  # A refused batch changes nothing
+        except (ValueError, IndexError):
+            return False
+        self.changed += 1
+        return True
@@ -1,9 +1,10 @@
+import numpy as np
 import pyqtgraph as pg
 from PyQt6 import QtWidgets, QtCore
 from signals import get_signal_name, get_signal_direction  # Import only the required functions
 from focus import FocusManager  # Expects a FocusManager class
-from uart import send_signal
 from data import data_history, start_time
+import data
 import time
 from comm import comm
 
@@ -22,7 +23,7 @@ class DynamicPlot(QtWidgets.QWidget):
         self.init_ui()
         self.setAcceptDrops(True)
         self.setStyleSheet("border: 2px solid gray;")
-        # Instead of a boolean flag, use a string: "plot", "display", or "xy"
+        # Instead of a boolean flag, use a string: "plot", "display", "xy" or "cpu"
         self.mode = "plot"  
 
         # Persistent widgets for display mode:
@@ -45,6 +46,12 @@ class DynamicPlot(QtWidgets.QWidget):
         self.cursor1_rel_pos = 1/3
         self.cursor2_rel_pos = 2/3
 
+        # Log-viewer state: the session being browsed and the last drawn view.
+        self._viewed_session = None
+        self._view_key = None
+        # Frozen snapshot and signals last drawn from it (see snapshot.py).
+        self._frozen_key = None
+
     def init_ui(self):
         self.layout = QtWidgets.QVBoxLayout(self)
         self.layout.setContentsMargins(0, 0, 0, 0)
@@ -80,7 +87,7 @@ class DynamicPlot(QtWidgets.QWidget):
         self.remove_button.clicked.connect(self.remove_self)
 
         # Toggle mode button.
-        # This button now cycles through three modes: plot, display, and xy.
+        # This button now cycles through the modes: plot, display, xy and cpu.
         self.toggle_button = QtWidgets.QPushButton("P")
         self.toggle_button.setFixedSize(40, 20)
         self.toggle_button.setStyleSheet(
@@ -169,7 +176,7 @@ class DynamicPlot(QtWidgets.QWidget):
 
     def add_signal(self, signal):
 
-        if self.mode != "xy":
+        if self.mode not in ("xy", "cpu"):
             """Adds a new signal stream to the plot if not already present."""
             if signal in self.signal_keys_assigned:
                 return  
@@ -239,20 +246,21 @@ class DynamicPlot(QtWidgets.QWidget):
                 widget = self.rx_widgets.pop(signal)[0]
                 widget.deleteLater()
 
-    def update_legend(self):
+    def update_legend(self, force=False):
         """Updates the legend based on the current signal streams,
-           but only updates once per second.
+           but only updates once per second (unless forced).
         """
-        current_time = time.time() - start_time
+        now = time.time()
+        current_time = data.plot_time()
         # Initialize the last update time if it doesn't exist.
         if not hasattr(self, "last_legend_update"):
             self.last_legend_update = 0
 
         # Only update the legend if 1 second has passed.
-        if current_time - self.last_legend_update < 1.0:
+        if not force and now - self.last_legend_update < 1.0:
             return
 
-        self.last_legend_update = current_time
+        self.last_legend_update = now
 
         # Create the legend once if necessary.
         if not hasattr(self, "legend") or self.legend is None:
@@ -261,10 +269,10 @@ class DynamicPlot(QtWidgets.QWidget):
         self.legend.clear()
 
         # In 'plot' mode, show the signal name with the 1s datarate.
-        if self.mode == "plot":
+        if self.mode == "plot" and data.session_view is None:
             for signal in self.signal_keys_assigned:
                 if signal in self.curves:
-                    signal_data = data_history.get(signal, [])
+                    signal_data = data.plot_history().get(signal, [])
                     count = 0
                     # Iterate backward; stop once data is older than 1 second.
                     for _, t in reversed(signal_data):
@@ -319,16 +327,44 @@ class DynamicPlot(QtWidgets.QWidget):
 
     def update_plot(self, data_history=data_history):
         """Updates the plot based on the current mode."""
+        frozen = data.frozen
+        if frozen is not None and data.session_view is None:
+            # Draw the snapshot once (again if the mode or signals change);
+            # zooming and cursors then work on data that no longer moves.
+            frozen_key = (frozen, self.mode, tuple(self.signal_keys_assigned))
+            if frozen_key == self._frozen_key:
+                return
+            self._frozen_key = frozen_key
+            data_history = frozen
+        else:
+            self._frozen_key = None
+
         if self.mode == "xy":
             self.update_xy_plot()
             return
+        elif self.mode == "cpu":
+            if frozen is None:
+                self.update_cpu_plot()
+            return
         elif self.mode == "display":
             self.update_display_widgets(data_history)
             return
 
+        if data.session_view is not None:
+            self.update_session_view(data.session_view)
+            return
+        self._viewed_session = None
+
         # For regular time-series mode.
-        self.update_legend()
-        current_time = time.time() - start_time
+        self.update_legend(force=frozen is not None)
+        current_time = data.plot_time()
+
+        try:
+            time_window = float(self.time_window_edit.text())
+        except ValueError:
+            time_window = 0
+        # Without a time window, the whole session is shown.
+        window_start = current_time - time_window if time_window > 0 else float("-inf")
 
         for signal in self.signal_keys_assigned:
             signal_data = data_history.get(signal)
@@ -345,19 +381,50 @@ class DynamicPlot(QtWidgets.QWidget):
                 except ValueError:
                     # signal_data is empty; skip updating.
                     continue
-                # Set data with times on the x-axis and signal values on the y-axis.
-                self.curves[signal].setData(list(ts), list(vals))
+                ts, vals = list(ts), list(vals)
+
+                # Older than the raw samples: prepend the envelope from the history pyramid.
+                pyramid = data.history_pyramid.get(signal)
+                first_time = pyramid.first_time() if pyramid else None
+                if first_time is not None and first_time < ts[0] and window_start < ts[0]:
+                    env_ts, env_vals = pyramid.envelope(max(window_start, first_time), ts[0],
+                                                        self.plot.width())
+                    older = env_ts < ts[0]
+                    ts = np.concatenate([env_ts[older], ts])
+                    vals = np.concatenate([env_vals[older], vals])
 
-        try:
-            time_window = float(self.time_window_edit.text())
-        except ValueError:
-            time_window = 0
+                # Set data with times on the x-axis and signal values on the y-axis.
+                # NaN samples (missing cells in loaded logs) are drawn as gaps.
+                self.curves[signal].setData(ts, vals, connect="finite")
 
         if time_window > 0:
             self.plot.setXRange(max(0, current_time - time_window), current_time)
         else:
             self.plot.enableAutoRange(axis='x')
 
+    def update_session_view(self, view):
+        """
+        Log-viewer mode: read and decimate only the visible time range from
+        the session file. Redraws only when the view or the signals change.
+        """
+        if self._viewed_session is not view:
+            # Newly opened log: start by showing the whole session.
+            self._viewed_session = view
+            self._view_key = None
+            self.plot.disableAutoRange(axis='x')
+            self.plot.setXRange(view.t_min, view.t_max, padding=0)
+        self.update_legend()
+        x0, x1 = self.plot.getViewBox().viewRange()[0]
+        width = max(self.plot.width(), 100)
+        view_key = (x0, x1, width, tuple(self.signal_keys_assigned))
+        if view_key == self._view_key:
+            return
+        self._view_key = view_key
+        for signal in self.signal_keys_assigned:
+            if signal in self.curves:
+                ts, vals = view.window(signal, x0, x1, width)
+                self.curves[signal].setData(ts, vals, connect="finite")
+
     def update_xy_plot(self):
         """Updates the XY plot using the first signal as x-axis and the second as y-axis."""
         if len(self.signal_keys_assigned) < 2:
@@ -365,14 +432,15 @@ class DynamicPlot(QtWidgets.QWidget):
         
         x_signal = self.signal_keys_assigned[0]
         y_signal = self.signal_keys_assigned[1]
-        current_time = time.time() - start_time
+        current_time = data.plot_time()
         try:
             time_window = float(self.time_window_edit.text())
         except ValueError:
             time_window = 0
 
-        x_data = data_history.get(x_signal, [])
-        y_data = data_history.get(y_signal, [])
+        history = data.plot_history()
+        x_data = history.get(x_signal, [])
+        y_data = history.get(y_signal, [])
         
         if time_window > 0:
             x_data = [entry for entry in x_data if entry[1] >= current_time - time_window]
@@ -402,6 +470,37 @@ class DynamicPlot(QtWidgets.QWidget):
         self.plot.setLabel('bottom', get_signal_name(x_signal))
         self.plot.setLabel('left', get_signal_name(y_signal))
 
+    def update_cpu_plot(self):
+        """One curve per firmware task: its share of the CPU (see taskprofile.py)."""
+        profile = data.task_profile
+        if self._cpu_profile_change == profile.changed:
+            return
+        self._cpu_profile_change = profile.changed
+        current_time = time.time() - start_time
+        try:
+            time_window = float(self.time_window_edit.text())
+        except ValueError:
+            time_window = 0
+
+        self.legend.clear()
+        for name in profile.latest():
+            entries = [entry for entry in profile.history[name]
+                       if time_window <= 0 or entry[0] >= current_time - time_window]
+            if not entries:
+                continue
+            ts, shares = zip(*entries)
+            if name not in self.task_curves:
+                color = self.get_color(name)
+                self.task_curves[name] = self.plot.plot(pen=pg.mkPen(color=color, width=2))
+            self.task_curves[name].setData(ts, shares)
+            self.legend.addItem(self.task_curves[name],
+                                f"{name} ({profile.stack_free.get(name, 0)} words free)")
+
+        if time_window > 0:
+            self.plot.setXRange(max(0, current_time - time_window), current_time)
+        else:
+            self.plot.enableAutoRange(axis='x')
+
     def update_display_widgets(self, data_history):
         """Update display widget text for each signal."""
         for signal in self.signal_keys_assigned:
@@ -410,7 +509,8 @@ class DynamicPlot(QtWidgets.QWidget):
                 value = data_history[signal][-1][0]
             
             if get_signal_direction(signal) == 'TX':
-                current_value = self.last_tx_values.get(signal, value)
+                # The boat's read-back value where there is one (see params.py).
+                current_value = data.param_table.values.get(signal, self.last_tx_values.get(signal, value))
                 container, name_label, input_field = self.tx_widgets[signal]
                 if not input_field.hasFocus():
                     input_field.setText(str(current_value) if current_value is not None else "")
@@ -427,7 +527,7 @@ class DynamicPlot(QtWidgets.QWidget):
             self.update_cursor_info()
 
     def toggle_mode(self):
-        """Cycle through three modes: plot, display, and xy."""
+        """Cycle through the modes: plot, display, xy and cpu."""
         if self.mode == "plot":
             # Hide cursor button and cursor elements when switching to other modes
             self.cursor_button.hide()
@@ -461,19 +561,33 @@ class DynamicPlot(QtWidgets.QWidget):
                 self.xy_curve = self.plot.plot(pen=pg.mkPen(width=2), name="")
             self.update_xy_plot()
         elif self.mode == "xy":
-            self.mode = "plot"
-            self.toggle_button.setText("P")
-            self.display_container.hide()
-            self.plot.show()
-            # Show cursor button in plot mode
-            self.cursor_button.show()
-            
+            self.mode = "cpu"
+            self.toggle_button.setText("CPU")
             if hasattr(self, "xy_curve"):
                 self.plot.removeItem(self.xy_curve)
                 del self.xy_curve
             if hasattr(self, "xy_marker"):
                 self.plot.removeItem(self.xy_marker)
                 del self.xy_marker
+            # The task profile comes with the CPU group: subscribe to it alone.
+            self.signal_keys_assigned = ["CPU"]
+            self.plot.clear()
+            self.legend = self.plot.addLegend(offset=(10, 10))
+            self.legend.anchor = (0, 0)
+            self.task_curves = {}
+            self._cpu_profile_change = None
+            self.plot.setLabel('bottom', "")
+            self.plot.setLabel('left', "Task CPU share (%)")
+            self.update_cpu_plot()
+        elif self.mode == "cpu":
+            self.mode = "plot"
+            self.toggle_button.setText("P")
+            self.display_container.hide()
+            self.plot.show()
+            # Show cursor button in plot mode
+            self.cursor_button.show()
+            self.task_curves = {}
+
             if hasattr(self, "_backup_signal_keys"):
                 self.signal_keys_assigned = self._backup_signal_keys
                 del self._backup_signal_keys
@@ -516,7 +630,7 @@ class DynamicPlot(QtWidgets.QWidget):
         except ValueError:
             return
 
-        send_signal(comm, signal, new_value)
+        comm.send_signal(signal, new_value)
         if signal not in data_history:
             data_history[signal] = []
         data_history[signal].append((new_value, time.time() - start_time))
@@ -542,14 +656,18 @@ class DynamicPlot(QtWidgets.QWidget):
 
     def get_state(self):
         geom = self.geometry().getRect()
+        signal_keys = self.signal_keys_assigned
+        if self.mode == "cpu":
+            # The signals to restore when cycling back to plot mode.
+            signal_keys = getattr(self, "_backup_signal_keys", [])
         state = {
             "geometry": {"x": geom[0], "y": geom[1], "width": geom[2], "height": geom[3]},
-            "signal_keys": self.signal_keys_assigned,
+            "signal_keys": signal_keys,
             "mode": self.mode
         }
         if self.mode == "display":
             state["text_size"] = self.display_text_size
-        elif self.mode in ["plot", "xy"]:
+        elif self.mode in ["plot", "xy", "cpu"]:
             try:
                 time_window = float(self.time_window_edit.text())
             except ValueError:
@@ -768,19 +886,24 @@ class DynamicPlot(QtWidgets.QWidget):
         delta_v = None
         
         # Find values at cursor positions if linked to a signal
-        if self.cursor_linked_signal and self.cursor_linked_signal in data_history:
-            # Get data for the linked signal
-            data = data_history[self.cursor_linked_signal]
-            if data:
+        if self.cursor_linked_signal and data.session_view is not None:
+            v1 = data.session_view.value_at(self.cursor_linked_signal, t1)
+            v2 = data.session_view.value_at(self.cursor_linked_signal, t2)
+            if v1 is not None and v2 is not None:
+                delta_v = v2 - v1
+        elif self.cursor_linked_signal and self.cursor_linked_signal in data.plot_history():
+            # Get data for the linked signal (the snapshot while frozen)
+            signal_data = data.plot_history()[self.cursor_linked_signal]
+            if signal_data:
                 # Find closest data points to cursor positions
-                if len(data) > 0:
+                if len(signal_data) > 0:
                     # Find value at cursor1
-                    closest_idx1 = min(range(len(data)), key=lambda i: abs(data[i][1] - t1))
-                    v1 = data[closest_idx1][0]
+                    closest_idx1 = min(range(len(signal_data)), key=lambda i: abs(signal_data[i][1] - t1))
+                    v1 = signal_data[closest_idx1][0]
                     
                     # Find value at cursor2
-                    closest_idx2 = min(range(len(data)), key=lambda i: abs(data[i][1] - t2))
-                    v2 = data[closest_idx2][0]
+                    closest_idx2 = min(range(len(signal_data)), key=lambda i: abs(signal_data[i][1] - t2))
+                    v2 = signal_data[closest_idx2][0]
                     
                     delta_v = v2 - v1
         
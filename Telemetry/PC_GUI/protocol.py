@@ -0,0 +1,119 @@
+"""
+Host-side description of the firmware telemetry stream (TELEMETRY.c).
+
+The telemetry task runs every TASK_PERIOD_S and sends an "OK" heartbeat
+each time. Signals are sent in groups, each group every `prescaler`
+task runs, as "KEY:%.2f\\r\\n" lines. Keep this in sync with the
+*_PRESCALER defines and the telemetry_transmit() calls in TELEMETRY.c.
+
+The host subscribes to the signals it uses with "SUB:<mask>\\r\\n" (bit i
+is the i-th key of SIGNAL_ORDER); the firmware echoes the mask back as
+a SUB frame and spends the freed bandwidth on faster group rates, as
+computed by effective_prescalers().
+
+Each group transmission starts with a sequence number line (SEQUENCE_KEYS),
+and "PNG:<n>" from the host is echoed back for round-trip measurements.
+While CPU is subscribed, the firmware also sends a per-task profile
+("TSK:<name>,<share>,<stack>" lines, see taskprofile.py).
+"""
+import re
+
+TASK_PERIOD_S = 0.020  # TASK_DELAY in freertos.c (ms)
+
+HEARTBEAT = "OK"
+# Only complete frames with a proper float format (two decimals) are accepted.
+VALUE_PATTERN = re.compile(r"^-?\d+\.\d\d$")
+
+# group: (prescaler, keys in transmit order)
+GROUPS = {
+    "ADC": (5, ["DIR", "BAT", "EX1", "EX2"]),
+    "IMU": (1, ["ROL", "PIT", "YAW", "ACX", "ACY", "ACZ", "GYX", "GYY", "GYZ", "SPE"]),
+    "RADIO": (2, ["RW1", "RW2", "RW3", "RW4"]),
+    "CONTROL": (2, ["RUD", "TWI", "TRI"]),
+    "CPU": (5, ["CPU"]),
+}
+
+KEY_GROUP = {key: group for group, (_, keys) in GROUPS.items() for key in keys}
+
+# --- Subscription ---
+SUBSCRIBE = "SUB"
+SIGNAL_ORDER = [key for _, keys in GROUPS.values() for key in keys]
+SIGNAL_BIT = {key: bit for bit, key in enumerate(SIGNAL_ORDER)}
+ALL_SIGNALS_MASK = (1 << len(SIGNAL_ORDER)) - 1  # Firmware default after reset
+BYTES_PER_VALUE = 12      # TELEMETRY_BYTES_PER_VALUE
+LOAD_PERCENT = 80         # TELEMETRY_LOAD_PERCENT
+HEARTBEAT_BYTES = 4       # "OK\r\n"
+PRESCALER_LCM = 60        # Multiple of every possible prescaler (1..5)
+PROFILE_LOAD_LINES = 3    # Task profile bytes per CPU transmission, in values
+
+# --- Link health ---
+PING = "PNG"
+SEQUENCE_MOD = 1000
+SEQUENCE_KEYS = {"ADC": "SQA", "IMU": "SQI", "RADIO": "SQR", "CONTROL": "SQC", "CPU": "SQP"}
+SEQUENCE_GROUP = {key: group for group, key in SEQUENCE_KEYS.items()}
+
+
+def group_period(group):
+    """Seconds between two transmissions of a group."""
+    return GROUPS[group][0] * TASK_PERIOD_S
+
+
+def expected_rate(group):
+    """Transmissions per second of a group when the link keeps up."""
+    return 1.0 / group_period(group)
+
+
+def subscription_mask(keys):
+    """Mask subscribing to `keys`; keys the firmware does not send are ignored."""
+    mask = 0
+    for key in keys:
+        if key in SIGNAL_BIT:
+            mask |= 1 << SIGNAL_BIT[key]
+    return mask
+
+
+def subscribed_keys(mask):
+    return [key for key in SIGNAL_ORDER if mask >> SIGNAL_BIT[key] & 1]
+
+
+def effective_prescalers(mask, baud=115200):
+    """
+    {group: prescaler} the firmware uses for a subscription: every group
+    is sped up by the same factor (up to its base prescaler), as far as
+    the subscribed values still fit in LOAD_PERCENT of the link.
+    Integer arithmetic, step by step as in telemetry_update_rates().
+    """
+    budget = baud // 10 * round(TASK_PERIOD_S * 1000) // 1000 * LOAD_PERCENT // 100
+    budget = (budget - HEARTBEAT_BYTES) * PRESCALER_LCM
+    subscribed = {group: sum(mask >> SIGNAL_BIT[key] & 1 for key in keys)
+                  for group, (_, keys) in GROUPS.items()}
+    # Groups with anything subscribed also send their sequence number.
+    lines = {group: count + 1 if count else 0 for group, count in subscribed.items()}
+    if lines["CPU"]:
+        lines["CPU"] += PROFILE_LOAD_LINES
+    for speedup in range(max(p for p, _ in GROUPS.values()), 0, -1):
+        prescalers = {group: max(1, base // speedup) for group, (base, _) in GROUPS.items()}
+        load = sum(lines[group] * BYTES_PER_VALUE * (PRESCALER_LCM // prescalers[group])
+                   for group in GROUPS)
+        if load <= budget:
+            break
+    return prescalers
+
+
+def parse_line(line):
+    """
+    Split a received line into (key, value). Returns (HEARTBEAT, None)
+    for the heartbeat and None for anything that is not a valid frame.
+    """
+    line = line.strip()
+    if line == HEARTBEAT:
+        return HEARTBEAT, None
+    if ":" not in line:
+        return None
+    key, value_str = line.split(":", 1)
+    if not VALUE_PATTERN.match(value_str):
+        return None
+    try:
+        return key, float(value_str)
+    except ValueError:
+        return None
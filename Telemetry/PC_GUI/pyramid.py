@@ -0,0 +1,148 @@
+"""
+Multi-resolution summary of the live history.
+
+data_history only keeps the last MAX_POINTS raw samples per signal. The
+pyramid keeps min/max/mean buckets over 10, 100 and 1000 samples (see
+HISTORY_LEVELS), updated incrementally as samples arrive, so tiles can
+still draw the envelope of the whole session. Each level holds at most
+LEVEL_MAX_BUCKETS buckets, which bounds memory.
+"""
+import bisect
+import numpy as np
+from config import HISTORY_LEVELS, LEVEL_MAX_BUCKETS
+
+# Bucket tuple layout: (t_start, t_end, vmin, vmax, mean)
+T_START, T_END, VMIN, VMAX, MEAN = range(5)
+
+
+class _Accumulator:
+    """Running bucket for one level: the samples (or child buckets) seen so far."""
+    __slots__ = ("parts", "count", "t_start", "t_end", "vmin", "vmax", "total")
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.parts = 0      # Samples or child buckets merged so far
+        self.count = 0      # Raw samples covered
+        self.t_start = self.t_end = None
+        self.vmin = float("inf")
+        self.vmax = float("-inf")
+        self.total = 0.0
+
+    def merge(self, t_start, t_end, vmin, vmax, total, count):
+        if self.parts == 0:
+            self.t_start = t_start
+        self.t_end = t_end
+        if vmin < self.vmin:
+            self.vmin = vmin
+        if vmax > self.vmax:
+            self.vmax = vmax
+        self.total += total
+        self.count += count
+        self.parts += 1
+
+    def bucket(self):
+        return (self.t_start, self.t_end, self.vmin, self.vmax, self.total / self.count)
+
+
+class SignalPyramid:
+    """Summary levels for a single signal."""
+
+    def __init__(self, factors=HISTORY_LEVELS, max_buckets=LEVEL_MAX_BUCKETS):
+        self.factors = factors
+        # Children per bucket at each level: 10 samples, then 10 buckets of 10, ...
+        self.fan_in = [factors[0]] + [factors[i] // factors[i - 1] for i in range(1, len(factors))]
+        self.max_buckets = max_buckets
+        self.levels = [[] for _ in factors]
+        self._acc = [_Accumulator() for _ in factors]
+
+    def add(self, value, t):
+        """O(1) amortized: feed one sample and cascade completed buckets upwards."""
+        if value != value:  # NaN
+            return
+        self._acc[0].merge(t, t, value, value, value, 1)
+        level = 0
+        while level < len(self.factors) and self._acc[level].parts >= self.fan_in[level]:
+            acc = self._acc[level]
+            bucket = acc.bucket()
+            self._append(level, bucket)
+            if level + 1 < len(self.factors):
+                self._acc[level + 1].merge(acc.t_start, acc.t_end, acc.vmin, acc.vmax,
+                                           acc.total, acc.count)
+            acc.reset()
+            level += 1
+
+    def _append(self, level, bucket):
+        buckets = self.levels[level]
+        buckets.append(bucket)
+        # Trim in batches so the copy is amortized. The list is rebound rather
+        # than trimmed in place, so readers holding the old list are unaffected.
+        if len(buckets) > self.max_buckets + self.max_buckets // 10:
+            self.levels[level] = buckets[-self.max_buckets:]
+
+    def first_time(self):
+        """Oldest time covered by any level, or None."""
+        times = [buckets[0][T_START] for buckets in self.levels if buckets]
+        return min(times) if times else None
+
+    @staticmethod
+    def bucket_width(buckets):
+        return (buckets[-1][T_END] - buckets[0][T_START]) / len(buckets)
+
+    def envelope(self, t0, t1, pixels):
+        """
+        Min/max envelope between t0 and t1 from the coarsest level whose
+        buckets are still no wider than one pixel. Returns (t, v) arrays
+        with the min and max of each bucket at the bucket's centre.
+        """
+        pixel_width = (t1 - t0) / max(pixels, 1)
+        levels = [buckets for buckets in self.levels if len(buckets) >= 2]
+        if not levels:
+            return np.empty(0), np.empty(0)
+        # Levels that reach back to t0 (finer levels may have been trimmed).
+        covering = [buckets for buckets in levels if buckets[0][T_START] <= t0]
+        if not covering:
+            covering = [min(levels, key=lambda buckets: buckets[0][T_START])]
+        accurate = [buckets for buckets in covering if self.bucket_width(buckets) <= pixel_width]
+        # Levels go from fine to coarse.
+        chosen = accurate[-1] if accurate else covering[0]
+        lo = bisect.bisect_left(chosen, t0, key=lambda bucket: bucket[T_END])
+        hi = bisect.bisect_right(chosen, t1, key=lambda bucket: bucket[T_START])
+        if hi <= lo:
+            return np.empty(0), np.empty(0)
+        table = np.asarray(chosen[lo:hi], dtype=np.float64)
+        if len(table) > pixels:
+            # Merge neighbouring buckets down to one per pixel.
+            edges = np.linspace(0, len(table), pixels + 1).astype(int)[:-1]
+            table = np.column_stack([
+                np.minimum.reduceat(table[:, T_START], edges),
+                np.maximum.reduceat(table[:, T_END], edges),
+                np.minimum.reduceat(table[:, VMIN], edges),
+                np.maximum.reduceat(table[:, VMAX], edges),
+            ])
+        centre = (table[:, T_START] + table[:, T_END]) / 2
+        t_out = np.repeat(centre, 2)
+        v_out = np.empty(2 * len(table))
+        v_out[0::2] = table[:, VMIN]
+        v_out[1::2] = table[:, VMAX]
+        return t_out, v_out
+
+
+class HistoryPyramid:
+    """Per-signal pyramids for the whole store."""
+
+    def __init__(self):
+        self.signals = {}
+
+    def add(self, key, value, t):
+        pyramid = self.signals.get(key)
+        if pyramid is None:
+            pyramid = self.signals[key] = SignalPyramid()
+        pyramid.add(value, t)
+
+    def get(self, key):
+        return self.signals.get(key)
+
+    def clear(self):
+        self.signals.clear()
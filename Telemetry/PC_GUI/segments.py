@@ -0,0 +1,325 @@
+"""
+Rotating, crash-safe logs.
+
+A log started as `run.csv` (or `run.rcs`) is written as numbered segments
+`run_000.csv`, `run_001.csv`, ... next to a manifest `run.session.json`.
+A new segment is started once the current one reaches SEGMENT_MAX_BYTES
+or SEGMENT_MAX_SECONDS. Each segment is flushed, fsync'd and marked
+closed in the manifest before the next one is opened, and the manifest
+is replaced atomically, so a crash or a full disk costs at most the
+segment being written.
+
+Opening the manifest (or any of its segments) stitches the segments back
+into a single session.
+"""
+import os
+import re
+import csv
+import json
+import time
+import numpy as np
+
+from config import SEGMENT_MAX_BYTES, SEGMENT_MAX_SECONDS
+from session import (SessionWriter, SessionReader, SESSION_EXT, read_session,
+                     read_csv_columns, minmax_decimate)
+
+MANIFEST_SUFFIX = ".session.json"
+SEGMENT_PATTERN = re.compile(r"^(?P<base>.*)_(?P<index>\d{3,})(?P<ext>\.csv|\.rcs)$")
+
+
+def manifest_path_for(path):
+    """Manifest path for a log path (`run.csv` -> `run.session.json`)."""
+    return os.path.splitext(path)[0] + MANIFEST_SUFFIX
+
+
+def find_manifest(path):
+    """Return the manifest for a manifest or segment path, or None."""
+    if path.endswith(MANIFEST_SUFFIX):
+        return path
+    match = SEGMENT_PATTERN.match(path)
+    if match:
+        candidate = match.group("base") + MANIFEST_SUFFIX
+        if os.path.exists(candidate):
+            return candidate
+    return None
+
+
+def write_manifest(path, manifest):
+    """Atomically replace the manifest on disk."""
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(manifest, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def read_manifest(path):
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+# --- Segment writers ---
+class CSVSegment:
+    """One CSV segment: a header row, then one row per logging tick."""
+    def __init__(self, path, keys):
+        self.file = open(path, "w", newline="")
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(["t"] + list(keys))
+        self.file.flush()
+
+    def write_row(self, row):
+        self.writer.writerow(row)
+        self.file.flush()
+
+    def bytes_written(self):
+        return self.file.tell()
+
+    def flush(self):
+        pass  # Every row is flushed as it is written
+
+    def close(self):
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.file.close()
+
+
+class SessionSegment:
+    """One binary session segment, streamed through a SessionWriter."""
+    def __init__(self, path, keys):
+        self.writer = SessionWriter(path, keys)
+
+    def append(self, key, value, t):
+        self.writer.append(key, value, t)
+
+    def bytes_written(self):
+        return self.writer.bytes_written()
+
+    def flush(self):
+        self.writer.flush()
+
+    def close(self):
+        self.writer.close()
+
+
+class RotatingLog:
+    """
+    Log split into numbered segments. `path` chooses the format by its
+    extension (.csv or .rcs); the segments are written next to it.
+    """
+    def __init__(self, path, keys, max_bytes=SEGMENT_MAX_BYTES, max_seconds=SEGMENT_MAX_SECONDS):
+        self.base, self.ext = os.path.splitext(path)
+        self.ext = SESSION_EXT if self.ext == SESSION_EXT else ".csv"
+        self.keys = list(keys)
+        self.max_bytes = max_bytes
+        self.max_seconds = max_seconds
+        self.manifest_path = self.base + MANIFEST_SUFFIX
+        self.manifest = {
+            "format": self.ext.lstrip("."),
+            "signals": self.keys,
+            "created": time.time(),
+            "complete": False,
+            "segments": [],
+        }
+        self.segment = None
+        self.segment_file = None
+        self.segment_opened = None
+        self.t_first = self.t_last = None
+        self.count = 0
+        self._open_segment()
+
+    def segment_path(self, index):
+        return f"{self.base}_{index:03d}{self.ext}"
+
+    def _open_segment(self):
+        index = len(self.manifest["segments"])
+        path = self.segment_path(index)
+        if self.ext == SESSION_EXT:
+            self.segment = SessionSegment(path, self.keys)
+        else:
+            self.segment = CSVSegment(path, self.keys)
+        self.segment_file = path
+        self.segment_opened = self.last_flush = time.time()
+        self.t_first = self.t_last = None
+        self.count = 0
+        self.manifest["segments"].append({
+            "file": os.path.basename(path),
+            "index": index,
+            "closed": False,
+        })
+        write_manifest(self.manifest_path, self.manifest)
+
+    def _close_segment(self):
+        entry = self.manifest["segments"][-1]
+        try:
+            self.segment.close()
+            entry["closed"] = True
+        finally:
+            entry.update({
+                "t_start": self.t_first,
+                "t_end": self.t_last,
+                "count": self.count,
+                "bytes": os.path.getsize(self.segment_file),
+            })
+            self.segment = None
+            write_manifest(self.manifest_path, self.manifest)
+
+    def _track(self, t):
+        if self.t_first is None:
+            self.t_first = t
+        self.t_last = t
+        self.count += 1
+
+    def write_row(self, row):
+        """CSV logs: write one row whose first cell is the time."""
+        self.segment.write_row(row)
+        self._track(row[0])
+
+    def append(self, key, value, t):
+        """Session logs: append one sample."""
+        self.segment.append(key, value, t)
+        self._track(t)
+
+    def maybe_rotate(self):
+        """
+        Called once per logging tick: start a new segment when the current
+        one is full or old enough, and push buffered samples to disk once a
+        second so a crash loses little of the open segment.
+        """
+        now = time.time()
+        if (self.segment.bytes_written() >= self.max_bytes
+                or now - self.segment_opened >= self.max_seconds):
+            self._close_segment()
+            self._open_segment()
+        elif now - self.last_flush >= 1.0:
+            self.segment.flush()
+            self.last_flush = now
+
+    def close(self):
+        if self.segment is not None:
+            self._close_segment()
+        self.manifest["complete"] = True
+        write_manifest(self.manifest_path, self.manifest)
+
+
+class TickLogger:
+    """
+    Writes a live store ({key: [(value, t), ...]}, see data.py) to a
+    RotatingLog once per logging tick: CSV logs get one row with the
+    latest value of every signal, session logs get every sample that
+    arrived since the previous tick. Times are relative to `t_zero` on
+    the store's clock.
+    """
+    def __init__(self, log, keys, history, t_zero):
+        self.log = log
+        self.keys = list(keys)
+        self.history = history
+        self.t_zero = t_zero
+        # Only samples received after logging started are written.
+        self.last_t = {key: t_zero for key in self.keys}
+
+    @property
+    def manifest_path(self):
+        return self.log.manifest_path
+
+    def tick(self, now):
+        """Write this tick's data; `now` is on the store's clock."""
+        if self.log.ext == SESSION_EXT:
+            self._stream_samples()
+        else:
+            row = [now - self.t_zero]
+            if self.keys:
+                for key in self.keys:
+                    # Latest value for each signal (or an empty string if no data).
+                    samples = self.history.get(key)
+                    row.append(samples[-1][0] if samples else "")
+            else:
+                # If no signals are selected, log only time.
+                row.append("")
+            self.log.write_row(row)
+        self.log.maybe_rotate()
+
+    def _stream_samples(self):
+        for key in self.keys:
+            samples = self.history.get(key, [])
+            last_t = self.last_t[key]
+            new_samples = []
+            for sample in reversed(samples):
+                if sample[1] <= last_t:
+                    break
+                new_samples.append(sample)
+            for value, t in reversed(new_samples):
+                self.log.append(key, value, t - self.t_zero)
+            if new_samples:
+                self.last_t[key] = new_samples[0][1]
+
+    def close(self):
+        self.log.close()
+
+
+# --- Stitching ---
+def segment_paths(manifest_path):
+    """Existing segment files of a manifest, in order."""
+    manifest = read_manifest(manifest_path)
+    folder = os.path.dirname(manifest_path) or "."
+    paths = [os.path.join(folder, entry["file"]) for entry in manifest["segments"]]
+    return [p for p in paths if os.path.exists(p) and os.path.getsize(p) > 0]
+
+
+def load_segments(manifest_path, keep_gaps=False, progress=None):
+    """
+    Read all segments of a manifest and concatenate them into a single
+    {key: (t, v)} session. Unreadable segments are skipped with a warning.
+    """
+    paths = segment_paths(manifest_path)
+    parts = {}
+    for i, path in enumerate(paths):
+        try:
+            if path.endswith(SESSION_EXT):
+                _, arrays = read_session(path)
+            else:
+                arrays = read_csv_columns(path, keep_gaps=keep_gaps)
+        except Exception as e:
+            print(f"Skipping unreadable segment {path}: {e}")
+            continue
+        for key, (t, v) in arrays.items():
+            parts.setdefault(key, []).append((t, v))
+        if progress:
+            progress((i + 1) / len(paths))
+    return {key: (np.concatenate([t for t, _ in p]), np.concatenate([v for _, v in p]))
+            for key, p in parts.items()}
+
+
+class SegmentedReader:
+    """SessionReader interface over the session files of a segmented log."""
+    def __init__(self, paths, cache_chunks=64):
+        per_reader = max(cache_chunks // max(len(paths), 1), 4)
+        self.readers = [SessionReader(p, cache_chunks=per_reader) for p in paths]
+        self.keys = sorted({key for r in self.readers for key in r.keys})
+        self.t_min = min((r.t_min for r in self.readers), default=0.0)
+        self.t_max = max((r.t_max for r in self.readers), default=0.0)
+
+    def close(self):
+        for reader in self.readers:
+            reader.close()
+
+    def _overlapping(self, t0, t1):
+        return [r for r in self.readers if r.t_max >= t0 and r.t_min <= t1]
+
+    def window(self, key, t0, t1, max_points):
+        parts = [r.window(key, t0, t1, max_points) for r in self._overlapping(t0, t1)]
+        parts = [p for p in parts if len(p[0])]
+        if not parts:
+            return np.empty(0), np.empty(0)
+        t = np.concatenate([p[0] for p in parts])
+        v = np.concatenate([p[1] for p in parts])
+        return minmax_decimate(t, v, max(max_points // 2, 1))
+
+    def value_at(self, key, t):
+        candidates = self._overlapping(t, t) or self.readers
+        best = None
+        for reader in candidates:
+            value = reader.value_at(key, t)
+            if value is not None:
+                best = value
+        return best
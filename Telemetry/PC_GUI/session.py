@@ -0,0 +1,532 @@
+#!/usr/bin/env python3
+"""
+Native binary session format (.rcs) for telemetry logs.
+
+File layout (little endian):
+    magic "RCSS" | version u16 | header length u32 | JSON header
+    chunk*       : CHUNK_HEADER followed by the payload
+    footer       : JSON chunk index
+    trailer      : footer offset u64 | magic "RCSE"
+
+Each chunk holds `count` samples of one signal: the float64 timestamps
+followed by the values in the signal's dtype (float32 unless the header
+says otherwise). When compression is enabled, the payload is zlib'd.
+
+The footer is only written on close. A file without a valid trailer
+(e.g. after a crash) is still readable: the loader walks the chunk
+headers instead.
+"""
+import os
+import sys
+import json
+import mmap
+import time
+import zlib
+import struct
+import argparse
+import numpy as np
+from collections import OrderedDict
+
+from signal_db import SIGNAL_KEYS
+
+# --- Format constants ---
+MAGIC = b"RCSS"
+END_MAGIC = b"RCSE"
+VERSION = 1
+SESSION_EXT = ".rcs"
+DEFAULT_CHUNK_SIZE = 4096       # Samples per signal per chunk
+DEFAULT_DTYPE = "f4"
+TIME_DTYPE = np.dtype("<f8")
+
+PREAMBLE = struct.Struct("<4sHI")
+# marker, signal index, flags, count, payload length, t0, t1, vmin, vmax
+CHUNK_HEADER = struct.Struct("<2sHBxIIdddd")
+CHUNK_MARKER = b"CH"
+TRAILER = struct.Struct("<Q4s")
+
+FLAG_ZLIB = 0x01
+
+
+def signal_metadata(keys):
+    """Build the header metadata for the given keys from database.json."""
+    meta = []
+    for key in keys:
+        info = SIGNAL_KEYS.get(key, {})
+        meta.append({
+            "key": key,
+            "name": info.get("name", key),
+            "dir": info.get("dir", "RX"),
+            "dtype": info.get("dtype", DEFAULT_DTYPE),
+        })
+    return meta
+
+
+# --- Writer ---
+class SessionWriter:
+    """
+    Streaming writer: samples are buffered per signal and written out as
+    one chunk every `chunk_size` samples (or on flush/close).
+    """
+    def __init__(self, path, keys, compress=False, chunk_size=DEFAULT_CHUNK_SIZE, metadata=None):
+        self.path = path
+        self.compress = compress
+        self.chunk_size = chunk_size
+        self.signals = signal_metadata(keys)
+        self.index = {s["key"]: i for i, s in enumerate(self.signals)}
+        self.dtypes = [np.dtype("<" + s["dtype"]) for s in self.signals]
+        self.pending = {s["key"]: ([], []) for s in self.signals}
+        self.chunks = []  # [signal index, offset, count, t0, t1, vmin, vmax]
+        self.file = open(path, "wb")
+        header = {
+            "signals": self.signals,
+            "compression": "zlib" if compress else "none",
+            "chunk_size": chunk_size,
+            "created": time.time(),
+        }
+        if metadata:
+            header.update(metadata)
+        header_bytes = json.dumps(header).encode("utf-8")
+        self.file.write(PREAMBLE.pack(MAGIC, VERSION, len(header_bytes)))
+        self.file.write(header_bytes)
+
+    def append(self, key, value, t):
+        """Append a single (value, t) sample for a signal."""
+        times, values = self.pending[key]
+        times.append(t)
+        values.append(value)
+        if len(times) >= self.chunk_size:
+            self._write_chunk(key)
+
+    def extend(self, key, values, times):
+        """Append many samples at once (e.g. from a converted log)."""
+        values = np.asarray(values)
+        times = np.asarray(times)
+        self._write_chunk(key)
+        for start in range(0, len(times), self.chunk_size):
+            stop = start + self.chunk_size
+            self._write_arrays(self.index[key], times[start:stop], values[start:stop])
+
+    def bytes_written(self):
+        """File size once the buffered samples are written (uncompressed estimate)."""
+        pending = sum(
+            len(times) * (TIME_DTYPE.itemsize + self.dtypes[self.index[key]].itemsize)
+            for key, (times, _) in self.pending.items()
+        )
+        return self.file.tell() + pending
+
+    def flush(self):
+        """Write all buffered samples and flush the file."""
+        for key in self.pending:
+            self._write_chunk(key)
+        self.file.flush()
+
+    def close(self):
+        if self.file.closed:
+            return
+        self.flush()
+        footer_offset = self.file.tell()
+        self.file.write(json.dumps({"chunks": self.chunks}).encode("utf-8"))
+        self.file.write(TRAILER.pack(footer_offset, END_MAGIC))
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.file.close()
+
+    def _write_chunk(self, key):
+        times, values = self.pending[key]
+        if not times:
+            return
+        self._write_arrays(self.index[key], times, values)
+        times.clear()
+        values.clear()
+
+    def _write_arrays(self, sig, times, values):
+        t = np.asarray(times, dtype=TIME_DTYPE)
+        v = np.asarray(values, dtype=self.dtypes[sig])
+        if len(t) == 0:
+            return
+        payload = t.tobytes() + v.tobytes()
+        flags = 0
+        if self.compress:
+            payload = zlib.compress(payload, 6)
+            flags |= FLAG_ZLIB
+        finite = v[np.isfinite(v)]
+        vmin = float(finite.min()) if len(finite) else float("nan")
+        vmax = float(finite.max()) if len(finite) else float("nan")
+        offset = self.file.tell()
+        self.file.write(CHUNK_HEADER.pack(CHUNK_MARKER, sig, flags, len(t), len(payload),
+                                          float(t[0]), float(t[-1]), vmin, vmax))
+        self.file.write(payload)
+        self.chunks.append([sig, offset, len(t), float(t[0]), float(t[-1]), vmin, vmax])
+
+
+# --- Reader ---
+def read_header(buf):
+    """Parse the preamble and JSON header. Returns (header, data offset)."""
+    magic, version, header_len = PREAMBLE.unpack_from(buf, 0)
+    if magic != MAGIC:
+        raise ValueError("Not a session file")
+    if version > VERSION:
+        raise ValueError(f"Unsupported session version {version}")
+    start = PREAMBLE.size
+    header = json.loads(bytes(buf[start:start + header_len]).decode("utf-8"))
+    return header, start + header_len
+
+
+def read_index(buf, data_offset):
+    """
+    Return the chunk index. Uses the footer when present, otherwise scans
+    the chunk headers (files that were not closed cleanly).
+    """
+    size = len(buf)
+    if size >= data_offset + TRAILER.size:
+        footer_offset, end = TRAILER.unpack_from(buf, size - TRAILER.size)
+        if end == END_MAGIC and data_offset <= footer_offset < size:
+            footer = bytes(buf[footer_offset:size - TRAILER.size])
+            return json.loads(footer.decode("utf-8"))["chunks"]
+    chunks = []
+    offset = data_offset
+    while offset + CHUNK_HEADER.size <= size:
+        marker, sig, flags, count, length, t0, t1, vmin, vmax = CHUNK_HEADER.unpack_from(buf, offset)
+        if marker != CHUNK_MARKER or offset + CHUNK_HEADER.size + length > size:
+            break  # Truncated tail
+        chunks.append([sig, offset, count, t0, t1, vmin, vmax])
+        offset += CHUNK_HEADER.size + length
+    return chunks
+
+
+def decode_chunk(buf, offset, dtype):
+    """Decode one chunk at `offset` into (t, v) arrays."""
+    _, _, flags, count, length, *_ = CHUNK_HEADER.unpack_from(buf, offset)
+    start = offset + CHUNK_HEADER.size
+    if flags & FLAG_ZLIB:
+        raw = zlib.decompress(buf[start:start + length])
+        t = np.frombuffer(raw, TIME_DTYPE, count)
+        v = np.frombuffer(raw, dtype, count, offset=count * TIME_DTYPE.itemsize)
+    else:
+        t = np.frombuffer(buf, TIME_DTYPE, count, offset=start)
+        v = np.frombuffer(buf, dtype, count, offset=start + count * TIME_DTYPE.itemsize)
+    return t, v
+
+
+def read_session(path):
+    """
+    Load a whole session file. Returns (header, {key: (t, v)}) with
+    float64 time arrays and value arrays in each signal's dtype.
+    """
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            raise ValueError("Empty session file")
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            header, data_offset = read_header(mm)
+            chunks = read_index(mm, data_offset)
+            signals = header["signals"]
+            dtypes = [np.dtype("<" + s.get("dtype", DEFAULT_DTYPE)) for s in signals]
+            counts = [0] * len(signals)
+            for chunk in chunks:
+                counts[chunk[0]] += chunk[2]
+            # Preallocate each signal buffer and copy the chunks straight in.
+            arrays = [(np.empty(n, TIME_DTYPE), np.empty(n, dtypes[i])) for i, n in enumerate(counts)]
+            fill = [0] * len(signals)
+            for sig, offset, count, *_ in chunks:
+                t, v = decode_chunk(mm, offset, dtypes[sig])
+                pos = fill[sig]
+                arrays[sig][0][pos:pos + count] = t
+                arrays[sig][1][pos:pos + count] = v
+                fill[sig] += count
+                del t, v  # Release the mmap views before closing
+        finally:
+            mm.close()
+    return header, {s["key"]: arrays[i] for i, s in enumerate(signals)}
+
+
+def to_history(arrays):
+    """Convert {key: (t, v)} arrays to data_history's (value, t) lists."""
+    return {key: list(zip(v.tolist(), t.tolist())) for key, (t, v) in arrays.items()}
+
+
+# --- CSV conversion ---
+CSV_CHUNK_ROWS = 20000
+
+
+def iter_csv_chunks(csv_path, chunk_rows=CSV_CHUNK_ROWS, progress=None):
+    """
+    Parse a CSV log in chunks of `chunk_rows` rows. Yields (t, {key: v})
+    float64 arrays with NaN for empty cells. `progress` is called with the
+    fraction of the file read so far.
+    """
+    import pandas as pd
+    size = max(os.path.getsize(csv_path), 1)
+    with open(csv_path, "rb") as f:
+        # index_col=False: rows of time-only logs end with a comma their header lacks.
+        for chunk in pd.read_csv(f, dtype=np.float64, chunksize=chunk_rows, index_col=False):
+            columns = {key: chunk[key].to_numpy() for key in chunk.columns[1:]
+                       if not key.startswith("Unnamed")}  # Trailing empty column of time-only logs
+            yield chunk.iloc[:, 0].to_numpy(), columns
+            if progress:
+                progress(min(f.tell() / size, 1.0))
+
+
+def read_csv_columns(csv_path, keep_gaps=False, chunk_rows=CSV_CHUNK_ROWS, progress=None):
+    """
+    Read a CSV log into {key: (t, v)} float64 arrays. Empty cells are
+    dropped, or kept as NaN gaps when `keep_gaps` is set.
+    """
+    t_parts, v_parts = [], {}
+    for t, columns in iter_csv_chunks(csv_path, chunk_rows, progress):
+        t_parts.append(t)
+        for key, v in columns.items():
+            v_parts.setdefault(key, []).append(v)
+    t = np.concatenate(t_parts) if t_parts else np.empty(0)
+    arrays = {}
+    for key, parts in v_parts.items():
+        v = np.concatenate(parts)
+        if keep_gaps:
+            arrays[key] = (t, v)
+        else:
+            mask = ~np.isnan(v)
+            arrays[key] = (t[mask], v[mask])
+    return arrays
+
+
+def convert_csv(csv_path, out_path=None, compress=False, chunk_size=DEFAULT_CHUNK_SIZE, progress=None):
+    """
+    Convert a CSV log to the session format one CSV chunk at a time, so
+    logs larger than memory can be converted. Returns the output path.
+    """
+    if out_path is None:
+        out_path = os.path.splitext(csv_path)[0] + SESSION_EXT
+    writer = None
+    try:
+        for t, columns in iter_csv_chunks(csv_path, chunk_size, progress):
+            if writer is None:
+                writer = SessionWriter(out_path, list(columns), compress=compress, chunk_size=chunk_size,
+                                       metadata={"source": os.path.basename(csv_path)})
+            for key, v in columns.items():
+                mask = ~np.isnan(v)
+                if mask.any():
+                    writer.extend(key, v[mask], t[mask])
+        if writer is None:
+            writer = SessionWriter(out_path, [], metadata={"source": os.path.basename(csv_path)})
+    finally:
+        if writer is not None:
+            writer.close()
+    return out_path
+
+
+# --- Windowed access ---
+def minmax_decimate(t, v, n_buckets):
+    """
+    Reduce (t, v) to at most 2 * n_buckets points by keeping the min and
+    max of each bucket, so peaks survive decimation. NaN gaps are kept.
+    """
+    n = len(t)
+    if n <= 2 * n_buckets or n_buckets <= 0:
+        return np.array(t, dtype=np.float64), np.array(v, dtype=np.float64)
+    size = n // n_buckets
+    usable = size * n_buckets
+    tb = t[:usable].reshape(n_buckets, size)
+    vb = np.asarray(v[:usable], dtype=np.float64).reshape(n_buckets, size)
+    with np.errstate(invalid="ignore"):
+        filled_lo = np.where(np.isnan(vb), np.inf, vb)
+        filled_hi = np.where(np.isnan(vb), -np.inf, vb)
+        i_min = filled_lo.argmin(axis=1)
+        i_max = filled_hi.argmax(axis=1)
+    rows = np.arange(n_buckets)
+    # Emit the two extremes of every bucket in time order.
+    first = np.minimum(i_min, i_max)
+    second = np.maximum(i_min, i_max)
+    t_out = np.empty(2 * n_buckets)
+    v_out = np.empty(2 * n_buckets)
+    t_out[0::2] = tb[rows, first]
+    t_out[1::2] = tb[rows, second]
+    v_out[0::2] = vb[rows, first]
+    v_out[1::2] = vb[rows, second]
+    if usable < n:
+        # The leftover tail becomes one more (shorter) bucket.
+        t_tail, v_tail = minmax_decimate(t[usable:], v[usable:], 1)
+        t_out = np.concatenate([t_out, t_tail])
+        v_out = np.concatenate([v_out, v_tail])
+    return t_out, v_out
+
+
+class SessionReader:
+    """
+    Random access to a session file through its chunk index. Only the
+    chunks overlapping a requested time range are decoded, and decoded
+    chunks are kept in an LRU cache of `cache_chunks` entries, so memory
+    stays constant regardless of the session length.
+    """
+    def __init__(self, path, cache_chunks=64):
+        self.path = path
+        self.cache_chunks = cache_chunks
+        self._cache = OrderedDict()
+        self._file = open(path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.header, data_offset = read_header(self._mm)
+        signals = self.header["signals"]
+        self.keys = [s["key"] for s in signals]
+        self._dtypes = [np.dtype("<" + s.get("dtype", DEFAULT_DTYPE)) for s in signals]
+        chunks = read_index(self._mm, data_offset)
+        # Per signal: chunk offsets, sample counts, time bounds and value bounds.
+        self._index = {}
+        for i, key in enumerate(self.keys):
+            rows = sorted((c for c in chunks if c[0] == i), key=lambda c: c[3])
+            table = np.array([c[1:] for c in rows], dtype=np.float64).reshape(-1, 6)
+            self._index[key] = (i, table)
+        bounds = [table[:, 2:4] for _, table in self._index.values() if len(table)]
+        if bounds:
+            stacked = np.concatenate(bounds)
+            self.t_min, self.t_max = float(stacked[:, 0].min()), float(stacked[:, 1].max())
+        else:
+            self.t_min = self.t_max = 0.0
+
+    def close(self):
+        self._cache.clear()
+        if not self._mm.closed:
+            self._mm.close()
+        self._file.close()
+
+    def sample_count(self, key):
+        _, table = self._index[key]
+        return int(table[:, 1].sum())
+
+    def _chunk(self, key, row):
+        """Decoded chunk `row` of `key`, through the LRU cache."""
+        cache_key = (key, row)
+        if cache_key in self._cache:
+            self._cache.move_to_end(cache_key)
+            return self._cache[cache_key]
+        sig, table = self._index[key]
+        arrays = decode_chunk(self._mm, int(table[row, 0]), self._dtypes[sig])
+        self._cache[cache_key] = arrays
+        if len(self._cache) > self.cache_chunks:
+            self._cache.popitem(last=False)
+        return arrays
+
+    def _rows_in_range(self, key, t0, t1):
+        _, table = self._index[key]
+        if not len(table):
+            return table, 0, 0
+        first = int(np.searchsorted(table[:, 3], t0, side="left"))   # First chunk ending after t0
+        last = int(np.searchsorted(table[:, 2], t1, side="right"))   # Chunks starting before t1
+        return table, first, max(first, last)
+
+    def window(self, key, t0, t1, max_points):
+        """
+        Return (t, v) for `key` between t0 and t1, decimated to about
+        `max_points` points. When the range spans more chunks than can be
+        shown, the envelope is built from the per-chunk min/max in the
+        index without decoding anything.
+        """
+        if key not in self._index:
+            return np.empty(0), np.empty(0)
+        table, first, last = self._rows_in_range(key, t0, t1)
+        if last <= first:
+            return np.empty(0), np.empty(0)
+        buckets = max(max_points // 2, 1)
+        if last - first > buckets:
+            rows = table[first:last]
+            t_out = np.empty(2 * len(rows))
+            v_out = np.empty(2 * len(rows))
+            t_out[0::2], t_out[1::2] = rows[:, 2], rows[:, 3]
+            v_out[0::2], v_out[1::2] = rows[:, 4], rows[:, 5]
+            return t_out, v_out
+        t_parts, v_parts = [], []
+        for row in range(first, last):
+            t, v = self._chunk(key, row)
+            lo, hi = np.searchsorted(t, t0, side="left"), np.searchsorted(t, t1, side="right")
+            # Keep one sample either side so the line reaches the view edges.
+            lo, hi = max(lo - 1, 0), min(hi + 1, len(t))
+            t_parts.append(t[lo:hi])
+            v_parts.append(v[lo:hi])
+        t = np.concatenate(t_parts)
+        v = np.concatenate(v_parts).astype(np.float64)
+        return minmax_decimate(t, v, buckets)
+
+    def value_at(self, key, t):
+        """Sample of `key` closest to time t, or None."""
+        if key not in self._index:
+            return None
+        table, first, last = self._rows_in_range(key, t, t)
+        if not len(table):
+            return None
+        row = min(first, len(table) - 1)
+        ts, vs = self._chunk(key, row)
+        i = int(np.clip(np.searchsorted(ts, t), 0, len(ts) - 1))
+        if i > 0 and abs(ts[i - 1] - t) < abs(ts[i] - t):
+            i -= 1
+        return float(vs[i])
+
+
+# --- Benchmark ---
+def load_csv_baseline(csv_path):
+    """The per-cell csv.reader loop used by logger.load_log."""
+    import csv
+    history = {}
+    with open(csv_path, "r") as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        signals = header[1:]
+        for signal in signals:
+            history[signal] = []
+        for row in reader:
+            t_val = float(row[0]) if row[0] else 0
+            for i, signal in enumerate(signals, start=1):
+                val = float(row[i]) if row[i] else 0
+                history[signal].append((val, t_val))
+    return history
+
+
+def _best_time(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def benchmark(csv_paths, repeat=3):
+    """Compare size and load time of CSV logs against the session format."""
+    import tempfile
+    print(f"{'file':<24}{'format':<14}{'size [kB]':>12}{'load [ms]':>12}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for csv_path in csv_paths:
+            name = os.path.basename(csv_path)
+            rows = [("csv", os.path.getsize(csv_path),
+                     _best_time(lambda: load_csv_baseline(csv_path), repeat))]
+            for compress in (False, True):
+                out = os.path.join(tmp, name + (".z" if compress else "") + SESSION_EXT)
+                convert_csv(csv_path, out, compress=compress)
+                rows.append(("rcs+zlib" if compress else "rcs", os.path.getsize(out),
+                             _best_time(lambda: to_history(read_session(out)[1]), repeat)))
+            for fmt, size, seconds in rows:
+                print(f"{name:<24}{fmt:<14}{size / 1024:>12.1f}{seconds * 1000:>12.1f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Telemetry session format tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    conv = sub.add_parser("convert", help="Convert CSV logs to the session format")
+    conv.add_argument("csv", nargs="+")
+    conv.add_argument("-z", "--compress", action="store_true", help="zlib-compress chunks")
+    conv.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+
+    bench = sub.add_parser("bench", help="Compare size and load time against CSV")
+    bench.add_argument("csv", nargs="+")
+    bench.add_argument("--repeat", type=int, default=3)
+
+    args = parser.parse_args(argv)
+    if args.command == "convert":
+        for path in args.csv:
+            out = convert_csv(path, compress=args.compress, chunk_size=args.chunk_size)
+            print(f"{path} -> {out} ({os.path.getsize(path)} -> {os.path.getsize(out)} bytes)")
+    elif args.command == "bench":
+        benchmark(args.csv, repeat=args.repeat)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
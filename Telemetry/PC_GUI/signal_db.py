@@ -0,0 +1,47 @@
+"""
+Signal database (database.json) without any Qt dependency, so headless
+tools can use it. signals.py re-exports it next to the Qt widgets.
+"""
+import json
+
+DATABASE_FILE = 'database.json'
+
+def load_signal_keys(database_file):
+    """ Load signal keys from a JSON configuration file. """
+    try:
+        with open(database_file, 'r') as file:
+            config = json.load(file)
+            # Convert to a dictionary where key = signal key, and value = {dir, name}
+            signal_dict = {
+                signal["key"]: {"dir": signal["dir"], "name": signal["name"]}
+                for signal in config.get("signal_keys", [])
+            }
+            return signal_dict
+    except (FileNotFoundError, json.JSONDecodeError) as e:
+        print(f"Error loading config file: {e}")
+        return {}
+
+# Load signal keys as a dictionary
+SIGNAL_KEYS = load_signal_keys(DATABASE_FILE)
+
+# Signals of additional devices are stored as "<device>/<key>" (see devices.py).
+DEVICE_SEPARATOR = "/"
+
+def device_key(device, signal_key):
+    """ Store key of a device's signal; the first device (None) uses the plain key. """
+    return f"{device}{DEVICE_SEPARATOR}{signal_key}" if device else signal_key
+
+def split_device_key(signal_key):
+    """ (device or None, plain signal key) of a store key. """
+    device, _, key = signal_key.rpartition(DEVICE_SEPARATOR)
+    return device or None, key
+
+def get_signal_direction(signal_key):
+    """ Returns the direction (RX or TX) for the given signal key. """
+    return SIGNAL_KEYS.get(split_device_key(signal_key)[1], {}).get("dir", None)
+
+def get_signal_name(signal_key):
+    """ Returns the human-readable name for the given signal key. """
+    device, key = split_device_key(signal_key)
+    name = SIGNAL_KEYS.get(key, {}).get("name", key)  # Default to key if name is missing
+    return device_key(device, name)
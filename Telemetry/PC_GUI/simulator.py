@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+"""
+Firmware simulator: speaks the TELEMETRY.c protocol on a pseudo-terminal,
+so the GUI, the headless daemon and the benchmarks can run without a
+boat. Every TASK_PERIOD_S it sends the "OK" heartbeat and the groups
+that are due according to their prescalers, with synthetic values.
+Commands sent to it ("KEY:value\\r\\n") are stored in `params`; SUB
+subscriptions, ENC change-only encoding, BDR/BDC baud-rate changes and
+the parameter table (PGA/PGT/PST) are handled like the firmware does. The
+rate the host set on the pty is compared with the simulated UART rate:
+while they differ, output arrives as garbage and input is lost, as on a
+real mismatched line. --loss and --latency-ms degrade the link to
+exercise the health monitoring.
+
+    python simulator.py                      # prints the port to connect to
+    python simulator.py --broken-baud 921600 # a rate the "cable" cannot carry
+    python simulator.py --loss 0.01 --latency-ms 80
+"""
+import os
+import sys
+import math
+import time
+import tty
+import random
+import errno
+import select
+import termios
+import argparse
+
+from config import BAUD_RATE
+from collections import deque
+from protocol import (GROUPS, TASK_PERIOD_S, SUBSCRIBE, SIGNAL_BIT, ALL_SIGNALS_MASK,
+                      PING, SEQUENCE_KEYS, SEQUENCE_MOD, effective_prescalers)
+from encoding import DEADBANDS, KEYFRAME, KEYFRAME_TICKS, ENCODING
+from taskprofile import PROFILE
+import params
+
+# Synthetic signal shapes: (amplitude, period s, offset)
+WAVES = {
+    "ROL": (25.0, 30.0, 0.0), "PIT": (5.0, 7.0, -2.0), "YAW": (180.0, 120.0, 180.0),
+    "SPE": (1.0, 40.0, 3.0), "DIR": (90.0, 60.0, 180.0), "BAT": (0.2, 300.0, 7.6),
+    "CPU": (5.0, 10.0, 35.0), "RUD": (20.0, 15.0, 0.0), "TWI": (10.0, 25.0, 10.0),
+    "TRI": (20.0, 25.0, 60.0),
+}
+for _i, _key in enumerate(["RW1", "RW2", "RW3", "RW4"]):
+    WAVES[_key] = (400.0, 5.0 + _i, 1500.0)
+
+# FreeRTOS tasks of the firmware: (name, base CPU share %, stack words free)
+TASKS = [
+    ("defaultTask", 0.5, 98), ("control_task", 6.0, 180), ("imu_read_task", 9.0, 150),
+    ("adc_read_task", 2.5, 110), ("telemetry_task", 0.0, 240), ("Tmr Svc", 0.1, 220),
+]
+PROFILE_EVERY = 5       # PROFILE_EVERY in TELEMETRY.c
+TX_SHARE_PER_BYTE = 0.02  # Telemetry task CPU % per byte of its last frame
+
+
+class FirmwareSimulator:
+    """Generates the firmware's output frames and parses its input commands."""
+
+    SUPPORTED_BAUDS = (115200, 230400, 460800, 921600)
+    CONFIRM_TICKS = 50  # BAUD_CONFIRM_TICKS
+
+    def __init__(self, broken_bauds=(), loss=0.0):
+        self.tick_count = 0
+        self.loss = loss  # Probability of losing each line
+        self.params = {}
+        self.rx_buffer = b""
+        self.started = time.time()
+        self.subscription = ALL_SIGNALS_MASK
+        self.prescalers = {group: prescaler for group, (prescaler, _) in GROUPS.items()}
+        self.replies = []  # Lines sent after the next frame's data
+        self.baud = BAUD_RATE
+        self.frame_baud = BAUD_RATE   # Rate the last frame was sent at
+        self.next_baud = None         # Switch after sending the next frame
+        self.fallback = None          # Rate to restore if BDC does not come
+        self.confirm_ticks = 0
+        self.broken_bauds = set(broken_bauds)  # Rates that garble even when matched
+        self.change_only = False
+        self.last_sent = {}
+        self.keyframe_pending = set()
+        self.keyframe_ticks = 0
+        self.keyframe_number = 0
+        self.sequence = {group: 0 for group in GROUPS}
+        self.cpu_sends = 0
+        self.frame_bytes = 0
+        self.param_values = [default for _, _, _, default in params.PARAMETERS]
+        self.param_version = 0
+
+    def value(self, key, t):
+        amplitude, period, offset = WAVES.get(key, (1.0, 10.0, 0.0))
+        phase = (sum(map(ord, key)) % 17) / 17.0
+        return offset + amplitude * math.sin(2 * math.pi * (t / period + phase))
+
+    def frame(self):
+        """Bytes sent by one run of the telemetry task."""
+        self.tick_count += 1
+        t = time.time() - self.started
+        if self.fallback:
+            self.confirm_ticks -= 1
+            if self.confirm_ticks == 0:
+                self.set_baud(self.fallback)
+                self.fallback = None
+        parts = ["OK\r\n"]
+        if self.change_only:
+            self.keyframe_ticks += 1
+            if self.keyframe_ticks >= KEYFRAME_TICKS:
+                self.keyframe_ticks = 0
+                self.keyframe_pending = set(SIGNAL_BIT)
+                self.keyframe_number = (self.keyframe_number + 1) % 100000
+                parts.append(f"{KEYFRAME}:{self.keyframe_number:.2f}\r\n")
+        for group, (_, keys) in GROUPS.items():
+            if self.tick_count % self.prescalers[group] == 0:
+                if any(self.subscription >> SIGNAL_BIT[key] & 1 for key in keys):
+                    parts.append(f"{SEQUENCE_KEYS[group]}:{self.sequence[group]:.2f}\r\n")
+                    self.sequence[group] = (self.sequence[group] + 1) % SEQUENCE_MOD
+                for key in keys:
+                    if self.subscription >> SIGNAL_BIT[key] & 1:
+                        parts.extend(self.send(key, self.value(key, t)))
+                if group == "CPU" and self.subscription >> SIGNAL_BIT["CPU"] & 1:
+                    parts.extend(self.task_profile(t))
+        parts.extend(self.replies)
+        self.replies = []
+        if self.loss:
+            parts = [part for part in parts if random.random() >= self.loss]
+        self.frame_baud = self.baud
+        self.frame_bytes = sum(map(len, parts))
+        if self.next_baud:
+            self.fallback, self.confirm_ticks = self.baud, self.CONFIRM_TICKS
+            self.set_baud(self.next_baud)
+            self.next_baud = None
+        return "".join(parts).encode("ascii")
+
+    def task_profile(self, t):
+        """TSK lines, every PROFILE_EVERY CPU transmissions (telemetry_cpu())."""
+        self.cpu_sends += 1
+        if self.cpu_sends < PROFILE_EVERY:
+            return []
+        self.cpu_sends = 0
+        lines, busy = [], 0.0
+        for i, (name, share, stack) in enumerate(TASKS):
+            if name == "telemetry_task":
+                share = self.frame_bytes * TX_SHARE_PER_BYTE
+            share = max(0.0, share * (1 + 0.1 * math.sin(t / (3 + i))))
+            busy += share
+            lines.append(f"{PROFILE}:{name},{share:.2f},{stack}\r\n")
+        lines.append(f"{PROFILE}:IDLE,{max(0.0, 100 - busy):.2f},118\r\n")
+        return lines
+
+    def send(self, key, value):
+        """The line for one value, or nothing if change-only encoding skips it."""
+        if (self.change_only and key not in self.keyframe_pending
+                and abs(value - self.last_sent.get(key, float("inf"))) < DEADBANDS[key]):
+            return []
+        self.last_sent[key] = value
+        self.keyframe_pending.discard(key)
+        return [f"{key}:{value:.2f}\r\n"]
+
+    def set_baud(self, baud):
+        self.baud = baud
+        self.rx_buffer = b""
+        self.prescalers = effective_prescalers(self.subscription, baud)
+
+    def line_ok(self, host_baud, baud):
+        """Whether bytes sent at `baud` reach a host set to `host_baud` intact."""
+        return host_baud is None or (host_baud == baud and baud not in self.broken_bauds)
+
+    def receive(self, data):
+        """Parse incoming command bytes; returns the (key, value) commands completed."""
+        self.rx_buffer += data
+        commands = []
+        while b"\r\n" in self.rx_buffer:
+            line, self.rx_buffer = self.rx_buffer.split(b"\r\n", 1)
+            key, sep, value = line.decode("ascii", errors="ignore").partition(":")
+            if not sep:
+                continue
+            if self.parameter_command(key, value):
+                commands.append((key, value))
+                continue
+            try:
+                self.params[key] = float(value)
+            except ValueError:
+                continue
+            if key == SUBSCRIBE:
+                self.subscription = int(self.params[key]) & ALL_SIGNALS_MASK
+                self.prescalers = effective_prescalers(self.subscription, self.baud)
+                self.replies.append(f"{SUBSCRIBE}:{self.subscription:.2f}\r\n")
+                self.keyframe_pending = set(SIGNAL_BIT)
+            elif key == PING:
+                self.replies.append(f"{PING}:{self.params[key]:.2f}\r\n")
+            elif key == ENCODING:
+                self.change_only = self.params[key] != 0
+                self.keyframe_ticks = KEYFRAME_TICKS - 1
+                self.replies.append(f"{ENCODING}:{int(self.change_only):.2f}\r\n")
+            elif key == "BDR":
+                baud = int(self.params[key])
+                if (not self.fallback and not self.next_baud and baud in self.SUPPORTED_BAUDS
+                        and baud != self.baud):
+                    self.replies.append(f"BDA:{baud:.2f}\r\n")
+                    self.next_baud = baud
+                    self.rx_buffer = b""  # The rest came at the old rate
+                    commands.append((key, self.params[key]))
+                    break
+                self.replies.append(f"BDA:{self.baud:.2f}\r\n")  # Refused
+            elif key == "BDC":
+                if self.fallback and int(self.params[key]) == self.baud:
+                    self.fallback = None
+                    self.replies.append(f"BDC:{self.baud:.2f}\r\n")
+            commands.append((key, self.params[key]))
+        return commands
+
+
+    # --- Parameter table (PARAMS.c) ---
+    def reply_parameter(self, index):
+        bits = params.float_to_hex(self.param_values[index])
+        self.replies.append(f"{params.VALUE}:{index}={bits}\r\n")
+
+    def parameter_command(self, key, arg):
+        """Handle a parameter command like params_handle(); False for other keys."""
+        if key == params.GET_ALL:
+            for index in range(len(self.param_values)):
+                self.reply_parameter(index)
+        elif key == params.GET:
+            if not arg.isdigit():
+                return self.parameter_error(1)
+            if int(arg) >= len(self.param_values):
+                return self.parameter_error(2)
+            self.reply_parameter(int(arg))
+        elif key == params.SET or key in params.PARAM_INDEX:
+            try:
+                if key == params.SET:
+                    entries = [entry.split("=") for entry in arg.split(",")]
+                    updates = [(int(index), params.hex_to_float(bits)) for index, bits in entries]
+                else:
+                    updates = [(params.PARAM_INDEX[key], float(arg))]
+            except ValueError:
+                return self.parameter_error(1)
+            if any(not 0 <= index < len(self.param_values) for index, _ in updates):
+                return self.parameter_error(2)
+            if any(params.check_value(params.PARAMETERS[index][0], value) for index, value in updates):
+                return self.parameter_error(3)
+            for index, value in updates:
+                self.param_values[index] = params.as_float32(value)
+            self.param_version = (self.param_version + 1) % params.VERSION_MOD
+            for index, _ in updates:
+                self.reply_parameter(index)
+        else:
+            return False
+        self.replies.append(f"{params.VERSION}:{self.param_version}\r\n")
+        return True
+
+    def parameter_error(self, code):
+        self.replies.append(f"{params.ERROR}:{code}\r\n")
+        return True
+
+
+def open_pty():
+    """(master fd, slave path) of a raw pseudo-terminal."""
+    master, slave = os.openpty()
+    tty.setraw(slave)
+    tty.setraw(master)
+    os.set_blocking(master, False)
+    return master, os.ttyname(slave), slave
+
+
+# termios speed constant -> baud
+_SPEEDS = {getattr(termios, f"B{baud}"): baud for baud in FirmwareSimulator.SUPPORTED_BAUDS
+           if hasattr(termios, f"B{baud}")}
+
+
+def host_baud(slave):
+    """Rate the host set on the pty (None if unknown)."""
+    try:
+        return _SPEEDS.get(termios.tcgetattr(slave)[5])
+    except termios.error:
+        return None
+
+
+def run(master, simulator, duration=None, verbose=False, slave=None, latency=0.0):
+    """
+    Serve the simulator on a pty master until `duration` seconds pass (or
+    forever). With the `slave` fd, the host's rate is checked against the
+    simulated one. Output is delayed by `latency` seconds.
+    """
+    next_tick = time.monotonic()
+    delayed = deque()  # (release time, bytes)
+    end = None if duration is None else next_tick + duration
+    dropped = 0
+    while end is None or time.monotonic() < end:
+        while delayed and delayed[0][0] <= time.monotonic():
+            try:
+                os.write(master, delayed.popleft()[1])
+            except OSError as e:
+                if e.errno not in (errno.EAGAIN, errno.EIO):
+                    raise
+        wake = min(next_tick, delayed[0][0]) if delayed else next_tick
+        timeout = max(0.0, wake - time.monotonic())
+        readable, _, _ = select.select([master], [], [], timeout)
+        if readable:
+            try:
+                data = os.read(master, 4096)
+                if slave is not None and not simulator.line_ok(host_baud(slave), simulator.baud):
+                    data = b""  # Framing errors: the firmware sees nothing
+                for key, value in simulator.receive(data):
+                    if verbose:
+                        print(f"{key} = {value}", flush=True)
+            except OSError:
+                pass
+        if time.monotonic() >= next_tick:
+            try:
+                frame = simulator.frame()
+                if slave is not None and not simulator.line_ok(host_baud(slave), simulator.frame_baud):
+                    frame = os.urandom(len(frame))
+                if latency:
+                    delayed.append((time.monotonic() + latency, frame))
+                else:
+                    os.write(master, frame)
+            except OSError as e:
+                if e.errno not in (errno.EAGAIN, errno.EIO):
+                    raise
+                dropped += 1  # Nobody reading: drop the frame like a full UART
+            next_tick += TASK_PERIOD_S
+    return dropped
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate the boat firmware on a pseudo-terminal")
+    parser.add_argument("--duration", type=float, help="Stop after this many seconds")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Print received commands")
+    parser.add_argument("--broken-baud", type=int, nargs="+", default=[],
+                        help="Rates that are accepted but garble the line")
+    parser.add_argument("--loss", type=float, default=0.0, help="Probability of losing each line")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Delay of everything sent")
+    args = parser.parse_args(argv)
+    master, path, slave = open_pty()
+    print(path, flush=True)
+    try:
+        run(master, FirmwareSimulator(args.broken_baud, args.loss), args.duration, args.verbose, slave,
+            args.latency_ms / 1000)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,65 @@
+"""
+Frozen view of the live history, taken when the plots are frozen (Space).
+
+The serial reader only ever appends to a signal's list in data_history;
+trimming to MAX_POINTS (append_sample()) binds a new list and leaves the
+old one alone. Pinning each list together with its length at freeze time
+is therefore a consistent snapshot that costs nothing per sample, while
+ingest and logging keep running. The frozen samples are only copied when
+a tile reads them. No Qt here.
+"""
+import numpy as np
+
+from session import SessionWriter
+
+
+class Snapshot:
+    """Read-only, dict-like view of data_history as it was at time `t`."""
+
+    def __init__(self, history, t):
+        self.t = t  # Freeze time, on the data_history clock
+        self.pinned = {key: (samples, len(samples)) for key, samples in list(history.items())}
+
+    def __contains__(self, key):
+        return key in self.pinned
+
+    def __getitem__(self, key):
+        samples, length = self.pinned[key]
+        return samples[:length]
+
+    def get(self, key, default=None):
+        return self[key] if key in self.pinned else default
+
+    def keys(self):
+        return self.pinned.keys()
+
+    def sample_count(self, key):
+        return self.pinned[key][1] if key in self.pinned else 0
+
+    def window(self, key, t0=None, t1=None):
+        """(t, v) float64 arrays of one signal, optionally limited to [t0, t1]."""
+        samples = self.get(key, [])
+        if not samples:
+            return np.empty(0), np.empty(0)
+        values, times = (np.array(column, dtype=float) for column in zip(*samples))
+        keep = np.ones(len(times), dtype=bool)
+        if t0 is not None:
+            keep &= times >= t0
+        if t1 is not None:
+            keep &= times <= t1
+        return times[keep], values[keep]
+
+    def export(self, path, keys=None, t0=None, t1=None, compress=False):
+        """Write the frozen samples (of `keys`, within [t0, t1]) to a .rcs session; returns the count."""
+        keys = [key for key in (keys or self.keys()) if self.sample_count(key)]
+        writer = SessionWriter(path, keys, compress=compress,
+                               metadata={"source": "freeze", "frozen_at": self.t})
+        total = 0
+        try:
+            for key in keys:
+                times, values = self.window(key, t0, t1)
+                writer.extend(key, values, times)
+                total += len(times)
+        finally:
+            writer.close()
+        return total
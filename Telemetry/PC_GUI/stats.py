@@ -0,0 +1,180 @@
+"""
+Rolling statistics of every live signal over the STATS_WINDOWS_S windows
+(1 s, 10 s, 60 s): count, mean, standard deviation, min, max and
+percentiles, for the statistics panel (statspanel.py).
+
+append_sample() hands each sample to RollingStats.add(), which only
+queues it (O(1), any thread). update(), on the GUI thread, folds the
+queue into per-window rings of STATS_PANES panes in one vectorized pass
+across all signals. Each pane keeps a count, a mean and a sum of squared
+deviations (Welford, merged with Chan's formula), its min and max, and a
+log-bucket histogram (relative accuracy STATS_SKETCH_ACCURACY) as the
+percentile sketch. A window is its last STATS_PANES panes (the newest
+one filling), so it covers at least (STATS_PANES - 1) / STATS_PANES of
+its length. summary() combines the panes of one window without ever
+looking at data_history. No Qt here.
+"""
+import math
+import threading
+import numpy as np
+
+from config import STATS_WINDOWS_S, STATS_PANES, STATS_SKETCH_ACCURACY, STATS_SKETCH_RANGE
+
+# Sketch buckets: 0 for |v| below SKETCH_MIN, else sign * (k + 1) around the
+# middle bucket, k = ceil(log_gamma(|v| / SKETCH_MIN)), clipped to the range.
+SKETCH_GAMMA = (1 + STATS_SKETCH_ACCURACY) / (1 - STATS_SKETCH_ACCURACY)
+SKETCH_MIN, SKETCH_MAX = STATS_SKETCH_RANGE
+SKETCH_K = int(math.ceil(math.log(SKETCH_MAX / SKETCH_MIN) / math.log(SKETCH_GAMMA)))
+SKETCH_ZERO = SKETCH_K + 1
+SKETCH_BUCKETS = 2 * SKETCH_K + 3
+# Value reported for each bucket: within STATS_SKETCH_ACCURACY of all values in it.
+_k = np.arange(SKETCH_K + 1)
+_magnitude = SKETCH_MIN * SKETCH_GAMMA ** _k * 2 / (SKETCH_GAMMA + 1)
+SKETCH_VALUES = np.concatenate([-_magnitude[::-1], [0.0], _magnitude])
+
+
+def sketch_bucket(values):
+    """Sketch bucket of each value (vectorized)."""
+    magnitude = np.abs(values)
+    k = np.ceil(np.log(np.maximum(magnitude, SKETCH_MIN) / SKETCH_MIN) / math.log(SKETCH_GAMMA))
+    k = np.minimum(k, SKETCH_K).astype(np.int64)
+    return np.where(magnitude < SKETCH_MIN, SKETCH_ZERO, SKETCH_ZERO + np.sign(values).astype(np.int64) * (k + 1))
+
+
+class _Window:
+    """Ring of panes of one window length, rows indexed by signal."""
+
+    def __init__(self, length, rows):
+        self.length = length
+        self.pane_s = length / STATS_PANES
+        self.pane = None  # Absolute index of the newest pane
+        self.count = np.zeros((rows, STATS_PANES))
+        self.mean = np.zeros((rows, STATS_PANES))
+        self.m2 = np.zeros((rows, STATS_PANES))
+        self.vmin = np.full((rows, STATS_PANES), np.inf)
+        self.vmax = np.full((rows, STATS_PANES), -np.inf)
+        self.sketch = np.zeros((rows, STATS_PANES, SKETCH_BUCKETS), dtype=np.uint32)
+
+    def grow(self, rows):
+        extra = rows - self.count.shape[0]
+        pad = ((0, extra), (0, 0))
+        self.count = np.pad(self.count, pad)
+        self.mean = np.pad(self.mean, pad)
+        self.m2 = np.pad(self.m2, pad)
+        self.vmin = np.pad(self.vmin, pad, constant_values=np.inf)
+        self.vmax = np.pad(self.vmax, pad, constant_values=-np.inf)
+        self.sketch = np.pad(self.sketch, pad + ((0, 0),))
+
+    def advance(self, pane):
+        """Make `pane` the newest one, clearing the panes that expire."""
+        if self.pane is not None and pane <= self.pane:
+            return
+        if self.pane is None or pane - self.pane >= STATS_PANES:
+            slots = slice(None)
+        else:
+            slots = np.arange(self.pane + 1, pane + 1) % STATS_PANES
+        self.count[:, slots] = 0
+        self.mean[:, slots] = 0
+        self.m2[:, slots] = 0
+        self.vmin[:, slots] = np.inf
+        self.vmax[:, slots] = -np.inf
+        self.sketch[:, slots] = 0
+        self.pane = pane
+
+    def add(self, rows, values, times, buckets):
+        panes = np.floor(times / self.pane_s).astype(np.int64)
+        self.advance(int(panes.max()))
+        keep = panes > self.pane - STATS_PANES  # Late samples of expired panes are dropped
+        rows, values, buckets, slots = rows[keep], values[keep], buckets[keep], panes[keep] % STATS_PANES
+        cells = rows * STATS_PANES + slots
+        size = self.count.size
+        # Batch statistics per (signal, pane), two-pass for the deviations.
+        n_b = np.bincount(cells, minlength=size)
+        touched = np.flatnonzero(n_b)
+        mean_b = np.bincount(cells, weights=values, minlength=size)[touched] / n_b[touched]
+        full_mean = np.zeros(size)
+        full_mean[touched] = mean_b
+        deviation = values - full_mean[cells]
+        m2_b = np.bincount(cells, weights=deviation * deviation, minlength=size)[touched]
+        n_b = n_b[touched]
+        # Chan et al.: merge the batch into the panes.
+        count, mean, m2 = self.count.reshape(-1), self.mean.reshape(-1), self.m2.reshape(-1)
+        n_a = count[touched]
+        n = n_a + n_b
+        delta = mean_b - mean[touched]
+        mean[touched] += delta * n_b / n
+        m2[touched] += m2_b + delta * delta * n_a * n_b / n
+        count[touched] = n
+        np.minimum.at(self.vmin.reshape(-1), cells, values)
+        np.maximum.at(self.vmax.reshape(-1), cells, values)
+        np.add.at(self.sketch.reshape(-1), cells * SKETCH_BUCKETS + buckets, 1)
+
+
+class RollingStats:
+    """Queue of live samples and the rolling state built from it."""
+
+    def __init__(self, windows=STATS_WINDOWS_S):
+        self.lock = threading.Lock()
+        self.pending = []   # (row, value, t) since the last update()
+        self.rows = {}      # signal key -> row
+        self.keys = []      # row -> signal key
+        self.windows = [_Window(length, 16) for length in windows]
+
+    def add(self, key, value, t):
+        """O(1), any thread: queue one sample (NaN gaps are skipped)."""
+        if value != value:
+            return
+        with self.lock:
+            row = self.rows.get(key)
+            if row is None:
+                row = self.rows[key] = len(self.keys)
+                self.keys.append(key)
+            self.pending.append((row, value, t))
+
+    def update(self):
+        """Fold the queued samples into every window (GUI thread)."""
+        with self.lock:
+            batch, self.pending = self.pending, []
+            rows = len(self.keys)
+        if not batch:
+            return 0
+        if rows > self.windows[0].count.shape[0]:
+            for window in self.windows:
+                window.grow(max(rows, 2 * window.count.shape[0]))
+        rows, values, times = (np.array(column) for column in zip(*batch))
+        rows = rows.astype(np.int64)
+        values = values.astype(float)
+        buckets = sketch_bucket(values)
+        for window in self.windows:
+            window.add(rows, values, times, buckets)
+        return len(batch)
+
+    def summary(self, length, now, percentiles=(5, 50, 95)):
+        """
+        {key: (count, mean, std, min, max, [percentiles])} over the window
+        of `length` seconds ending at `now`, for the signals with samples.
+        """
+        window = self.windows[[w.length for w in self.windows].index(length)]
+        window.advance(int(math.floor(now / window.pane_s)))
+        rows = len(self.keys)
+        count = window.count[:rows]
+        n = count.sum(axis=1)
+        live = np.flatnonzero(n)
+        if not len(live):
+            return {}
+        count, n = count[live], n[live]
+        # Chan et al. across the panes.
+        mean = (count * window.mean[live]).sum(axis=1) / n
+        m2 = window.m2[live].sum(axis=1) + (count * (window.mean[live] - mean[:, None]) ** 2).sum(axis=1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            std = np.sqrt(np.where(n > 1, m2 / (n - 1), np.nan))
+        vmin = window.vmin[live].min(axis=1)
+        vmax = window.vmax[live].max(axis=1)
+        cumulative = window.sketch[live].sum(axis=1).cumsum(axis=1)
+        quantiles = []
+        for p in percentiles:
+            rank = np.maximum(np.ceil(p / 100 * n), 1)
+            bucket = (cumulative >= rank[:, None]).argmax(axis=1)
+            quantiles.append(np.clip(SKETCH_VALUES[bucket], vmin, vmax))
+        return {self.keys[row]: (int(n[i]), mean[i], std[i], vmin[i], vmax[i], [q[i] for q in quantiles])
+                for i, row in enumerate(live)}
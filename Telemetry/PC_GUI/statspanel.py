@@ -0,0 +1,76 @@
+"""Panel showing the rolling statistics of every live signal (see stats.py)."""
+import math
+from PyQt6 import QtWidgets, QtCore
+
+from config import STATS_WINDOWS_S, STATS_REFRESH_MS
+from signals import get_signal_name
+
+PERCENTILES = (5, 50, 95)
+
+
+class StatisticsPanel(QtWidgets.QWidget):
+    """
+    Table of count, mean, std, min, max and percentiles per signal over
+    the selected window. Every STATS_REFRESH_MS the queued samples are
+    folded into the RollingStats and, while visible, the table is filled
+    from its summary.
+    """
+    COLUMNS = ["Signal", "N", "Mean", "Std", "Min", "Max"] + [f"P{p}" for p in PERCENTILES]
+
+    def __init__(self, stats, time_source, parent=None):
+        super().__init__(parent)
+        self.stats = stats
+        self.time_source = time_source  # Returns "now" on the data_history clock
+        layout = QtWidgets.QVBoxLayout(self)
+        layout.setContentsMargins(5, 5, 5, 5)
+
+        bar = QtWidgets.QHBoxLayout()
+        bar.addWidget(QtWidgets.QLabel("Window:"))
+        self.window_combo = QtWidgets.QComboBox()
+        for length in STATS_WINDOWS_S:
+            self.window_combo.addItem(f"{length:g} s", length)
+        self.window_combo.currentIndexChanged.connect(lambda *_: self.refresh())
+        bar.addWidget(self.window_combo)
+        bar.addStretch(1)
+        layout.addLayout(bar)
+
+        self.table = QtWidgets.QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QtWidgets.QAbstractItemView.EditTrigger.NoEditTriggers)
+        layout.addWidget(self.table)
+        self.shown_keys = []  # Signal of each table row
+
+        self.timer = QtCore.QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start(STATS_REFRESH_MS)
+
+    def refresh(self):
+        # Fold the queue even while hidden, so it stays short.
+        self.stats.update()
+        if not self.isVisible():
+            return
+        summary = self.stats.summary(self.window_combo.currentData(), self.time_source(), PERCENTILES)
+        keys = list(summary)
+        if keys != self.shown_keys:
+            self.shown_keys = keys
+            self.table.setRowCount(len(keys))
+            for row, key in enumerate(keys):
+                self.table.setItem(row, 0, QtWidgets.QTableWidgetItem(get_signal_name(key)))
+                for column in range(1, len(self.COLUMNS)):
+                    item = QtWidgets.QTableWidgetItem()
+                    item.setTextAlignment(QtCore.Qt.AlignmentFlag.AlignRight | QtCore.Qt.AlignmentFlag.AlignVCenter)
+                    self.table.setItem(row, column, item)
+            self.table.resizeColumnToContents(0)
+        # Resizing to contents on every cell would cost far more than the statistics.
+        self.table.setUpdatesEnabled(False)
+        for row, key in enumerate(keys):
+            count, mean, std, vmin, vmax, percentiles = summary[key]
+            values = [str(count)] + [format_value(v) for v in (mean, std, vmin, vmax, *percentiles)]
+            for column, text in enumerate(values, start=1):
+                self.table.item(row, column).setText(text)
+        self.table.setUpdatesEnabled(True)
+
+
+def format_value(value):
+    return "-" if math.isnan(value) else f"{value:.4g}"
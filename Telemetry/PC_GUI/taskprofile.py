@@ -0,0 +1,50 @@
+"""
+Per-task CPU profile streamed by the firmware (telemetry_cpu() in TELEMETRY.c).
+
+While CPU is subscribed, every few CPU transmissions the boat sends one
+line per FreeRTOS task:
+
+    TSK:<name>,<share %>,<stack words never used>
+
+the share being the task's run time over the window since the previous
+profile. TaskProfile keeps a short history per task for the CPU plot
+mode. No Qt here.
+"""
+from collections import deque
+
+PROFILE = "TSK"
+HISTORY_LENGTH = 600  # Profiles kept per task (a profile every ~0.5 s)
+
+
+class TaskProfile:
+    """Task shares and stack margins, fed by the serial reader."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.history = {}       # task name -> deque of (t, share %)
+        self.stack_free = {}    # task name -> stack high water mark (words)
+        self.changed = 0        # Bumped on every profile line, for polling views
+
+    def on_line(self, line, t):
+        """Handle a profile line received at `t`; returns False for any other line."""
+        key, sep, arg = line.strip().partition(":")
+        if not sep or key != PROFILE:
+            return False
+        try:
+            name, share, stack = arg.rsplit(",", 2)
+            share, stack = float(share), int(stack)
+        except ValueError:
+            return False
+        if name not in self.history:
+            self.history[name] = deque(maxlen=HISTORY_LENGTH)
+        self.history[name].append((t, share))
+        self.stack_free[name] = stack
+        self.changed += 1
+        return True
+
+    def latest(self):
+        """{task name: last share %}, busiest first."""
+        shares = {name: history[-1][1] for name, history in self.history.items() if history}
+        return dict(sorted(shares.items(), key=lambda item: -item[1]))
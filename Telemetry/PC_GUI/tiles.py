@@ -196,12 +196,15 @@ class TilingArea(QtWidgets.QWidget):
                 elif target_mode == "xy" and plot.mode == "plot":
                     plot.toggle_mode()
                     plot.toggle_mode()
+                elif target_mode == "cpu" and plot.mode == "plot":
+                    for _ in range(3):
+                        plot.toggle_mode()
                 # --- End updated mode retrieval ---
                 # Restore additional state based on mode.
                 if target_mode == "display":
                     if "text_size" in plot_state:
                         plot.update_display_text_size(plot_state["text_size"])
-                else:  # for "plot" and "xy"
+                else:  # for "plot", "xy" and "cpu"
                     if "time_window" in plot_state:
                         plot.time_window_edit.setText(str(plot_state["time_window"]))
                 new_row_splitter.addWidget(plot)
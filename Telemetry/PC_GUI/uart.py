@@ -1,13 +1,14 @@
 import sys
 import serial
 from serial.tools import list_ports
-from config import BAUD_RATE
-from PyQt6 import QtWidgets
+from config import BAUD_RATE, SUBSCRIBE_RETRY_S
+# Qt is only imported by the GUI helpers, so the reader also runs headless.
 
 # This will hold the serial connection
 ser = None
 
 def select_serial_port():
+    from PyQt6 import QtWidgets
     ports = [port.device for port in list_ports.comports()]
     if not ports:
         QtWidgets.QMessageBox.critical(None, "Serial Port Error", "No serial ports found.")
@@ -21,6 +22,7 @@ def select_serial_port():
     return port
 
 def open_serial_port(port):
+    from PyQt6 import QtWidgets
     global ser
     try:
         ser = serial.Serial(port, BAUD_RATE, timeout=0.1)
@@ -38,6 +40,7 @@ def send_signal(comm, signal, value):
     
     Protocol format: "KEY:%.?f\r\n"
     """
+    from PyQt6 import QtWidgets
     if not isinstance(value, (int, float)):
         raise ValueError("Value must be a number.")
     if comm.ser and comm.ser.is_open:
@@ -46,7 +49,7 @@ def send_signal(comm, signal, value):
             comm.ser.write(message.encode("utf-8"))
             comm.ser.flush()
         except (serial.SerialException, OSError) as e:
-            print(f"Error sending data on serial port: {e}")
+            print(f"Error sending data on serial port: {e}", file=sys.stderr)
             QtWidgets.QMessageBox.critical(None, "Serial Port Error", f"Error sending data:\n{e}")
             try:
                 comm.ser.close()
@@ -59,6 +62,7 @@ def send_signal(comm, signal, value):
 last_ok_time = 0
 
 def change_serial_port():
+    from PyQt6 import QtWidgets
     global ser, last_ok_time
     # Disconnect if already connected.
     if ser is not None:
@@ -77,58 +81,187 @@ def change_serial_port():
             import time
             last_ok_time = time.time()
 
+class SubscriptionRequest:
+    """
+    Asks the firmware for a subscription mask (see protocol.py) until its
+    SUB echo confirms it; resent every SUBSCRIBE_RETRY_S meanwhile, which
+    also covers a firmware reset.
+    """
+    def __init__(self):
+        self.mask = None
+        self.sent_time = 0.0
+
+    def update(self, ser, mask, acked_mask):
+        import time
+        if mask == acked_mask or ser is None:
+            return
+        if mask != self.mask or time.time() - self.sent_time > SUBSCRIBE_RETRY_S:
+            ser.write(f"SUB:{mask}\r\n".encode("ascii"))
+            self.mask = mask
+            self.sent_time = time.time()
+
+    def reset(self):
+        self.mask = None
+
 class SerialReader:
-    def __init__(self, comm):
+    """
+    Reads frames from the ports of one or more links into the data store,
+    on one thread. A link is anything with `ser` and `last_ok_time`
+    (comm.SerialComm, headless.HeadlessLink); its `device` (a
+    devices.DeviceStore, the first device's by default) says where the
+    samples go. Where ports have file descriptors, all of them are waited
+    on with one selector. Serial errors close the port and are reported
+    through the link's `on_lost(message)` if it has one (comm.SerialComm
+    reconnects), or else `on_error(message)`, both called from the reader
+    thread (the GUI forwards errors to the main thread).
+    """
+    def __init__(self, comm=None, on_error=None):
         self._running = True
-        self.comm = comm
+        self.links = [comm] if comm is not None else []
+        self.on_error = on_error
+        self.pending = {}  # link -> incomplete last line of its previous read
+
+    def add(self, link):
+        """Service one more link (from any thread)."""
+        self.links = self.links + [link]
+
+    def remove(self, link):
+        self.links = [other for other in self.links if other is not link]
 
     def read_serial(self):
         import time
-        from data import data_history, start_time
-        from config import MAX_POINTS  # assuming MAX_POINTS is in config
-        import re
-        pattern = re.compile(r"^-?\d+\.\d\d$")
+        import selectors
+        selector = selectors.DefaultSelector()
+        registered = set()  # Ports in the selector
+        attempted = set()   # Ports the selector was last set up for
         while self._running:
-            if self.comm.ser is not None:
+            open_links = {}
+            for link in self.links:
+                ser = link.ser
+                if ser is not None:
+                    open_links[ser] = link
+            if not open_links:
+                time.sleep(0.05)
+                continue
+            if open_links.keys() != attempted:
+                attempted = set(open_links)
+                selector.close()
+                selector = selectors.DefaultSelector()
+                try:
+                    for ser in open_links:
+                        selector.register(ser.fileno(), selectors.EVENT_READ, ser)
+                    registered = attempted
+                except (OSError, ValueError, serial.SerialException):
+                    # No file descriptor (Windows) or a port closed meanwhile: poll instead.
+                    registered = set()
+            if registered:
                 try:
-                    if self.comm.ser.in_waiting:
-                        raw_bytes = self.comm.ser.read(self.comm.ser.in_waiting)
-                        raw_lines = raw_bytes.decode('utf-8', errors='ignore').splitlines()
-                        for line in raw_lines:
-                            line = line.strip()
-                            if line == "OK":
-                                self.comm.last_ok_time = time.time()
-                            if not line or ':' not in line:
-                                continue
-                            key, value_str = line.split(':', 1)
-                            # Only use complete frames with a proper float format (two decimals)
-                            if not pattern.match(value_str):
-                                continue
-                            try:
-                                value = float(value_str)
-                            except ValueError:
-                                continue
-                            if key in data_history:
-                                data_history[key].append((value, time.time() - start_time))
-                                if len(data_history[key]) > MAX_POINTS:
-                                    data_history[key] = data_history[key][-MAX_POINTS:]
-                except (OSError, serial.SerialException) as e:
-                    print(f"Error reading from serial port: {e}")
-                    QtWidgets.QMessageBox.critical(None, "Serial Port Error",
-                        f"Error reading from serial port:\n{e}\n\nThe port will be closed.")
-                    try:
-                        self.comm.ser.close()
-                    except Exception:
-                        pass
-                    self.comm.ser = None
-            time.sleep(0.005)
+                    ready = [key.data for key, _ in selector.select(timeout=0.1)]
+                except (OSError, ValueError):
+                    attempted = set()  # A port closed under us: set up again
+                    continue
+            elif len(open_links) == 1:
+                ready = list(open_links)  # Its read blocks for up to the port timeout
+            else:
+                ready = [ser for ser in open_links if self._waiting(ser)]
+                if not ready:
+                    time.sleep(0.002)
+            for ser in ready:
+                self._read(open_links[ser], ser)
+        selector.close()
+
+    @staticmethod
+    def _waiting(ser):
+        try:
+            return ser.in_waiting > 0
+        except (OSError, serial.SerialException, TypeError, AttributeError):
+            return True  # Let the read report it
+
+    def _read(self, link, ser):
+        import time
+        from data import start_time, primary
+        device = getattr(link, "device", None) or primary
+        try:
+            # Blocks for up to the port timeout, so an idle link costs no CPU.
+            raw_bytes = ser.read(ser.in_waiting or 1)
+            if not raw_bytes:
+                return
+            raw_lines = (self.pending.get(link, "") + raw_bytes.decode('utf-8', errors='ignore')).split("\n")
+            # A frame split across two reads is completed by the next one.
+            self.pending[link] = raw_lines.pop()
+            if len(self.pending[link]) > 64:
+                self.pending[link] = ""  # No line end in sight: garbage, not a frame
+                device.link_monitor.on_bad_frame()
+            dispatch_lines(link, device, raw_lines, time.time() - start_time)
+        except (OSError, serial.SerialException, TypeError, AttributeError) as e:
+            # TypeError/AttributeError: the port was closed under us by another thread.
+            if not self._running:
+                return
+            source = f" ({device.name})" if device.name else ""
+            print(f"Error reading from serial port{source}: {e}", file=sys.stderr)
+            try:
+                ser.close()
+            except Exception:
+                pass
+            self.pending.pop(link, None)
+            if link.ser is ser:
+                link.ser = None
+            message = f"Error reading from serial port{source}:\n{e}\n\nThe port will be closed."
+            # A link that can reconnect by itself decides whether to report it.
+            on_lost = getattr(link, "on_lost", None)
+            if on_lost:
+                on_lost(message)
+            elif self.on_error:
+                self.on_error(message)
 
     def stop(self):
         self._running = False
 
-def start_serial_reader(comm):
+def dispatch_lines(link, device, lines, now):
+    """
+    Feed received lines (without their line ends) into `device`'s store
+    and link state at time `now` (data.start_time clock); heartbeats also
+    set `link.last_ok_time`. Shared by SerialReader and the fan-out bench.
+    """
+    import time
+    from data import data_history, append_sample
+    from protocol import HEARTBEAT, SUBSCRIBE, PING, SEQUENCE_GROUP, parse_line
+    from encoding import KEYFRAME, ENCODING
+    link_monitor, hold_decoder = device.link_monitor, device.hold_decoder
+    for line in lines:
+        if not line.strip():
+            continue
+        frame = parse_line(line)
+        if frame is None:
+            if not device.param_table.on_line(line) and not device.task_profile.on_line(line, now):
+                link_monitor.on_bad_frame()
+            continue
+        key, value = frame
+        if key == HEARTBEAT:
+            link.last_ok_time = time.time()
+            link_monitor.on_heartbeat(now)
+            # The heartbeat proves the previous run happened: hold what it left out.
+            for held_key, held_value, held_t in hold_decoder.on_heartbeat(now):
+                append_sample(device.key(held_key), held_value, held_t)
+                link_monitor.on_sample(held_key, held_t)
+        elif key in SEQUENCE_GROUP:
+            link_monitor.on_sequence(SEQUENCE_GROUP[key], int(value))
+        elif key == PING:
+            link_monitor.ping.on_echo(int(value), now)
+        elif key == SUBSCRIBE:
+            link_monitor.set_subscription(int(value))
+        elif key == KEYFRAME:
+            hold_decoder.on_keyframe(int(value), now)
+        elif key == ENCODING:
+            hold_decoder.enabled = bool(value)
+        elif device.key(key) in data_history:
+            append_sample(device.key(key), value, now)
+            link_monitor.on_sample(key, now)
+            hold_decoder.on_sample(key, value, now)
+
+def start_serial_reader(comm, on_error=None):
     import threading
-    reader = SerialReader(comm)
+    reader = SerialReader(comm, on_error)
     thread = threading.Thread(target=reader.read_serial, daemon=True)
     thread.start()
     return thread